@@ -0,0 +1,29 @@
+-- Migration: Add User Taste Vectors
+-- Created: 2026-10-18
+-- Purpose: Persist each user's taste embedding (decayed weighted average of
+--          the embeddings of vehicles they viewed, saved or inquired about)
+--          so personalization survives restarts. Vectors are updated in
+--          memory per interaction and flushed here periodically.
+
+-- ============================================================================
+-- STEP 1: Create user_taste_vectors (one compact row per user)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS user_taste_vectors (
+    user_id TEXT PRIMARY KEY,
+    -- Little-endian float16 vector (2 bytes per dimension)
+    taste BYTEA NOT NULL,
+    -- Decayed total interaction weight behind the vector, as of last_interaction_at
+    weight REAL NOT NULL DEFAULT 0,
+    last_interaction_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- ============================================================================
+-- STEP 2: Keep updated_at current
+-- ============================================================================
+
+DROP TRIGGER IF EXISTS update_user_taste_vectors_updated_at ON user_taste_vectors;
+CREATE TRIGGER update_user_taste_vectors_updated_at
+    BEFORE UPDATE ON user_taste_vectors
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,28 @@
+-- Migration: Add Precomputed Vehicle Neighbors
+-- Created: 2026-10-18
+-- Purpose: Store the top-K nearest neighbours of every active listing so
+--          "similar vehicles" calls are a key lookup instead of a live
+--          vector query. Rows are rebuilt in batch by the application and
+--          updated incrementally as listings are added or removed.
+
+-- ============================================================================
+-- STEP 1: Create vehicle_neighbors (one compact row per listing)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS vehicle_neighbors (
+    listing_id UUID PRIMARY KEY REFERENCES vehicle_listings(id) ON DELETE CASCADE,
+    -- Neighbour listing IDs, best first (at most K, default 50)
+    neighbor_ids UUID[] NOT NULL DEFAULT '{}',
+    -- Cosine similarities matching neighbor_ids
+    scores REAL[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- ============================================================================
+-- STEP 2: Keep updated_at current
+-- ============================================================================
+
+DROP TRIGGER IF EXISTS update_vehicle_neighbors_updated_at ON vehicle_neighbors;
+CREATE TRIGGER update_vehicle_neighbors_updated_at
+    BEFORE UPDATE ON vehicle_neighbors
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,137 @@
+"""
+Otto.AI Local Intent Classifier Evaluation Script
+
+Trains the hashed n-gram intent model on logged intents (plus the keyword-rule
+seed corpus), evaluates it on a held-out split and reports how often the
+confidence gate lets a message skip the LLM.
+
+Logged intents are JSONL, one object per line:
+    {"message": "show me SUVs", "intent": "search"}
+
+Usage:
+    python -m scripts.evaluate_intent_classifier --log data/intent_log.jsonl
+    python -m scripts.evaluate_intent_classifier --log data/intent_log.jsonl --save models/intent_model.json
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple, Any
+
+# Ensure we're running from project root
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+
+from src.conversation.intent_classifier import (
+    LocalIntentClassifier,
+    build_seed_examples,
+    load_intent_log,
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    DEFAULT_MARGIN_THRESHOLD
+)
+
+
+def split_examples(
+    examples: List[Tuple[str, str]],
+    test_fraction: float,
+    seed: int
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Shuffle and split examples into train/test sets"""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - test_fraction))
+    return shuffled[:cut], shuffled[cut:]
+
+
+def evaluate(model: LocalIntentClassifier, test_set: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Measure accuracy, gated coverage and inference latency"""
+    correct = 0
+    accepted = 0
+    accepted_correct = 0
+    latencies = []
+    confusion: Counter = Counter()
+
+    for message, label in test_set:
+        prediction = model.predict(message)
+        latencies.append(prediction.latency_ms)
+        is_correct = prediction.label == label
+        correct += is_correct
+        if not is_correct:
+            confusion[(label, prediction.label)] += 1
+        if model.is_confident(prediction):
+            accepted += 1
+            accepted_correct += is_correct
+
+    total = len(test_set) or 1
+    latencies.sort()
+    return {
+        'examples': len(test_set),
+        'accuracy': correct / total,
+        'llm_skip_rate': accepted / total,
+        'gated_accuracy': accepted_correct / accepted if accepted else 0.0,
+        'p50_latency_ms': statistics.median(latencies) if latencies else 0.0,
+        'p99_latency_ms': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0,
+        'top_confusions': confusion.most_common(5)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier")
+    parser.add_argument('--log', type=str, help='JSONL file of logged intents')
+    parser.add_argument('--no-seed', action='store_true', help='Do not add the keyword-rule seed corpus')
+    parser.add_argument('--test-fraction', type=float, default=0.2)
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE_THRESHOLD)
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN_THRESHOLD)
+    parser.add_argument('--epochs', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--save', type=str, help='Write the trained artifact to this path')
+    args = parser.parse_args()
+
+    logged = load_intent_log(args.log) if args.log else []
+    seed_examples = [] if args.no_seed else build_seed_examples()
+    if not logged and not seed_examples:
+        print("[ERROR] No training data: pass --log or drop --no-seed")
+        sys.exit(1)
+
+    # Hold out logged traffic when available, since that is what production sees
+    if logged:
+        train_set, test_set = split_examples(logged, args.test_fraction, args.seed)
+        train_set += seed_examples
+    else:
+        train_set, test_set = split_examples(seed_examples, args.test_fraction, args.seed)
+
+    print("=" * 60)
+    print("Otto.AI Local Intent Classifier Evaluation")
+    print("=" * 60)
+    print(f"Train examples: {len(train_set)}  Test examples: {len(test_set)}")
+    print(f"Label distribution: {dict(Counter(label for _, label in train_set))}")
+
+    model = LocalIntentClassifier(
+        confidence_threshold=args.confidence,
+        margin_threshold=args.margin
+    )
+    model.train(train_set, epochs=args.epochs, seed=args.seed)
+
+    results = evaluate(model, test_set)
+    print(f"\nAccuracy:           {results['accuracy']:.3f}")
+    print(f"LLM skip rate:      {results['llm_skip_rate']:.3f}")
+    print(f"Gated accuracy:     {results['gated_accuracy']:.3f}")
+    print(f"p50 latency:        {results['p50_latency_ms']:.3f} ms")
+    print(f"p99 latency:        {results['p99_latency_ms']:.3f} ms")
+    if results['top_confusions']:
+        print("Top confusions (expected -> predicted):")
+        for (expected, predicted), count in results['top_confusions']:
+            print(f"  {expected} -> {predicted}: {count}")
+
+    if args.save:
+        model.save(args.save)
+        print(f"\n[OK] Saved model artifact to {args.save}")
+        print(f"     Set OTTO_INTENT_MODEL_PATH={args.save} to use it at inference")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ from .favorites_analytics_service import (
     ConversionMetrics
 )
 from .preference_analytics import PreferenceAnalytics, TrendDirection, SeasonalPattern
+from .preference_index import PreferenceIndex, PreferenceSegment
 
 __all__ = [
     'FavoritesAnalyticsService',
@@ -16,5 +17,7 @@ __all__ = [
     'ConversionMetrics',
     'PreferenceAnalytics',
     'TrendDirection',
-    'SeasonalPattern'
+    'SeasonalPattern',
+    'PreferenceIndex',
+    'PreferenceSegment'
 ]
\ No newline at end of file
@@ -15,6 +15,7 @@ from enum import Enum
 from src.services.profile_service import ProfileService, PreferenceChange
 from src.memory.temporal_memory import TemporalMemoryManager
 from src.conversation.nlu_service import UserPreference
+from src.analytics.preference_index import PreferenceIndex, PreferenceSegment
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -69,13 +70,22 @@ class PreferenceAnalytics:
         self,
         profile_service: ProfileService,
         temporal_memory: TemporalMemoryManager,
-        analysis_window: int = 90  # days
+        analysis_window: int = 90,  # days
+        preference_index: Optional[PreferenceIndex] = None
     ):
         self.profile_service = profile_service
         self.temporal_memory = temporal_memory
         self.analysis_window = analysis_window
         self.initialized = False
 
+        # Similar users and segments come from an index the profile service keeps current
+        self.preference_index = (
+            preference_index or getattr(profile_service, "preference_index", None) or PreferenceIndex()
+        )
+        profile_service.preference_index = self.preference_index
+        self.similar_user_threshold = 0.5  # Jaccard over preference sets
+        self.max_similar_users = 10
+
         # Cache for computed analytics
         self.trend_cache: Dict[str, Dict[str, PreferenceTrend]] = {}
         self.cache_ttl = timedelta(hours=1)
@@ -91,6 +101,12 @@ class PreferenceAnalytics:
                 logger.error("Temporal memory manager not initialized")
                 return False
 
+            if not len(self.preference_index):
+                self.preference_index.build(
+                    (user_id, profile.preferences)
+                    for user_id, profile in list(self.profile_service.profiles.items())
+                )
+
             self.initialized = True
             logger.info("Preference analytics initialized")
             return True
@@ -171,26 +187,15 @@ class PreferenceAnalytics:
             return []
 
         try:
-            # Get all user profiles
-            # In production, this would query from database
-            all_profiles = list(self.profile_service.profiles.values())
-
-            # Extract preference patterns
-            preference_patterns = []
-            for profile in all_profiles:
-                pattern = self._extract_preference_pattern(profile)
-                preference_patterns.append(pattern)
-
-            # Cluster similar patterns
-            segments = self._cluster_preferences(preference_patterns, min_segment_size)
+            # Segments are refit off the event loop once enough profiles changed;
+            # in between, changed users are moved to their nearest segment as they save
+            if self.preference_index.needs_refit():
+                await asyncio.to_thread(self.preference_index.fit_segments)
 
             # Generate insights for each segment
             insights = []
-            for segment_id, users in segments.items():
-                if len(users) < min_segment_size:
-                    continue
-
-                insight = await self._generate_segment_insight(segment_id, users)
+            for segment in self.preference_index.segments(min_segment_size):
+                insight = await self._generate_segment_insight(segment)
                 insights.append(insight)
 
             # Sort by segment size
@@ -454,94 +459,15 @@ class PreferenceAnalytics:
 
         return predictions
 
-    def _extract_preference_pattern(self, profile) -> Dict[str, Any]:
-        """Extract key preference pattern from profile"""
-        pattern = {
-            "user_id": profile.user_id,
-            "preferences": {}
-        }
-
-        # Extract high-confidence preferences
-        for key, value in profile.preferences.items():
-            if key.startswith("pref_"):
-                category = key[5:]
-                if value.get("confidence", 0) > 0.7:
-                    pattern["preferences"][category] = value.get("value")
-
-        return pattern
-
-    def _cluster_preferences(
-        self,
-        patterns: List[Dict[str, Any]],
-        min_size: int
-    ) -> Dict[str, List[Dict[str, Any]]]:
-        """Simple clustering of preference patterns"""
-        segments = {}
-        segment_id = 0
-
-        # This is a very simplified clustering
-        # In production, use proper clustering algorithms
-        for pattern in patterns:
-            # Simple heuristic-based segmentation
-            segment_key = self._get_segment_key(pattern)
-
-            if segment_key not in segments:
-                segments[segment_key] = []
-            segments[segment_key].append(pattern)
-
-        # Filter by minimum size
-        return {
-            k: v for k, v in segments.items()
-            if len(v) >= min_size
-        }
-
-    def _get_segment_key(self, pattern: Dict[str, Any]) -> str:
-        """Generate segment key based on preference pattern"""
-        prefs = pattern.get("preferences", {})
-
-        # Simple segmentation logic
-        if "budget" in prefs and prefs["budget"] < 30000:
-            if "family_size" in prefs and prefs["family_size"] > 2:
-                return "budget_family"
-            elif "vehicle_type" in prefs and prefs["vehicle_type"] == "EV":
-                return "budget_ev"
-            else:
-                return "budget_basic"
-        elif "vehicle_type" in prefs and prefs["vehicle_type"] == "Luxury":
-            return "luxury_buyer"
-        elif "family_size" in prefs and prefs["family_size"] > 2:
-            return "family_oriented"
-        else:
-            return "general"
-
-    async def _generate_segment_insight(
-        self,
-        segment_id: str,
-        users: List[Dict[str, Any]]
-    ) -> SegmentInsight:
+    async def _generate_segment_insight(self, segment: PreferenceSegment) -> SegmentInsight:
         """Generate insights for a user segment"""
-        # Calculate defining preferences
-        all_prefs = {}
-        for user in users:
-            for category, value in user.get("preferences", {}).items():
-                if category not in all_prefs:
-                    all_prefs[category] = {}
-                if value not in all_prefs[category]:
-                    all_prefs[category][value] = 0
-                all_prefs[category][value] += 1
-
-        # Get most common preferences
-        defining_prefs = []
-        for category, values in all_prefs.items():
-            most_common = max(values.items(), key=lambda x: x[1])
-            if most_common[1] > len(users) * 0.5:  # Appears in >50% of segment
-                defining_prefs.append(f"{category}: {most_common[0]}")
+        # Defining preferences (held by >50% of the segment) come with the segment
 
         # Mock other metrics (would be calculated from real data)
         return SegmentInsight(
-            segment_name=segment_id,
-            size=len(users),
-            defining_preferences=defining_prefs,
+            segment_name=segment.name,
+            size=segment.size,
+            defining_preferences=segment.defining_preferences,
             common_journey=["browse", "compare", "save", "inquire"],
             conversion_rate=0.15,
             avg_session_count=3.2
@@ -553,29 +479,14 @@ class PreferenceAnalytics:
         preferences: Dict[str, Any]
     ) -> List[str]:
         """Find users with similar preferences"""
-        # Simple similarity based on matching categories
-        similar_users = []
-
-        for other_user_id, profile in self.profile_service.profiles.items():
-            if other_user_id == user_id:
-                continue
-
-            # Calculate similarity score
-            score = 0
-            total = 0
-
-            for category, pref in preferences.items():
-                total += 1
-                pref_key = f"pref_{category.value}"
-                if pref_key in profile.preferences:
-                    other_value = profile.preferences[pref_key].get("value")
-                    if other_value == pref.value:
-                        score += 1
-
-            if total > 0 and score / total > 0.7:  # 70% similarity
-                similar_users.append(other_user_id)
-
-        return similar_users[:10]  # Limit to 10 similar users
+        # LSH candidates re-scored with exact Jaccard; no scan over all profiles
+        similar = self.preference_index.similar_to(
+            [(category.value, pref.value) for category, pref in preferences.items()],
+            limit=self.max_similar_users,
+            min_similarity=self.similar_user_threshold,
+            exclude_user_id=user_id
+        )
+        return [other_user_id for other_user_id, _ in similar]
 
     async def _calculate_similar_user_adjustment(
         self,
@@ -0,0 +1,609 @@
+"""
+Preference Index for Otto.AI
+Similar-user retrieval and segmentation over user preference sets
+
+Every profile is reduced to a set of "category: value" tokens.
+- Similar users: MinHash signatures cut into LSH bands give candidates
+  (users sharing at least one whole band), re-scored with exact Jaccard.
+- Segments: mini-batch k-means over the sparse one-hot matrix of
+  high-confidence preferences, with numbers bucketed to one significant
+  digit so budgets and sizes group together.
+
+Profiles are indexed incrementally as they change. Token sets and LSH
+buckets keep a compact base (CSR arrays, sorted bucket keys) plus a small
+delta of changed users that is merged in once it grows; changed users are
+moved to their nearest segment with an online k-means step, and segments
+are refit once enough of the population has changed.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 60
+# 20 bands of 3 rows: pairs with Jaccard 0.5 share a band ~93% of the time, 0.2 only ~15%
+LSH_BANDS = 20
+# Per band and lookup; big buckets hold near-identical sets, so a slice is representative
+MAX_BUCKET_CANDIDATES = 256
+
+SEGMENT_MIN_CONFIDENCE = 0.7
+DEFAULT_SEGMENTS = 8
+# Refit segments once this share of indexed users changed since the last fit
+REFIT_FRACTION = 0.2
+# Merge the delta into the base once it holds this share of users
+COMPACT_FRACTION = 0.05
+
+# Token occurrences hashed per block while computing signatures (~16 MB of uint32)
+_HASH_BLOCK_TOKENS = 1 << 16
+
+_NO_TOKENS = np.zeros(0, dtype=np.int32)
+
+
+def preference_items(
+    preferences: Dict[str, Any],
+    min_confidence: Optional[float] = None
+) -> List[Tuple[str, Any]]:
+    """(category, value) pairs from a profile's pref_* entries, optionally above a confidence"""
+    items = []
+    for key, entry in preferences.items():
+        if not key.startswith("pref_") or not isinstance(entry, dict):
+            continue
+        if min_confidence is not None and entry.get("confidence", 0) <= min_confidence:
+            continue
+        items.append((key[5:], entry.get("value")))
+    return items
+
+
+def _bucket(value: Any) -> Any:
+    """Numbers to one significant digit (27500 -> 30000); other values unchanged"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    return float(f"{value:.1g}")
+
+
+def _token(category: str, value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{category}: {value}"
+
+
+def _token_hash(token: str) -> int:
+    """Stable 64-bit token hash (independent of vocabulary order and process)"""
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+class _Vocabulary:
+    """Token -> dense id, with the stable hash of every token"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        self._hashes: List[int] = []
+        self._hash_array = np.zeros(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, tokens: Iterable[str]) -> np.ndarray:
+        ids = []
+        for token in tokens:
+            token_id = self.ids.get(token)
+            if token_id is None:
+                token_id = self.ids[token] = len(self.tokens)
+                self.tokens.append(token)
+                self._hashes.append(_token_hash(token))
+            ids.append(token_id)
+        return np.unique(np.array(ids, dtype=np.int32))
+
+    @property
+    def hashes(self) -> np.ndarray:
+        if len(self._hash_array) != len(self._hashes):
+            self._hash_array = np.array(self._hashes, dtype=np.uint64)
+        return self._hash_array
+
+
+class _TokenSets:
+    """Sorted token ids per user slot: CSR base arrays plus overrides for slots changed since"""
+
+    def __init__(self, sets: Optional[List[np.ndarray]] = None):
+        sets = sets or []
+        self.indptr = np.zeros(len(sets) + 1, dtype=np.int64)
+        np.cumsum([len(tokens) for tokens in sets], out=self.indptr[1:])
+        self.data = np.concatenate(sets).astype(np.int32) if sets else _NO_TOKENS
+        self.overrides: Dict[int, np.ndarray] = {}
+
+    @property
+    def base_slots(self) -> int:
+        return len(self.indptr) - 1
+
+    def get(self, slot: int) -> np.ndarray:
+        if slot in self.overrides:
+            return self.overrides[slot]
+        if slot < self.base_slots:
+            return self.data[self.indptr[slot]:self.indptr[slot + 1]]
+        return _NO_TOKENS
+
+    def set(self, slot: int, tokens: np.ndarray) -> None:
+        self.overrides[slot] = tokens
+
+    def gather(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Tokens of all slots concatenated, and the position in slots each token came from"""
+        overridden = np.fromiter(self.overrides, dtype=np.int64, count=len(self.overrides))
+        in_base = (slots < self.base_slots) & ~np.isin(slots, overridden)
+
+        positions = np.flatnonzero(in_base)
+        starts = self.indptr[slots[positions]]
+        lengths = self.indptr[slots[positions] + 1] - starts
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        tokens, owners = [self.data[offsets]], [np.repeat(positions, lengths)]
+
+        for position in np.flatnonzero(~in_base).tolist():
+            slot_tokens = self.get(int(slots[position]))
+            tokens.append(slot_tokens)
+            owners.append(np.full(len(slot_tokens), position))
+        return np.concatenate(tokens), np.concatenate(owners)
+
+    def compact(self, n_slots: int) -> None:
+        """Merge overrides into the CSR arrays"""
+        if not self.overrides and n_slots == self.base_slots:
+            return
+        lengths = np.zeros(n_slots, dtype=np.int64)
+        lengths[:self.base_slots] = np.diff(self.indptr)
+        overridden = np.zeros(max(n_slots, self.base_slots), dtype=bool)
+        for slot, tokens in self.overrides.items():
+            lengths[slot] = len(tokens)
+            overridden[slot] = True
+
+        indptr = np.zeros(n_slots + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        data = np.empty(indptr[-1], dtype=np.int32)
+
+        row_of = np.repeat(np.arange(self.base_slots), np.diff(self.indptr))
+        keep = ~overridden[row_of]
+        kept_rows = row_of[keep]
+        data[indptr[kept_rows] + (np.flatnonzero(keep) - self.indptr[kept_rows])] = self.data[keep]
+        for slot, tokens in self.overrides.items():
+            data[indptr[slot]:indptr[slot] + len(tokens)] = tokens
+
+        self.indptr, self.data, self.overrides = indptr, data, {}
+
+    def matrix(self, n_columns: int) -> sparse.csr_matrix:
+        """One-hot rows (call compact first)"""
+        return sparse.csr_matrix(
+            (np.ones(len(self.data), dtype=np.float32), self.data, self.indptr),
+            shape=(self.base_slots, n_columns)
+        )
+
+
+class _LSHBuckets:
+    """Per-band (key, slot) arrays sorted by key, plus a dict delta for slots indexed since"""
+
+    def __init__(self, bands: int):
+        self.bands = bands
+        self.keys = np.zeros((bands, 0), dtype=np.uint32)
+        self.slots = np.zeros((bands, 0), dtype=np.int32)
+        self.delta: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self.delta_size = 0
+
+    def rebuild(self, band_keys: np.ndarray, slots: np.ndarray) -> None:
+        order = np.argsort(band_keys, axis=0, kind="stable")
+        self.keys = np.ascontiguousarray(np.take_along_axis(band_keys, order, axis=0).T)
+        self.slots = np.ascontiguousarray(slots[order].T.astype(np.int32))
+        self.delta = [{} for _ in range(self.bands)]
+        self.delta_size = 0
+
+    def add(self, slot: int, band_keys: np.ndarray) -> None:
+        for band, key in enumerate(band_keys.tolist()):
+            self.delta[band].setdefault(key, []).append(slot)
+        self.delta_size += 1
+
+    def candidates(self, band_keys: np.ndarray, per_band: int) -> np.ndarray:
+        found = []
+        for band, key in enumerate(band_keys.tolist()):
+            # Search with the uint32 element itself; a Python int would upcast the whole band
+            lo = int(np.searchsorted(self.keys[band], band_keys[band], side="left"))
+            hi = int(np.searchsorted(self.keys[band], band_keys[band], side="right"))
+            found.append(self.slots[band, lo:min(hi, lo + per_band)])
+            recent = self.delta[band].get(key)
+            if recent:
+                found.append(np.array(recent[-per_band:], dtype=np.int32))
+        return np.unique(np.concatenate(found)) if found else _NO_TOKENS
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.slots.nbytes
+
+
+@dataclass
+class PreferenceSegment:
+    """One k-means segment of the user population"""
+    segment_id: int
+    name: str
+    size: int
+    # "category: value" held by more than half of the segment, most common first
+    defining_preferences: List[str] = field(default_factory=list)
+
+
+class PreferenceIndex:
+    """MinHash LSH similar-user index and mini-batch k-means segments over preference sets"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, bands: int = LSH_BANDS, seed: int = 17):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_permutations // bands
+
+        # Multiply-shift hash family: h(x) = (a*x + b) >> 32 over uint64, one (a, b) per permutation
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_permutations, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_permutations, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+        self.user_ids: List[str] = []
+        self.user_index: Dict[str, int] = {}
+        self.tokens = _Vocabulary()  # exact values, for similarity
+        self.segment_tokens = _Vocabulary()  # confident, bucketed values, for segments
+        self._sets = _TokenSets()
+        self._segment_sets = _TokenSets()
+        self._band_keys = np.zeros((0, bands), dtype=np.uint32)
+        self._indexed = np.zeros(0, dtype=bool)  # slot has tokens and sits in the LSH buckets
+        self._buckets = _LSHBuckets(bands)
+
+        # Segments: centroids over segment token columns, online counts, slot -> segment (-1: none)
+        self.centroids: Optional[np.ndarray] = None
+        self._center_counts = np.zeros(0, dtype=np.float64)
+        self._segments = np.zeros(0, dtype=np.int32)
+        self._changed_since_fit = 0
+        self._users_at_fit = 0
+
+        self._lock = threading.RLock()
+        self.stats = {
+            "updates": 0,
+            "compactions": 0,
+            "segment_fits": 0,
+            "similar_queries": 0,
+            "candidates_scored": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.user_index
+
+    # ---- Hashing ----
+
+    def _signature_band_keys(self, indptr: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+        """LSH band keys (n, bands) of the token hash sets laid out by indptr; empty sets get zeros"""
+        n = len(indptr) - 1
+        keys = np.zeros((n, self.bands), dtype=np.uint32)
+        nonempty = np.flatnonzero(np.diff(indptr))
+        ends = indptr[nonempty + 1]
+
+        start = 0
+        while start < len(nonempty):
+            stop = int(np.searchsorted(ends, indptr[nonempty[start]] + _HASH_BLOCK_TOKENS, side="right"))
+            stop = max(stop, start + 1)
+            rows = nonempty[start:stop]
+            lo, hi = indptr[rows[0]], indptr[rows[-1] + 1]
+
+            hashed = ((hashes[lo:hi, np.newaxis] * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+            signatures = np.minimum.reduceat(hashed, indptr[rows] - lo, axis=0)
+
+            banded = signatures.reshape(len(rows), self.bands, self.rows).astype(np.uint64)
+            keys[rows] = ((banded * self._band_mix).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+            start = stop
+        return keys
+
+    def _query_band_keys(self, tokens: List[str]) -> np.ndarray:
+        hashes = np.array([
+            self.tokens.hashes[self.tokens.ids[token]] if token in self.tokens.ids else _token_hash(token)
+            for token in tokens
+        ], dtype=np.uint64)
+        return self._signature_band_keys(np.array([0, len(hashes)]), hashes)[0]
+
+    # ---- Building and incremental updates ----
+
+    def build(self, profiles: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Index all (user_id, preferences) at once, replacing current contents"""
+        latest: Dict[str, Dict[str, Any]] = {}
+        for user_id, preferences in profiles:
+            latest[user_id] = preferences
+
+        tokens, segment_tokens = _Vocabulary(), _Vocabulary()
+        sets, segment_sets = [], []
+        for preferences in latest.values():
+            sets.append(tokens.add(_token(c, v) for c, v in preference_items(preferences)))
+            segment_sets.append(segment_tokens.add(
+                _token(c, _bucket(v)) for c, v in preference_items(preferences, SEGMENT_MIN_CONFIDENCE)
+            ))
+
+        token_sets = _TokenSets(sets)
+        band_keys = self._signature_band_keys(token_sets.indptr, tokens.hashes[token_sets.data])
+        indexed = np.diff(token_sets.indptr) > 0
+
+        with self._lock:
+            self.user_ids = list(latest)
+            self.user_index = {user_id: slot for slot, user_id in enumerate(self.user_ids)}
+            self.tokens, self.segment_tokens = tokens, segment_tokens
+            self._sets, self._segment_sets = token_sets, _TokenSets(segment_sets)
+            self._band_keys, self._indexed = band_keys, indexed
+            self._buckets.rebuild(band_keys[indexed], np.flatnonzero(indexed))
+            self.centroids = None
+            self._segments = np.full(len(self.user_ids), -1, dtype=np.int32)
+
+        logger.info(f"✅ Preference index built: {len(self.user_ids)} users, {len(tokens)} preference tokens")
+
+    def update_profile(self, user_id: str, preferences: Dict[str, Any]) -> bool:
+        """Re-index one user's preferences; False when nothing changed"""
+        with self._lock:
+            tokens = self.tokens.add(_token(c, v) for c, v in preference_items(preferences))
+            segment_tokens = self.segment_tokens.add(
+                _token(c, _bucket(v)) for c, v in preference_items(preferences, SEGMENT_MIN_CONFIDENCE)
+            )
+
+            slot = self.user_index.get(user_id)
+            if slot is None:
+                slot = len(self.user_ids)
+                self.user_ids.append(user_id)
+                self.user_index[user_id] = slot
+                self._ensure_capacity(slot + 1)
+            elif np.array_equal(self._sets.get(slot), tokens) and \
+                    np.array_equal(self._segment_sets.get(slot), segment_tokens):
+                return False
+
+            self._sets.set(slot, tokens)
+            self._segment_sets.set(slot, segment_tokens)
+            self._indexed[slot] = len(tokens) > 0
+            if len(tokens):
+                band_keys = self._signature_band_keys(np.array([0, len(tokens)]), self.tokens.hashes[tokens])[0]
+                self._band_keys[slot] = band_keys
+                self._buckets.add(slot, band_keys)
+            self._assign_segment(slot, segment_tokens)
+
+            if self._buckets.delta_size > max(1000, COMPACT_FRACTION * len(self.user_ids)):
+                self._compact()
+
+        self.stats["updates"] += 1
+        return True
+
+    def _ensure_capacity(self, n_users: int) -> None:
+        capacity = len(self._indexed)
+        if n_users <= capacity:
+            return
+        capacity = max(n_users, capacity * 2, 16)
+        band_keys = np.zeros((capacity, self.bands), dtype=np.uint32)
+        indexed = np.zeros(capacity, dtype=bool)
+        segments = np.full(capacity, -1, dtype=np.int32)
+        band_keys[:len(self._band_keys)] = self._band_keys
+        indexed[:len(self._indexed)] = self._indexed
+        segments[:len(self._segments)] = self._segments
+        self._band_keys, self._indexed, self._segments = band_keys, indexed, segments
+
+    def _compact(self) -> None:
+        """Fold the delta back into the CSR token arrays and sorted buckets"""
+        n = len(self.user_ids)
+        self._sets.compact(n)
+        self._segment_sets.compact(n)
+        indexed = np.flatnonzero(self._indexed[:n])
+        self._buckets.rebuild(self._band_keys[indexed], indexed)
+        self.stats["compactions"] += 1
+
+    # ---- Similar users ----
+
+    def similar_to(
+        self,
+        items: Iterable[Tuple[str, Any]],
+        limit: int = 10,
+        min_similarity: float = 0.5,
+        exclude_user_id: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Users whose preference sets are most similar to the given (category, value) pairs.
+
+        Args:
+            items: Preferences to match
+            limit: Maximum users returned
+            min_similarity: Minimum exact Jaccard similarity
+            exclude_user_id: User to leave out (usually the one asking)
+
+        Returns:
+            (user_id, jaccard) pairs, most similar first
+        """
+        query = sorted({_token(category, value) for category, value in items})
+        if not query:
+            return []
+
+        with self._lock:
+            candidates = self._buckets.candidates(self._query_band_keys(query), MAX_BUCKET_CANDIDATES)
+            exclude = self.user_index.get(exclude_user_id, -1)
+            candidates = candidates[(candidates != exclude) & self._indexed[candidates]]
+            if not len(candidates):
+                return []
+
+            known = np.array([self.tokens.ids[token] for token in query if token in self.tokens.ids], dtype=np.int32)
+            flat, owners = self._sets.gather(candidates)
+            shared = np.bincount(owners, weights=np.isin(flat, known), minlength=len(candidates))
+            sizes = np.bincount(owners, minlength=len(candidates))
+            jaccard = shared / (len(query) + sizes - shared)
+
+            keep = np.flatnonzero(jaccard >= min_similarity)
+            ranked = keep[np.argsort(-jaccard[keep], kind="stable")[:limit]]
+            similar = [(self.user_ids[candidates[i]], float(jaccard[i])) for i in ranked.tolist()]
+
+        self.stats["similar_queries"] += 1
+        self.stats["candidates_scored"] += len(candidates)
+        return similar
+
+    def similar_users(self, user_id: str, limit: int = 10, min_similarity: float = 0.5) -> List[Tuple[str, float]]:
+        """Users most similar to an indexed user"""
+        slot = self.user_index.get(user_id)
+        if slot is None:
+            return []
+        items = [tuple(self.tokens.tokens[token_id].split(": ", 1)) for token_id in self._sets.get(slot).tolist()]
+        return self.similar_to(items, limit, min_similarity, exclude_user_id=user_id)
+
+    # ---- Segments ----
+
+    def _nearest_segments(self, rows: sparse.csr_matrix, centroids: np.ndarray) -> np.ndarray:
+        distances = (centroids ** 2).sum(axis=1) - 2 * np.asarray(rows @ centroids.T)
+        return np.argmin(distances, axis=1).astype(np.int32)
+
+    def fit_segments(
+        self,
+        n_segments: int = DEFAULT_SEGMENTS,
+        batch_size: int = 4096,
+        iterations: int = 100,
+        seed: int = 0
+    ) -> None:
+        """Mini-batch k-means (k-means++ seeding) over the one-hot segment matrix"""
+        with self._lock:
+            n = len(self.user_ids)
+            self._segment_sets.compact(n)
+            matrix = self._segment_sets.matrix(len(self.segment_tokens))
+            changed_before = self.stats["updates"]
+
+        rows = np.flatnonzero(np.diff(matrix.indptr))
+        segments = np.full(n, -1, dtype=np.int32)
+        if not len(rows):
+            with self._lock:
+                self.centroids = None
+                self._segments[:n] = segments
+            return
+
+        rng = np.random.default_rng(seed)
+        centroids = self._seed_centroids(matrix, rows, n_segments, rng)
+        counts = np.zeros(len(centroids), dtype=np.float64)
+
+        for _ in range(iterations):
+            batch = matrix[rng.choice(rows, size=min(batch_size, len(rows)), replace=False)]
+            assigned = self._nearest_segments(batch, centroids)
+            members = np.bincount(assigned, minlength=len(centroids)).astype(np.float64)
+            sums = np.asarray((sparse.csr_matrix(
+                (np.ones(len(assigned)), (assigned, np.arange(len(assigned)))),
+                shape=(len(centroids), len(assigned))
+            ) @ batch).todense())
+
+            # Per-centre learning rate 1/count, applied to the whole batch at once
+            counts += members
+            moved = members > 0
+            centroids[moved] += (sums[moved] - members[moved, np.newaxis] * centroids[moved]) / counts[moved, np.newaxis]
+
+        for start in range(0, len(rows), 1 << 16):
+            chunk = rows[start:start + (1 << 16)]
+            segments[chunk] = self._nearest_segments(matrix[chunk], centroids)
+
+        with self._lock:
+            # Columns added while fitting start at zero weight
+            width = len(self.segment_tokens)
+            self.centroids = np.pad(centroids, ((0, 0), (0, width - centroids.shape[1])))
+            self._center_counts = np.bincount(segments[segments >= 0], minlength=len(centroids)).astype(np.float64)
+            self._segments[:n] = segments
+            self._changed_since_fit = self.stats["updates"] - changed_before
+            self._users_at_fit = len(rows)
+
+        self.stats["segment_fits"] += 1
+        logger.info(f"✅ Preference segments fit: {len(centroids)} segments over {len(rows)} users")
+
+    def _seed_centroids(
+        self,
+        matrix: sparse.csr_matrix,
+        rows: np.ndarray,
+        n_segments: int,
+        rng: np.random.Generator,
+        sample_size: int = 20000
+    ) -> np.ndarray:
+        """k-means++ over a sample; fewer centres when the sample has fewer distinct rows"""
+        sample = matrix[rng.choice(rows, size=min(sample_size, len(rows)), replace=False)]
+        norms = np.asarray(sample.multiply(sample).sum(axis=1)).ravel()
+
+        centroids = [np.asarray(sample[rng.integers(sample.shape[0])].todense()).ravel()]
+        closest = norms - 2 * (sample @ centroids[0]) + centroids[0] @ centroids[0]
+        while len(centroids) < n_segments:
+            closest = np.maximum(closest, 0)
+            if closest.sum() <= 0:
+                break
+            pick = rng.choice(sample.shape[0], p=closest / closest.sum())
+            centroid = np.asarray(sample[pick].todense()).ravel()
+            centroids.append(centroid)
+            closest = np.minimum(closest, norms - 2 * (sample @ centroid) + centroid @ centroid)
+        return np.array(centroids, dtype=np.float64)
+
+    def _assign_segment(self, slot: int, segment_tokens: np.ndarray) -> None:
+        """Online k-means step for one changed user"""
+        self._changed_since_fit += 1
+        if self.centroids is None or not len(segment_tokens):
+            self._segments[slot] = -1
+            return
+
+        if self.centroids.shape[1] < len(self.segment_tokens):
+            self.centroids = np.pad(self.centroids, ((0, 0), (0, len(self.segment_tokens) - self.centroids.shape[1])))
+        vector = np.zeros(self.centroids.shape[1])
+        vector[segment_tokens] = 1.0
+
+        segment = int(np.argmin(((self.centroids - vector) ** 2).sum(axis=1)))
+        self._center_counts[segment] += 1
+        self.centroids[segment] += (vector - self.centroids[segment]) / self._center_counts[segment]
+        self._segments[slot] = segment
+
+    def needs_refit(self) -> bool:
+        return self.centroids is None or self._changed_since_fit > REFIT_FRACTION * max(1, self._users_at_fit)
+
+    def segments(self, min_size: int = 1) -> List[PreferenceSegment]:
+        """Current segments (plus "general" for users without confident preferences), largest first"""
+        with self._lock:
+            n = len(self.user_ids)
+            self._segment_sets.compact(n)
+            matrix = self._segment_sets.matrix(len(self.segment_tokens))
+            assigned = self._segments[:n].copy()
+            n_segments = 0 if self.centroids is None else len(self.centroids)
+            vocabulary = list(self.segment_tokens.tokens)
+
+        members = assigned >= 0
+        sizes = np.bincount(assigned[members], minlength=n_segments)
+        # Exact share of each segment holding each preference
+        holders = np.asarray((sparse.csr_matrix(
+            (np.ones(int(members.sum())), (assigned[members], np.flatnonzero(members))),
+            shape=(n_segments, n)
+        ) @ matrix).todense()) if n_segments else np.zeros((0, len(vocabulary)))
+
+        result = []
+        for segment_id in range(n_segments):
+            if sizes[segment_id] < min_size or not sizes[segment_id]:
+                continue
+            share = holders[segment_id] / sizes[segment_id]
+            defining = [vocabulary[i] for i in np.argsort(-share, kind="stable") if share[i] > 0.5]
+            result.append(PreferenceSegment(
+                segment_id=segment_id,
+                name=", ".join(defining[:2]) or f"segment_{segment_id}",
+                size=int(sizes[segment_id]),
+                defining_preferences=defining
+            ))
+
+        general = int((~members).sum())
+        if general >= max(min_size, 1):
+            result.append(PreferenceSegment(segment_id=-1, name="general", size=general))
+
+        result.sort(key=lambda segment: segment.size, reverse=True)
+        return result
+
+    def segment_of(self, user_id: str) -> Optional[int]:
+        slot = self.user_index.get(user_id)
+        return None if slot is None else int(self._segments[slot])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "users": len(self.user_ids),
+            "preference_tokens": len(self.tokens),
+            "pending_delta": self._buckets.delta_size,
+            "bucket_bytes": self._buckets.nbytes,
+            "segments": 0 if self.centroids is None else len(self.centroids),
+        }
@@ -7,6 +7,7 @@ Integrates with PDFIngestionService to provide complete listing creation workflo
 import asyncio
 import hashlib
 import logging
+import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from io import BytesIO
@@ -16,6 +17,8 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from ..services.pdf_ingestion_service import get_pdf_ingestion_service, VehicleListingArtifact
+from ..services.ingestion_pipeline import get_ingestion_pipeline
+from ..services.ingestion_job_queue import get_ingestion_job_queue, workers_in_process
 from ..services.storage_service import get_storage_service
 from ..services.vehicle_embedding_service import VehicleEmbeddingService, process_listing_for_search
 from ..semantic.embedding_service import OttoAIEmbeddingService
@@ -104,8 +107,8 @@ class BatchStatus(BaseModel):
 # In-memory task storage (in production, use Redis or database)
 processing_tasks: Dict[str, ProcessingStatus] = {}
 
-# Batch processing storage
-batch_jobs: Dict[str, BatchStatus] = {}
+# Bulk uploads are tracked durably by the ingestion job queue
+MAX_BULK_FILE_BYTES = 20 * 1024 * 1024
 
 
 @listings_router.post("/upload", response_model=ListingUploadResponse)
@@ -182,7 +185,6 @@ async def upload_condition_report(
 
 @listings_router.post("/upload/bulk", response_model=BatchUploadResponse)
 async def upload_condition_reports_bulk(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(..., description="Multiple vehicle condition report PDFs"),
     seller_id: Optional[str] = Query(None, description="Seller identifier"),
     max_concurrent: int = Query(3, ge=1, le=10, description="Max concurrent processing jobs")
@@ -190,12 +192,13 @@ async def upload_condition_reports_bulk(
     """
     Upload and process multiple vehicle condition report PDFs in batch.
 
-    This endpoint accepts multiple PDF files and queues them for asynchronous processing.
+    Files are streamed to the ingestion spool directory and queued as
+    durable jobs; the ingestion workers process them and survive restarts.
     Use the batch status endpoint to monitor progress.
 
-    - **files**: List of PDF files to upload (max 50 per batch)
+    - **files**: List of PDF files to upload (max 50 per batch, 20MB each)
     - **seller_id**: Optional seller identifier to associate with all listings
-    - **max_concurrent**: Maximum number of PDFs to process simultaneously (1-10)
+    - **max_concurrent**: Maximum number of PDFs from this batch processed simultaneously (1-10)
 
     Returns a batch_id that can be used to track processing status.
     """
@@ -220,56 +223,18 @@ async def upload_condition_reports_bulk(
                 detail=f"Only PDF files are supported. Invalid file: {file.filename}"
             )
 
-    try:
-        # Generate batch ID
-        batch_id = f"batch_{int(datetime.utcnow().timestamp())}_{len(files)}"
-
-        # Read all PDF bytes upfront
-        pdf_data_list = []
-        for file in files:
-            pdf_bytes = await file.read()
-            pdf_data_list.append({
-                'filename': file.filename,
-                'bytes': pdf_bytes,
-                'size': len(pdf_bytes)
-            })
-
-        # Initialize batch status
-        file_statuses = [
-            BatchFileStatus(
-                filename=pdf['filename'],
-                status='queued',
-                progress=0.0,
-                message='Queued for processing'
-            )
-            for pdf in pdf_data_list
-        ]
+    job_queue = get_ingestion_job_queue()
+    batch_id = f"batch_{int(datetime.utcnow().timestamp())}_{len(files)}_{uuid.uuid4().hex[:8]}"
 
-        batch_jobs[batch_id] = BatchStatus(
-            batch_id=batch_id,
-            status='queued',
-            total_files=len(files),
-            completed=0,
-            failed=0,
-            in_progress=0,
-            queued=len(files),
-            progress=0.0,
-            started_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            files=file_statuses,
-            seller_id=seller_id
-        )
-
-        logger.info(f"Created batch job {batch_id} with {len(files)} files")
+    try:
+        # Stream each PDF to disk instead of holding the whole batch in memory
+        spooled = []
+        for index, file in enumerate(files):
+            spooled.append(await job_queue.spool_upload(file, batch_id, index, max_bytes=MAX_BULK_FILE_BYTES))
 
-        # Start batch processing in background
-        background_tasks.add_task(
-            process_batch_async,
-            batch_id,
-            pdf_data_list,
-            seller_id,
-            max_concurrent
-        )
+        job_queue.enqueue_batch(batch_id, spooled, seller_id=seller_id, max_concurrent=max_concurrent)
+        if workers_in_process():
+            job_queue.start()
 
         return BatchUploadResponse(
             success=True,
@@ -278,9 +243,11 @@ async def upload_condition_reports_bulk(
             message=f"Batch upload queued. {len(files)} files will be processed. Use GET /api/listings/batch/{batch_id} to monitor progress."
         )
 
-    except HTTPException:
-        raise
+    except ValueError as e:
+        job_queue.discard_spool(batch_id)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        job_queue.discard_spool(batch_id)
         logger.error(f"Failed to create batch upload: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -288,162 +255,6 @@ async def upload_condition_reports_bulk(
         )
 
 
-async def process_batch_async(
-    batch_id: str,
-    pdf_data_list: List[Dict[str, Any]],
-    seller_id: Optional[str],
-    max_concurrent: int
-):
-    """
-    Process a batch of PDFs asynchronously with concurrency control.
-
-    Uses a semaphore to limit concurrent processing and updates batch status
-    as each file completes.
-    """
-    semaphore = asyncio.Semaphore(max_concurrent)
-
-    # Update batch status to processing
-    batch_jobs[batch_id].status = 'processing'
-    batch_jobs[batch_id].updated_at = datetime.utcnow()
-
-    async def process_single_pdf(index: int, pdf_data: Dict[str, Any]):
-        """Process a single PDF with semaphore control"""
-        async with semaphore:
-            filename = pdf_data['filename']
-            pdf_bytes = pdf_data['bytes']
-
-            # Update status to processing
-            batch_jobs[batch_id].files[index].status = 'processing'
-            batch_jobs[batch_id].files[index].message = 'Processing PDF...'
-            batch_jobs[batch_id].in_progress += 1
-            batch_jobs[batch_id].queued -= 1
-            batch_jobs[batch_id].updated_at = datetime.utcnow()
-            _update_batch_progress(batch_id)
-
-            try:
-                # Process the PDF
-                result = await process_pdf_for_batch(pdf_bytes, filename, seller_id)
-
-                # Update status to completed
-                batch_jobs[batch_id].files[index].status = 'completed'
-                batch_jobs[batch_id].files[index].progress = 100.0
-                batch_jobs[batch_id].files[index].message = 'Successfully processed'
-                batch_jobs[batch_id].files[index].listing_id = result.get('listing_id')
-                batch_jobs[batch_id].files[index].vin = result.get('vin')
-                batch_jobs[batch_id].completed += 1
-                batch_jobs[batch_id].in_progress -= 1
-
-                logger.info(f"Batch {batch_id}: Completed {filename} -> {result.get('listing_id')}")
-
-            except Exception as e:
-                # Update status to failed
-                batch_jobs[batch_id].files[index].status = 'failed'
-                batch_jobs[batch_id].files[index].progress = 0.0
-                batch_jobs[batch_id].files[index].message = 'Processing failed'
-                batch_jobs[batch_id].files[index].error = str(e)
-                batch_jobs[batch_id].failed += 1
-                batch_jobs[batch_id].in_progress -= 1
-
-                logger.error(f"Batch {batch_id}: Failed {filename}: {str(e)}")
-
-            batch_jobs[batch_id].updated_at = datetime.utcnow()
-            _update_batch_progress(batch_id)
-
-    # Create tasks for all PDFs
-    tasks = [
-        process_single_pdf(i, pdf_data)
-        for i, pdf_data in enumerate(pdf_data_list)
-    ]
-
-    # Wait for all to complete
-    await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Update final batch status
-    batch = batch_jobs[batch_id]
-    if batch.failed == 0:
-        batch.status = 'completed'
-    elif batch.completed == 0:
-        batch.status = 'failed'
-    else:
-        batch.status = 'partial'
-
-    batch.completed_at = datetime.utcnow()
-    batch.updated_at = datetime.utcnow()
-    batch.progress = 100.0
-
-    logger.info(f"Batch {batch_id} finished: {batch.completed} completed, {batch.failed} failed")
-
-
-async def process_pdf_for_batch(
-    pdf_bytes: bytes,
-    filename: str,
-    seller_id: Optional[str]
-) -> Dict[str, Any]:
-    """
-    Process a single PDF as part of a batch.
-    Returns dict with listing_id and vin on success.
-    """
-    start_time = datetime.utcnow()
-
-    # Get services
-    pdf_service = await get_pdf_ingestion_service()
-    storage_service = await get_storage_service()
-
-    # Process PDF
-    artifact = await pdf_service.process_condition_report(pdf_bytes, filename)
-
-    # Upload images to storage
-    upload_tasks = []
-    for image in artifact.images:
-        hash_prefix = hashlib.md5(image.image_bytes[:1024]).hexdigest()[:8]
-        img_filename = f"{artifact.vehicle.vin}_{image.vehicle_angle}_{hash_prefix}.{image.format}"
-        upload_tasks.append(
-            storage_service.upload_vehicle_image(
-                image.image_bytes,
-                img_filename,
-                optimize=True,
-                create_variants=True
-            )
-        )
-
-    # Wait for uploads
-    upload_results = await asyncio.gather(*upload_tasks, return_exceptions=True)
-
-    # Update image URLs
-    for image, result in zip(artifact.images, upload_results):
-        if isinstance(result, Exception):
-            continue
-        image.storage_url = result.get('web_url')
-        image.thumbnail_url = result.get('thumbnail_url')
-
-    # Add processing metadata
-    artifact.processing_metadata = {
-        'filename': filename,
-        'seller_id': seller_id,
-        'processed_at': start_time.isoformat(),
-        'batch_processing': True
-    }
-
-    # Persist to database with embeddings
-    embedding_service = OttoAIEmbeddingService()
-    embedding_result = await process_listing_for_search(artifact, embedding_service)
-    listing_id = embedding_result.get('listing_id', f"listing_{artifact.vehicle.vin}")
-
-    return {
-        'listing_id': listing_id,
-        'vin': artifact.vehicle.vin,
-        'processing_time': (datetime.utcnow() - start_time).total_seconds()
-    }
-
-
-def _update_batch_progress(batch_id: str):
-    """Update overall batch progress percentage"""
-    batch = batch_jobs[batch_id]
-    total = batch.total_files
-    completed = batch.completed + batch.failed
-    batch.progress = (completed / total) * 100 if total > 0 else 0
-
-
 @listings_router.get("/batch/{batch_id}", response_model=BatchStatus)
 async def get_batch_status(batch_id: str):
     """
@@ -455,13 +266,14 @@ async def get_batch_status(batch_id: str):
     - Listing IDs for completed files
     - Error messages for failed files
     """
-    if batch_id not in batch_jobs:
+    batch = get_ingestion_job_queue().store.get_batch(batch_id)
+    if batch is None:
         raise HTTPException(
             status_code=404,
             detail=f"Batch job {batch_id} not found"
         )
 
-    return batch_jobs[batch_id]
+    return BatchStatus(**batch)
 
 
 @listings_router.get("/batch", response_model=List[BatchStatus])
@@ -474,16 +286,21 @@ async def list_batch_jobs(
 
     Optionally filter by status: queued, processing, completed, partial, failed
     """
-    batches = list(batch_jobs.values())
-
-    # Filter by status if provided
-    if status:
-        batches = [b for b in batches if b.status == status]
+    # Newest first, filtered by status if provided
+    batches = get_ingestion_job_queue().store.list_batches(status=status, limit=limit)
+    return [BatchStatus(**batch) for batch in batches]
 
-    # Sort by started_at descending (newest first)
-    batches.sort(key=lambda b: b.started_at, reverse=True)
 
-    return batches[:limit]
+@listings_router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Per-stage throughput, latency and queue depth of the ingestion pipeline, plus dedupe savings"""
+    pipeline = await get_ingestion_pipeline()
+    dedupe_index = pipeline.service.get_dedupe_index()
+    return {
+        **pipeline.get_stats(),
+        'job_queue': get_ingestion_job_queue().get_stats(),
+        'dedupe': await asyncio.to_thread(dedupe_index.get_stats) if dedupe_index else None
+    }
 
 
 async def process_pdf_sync(
@@ -515,7 +332,8 @@ async def process_pdf_sync(
                 image.image_bytes,
                 img_filename,
                 optimize=True,
-                create_variants=True
+                create_variants=True,
+                perceptual_hash=image.perceptual_hash
             )
             upload_tasks.append(task)
 
@@ -871,35 +689,39 @@ async def get_similar_listings(
     listing_id: str,
     limit: int = Query(5, ge=1, le=20, description="Number of similar listings")
 ):
-    """Get similar vehicle listings based on semantic similarity using pgvector"""
+    """Get similar vehicle listings from the precomputed kNN graph, falling back to pgvector"""
     try:
         listing_repo = get_listing_repository()
         image_repo = get_image_repository()
 
-        # Get the source listing to get its embedding
-        listing = await listing_repo.get_by_id(listing_id)
+        # Key lookup in the kNN graph; None means the listing isn't in it yet
+        similar_listings = await listing_repo.find_similar_by_id(listing_id, limit=limit)
 
-        if not listing:
-            raise HTTPException(status_code=404, detail="Listing not found")
+        if similar_listings is None:
+            # Get the source listing to get its embedding
+            listing = await listing_repo.get_by_id(listing_id)
 
-        # Get the text embedding from the listing
-        text_embedding = listing.get('text_embedding')
+            if not listing:
+                raise HTTPException(status_code=404, detail="Listing not found")
 
-        if not text_embedding:
-            # If no embedding, return empty result
-            return []
+            # Get the text embedding from the listing
+            text_embedding = listing.get('text_embedding')
 
-        # Parse embedding if stored as string
-        if isinstance(text_embedding, str):
-            import ast
-            text_embedding = ast.literal_eval(text_embedding)
+            if not text_embedding:
+                # If no embedding, return empty result
+                return []
 
-        # Find similar listings using pgvector
-        similar_listings = await listing_repo.find_similar(
-            embedding=text_embedding,
-            limit=limit,
-            exclude_id=listing_id
-        )
+            # Parse embedding if stored as string
+            if isinstance(text_embedding, str):
+                import ast
+                text_embedding = ast.literal_eval(text_embedding)
+
+            # Find similar listings using pgvector
+            similar_listings = await listing_repo.find_similar(
+                embedding=text_embedding,
+                limit=limit,
+                exclude_id=listing_id
+            )
 
         # Build response with images
         results = []
@@ -21,6 +21,7 @@ from .semantic_search_api import app as semantic_search_app
 from .auth_api import auth_router
 # Story 3-3b: SSE router for vehicle updates
 from .vehicle_updates_sse import vehicle_updates_router
+from ..services.ingestion_job_queue import get_ingestion_job_queue, workers_in_process
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -73,6 +74,81 @@ def create_application() -> FastAPI:
     # Story 3-3b: SSE endpoint for vehicle updates (replaces WebSocket for vehicle updates)
     app.include_router(vehicle_updates_router, tags=["vehicle-updates"])
 
+    # Resume durable bulk-ingestion jobs (including any interrupted by a restart)
+    @app.on_event("startup")
+    async def start_ingestion_workers():
+        if workers_in_process():
+            get_ingestion_job_queue().start()
+
+    @app.on_event("shutdown")
+    async def stop_ingestion_workers():
+        if workers_in_process():
+            await get_ingestion_job_queue().stop()
+
+    # Similar-vehicle lookups: serve persisted kNN rows, rebuild from embeddings nightly
+    # and persist incremental updates every minute
+    @app.on_event("startup")
+    async def start_similarity_graph():
+        try:
+            from ..recommendation.similarity_graph import get_vehicle_similarity_graph
+            from ..repositories.listing_repository import get_listing_repository
+
+            listing_repo = get_listing_repository()
+            graph = get_vehicle_similarity_graph()
+            graph.load_rows(await listing_repo.load_neighbor_rows())
+            graph.start_background_rebuild(
+                listing_repo.list_active_embeddings,
+                on_rebuilt=lambda built: listing_repo.save_neighbor_rows(built.to_rows(), replace=True)
+            )
+            graph.start_background_flush(listing_repo.save_neighbor_rows, listing_repo.delete_neighbor_rows)
+        except Exception as e:
+            logger.warning(f"⚠️ Vehicle similarity graph unavailable, using live vector search: {e}")
+
+    @app.on_event("shutdown")
+    async def stop_similarity_graph():
+        from ..recommendation.similarity_graph import get_vehicle_similarity_graph
+        from ..repositories.listing_repository import get_listing_repository
+
+        graph = get_vehicle_similarity_graph()
+        await graph.stop_background_rebuild()
+        await graph.stop_background_flush()
+        listing_repo = get_listing_repository()
+        await graph.flush(listing_repo.save_neighbor_rows, listing_repo.delete_neighbor_rows)
+
+    # Per-user taste vectors: restore persisted vectors, flush changed ones every minute
+    @app.on_event("startup")
+    async def start_taste_vectors():
+        try:
+            from ..recommendation.taste_vectors import get_taste_vector_store
+            from ..repositories.user_taste_repository import get_user_taste_repository
+
+            taste_repo = get_user_taste_repository()
+            store = get_taste_vector_store()
+            store.load_rows(await taste_repo.load_rows())
+            store.start_background_flush(taste_repo.save_rows)
+        except Exception as e:
+            logger.warning(f"⚠️ User taste vectors not restored, starting empty: {e}")
+
+    @app.on_event("shutdown")
+    async def stop_taste_vectors():
+        from ..recommendation.taste_vectors import get_taste_vector_store
+        from ..repositories.user_taste_repository import get_user_taste_repository
+
+        store = get_taste_vector_store()
+        await store.stop_background_flush()
+        await store.flush(get_user_taste_repository().save_rows)
+
+    # Interaction event log: flush buffered events every few seconds, compact day partitions
+    @app.on_event("startup")
+    async def start_interaction_log():
+        from ..recommendation.interaction_log import get_interaction_event_log
+        get_interaction_event_log().start_background_tasks()
+
+    @app.on_event("shutdown")
+    async def stop_interaction_log():
+        from ..recommendation.interaction_log import get_interaction_event_log
+        await get_interaction_event_log().stop_background_tasks()
+
     # Note: The other API apps are separate FastAPI instances
     # In production, you might want to refactor them into routers
     # For now, we provide a unified entry point
@@ -148,6 +148,14 @@ async def get_notification_service() -> NotificationService:
 
     return notification_service
 
+@notifications_router.on_event("shutdown")
+async def close_notification_service():
+    """Stop the digest flusher and close the database connection"""
+    global notification_service
+    if notification_service is not None:
+        await notification_service.close()
+        notification_service = None
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
@@ -22,6 +22,7 @@ from dataclasses import dataclass
 import hashlib
 import uuid
 
+import numpy as np
 from fastapi import FastAPI, HTTPException, Query, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -42,6 +43,7 @@ from src.search.query_expansion_service import QueryExpansionService
 from src.search.hybrid_search_service import HybridSearchService
 from src.search.reranking_service import RerankingService
 from src.search.contextual_embedding_service import ContextualEmbeddingService
+from src.recommendation.taste_vectors import get_taste_vector_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -106,6 +108,7 @@ class SemanticSearchRequest(BaseModel):
     sort_order: str = Field("desc", description="Sort order: asc, desc")
     include_similarity_scores: bool = Field(True, description="Include similarity scores in response")
     search_id: Optional[str] = Field(None, description="Unique search identifier for tracking")
+    user_id: Optional[str] = Field(None, description="Re-rank relevance results by this user's taste")
 
     # RAG Strategy enhancements (Story 1-9 through 1-12)
     enable_expansion: bool = Field(True, description="Enable LLM query expansion")
@@ -265,6 +268,10 @@ class SemanticSearchService:
         self.query_cache: Dict[str, Dict] = {}
         self.cache_ttl = 300  # 5 minutes
 
+        # Per-user taste embeddings; results are shared in the cache and personalized after
+        self.taste_vectors = get_taste_vector_store()
+        self.taste_weight = 0.2
+
     async def initialize(self, supabase_url: str, supabase_key: str) -> bool:
         """Initialize the search service"""
         try:
@@ -356,7 +363,7 @@ class SemanticSearchService:
 
             if cached_results:
                 logger.info(f"Cache hit for search: {request.query[:50]}...")
-                return SemanticSearchResponse(**cached_results)
+                return self._personalize(SemanticSearchResponse(**cached_results), request)
 
             # Build database filters
             db_filters = {}
@@ -366,14 +373,16 @@ class SemanticSearchService:
 
             # Use RAG Pipeline if enabled and requested
             if self.rag_enabled and request.use_rag_pipeline and self.search_orchestrator:
-                return await self._rag_pipeline_search(
+                response = await self._rag_pipeline_search(
+                    request, search_id, db_filters, client_id, start_time, cache_key
+                )
+            else:
+                # Fallback to legacy search
+                response = await self._legacy_search(
                     request, search_id, db_filters, client_id, start_time, cache_key
                 )
 
-            # Fallback to legacy search
-            return await self._legacy_search(
-                request, search_id, db_filters, client_id, start_time, cache_key
-            )
+            return self._personalize(response, request)
 
         except Exception as e:
             processing_time = time.time() - start_time
@@ -562,6 +571,23 @@ class SemanticSearchService:
 
         return response
 
+    def _personalize(self, response: SemanticSearchResponse, request: SemanticSearchRequest) -> SemanticSearchResponse:
+        """Re-rank relevance-sorted results by the user's taste vector (one dot product, no I/O)"""
+        if (
+            not request.user_id or (request.sort_by, request.sort_order) != ('relevance', 'desc') or not response.results
+            or request.user_id not in self.taste_vectors
+        ):
+            return response
+
+        taste_scores = self.taste_vectors.score_ids(request.user_id, [result.id for result in response.results])
+        relevance = np.array([result.similarity_score or 0.0 for result in response.results], dtype=np.float32)
+        blended = (1 - self.taste_weight) * relevance + self.taste_weight * taste_scores
+        order = np.argsort(-blended, kind='stable')
+
+        response.results = [response.results[i] for i in order.tolist()]
+        response.search_metadata = {**response.search_metadata, "personalized": True}
+        return response
+
     def get_search_stats(self) -> Dict[str, Any]:
         """Get search performance statistics"""
         return {
@@ -0,0 +1,173 @@
+"""
+Test Suite for the WebSocket Connection Manager
+Per-connection queues, overflow handling and fan-out under load
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+import time
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.api.websocket_connection_manager import (
+    ConnectionManager,
+    OVERFLOW_CLOSE,
+    OVERFLOW_DROP_OLDEST
+)
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that records frames, optionally slowly"""
+
+    def __init__(self, delay: float = 0.0, block: bool = False):
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed = False
+        self._never = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.block:
+            await self._never.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = True
+
+    async def ping(self):
+        pass
+
+
+class TestConnectionManager:
+    """Test queueing semantics"""
+
+    @pytest.mark.asyncio
+    async def test_messages_delivered_in_order(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        conn_id = await manager.connect(ws, "user_1")
+
+        for i in range(10):
+            await manager.send_message(conn_id, {"seq": i})
+        await manager.flush(conn_id)
+
+        assert [json.loads(t)["seq"] for t in ws.sent] == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_user_does_not_deadlock(self):
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(3)]
+        ids = [await manager.connect(ws, "user_1") for ws in sockets]
+        await manager.connect(FakeWebSocket(), "user_2")
+
+        sent = await asyncio.wait_for(manager.broadcast_to_user("user_1", {"type": "update"}), timeout=1)
+        for conn_id in ids:
+            await manager.flush(conn_id)
+
+        assert sent == 3
+        assert all(len(ws.sent) == 1 for ws in sockets)
+
+    @pytest.mark.asyncio
+    async def test_user_index_enforces_limit_and_tracks_disconnects(self):
+        manager = ConnectionManager(max_connections_per_user=2)
+        first = await manager.connect(FakeWebSocket(), "user_1")
+        await manager.connect(FakeWebSocket(), "user_1")
+
+        with pytest.raises(Exception):
+            await manager.connect(FakeWebSocket(), "user_1")
+
+        await manager.disconnect(first)
+        assert len(manager.user_connections["user_1"]) == 1
+        await manager.connect(FakeWebSocket(), "user_1")
+
+    @pytest.mark.asyncio
+    async def test_overflow_closes_slow_connection(self):
+        manager = ConnectionManager(send_queue_size=4, overflow_policy=OVERFLOW_CLOSE)
+        ws = FakeWebSocket(block=True)
+        conn_id = await manager.connect(ws, "user_1")
+
+        results = [await manager.send_message(conn_id, {"seq": i}) for i in range(10)]
+        await asyncio.sleep(0)
+
+        assert False in results
+        assert conn_id not in manager.connections
+        assert ws.closed
+        assert manager.stats["overflow_closes"] == 1
+        await asyncio.sleep(0)
+        assert not manager._disconnect_tasks  # finished disconnects release their reference
+
+    @pytest.mark.asyncio
+    async def test_overflow_drops_oldest(self):
+        manager = ConnectionManager(send_queue_size=3, overflow_policy=OVERFLOW_DROP_OLDEST)
+        ws = FakeWebSocket(delay=0.01)
+        conn_id = await manager.connect(ws, "user_1")
+
+        for i in range(10):
+            await manager.send_message(conn_id, {"seq": i})
+        await manager.flush(conn_id)
+
+        delivered = [json.loads(t)["seq"] for t in ws.sent]
+        assert delivered[-1] == 9
+        assert manager.stats["messages_dropped"] > 0
+        assert conn_id in manager.connections
+
+    @pytest.mark.asyncio
+    async def test_send_failure_removes_connection(self):
+        manager = ConnectionManager()
+
+        class BrokenWebSocket(FakeWebSocket):
+            async def send_text(self, text):
+                raise RuntimeError("socket closed")
+
+        conn_id = await manager.connect(BrokenWebSocket(), "user_1")
+        await manager.send_message(conn_id, {"x": 1})
+        await asyncio.sleep(0.01)
+
+        assert conn_id not in manager.connections
+        assert "user_1" not in manager.user_connections
+
+
+@pytest.mark.performance
+class TestConnectionManagerLoad:
+    """Fan-out across 5k connections with a slow consumer mixed in"""
+
+    @pytest.mark.asyncio
+    async def test_5k_connections_with_slow_consumer(self):
+        manager = ConnectionManager(send_queue_size=16, max_connections_per_user=5)
+        fast = []
+        for i in range(5000):
+            ws = FakeWebSocket()
+            fast.append((await manager.connect(ws, f"user_{i % 2000}"), ws))
+
+        slow_ws = FakeWebSocket(block=True)
+        slow_id = await manager.connect(slow_ws, "slow_user")
+
+        rounds = 20
+        started = time.perf_counter()
+        for r in range(rounds):
+            await manager.broadcast({"type": "inventory_update", "round": r})
+            await asyncio.sleep(0)
+        for conn_id, _ in fast:
+            await manager.flush(conn_id, timeout=5)
+        elapsed = time.perf_counter() - started
+
+        # Every fast client got every message; the stalled one was cut off instead of stalling fan-out
+        assert all(len(ws.sent) == rounds for _, ws in fast)
+        assert slow_id not in manager.connections
+        assert elapsed < 10
+
+        stats = await manager.get_connection_stats()
+        assert stats["total_connections"] == 5000
+        assert stats["overflow_closes"] == 1
+
+        for conn_id, _ in fast:
+            await manager.disconnect(conn_id)
@@ -70,6 +70,7 @@ class TestConnectionManager:
         # Send message
         message = {"type": "test", "content": "Hello"}
         result = await connection_manager.send_message(conn_id, message)
+        await connection_manager.flush(conn_id)
 
         assert result == True
         mock_websocket.send_text.assert_called_once_with(json.dumps(message))
@@ -91,6 +92,8 @@ class TestConnectionManager:
         # Broadcast message
         message = {"type": "broadcast", "content": "Hello all"}
         sent_count = await connection_manager.broadcast_to_user("test_user", message)
+        await connection_manager.flush(conn1)
+        await connection_manager.flush(conn2)
 
         assert sent_count == 2
         mock_ws1.send_text.assert_called_with(json.dumps(message))
@@ -47,6 +47,13 @@ from src.semantic.vehicle_database_service import VehicleDatabaseService
 from src.recommendation.comparison_engine import ComparisonEngine
 from src.recommendation.recommendation_engine import RecommendationEngine
 from src.recommendation.interaction_tracker import InteractionTracker
+from src.recommendation.collaborative_filtering import (
+    events_from_favorites, events_from_tracker, get_collaborative_filtering_engine
+)
+from src.recommendation.taste_vectors import get_taste_vector_store
+from src.recommendation.similarity_graph import get_vehicle_similarity_graph
+from src.recommendation.interaction_log import get_interaction_event_log
+from src.user.favorites_service import FavoritesService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -792,11 +799,19 @@ embedding_service: Optional[OttoAIEmbeddingService] = None
 comparison_engine: Optional[ComparisonEngine] = None
 recommendation_engine: Optional[RecommendationEngine] = None
 interaction_tracker: Optional[InteractionTracker] = None
+favorites_service: Optional[FavoritesService] = None
+
+async def load_collaborative_events():
+    """Tracked vehicle interactions plus favorites, for the nightly collaborative filter rebuild"""
+    events = await asyncio.to_thread(events_from_tracker, interaction_tracker)
+    if favorites_service:
+        events.extend(events_from_favorites(await favorites_service.get_all_favorites()))
+    return events
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup with proper Supabase and Redis connections"""
-    global vehicle_db_service, embedding_service, comparison_engine, recommendation_engine, interaction_tracker, comparison_cache
+    global vehicle_db_service, embedding_service, comparison_engine, recommendation_engine, interaction_tracker, comparison_cache, favorites_service
 
     logger.info("Starting Otto.AI Vehicle Comparison API...")
 
@@ -827,7 +842,16 @@ async def startup_event():
         embedding_service = OttoAIEmbeddingService()
         comparison_engine = ComparisonEngine(vehicle_db_service, embedding_service)
         recommendation_engine = RecommendationEngine(vehicle_db_service, embedding_service)
-        interaction_tracker = InteractionTracker()
+        interaction_tracker = InteractionTracker(
+            collaborative_filter=get_collaborative_filtering_engine(),
+            taste_vectors=get_taste_vector_store(),
+            event_log=get_interaction_event_log()
+        )
+
+        favorites_service = FavoritesService()
+        if not await favorites_service.initialize(supabase_url, supabase_key):
+            favorites_service = None
+            logger.warning("⚠️ Favorites unavailable, collaborative filter uses tracked interactions only")
 
         logger.info("✅ All services initialized successfully with Supabase and Redis connections")
 
@@ -842,22 +866,76 @@ async def startup_event():
         embedding_service = OttoAIEmbeddingService()
         comparison_engine = ComparisonEngine(vehicle_db_service, embedding_service)
         recommendation_engine = RecommendationEngine(vehicle_db_service, embedding_service)
-        interaction_tracker = InteractionTracker()
+        interaction_tracker = InteractionTracker(
+            collaborative_filter=get_collaborative_filtering_engine(),
+            taste_vectors=get_taste_vector_store(),
+            event_log=get_interaction_event_log()
+        )
 
         logger.warning("⚠️ Services initialized with limited functionality")
 
+    # Rebuild the item-item neighbours now and nightly; tracked interactions update them in between
+    get_collaborative_filtering_engine().start_background_rebuild(load_collaborative_events)
+    # Trending scores need the whole catalogue in the signal table
+    recommendation_engine.signal_table.start_background_refresh()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     global comparison_cache
     logger.info("Shutting down Otto.AI Vehicle Comparison API...")
 
+    await get_collaborative_filtering_engine().stop_background_rebuild()
+    if recommendation_engine:
+        await recommendation_engine.signal_table.stop_background_refresh()
+    if favorites_service:
+        await favorites_service.close()
+
     # Close Redis connection
     if comparison_cache:
         await comparison_cache.close()
 
     logger.info("Cleanup completed")
 
+# Taste vectors are updated by this process's interaction tracker and look up vehicle
+# embeddings in the similarity graph, so the graph is built here too
+@app.on_event("startup")
+async def start_taste_vectors():
+    try:
+        from src.repositories.listing_repository import get_listing_repository
+        from src.repositories.user_taste_repository import get_user_taste_repository
+
+        get_vehicle_similarity_graph().start_background_rebuild(get_listing_repository().list_active_embeddings)
+
+        taste_repo = get_user_taste_repository()
+        store = get_taste_vector_store()
+        store.load_rows(await taste_repo.load_rows())
+        store.start_background_flush(taste_repo.save_rows)
+    except Exception as e:
+        logger.warning(f"⚠️ User taste vectors unavailable, interactions won't update them: {e}")
+
+@app.on_event("shutdown")
+async def stop_taste_vectors():
+    from src.repositories.user_taste_repository import get_user_taste_repository
+
+    await get_vehicle_similarity_graph().stop_background_rebuild()
+    store = get_taste_vector_store()
+    await store.stop_background_flush()
+    try:
+        await store.flush(get_user_taste_repository().save_rows)
+    except Exception as e:
+        logger.warning(f"⚠️ Final taste vector flush failed: {e}")
+
+# Interaction event log: this process's tracker appends to it, so flush buffered events
+# every few seconds, compact day partitions, and flush the rest on shutdown
+@app.on_event("startup")
+async def start_interaction_log():
+    get_interaction_event_log().start_background_tasks()
+
+@app.on_event("shutdown")
+async def stop_interaction_log():
+    await get_interaction_event_log().stop_background_tasks()
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
@@ -26,6 +26,20 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from starlette.requests import Request
 
+from src.realtime_services.sse_event_broker import (
+    INVENTORY_TOPIC,
+    OVERFLOW,
+    get_sse_broker,
+    user_topic
+)
+from src.realtime_services.inventory_snapshot import (
+    INVENTORY_DELTA_EVENT,
+    ENCODING_IDENTITY,
+    get_inventory_snapshot,
+    negotiate_encoding,
+    transform_vehicle_for_frontend
+)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -35,63 +49,8 @@ vehicle_updates_router = APIRouter(prefix="/api/vehicles", tags=["vehicle-update
 # Active SSE connections tracking
 active_sse_connections: Dict[str, Any] = {}
 
-
-def transform_vehicle_for_frontend(row: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Transform database row to frontend format.
-
-    Maps database field names to frontend expectations:
-    - odometer -> mileage
-    - description_text -> description
-    - exterior_color -> color
-    - body_style -> body_type
-    - asking_price -> price (fallback to estimated_price, auction_forecast)
-    - status -> availabilityStatus (active -> available)
-    """
-    # Map status to availabilityStatus
-    status = row.get('status', 'active')
-    availability_status = 'available' if status == 'active' else 'reserved'
-
-    # Get price with fallbacks
-    price = row.get('asking_price') or row.get('estimated_price') or row.get('auction_forecast')
-
-    return {
-        'id': row.get('id', ''),
-        'vin': row.get('vin', ''),
-        'year': row.get('year', 0),
-        'make': row.get('make', ''),
-        'model': row.get('model', ''),
-        'trim': row.get('trim'),
-        # Map odometer -> mileage
-        'mileage': row.get('odometer'),
-        'drivetrain': row.get('drivetrain'),
-        'transmission': row.get('transmission'),
-        # Map exterior_color -> color
-        'color': row.get('exterior_color'),
-        'fuel_type': row.get('fuel_type'),
-        # Map body_style -> body_type (fallback to vehicle_type)
-        'body_type': row.get('body_style') or row.get('vehicle_type'),
-        # Map condition_grade -> condition
-        'condition': row.get('condition_grade'),
-        # Map description_text -> description
-        'description': row.get('description_text'),
-        'images': [],  # Will be populated when image storage is implemented
-        'features': None,  # Will be populated from features table
-        'matchScore': row.get('condition_score'),
-        'availabilityStatus': availability_status,
-        'currentViewers': None,
-        'ottoRecommendation': None,
-        'range': None,  # Will be calculated for EVs
-        'isFavorited': False,
-        # Map asking_price -> price with fallbacks
-        'price': price,
-        'originalPrice': None,
-        'savings': None,
-        # Required field - use empty string if null
-        'seller_id': row.get('seller_id') or '',
-        'created_at': row.get('created_at'),
-        'updated_at': row.get('updated_at'),
-    }
+# Seconds without events before a keep-alive comment is sent
+KEEPALIVE_INTERVAL_SECONDS = 30
 
 
 # ============================================================================
@@ -171,7 +130,9 @@ async def verify_jwt_token(token: str) -> Dict[str, Any]:
 
 async def vehicle_update_event_stream(
     user_id: str,
-    request: Request
+    request: Request,
+    last_event_id: Optional[str] = None,
+    encoding: str = ENCODING_IDENTITY
 ) -> AsyncGenerator[str, None]:
     """
     Generate SSE events for vehicle updates
@@ -179,16 +140,25 @@ async def vehicle_update_event_stream(
     Args:
         user_id: Authenticated user ID
         request: FastAPI request object
+        last_event_id: Last-Event-ID sent by a reconnecting EventSource
+        encoding: Snapshot framing: identity, gzip or br
 
     Yields:
         SSE-formatted event strings
 
     Events:
-        - event: vehicle_update
-        - data: {vehicles: [...], timestamp: ..., requestId: ...}
-        - id: unique event ID
+        - event: vehicle_update (or inventory_snapshot when compressed)
+        - data: {vehicles: [...], timestamp: ..., requestId: ..., version: ...}
+        - event: inventory_delta
+        - data: {version: ..., baseVersion: ..., added: [...], removed: [...], changed: {...}}
+        - id: per-topic cursor list used for Last-Event-ID replay
     """
-    connection_id = f"{user_id}-{uuid4().hex[:8]}"
+    broker = get_sse_broker()
+    await broker.start()
+
+    # Subscribe before building the snapshot so no event published meanwhile is lost
+    subscription = broker.subscribe(user_id)
+    connection_id = subscription.connection_id
 
     logger.info(f"[SSE] Vehicle update stream started: {connection_id}")
 
@@ -200,74 +170,50 @@ async def vehicle_update_event_stream(
     }
 
     try:
-        # Fetch initial vehicles from database
-        from src.services.supabase_client import get_supabase_client_singleton
-
-        supabase = get_supabase_client_singleton()
-        response = supabase.table('vehicle_listings') \
-            .select('*') \
-            .eq('status', 'active') \
-            .order('created_at', desc=True) \
-            .limit(100) \
-            .execute()
-
-        raw_vehicles = response.data if response.data else []
-
-        # Fetch images for all vehicles in one batch query
-        listing_ids = [row.get('id') for row in raw_vehicles]
-        images_by_listing = {}
-        if listing_ids:
-            images_result = supabase.table('vehicle_images') \
-                .select('*') \
-                .in_('listing_id', listing_ids) \
-                .execute()
-
-            # Group images by listing_id
-            for img_row in images_result.data:
-                listing_id = img_row.get('listing_id')
-                if listing_id not in images_by_listing:
-                    images_by_listing[listing_id] = []
-
-                # Transform database image to frontend format
-                image_url = img_row.get('web_url') or img_row.get('detail_url') or img_row.get('thumbnail_url')
-                if image_url:
-                    images_by_listing[listing_id].append({
-                        'url': image_url,
-                        'description': img_row.get('description') or '',
-                        'category': img_row.get('category') or 'hero',
-                        'altText': img_row.get('suggested_alt') or ''
-                    })
-
-        # Transform database rows to frontend format with images
-        initial_vehicles = []
-        for row in raw_vehicles:
-            vehicle = transform_vehicle_for_frontend(row)
-            listing_id = row.get('id')
-            vehicle['images'] = images_by_listing.get(listing_id, [])
-            initial_vehicles.append(vehicle)
-
-        logger.info(f"[SSE] Sending {len(initial_vehicles)} initial vehicles to client")
-
-        # Send initial connection event with actual vehicles
         yield f": connected\n\n"
-        yield f"event: vehicle_update\n"
-        yield f"data: {json.dumps({'vehicles': initial_vehicles, 'timestamp': datetime.utcnow().isoformat(), 'requestId': 'connection-established'})}\n"
-        yield f"id: {connection_id}-init\n\n"
 
-        # Keep connection alive and listen for updates
-        # In production, this would subscribe to a pub/sub system (Redis, Kafka, etc.)
+        # A reconnecting client only needs what it missed, if the ring buffers still hold it
+        snapshot_version = 0
+        missed = broker.replay(subscription, last_event_id)
+        if missed is not None:
+            logger.info(f"[SSE] Replaying {len(missed)} missed events to {connection_id}")
+            for event in missed:
+                frame = broker.format_frame(subscription, event)
+                if frame:
+                    yield frame
+        else:
+            # Shared pre-serialized snapshot: no per-connection queries or encoding
+            frame, snapshot_version = await get_inventory_snapshot().snapshot_frame(encoding)
+            yield f"id: {subscription.last_event_id}\n{frame}"
+
+        # Stream published events; keep-alive comments when idle
         while True:
             # Check if client disconnected
             if await request.is_disconnected():
                 logger.info(f"[SSE] Client disconnected: {connection_id}")
                 break
 
-            # Send keep-alive comment every 30 seconds
-            yield ": keep-alive\n\n"
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=KEEPALIVE_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is OVERFLOW:
+                # Client fell too far behind; it reconnects and replays via Last-Event-ID
+                logger.warning(f"[SSE] Closing lagging stream: {connection_id}")
+                break
+
+            if event.event == INVENTORY_DELTA_EVENT and event.seq <= snapshot_version:
+                # Already contained in the snapshot this client received
+                continue
 
-            # Wait for next iteration or new event
-            # In production, this would await on a queue or pub/sub message
-            await asyncio.sleep(30)
+            frame = broker.format_frame(subscription, event)
+            if frame:
+                yield frame
 
     except asyncio.CancelledError:
         logger.info(f"[SSE] Stream cancelled: {connection_id}")
@@ -275,49 +221,53 @@ async def vehicle_update_event_stream(
         logger.error(f"[SSE] Stream error for {connection_id}: {e}")
     finally:
         # Clean up connection
+        broker.unsubscribe(subscription)
         if connection_id in active_sse_connections:
             del active_sse_connections[connection_id]
         logger.info(f"[SSE] Vehicle update stream ended: {connection_id}")
 
 
-async def broadcast_vehicle_update(user_id: str, vehicles: list[Dict[str, Any]], request_id: str):
+async def broadcast_vehicle_update(user_id: str, vehicles: list[Dict[str, Any]], request_id: str) -> int:
     """
     Broadcast a vehicle update to a specific user's SSE connections
 
     This is a helper function for other parts of the system to trigger updates.
-    In production, this would publish to a pub/sub system.
+    The event is published on the user's topic; with Redis configured every
+    worker holding a stream for the user receives it.
 
     Args:
         user_id: Target user ID
         vehicles: List of vehicles to send
         request_id: Unique request ID for tracking
-    """
-    # Find active connections for this user
-    user_connections = [
-        (conn_id, conn) for conn_id, conn in active_sse_connections.items()
-        if conn["user_id"] == user_id
-    ]
-
-    if not user_connections:
-        logger.warning(f"[SSE] No active connections for user {user_id}")
-        return
 
-    # Prepare SSE event
+    Returns:
+        Sequence number of the published event
+    """
     event_data = {
         "vehicles": vehicles,
         "timestamp": datetime.utcnow().isoformat(),
         "requestId": request_id
     }
 
-    # In production with pub/sub, we would publish here
-    # For now, we just log that an update would be sent
-    logger.info(f"[SSE] Would broadcast vehicle update to {len(user_connections)} connections: {request_id}")
+    broker = get_sse_broker()
+    await broker.start()
+    event = await broker.publish(user_topic(user_id), "vehicle_update", event_data)
+
+    logger.info(f"[SSE] Published vehicle update for user {user_id}: {request_id}")
+    return event.seq
 
-    # TODO: Implement actual broadcast mechanism
-    # Options:
-    # 1. Redis pub/sub
-    # 2. Internal queue with background task
-    # 3. Direct write to connection if same process
+
+async def broadcast_availability_update(update: AvailabilityStatusUpdateEvent) -> int:
+    """
+    Broadcast an availability status change to every SSE connection
+
+    Returns:
+        Sequence number of the published event
+    """
+    broker = get_sse_broker()
+    await broker.start()
+    event = await broker.publish(INVENTORY_TOPIC, "availability_status_update", update.model_dump())
+    return event.seq
 
 
 # ============================================================================
@@ -327,11 +277,18 @@ async def broadcast_vehicle_update(user_id: str, vehicles: list[Dict[str, Any]],
 @vehicle_updates_router.get("/updates")
 async def get_vehicle_updates(
     request: Request,
-    token: Optional[str] = Query(None, description="JWT authentication token (optional - Epic 4 not yet implemented)")
+    token: Optional[str] = Query(None, description="JWT authentication token (optional - Epic 4 not yet implemented)"),
+    lastEventId: Optional[str] = Query(None, description="Resume cursor for clients that cannot set the Last-Event-ID header"),
+    encoding: Optional[str] = Query(None, description="Snapshot compression preference, e.g. 'br,gzip'")
 ):
     """
     SSE endpoint for real-time vehicle updates
 
+    A reconnecting EventSource sends Last-Event-ID; events still held in the
+    broker's ring buffers are replayed instead of a full snapshot. New clients
+    get the shared inventory snapshot (compressed when ``encoding`` asks for
+    gzip or br) followed by inventory_delta events.
+
     Story 3-3b: Replaces WebSocket vehicle_update messages
 
     Returns:
@@ -360,11 +317,12 @@ async def get_vehicle_updates(
     else:
         logger.info("[SSE] Allowing anonymous connection (Epic 4 not yet implemented)")
 
-    logger.info(f"[SSE] New vehicle updates connection: user_id={user_id}")
+    last_event_id = request.headers.get("last-event-id") or lastEventId
+    logger.info(f"[SSE] New vehicle updates connection: user_id={user_id}, resume={last_event_id}")
 
     # Return SSE stream
     return StreamingResponse(
-        vehicle_update_event_stream(user_id, request),
+        vehicle_update_event_stream(user_id, request, last_event_id, negotiate_encoding(encoding)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -397,13 +355,14 @@ async def trigger_vehicle_update(
     if not request_id:
         request_id = f"trigger-{uuid4().hex[:8]}"
 
-    await broadcast_vehicle_update(user_id, vehicles, request_id)
+    seq = await broadcast_vehicle_update(user_id, vehicles, request_id)
 
     return {
         "status": "queued",
         "user_id": user_id,
         "request_id": request_id,
-        "vehicle_count": len(vehicles)
+        "vehicle_count": len(vehicles),
+        "event_seq": seq
     }
 
 
@@ -417,6 +376,8 @@ async def get_active_connections():
     """
     return {
         "active_connections": len(active_sse_connections),
+        "broker": get_sse_broker().get_stats(),
+        "inventory_snapshot": get_inventory_snapshot().get_stats(),
         "connections": [
             {
                 "connection_id": conn_id,
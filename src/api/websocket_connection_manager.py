@@ -0,0 +1,306 @@
+"""
+WebSocket Connection Manager for Otto.AI
+Per-connection send queues and lock-free fan-out for the conversation WebSocket
+
+Every connection owns a bounded outbound queue drained by its own writer task,
+so a slow client only ever delays itself. Senders never await the socket: a
+message is serialized once and enqueued on each target connection. When a
+queue overflows the connection is either closed (the client reconnects and
+resyncs) or its oldest pending message is dropped, depending on the policy.
+
+A user_id -> connection_ids index makes per-user limits and per-user
+broadcasts O(connections of that user) instead of a scan over all sockets.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+from uuid import uuid4
+
+from fastapi import WebSocket, HTTPException
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_CLOSE = "close"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+
+_CLOSE_SENTINEL = None
+
+
+class ConnectionManager:
+    """Manages WebSocket connections with per-connection writers and heartbeat"""
+
+    def __init__(
+        self,
+        max_connections_per_user: int = 5,
+        connection_timeout: int = 300,
+        heartbeat_interval: int = 30,
+        send_queue_size: int = 256,
+        send_timeout: float = 10.0,
+        overflow_policy: str = OVERFLOW_CLOSE
+    ):
+        if overflow_policy not in (OVERFLOW_CLOSE, OVERFLOW_DROP_OLDEST):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.max_connections_per_user = max_connections_per_user
+        self.connection_timeout = connection_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.send_queue_size = send_queue_size
+        self.send_timeout = send_timeout
+        self.overflow_policy = overflow_policy
+
+        self.connections: Dict[str, Dict[str, Any]] = {}
+        self.user_connections: Dict[str, Set[str]] = defaultdict(set)
+        self.heartbeat_task = None
+        # Strong references to fire-and-forget disconnects until they finish
+        self._disconnect_tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            'messages_enqueued': 0,
+            'messages_sent': 0,
+            'messages_dropped': 0,
+            'overflow_closes': 0,
+            'send_failures': 0,
+            'broadcasts': 0
+        }
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> str:
+        """Accept and track a new WebSocket connection"""
+        await websocket.accept()
+
+        # Check per-user connection limit
+        if len(self.user_connections.get(user_id, ())) >= self.max_connections_per_user:
+            await websocket.close(code=1008, reason="Too many connections")
+            raise HTTPException(status_code=429, detail="Too many connections")
+
+        # Generate unique connection ID
+        connection_id = str(uuid4())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.send_queue_size)
+
+        connection = {
+            "websocket": websocket,
+            "user_id": user_id,
+            "connected_at": datetime.now(),
+            "last_heartbeat": datetime.now(),
+            "message_count": 0,
+            "dropped_count": 0,
+            "is_alive": True,
+            "queue": queue
+        }
+        self.connections[connection_id] = connection
+        self.user_connections[user_id].add(connection_id)
+        connection["writer"] = asyncio.create_task(self._writer(connection_id, connection))
+
+        logger.info(f"WebSocket connected: {connection_id} for user {user_id}")
+        return connection_id
+
+    async def _writer(self, connection_id: str, connection: Dict[str, Any]):
+        """Drain one connection's queue onto its socket"""
+        queue: asyncio.Queue = connection["queue"]
+        websocket = connection["websocket"]
+
+        while True:
+            text = await queue.get()
+            try:
+                if text is _CLOSE_SENTINEL:
+                    return
+                await asyncio.wait_for(websocket.send_text(text), timeout=self.send_timeout)
+                connection["message_count"] += 1
+                self.stats['messages_sent'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error sending message to {connection_id}: {e}")
+                self.stats['send_failures'] += 1
+                connection["is_alive"] = False
+                self._schedule_disconnect(connection_id)
+                return
+            finally:
+                queue.task_done()
+
+    def _schedule_disconnect(self, connection_id: str) -> None:
+        """Disconnect without awaiting, keeping the task referenced until it finishes"""
+        task = asyncio.create_task(self.disconnect(connection_id))
+        self._disconnect_tasks.add(task)
+        task.add_done_callback(self._disconnect_done)
+
+    def _disconnect_done(self, task: asyncio.Task) -> None:
+        self._disconnect_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background disconnect failed: {task.exception()}")
+
+    async def disconnect(self, connection_id: str):
+        """Remove a connection, stop its writer and close the socket"""
+        connection = self.connections.pop(connection_id, None)
+        if connection is None:
+            return
+
+        connection["is_alive"] = False
+        user_ids = self.user_connections.get(connection["user_id"])
+        if user_ids is not None:
+            user_ids.discard(connection_id)
+            if not user_ids:
+                del self.user_connections[connection["user_id"]]
+
+        writer = connection.get("writer")
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
+        self._drain(connection["queue"])
+
+        try:
+            await connection["websocket"].close()
+        except Exception as e:
+            logger.warning(f"Error closing WebSocket {connection_id}: {e}")
+
+        logger.info(f"WebSocket disconnected: {connection_id}")
+
+    @staticmethod
+    def _drain(queue: asyncio.Queue):
+        """Discard pending messages so join() callers are released"""
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            queue.task_done()
+
+    def _enqueue(self, connection_id: str, text: str) -> bool:
+        """Queue pre-serialized text for one connection without awaiting the socket"""
+        connection = self.connections.get(connection_id)
+        if connection is None or not connection["is_alive"]:
+            return False
+
+        queue: asyncio.Queue = connection["queue"]
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            if self.overflow_policy == OVERFLOW_CLOSE:
+                logger.warning(f"Send queue full for {connection_id}, closing slow connection")
+                self.stats['overflow_closes'] += 1
+                connection["is_alive"] = False
+                self._schedule_disconnect(connection_id)
+                return False
+
+            # Drop the oldest pending message to make room for the newest
+            queue.get_nowait()
+            queue.task_done()
+            queue.put_nowait(text)
+            connection["dropped_count"] += 1
+            self.stats['messages_dropped'] += 1
+
+        self.stats['messages_enqueued'] += 1
+        return True
+
+    async def send_message(self, connection_id: str, message: Dict[str, Any]) -> bool:
+        """Queue a message for a specific connection"""
+        if connection_id not in self.connections:
+            logger.warning(f"Connection {connection_id} not found")
+            return False
+        return self._enqueue(connection_id, json.dumps(message))
+
+    async def broadcast_to_user(self, user_id: str, message: Dict[str, Any]) -> int:
+        """Broadcast message to all connections for a user"""
+        text = json.dumps(message)
+        self.stats['broadcasts'] += 1
+        return sum(
+            self._enqueue(connection_id, text)
+            for connection_id in list(self.user_connections.get(user_id, ()))
+        )
+
+    async def broadcast(self, message: Dict[str, Any], user_ids: Optional[Iterable[str]] = None) -> int:
+        """Broadcast one message to many users (or everyone), serialized once"""
+        text = json.dumps(message)
+        self.stats['broadcasts'] += 1
+
+        if user_ids is None:
+            targets = list(self.connections.keys())
+        else:
+            targets = [
+                connection_id
+                for user_id in user_ids
+                for connection_id in self.user_connections.get(user_id, ())
+            ]
+
+        return sum(self._enqueue(connection_id, text) for connection_id in targets)
+
+    async def flush(self, connection_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued for a connection has been written"""
+        connection = self.connections.get(connection_id)
+        if connection is None:
+            return False
+        try:
+            await asyncio.wait_for(connection["queue"].join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def get_connection_stats(self) -> Dict[str, Any]:
+        """Get statistics about active connections"""
+        total_connections = len(self.connections)
+
+        # Calculate average message count
+        avg_messages = 0
+        if self.connections:
+            avg_messages = sum(c["message_count"] for c in self.connections.values()) / total_connections
+
+        return {
+            "total_connections": total_connections,
+            "unique_users": len(self.user_connections),
+            "average_messages_per_connection": avg_messages,
+            "max_connections_per_user": self.max_connections_per_user,
+            "queued_messages": sum(c["queue"].qsize() for c in self.connections.values()),
+            **self.stats
+        }
+
+    async def start_heartbeat_monitor(self):
+        """Start background task to monitor connection health"""
+        async def heartbeat_loop():
+            while True:
+                await asyncio.sleep(self.heartbeat_interval)
+                await self.check_heartbeats()
+
+        self.heartbeat_task = asyncio.create_task(heartbeat_loop())
+        logger.info("Heartbeat monitor started")
+
+    async def check_heartbeats(self):
+        """Check connection health and send heartbeats"""
+        now = datetime.now()
+        dead_connections = []
+        to_ping = []
+
+        for conn_id, conn in list(self.connections.items()):
+            # Check if connection has timed out
+            time_since_heartbeat = (now - conn["last_heartbeat"]).total_seconds()
+
+            if time_since_heartbeat > self.connection_timeout:
+                dead_connections.append(conn_id)
+            else:
+                to_ping.append(conn_id)
+
+        # Ping concurrently so one unresponsive client cannot hold up the sweep
+        results = await asyncio.gather(
+            *(self._ping(conn_id, now) for conn_id in to_ping),
+            return_exceptions=True
+        )
+        dead_connections.extend(
+            conn_id for conn_id, ok in zip(to_ping, results) if ok is not True
+        )
+
+        # Clean up dead connections
+        for conn_id in dead_connections:
+            await self.disconnect(conn_id)
+
+    async def _ping(self, connection_id: str, now: datetime) -> bool:
+        conn = self.connections.get(connection_id)
+        if conn is None:
+            return True
+        try:
+            await asyncio.wait_for(conn["websocket"].ping(), timeout=self.send_timeout)
+            conn["last_heartbeat"] = now
+            return True
+        except Exception as e:
+            logger.warning(f"Heartbeat failed for {connection_id}: {e}")
+            return False
@@ -22,7 +22,9 @@ from src.services.voice_input_service import VoiceInputService, VoiceResult
 from src.models.voice_models import VoiceCommand, parse_vehicle_command, VoiceState
 from src.memory.zep_client import ZepClient
 from src.conversation.groq_client import GroqClient
+from src.conversation.intent_classifier import local_intent_classifier_from_env
 from src.config.conversation_config import get_conversation_config, start_config_hot_reload, stop_config_hot_reload
+from src.api.websocket_connection_manager import ConnectionManager
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -55,144 +57,13 @@ service_health = {
 }
 
 
-class ConnectionManager:
-    """Manages WebSocket connections with pooling and heartbeat"""
-
-    def __init__(self):
-        self.connections: Dict[str, Dict[str, Any]] = {}
-        self.lock = asyncio.Lock()
-        self.heartbeat_task = None
-
-    async def connect(self, websocket: WebSocket, user_id: str) -> str:
-        """Accept and track a new WebSocket connection"""
-        await websocket.accept()
-
-        # Generate unique connection ID
-        connection_id = str(uuid4())
-
-        async with self.lock:
-            # Check per-user connection limit
-            user_connections = [c for c in self.connections.values() if c["user_id"] == user_id]
-            if len(user_connections) >= max_connections_per_user:
-                await websocket.close(code=1008, reason="Too many connections")
-                raise HTTPException(status_code=429, detail="Too many connections")
-
-            # Store connection
-            self.connections[connection_id] = {
-                "websocket": websocket,
-                "user_id": user_id,
-                "connected_at": datetime.now(),
-                "last_heartbeat": datetime.now(),
-                "message_count": 0,
-                "is_alive": True
-            }
-
-        logger.info(f"WebSocket connected: {connection_id} for user {user_id}")
-        return connection_id
-
-    async def disconnect(self, connection_id: str):
-        """Remove a connection"""
-        async with self.lock:
-            if connection_id in self.connections:
-                connection = self.connections[connection_id]
-                connection["is_alive"] = False
-
-                try:
-                    await connection["websocket"].close()
-                except Exception as e:
-                    logger.warning(f"Error closing WebSocket {connection_id}: {e}")
-
-                del self.connections[connection_id]
-                logger.info(f"WebSocket disconnected: {connection_id}")
-
-    async def send_message(self, connection_id: str, message: Dict[str, Any]):
-        """Send a message to a specific connection"""
-        async with self.lock:
-            if connection_id not in self.connections:
-                logger.warning(f"Connection {connection_id} not found")
-                return False
-
-            connection = self.connections[connection_id]
-            if not connection["is_alive"]:
-                return False
-
-            try:
-                await connection["websocket"].send_text(json.dumps(message))
-                connection["message_count"] += 1
-                return True
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                connection["is_alive"] = False
-                return False
-
-    async def broadcast_to_user(self, user_id: str, message: Dict[str, Any]):
-        """Broadcast message to all connections for a user"""
-        sent_count = 0
-        async with self.lock:
-            for conn_id, conn in list(self.connections.items()):
-                if conn["user_id"] == user_id and conn["is_alive"]:
-                    if await self.send_message(conn_id, message):
-                        sent_count += 1
-
-        return sent_count
-
-    async def get_connection_stats(self) -> Dict[str, Any]:
-        """Get statistics about active connections"""
-        async with self.lock:
-            total_connections = len(self.connections)
-            unique_users = len(set(c["user_id"] for c in self.connections.values()))
-
-            # Calculate average message count
-            avg_messages = 0
-            if self.connections:
-                avg_messages = sum(c["message_count"] for c in self.connections.values()) / total_connections
-
-            return {
-                "total_connections": total_connections,
-                "unique_users": unique_users,
-                "average_messages_per_connection": avg_messages,
-                "max_connections_per_user": max_connections_per_user
-            }
-
-    async def start_heartbeat_monitor(self):
-        """Start background task to monitor connection health"""
-        async def heartbeat_loop():
-            while True:
-                await asyncio.sleep(heartbeat_interval)
-                await self.check_heartbeats()
-
-        self.heartbeat_task = asyncio.create_task(heartbeat_loop())
-        logger.info("Heartbeat monitor started")
-
-    async def check_heartbeats(self):
-        """Check connection health and send heartbeats"""
-        now = datetime.now()
-        dead_connections = []
-
-        async with self.lock:
-            for conn_id, conn in list(self.connections.items()):
-                # Check if connection has timed out
-                time_since_heartbeat = (now - conn["last_heartbeat"]).total_seconds()
-
-                if time_since_heartbeat > connection_timeout:
-                    dead_connections.append(conn_id)
-                    continue
-
-                # Send heartbeat ping
-                try:
-                    await conn["websocket"].ping()
-                    conn["last_heartbeat"] = now
-                except Exception as e:
-                    logger.warning(f"Heartbeat failed for {conn_id}: {e}")
-                    dead_connections.append(conn_id)
-
-        # Clean up dead connections
-        for conn_id in dead_connections:
-            await self.disconnect(conn_id)
-
-
 # Initialize connection manager and services
-connection_manager = ConnectionManager()
+connection_manager = ConnectionManager(
+    max_connections_per_user=max_connections_per_user,
+    connection_timeout=connection_timeout,
+    heartbeat_interval=heartbeat_interval,
+    send_queue_size=int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "256"))
+)
 conversation_agent = None
 voice_service = None
 cache = None
@@ -547,7 +418,8 @@ async def initialize_conversation_services():
         zep_client = ZepClient(api_key=config.zep_api_key, cache=cache)
         groq_client = GroqClient(
             api_key=config.groq_api_key or config.openrouter_api_key,
-            base_url=config.openrouter_base_url if config.openrouter_api_key else None
+            base_url=config.openrouter_base_url if config.openrouter_api_key else None,
+            intent_classifier=local_intent_classifier_from_env()
         )
 
         conversation_agent = ConversationAgent(
@@ -667,8 +539,9 @@ async def conversation_endpoint(websocket: WebSocket, user_id: str):
             await connection_manager.send_message(connection_id, error_message)
 
     finally:
-        # Cleanup
+        # Cleanup: give queued messages (e.g. a final error) a moment to go out
         if connection_id:
+            await connection_manager.flush(connection_id, timeout=1.0)
             await connection_manager.disconnect(connection_id)
 
 
@@ -736,9 +609,16 @@ async def process_conversation_message(connection_id: str, user_id: str, session
 
             # Get response from conversation agent with timeout
             if conversation_agent:
-                # Send initial acknowledgment immediately
-                ack_response = await get_fallback_response("slow_response")
-                await connection_manager.send_message(connection_id, ack_response)
+                # Greetings and other non-data messages the local classifier is sure
+                # about answer quickly, so only acknowledge messages that need data
+                local_intent = await conversation_agent.groq_client.analyze_message_intent(
+                    voice_result.transcript if voice_result else content,
+                    local_only=True
+                )
+                if not (local_intent['success'] and not local_intent['analysis']['requires_data']):
+                    # Send initial acknowledgment immediately
+                    ack_response = await get_fallback_response("slow_response")
+                    await connection_manager.send_message(connection_id, ack_response)
 
                 # Process with timeout and circuit breaker
                 agent_response = await enforce_response_timeout(
@@ -14,6 +14,20 @@ from .multi_level_cache import (
     cache_manager,
     cached
 )
+from .dialogue_state_store import (
+    DialogueStateStore,
+    BoundedLRUCache,
+    UserState,
+    StateVersionConflict,
+    create_dialogue_state_store,
+    register_state_type
+)
+from .llm_response_cache import (
+    LLMResponseCache,
+    LLMCallPolicy,
+    DEFAULT_LLM_CALL_POLICIES,
+    get_llm_response_cache
+)
 
 __all__ = [
     'MultiLevelCache',
@@ -24,5 +38,15 @@ __all__ = [
     'CacheMetrics',
     'CacheLevel',
     'cache_manager',
-    'cached'
+    'cached',
+    'DialogueStateStore',
+    'BoundedLRUCache',
+    'UserState',
+    'StateVersionConflict',
+    'create_dialogue_state_store',
+    'register_state_type',
+    'LLMResponseCache',
+    'LLMCallPolicy',
+    'DEFAULT_LLM_CALL_POLICIES',
+    'get_llm_response_cache'
 ]
\ No newline at end of file
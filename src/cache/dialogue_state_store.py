@@ -0,0 +1,415 @@
+"""
+Dialogue State Store for Otto.AI
+Externalized, bounded per-user conversation state shared across workers
+
+Tiers:
+1. Local - bounded LRU + TTL map of live UserState objects (per worker)
+2. Redis - one hash per user, one field per namespace plus a version field
+
+Values are tagged JSON; only types registered with register_state_type are
+reconstructed on load.
+
+State is loaded lazily at the start of a turn and written back once at the end.
+Writes use optimistic versioning: a Lua compare-and-set only applies when the
+stored version matches the version that was read, otherwise the dirty
+namespaces are re-applied on top of the newer remote state.
+"""
+
+import os
+import json
+import time
+import zlib
+import logging
+import dataclasses
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional, Set
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+VERSION_FIELD = "_v"
+COMPRESSION_THRESHOLD_BYTES = 512
+
+# KEYS[1] = user hash, ARGV[1] = expected version, ARGV[2] = ttl, ARGV[3..] = field/value pairs
+_COMPARE_AND_SET_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], '_v')
+if not current then current = '0' end
+if current ~= ARGV[1] then
+    return -1
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local version = redis.call('HINCRBY', KEYS[1], '_v', 1)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return version
+"""
+
+
+class StateVersionConflict(Exception):
+    """Raised when a state write keeps losing the optimistic version check"""
+
+
+# Dataclasses and Enums allowed to round-trip through shared Redis. Decoding
+# only ever constructs these types, never arbitrary classes.
+_STATE_TYPES: Dict[str, type] = {}
+
+
+def register_state_type(cls: type) -> type:
+    """Allow a dataclass or Enum to be stored as dialogue state (usable as a decorator)"""
+    _STATE_TYPES[f"{cls.__module__}.{cls.__qualname__}"] = cls
+    return cls
+
+
+def _type_name(value: Any) -> str:
+    name = f"{type(value).__module__}.{type(value).__qualname__}"
+    if name not in _STATE_TYPES:
+        raise TypeError(f"{name} is not a registered state type")
+    return name
+
+
+def _to_json(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return {"__enum__": _type_name(value), "value": _to_json(value.value)}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            "__dataclass__": _type_name(value),
+            "fields": {f.name: _to_json(getattr(value, f.name)) for f in dataclasses.fields(value) if f.init}
+        }
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_to_json(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [_to_json(item) for item in value]}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith("__") for key in value):
+            return {key: _to_json(item) for key, item in value.items()}
+        return {"__items__": [[_to_json(key), _to_json(item)] for key, item in value.items()]}
+    raise TypeError(f"Unsupported state value type: {type(value).__name__}")
+
+
+def _from_json(obj: Dict[str, Any]) -> Any:
+    """json object_hook; inner objects are already decoded"""
+    if "__dataclass__" in obj or "__enum__" in obj:
+        name = obj.get("__dataclass__") or obj["__enum__"]
+        cls = _STATE_TYPES.get(name)
+        if cls is None:
+            raise ValueError(f"{name} is not a registered state type")
+        return cls(**obj["fields"]) if "__dataclass__" in obj else cls(obj["value"])
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    if "__tuple__" in obj:
+        return tuple(obj["__tuple__"])
+    if "__set__" in obj:
+        return set(obj["__set__"])
+    if "__items__" in obj:
+        return {(tuple(key) if isinstance(key, list) else key): item for key, item in obj["__items__"]}
+    return obj
+
+
+def encode_state_value(value: Any) -> bytes:
+    """Compact encoding: tagged JSON, zlib-compressed above a small threshold"""
+    data = json.dumps(_to_json(value), separators=(",", ":")).encode()
+    if len(data) > COMPRESSION_THRESHOLD_BYTES:
+        return b"c" + zlib.compress(data, 6)
+    return b"j" + data
+
+
+def decode_state_value(data: bytes) -> Any:
+    """Inverse of encode_state_value"""
+    if data[:1] == b"c":
+        return json.loads(zlib.decompress(data[1:]), object_hook=_from_json)
+    if data[:1] == b"j":
+        return json.loads(data[1:], object_hook=_from_json)
+    raise ValueError(f"Unknown state encoding {data[:1]!r}")
+
+
+class BoundedLRUCache(MutableMapping):
+    """Dict-like LRU map with a per-entry TTL and a hard size limit"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def _expired(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and time.monotonic() > expires_at
+
+    def __getitem__(self, key: str) -> Any:
+        expires_at, value = self._data[key]
+        if self._expired(expires_at):
+            del self._data[key]
+            raise KeyError(key)
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        if self._expired(entry[0]):
+            del self._data[key]
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        self._purge_expired()
+        return iter(list(self._data.keys()))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp is not None and now > exp]
+        for key in expired:
+            del self._data[key]
+
+
+@dataclass
+class UserState:
+    """Per-user state record split into independently written namespaces"""
+    user_id: str
+    version: int = 0
+    namespaces: Dict[str, Any] = field(default_factory=dict)
+    dirty: Set[str] = field(default_factory=set)
+
+    def get(self, namespace: str, default: Any = None) -> Any:
+        return self.namespaces.get(namespace, default)
+
+    def set(self, namespace: str, value: Any) -> None:
+        self.namespaces[namespace] = value
+        self.dirty.add(namespace)
+
+    def clear(self, namespace: str) -> None:
+        if namespace in self.namespaces:
+            self.set(namespace, None)
+
+
+class DialogueStateStore:
+    """Two-tier (local LRU+TTL over Redis hash) store for per-user dialogue state"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        local_max_entries: int = 10000,
+        local_ttl_seconds: int = 900,
+        redis_ttl_seconds: int = 7 * 86400,
+        key_prefix: str = "otto_ai:state:",
+        max_write_retries: int = 3
+    ):
+        self.redis_url = redis_url
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.key_prefix = key_prefix
+        self.max_write_retries = max_write_retries
+        self.local = BoundedLRUCache(max_entries=local_max_entries, ttl_seconds=local_ttl_seconds)
+        self.redis_client = None
+        self._cas_script = None
+
+        self.stats = {
+            'loads': 0,
+            'local_hits': 0,
+            'remote_loads': 0,
+            'saves': 0,
+            'skipped_saves': 0,
+            'conflicts': 0,
+            'bytes_written': 0,
+            'errors': 0
+        }
+
+    async def initialize(self) -> bool:
+        """Connect the Redis tier; the store stays usable (local only) without it"""
+        if not self.redis_url:
+            logger.info("Dialogue state store running with local tier only")
+            return True
+
+        if not REDIS_AVAILABLE:
+            logger.warning("⚠️ Redis module not available, dialogue state store is local only")
+            return True
+
+        try:
+            client = redis.from_url(self.redis_url)
+            await client.ping()
+            self.redis_client = client
+            self._cas_script = client.register_script(_COMPARE_AND_SET_SCRIPT)
+            logger.info("✅ Dialogue state store connected to Redis")
+        except Exception as e:
+            logger.warning(f"⚠️ Dialogue state Redis tier unavailable, using local tier only: {e}")
+            self.redis_client = None
+
+        return True
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    async def load(self, user_id: str) -> UserState:
+        """
+        Load a user's state at turn start.
+
+        A local copy is reused when its version still matches Redis (one HGET);
+        otherwise the whole hash is fetched and decoded.
+        """
+        self.stats['loads'] += 1
+        cached: Optional[UserState] = self.local.get(user_id)
+
+        if not self.redis_client:
+            if cached is None:
+                cached = UserState(user_id=user_id)
+                self.local[user_id] = cached
+            else:
+                self.stats['local_hits'] += 1
+            return cached
+
+        try:
+            key = self._key(user_id)
+            if cached is not None:
+                remote_version = await self.redis_client.hget(key, VERSION_FIELD)
+                if int(remote_version or 0) == cached.version:
+                    self.stats['local_hits'] += 1
+                    return cached
+
+            state = await self._fetch_remote(user_id)
+            self.local[user_id] = state
+            return state
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Failed to load dialogue state for {user_id}: {e}")
+            if cached is None:
+                cached = UserState(user_id=user_id)
+                self.local[user_id] = cached
+            return cached
+
+    async def _fetch_remote(self, user_id: str) -> UserState:
+        self.stats['remote_loads'] += 1
+        raw = await self.redis_client.hgetall(self._key(user_id))
+        state = UserState(user_id=user_id)
+        for name, value in raw.items():
+            name = name.decode() if isinstance(name, bytes) else name
+            if name == VERSION_FIELD:
+                state.version = int(value)
+            else:
+                try:
+                    state.namespaces[name] = decode_state_value(value)
+                except (ValueError, TypeError) as e:
+                    # Unreadable namespaces (old encodings, unregistered types) start fresh
+                    logger.warning(f"Dropping undecodable {name} state for user {user_id}: {e}")
+        return state
+
+    async def save(self, state: UserState) -> bool:
+        """Write dirty namespaces back once at turn end"""
+        if not state.dirty:
+            self.stats['skipped_saves'] += 1
+            return True
+
+        self.local[state.user_id] = state
+
+        if not self.redis_client:
+            state.version += 1
+            state.dirty.clear()
+            self.stats['saves'] += 1
+            return True
+
+        try:
+            encoded = {name: encode_state_value(state.namespaces.get(name)) for name in state.dirty}
+            args = [state.version, self.redis_ttl_seconds]
+            for name, value in encoded.items():
+                args.extend([name, value])
+
+            for _ in range(self.max_write_retries):
+                new_version = await self._cas_script(keys=[self._key(state.user_id)], args=args)
+                if new_version != -1:
+                    state.version = int(new_version)
+                    state.dirty.clear()
+                    self.stats['saves'] += 1
+                    self.stats['bytes_written'] += sum(len(v) for v in encoded.values())
+                    return True
+
+                # Another worker wrote first: keep its other namespaces, re-apply ours
+                self.stats['conflicts'] += 1
+                remote = await self._fetch_remote(state.user_id)
+                for name in state.dirty:
+                    remote.namespaces[name] = state.namespaces.get(name)
+                state.namespaces = remote.namespaces
+                state.version = remote.version
+                args[0] = state.version
+
+            raise StateVersionConflict(
+                f"Dialogue state for {state.user_id} changed concurrently {self.max_write_retries} times"
+            )
+
+        except StateVersionConflict:
+            raise
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Failed to save dialogue state for {state.user_id}: {e}")
+            return False
+
+    async def delete(self, user_id: str) -> bool:
+        """Drop all state for a user from both tiers"""
+        self.local.pop(user_id, None)
+        if not self.redis_client:
+            return True
+        try:
+            await self.redis_client.delete(self._key(user_id))
+            return True
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Failed to delete dialogue state for {user_id}: {e}")
+            return False
+
+    def local_size(self) -> int:
+        """Number of users currently held in the local tier"""
+        return len(self.local)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store statistics"""
+        loads = self.stats['loads']
+        return {
+            **self.stats,
+            'local_entries': len(self.local),
+            'local_evictions': self.local.evictions,
+            'local_hit_rate': self.stats['local_hits'] / loads if loads else 0.0,
+            'redis_enabled': self.redis_client is not None
+        }
+
+
+def create_dialogue_state_store() -> DialogueStateStore:
+    """Build a store from environment configuration"""
+    return DialogueStateStore(
+        redis_url=os.getenv("DIALOGUE_STATE_REDIS_URL") or os.getenv("REDIS_URL"),
+        local_max_entries=int(os.getenv("DIALOGUE_STATE_LOCAL_MAX_ENTRIES", "10000")),
+        local_ttl_seconds=int(os.getenv("DIALOGUE_STATE_LOCAL_TTL_SECONDS", "900")),
+        redis_ttl_seconds=int(os.getenv("DIALOGUE_STATE_REDIS_TTL_SECONDS", str(7 * 86400)))
+    )
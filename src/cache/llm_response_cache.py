@@ -0,0 +1,331 @@
+"""
+LLM Response Cache for Otto.AI
+Shared exact + near-duplicate cache in front of LLM and Groq Compound calls
+
+Exact-match keys hash the model, the full message list and every generation
+parameter, so a hit is only served for an identical request. Call types that
+opt in (research-style prompts) additionally keep a small in-process index of
+prompt embeddings; on an exact miss the closest earlier prompt within the same
+scope is reused when its cosine similarity clears the policy threshold.
+
+Entries live in a MultiLevelCache with a per-call-type TTL. The cache tracks
+the serialized size of what it wrote and evicts least recently used entries
+once the configured byte budget is exceeded. Hits record the tokens, estimated
+cost and latency of the original call, reported per call site.
+"""
+
+import os
+import copy
+import json
+import time
+import zlib
+import hashlib
+import logging
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.cache.multi_level_cache import MultiLevelCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 512
+
+
+@dataclass
+class LLMCallPolicy:
+    """Caching rules for one type of LLM call"""
+    ttl_seconds: int
+    semantic: bool = False
+    similarity_threshold: float = 0.95
+    max_temperature: Optional[float] = None
+    cost_per_1k_tokens: float = 0.0
+
+
+DEFAULT_LLM_CALL_POLICIES: Dict[str, LLMCallPolicy] = {
+    # Conversational calls are only cached when sampling is near-deterministic
+    'chat': LLMCallPolicy(ttl_seconds=900, max_temperature=0.3, cost_per_1k_tokens=0.0002),
+    'intent': LLMCallPolicy(ttl_seconds=3600, max_temperature=0.3, cost_per_1k_tokens=0.0002),
+    'research': LLMCallPolicy(ttl_seconds=7 * 86400, semantic=True, cost_per_1k_tokens=0.005),
+    'research_personalized': LLMCallPolicy(ttl_seconds=3600, cost_per_1k_tokens=0.005),
+    'price_forecast': LLMCallPolicy(ttl_seconds=86400, cost_per_1k_tokens=0.005),
+    'vehicle_intelligence': LLMCallPolicy(ttl_seconds=86400, cost_per_1k_tokens=0.005),
+}
+
+
+def hashed_text_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """Cheap local prompt embedding: L2-normalized hashed unigram/bigram counts"""
+    tokens = [t for t in ''.join(c.lower() if c.isalnum() else ' ' for c in text).split() if t]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+        vector[zlib.crc32(feature.encode()) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def build_request_key(call_type: str, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """Deterministic exact-match key over model, prompt and generation parameters"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'params': params},
+        sort_keys=True,
+        default=str
+    )
+    return f"llm:{call_type}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def estimate_tokens(value: Any) -> int:
+    """Token count from an OpenAI-style usage block, else ~4 characters per token"""
+    if isinstance(value, dict):
+        usage = value.get('usage') or {}
+        if usage.get('total_tokens'):
+            return int(usage['total_tokens'])
+    return len(json.dumps(value, default=str)) // 4
+
+
+class LLMResponseCache:
+    """Byte-bounded exact + semantic response cache backed by MultiLevelCache"""
+
+    def __init__(
+        self,
+        cache: Optional[MultiLevelCache] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        policies: Optional[Dict[str, LLMCallPolicy]] = None,
+        embedder: Optional[Callable[[str], np.ndarray]] = None,
+        max_semantic_entries: int = 5000
+    ):
+        self.cache = cache or MultiLevelCache(local_cache_size=5000, enable_edge_cache=False)
+        self.max_bytes = max_bytes
+        self.policies = {**DEFAULT_LLM_CALL_POLICIES, **(policies or {})}
+        self.embedder = embedder or hashed_text_embedding
+        self.max_semantic_entries = max_semantic_entries
+        self._initialized = False
+
+        # key -> serialized size, in LRU order, for entries written by this process
+        self._entry_sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+
+        # (call_type, scope) -> [(key, embedding)]
+        self._semantic_index: Dict[Tuple[str, str], List[Tuple[str, np.ndarray]]] = defaultdict(list)
+        self._semantic_size = 0
+
+        self.stats = {
+            'hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+        self.site_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            'calls': 0,
+            'hits': 0,
+            'semantic_hits': 0,
+            'tokens_saved': 0,
+            'cost_saved_usd': 0.0,
+            'latency_saved_ms': 0.0
+        })
+
+        for call_type, policy in self.policies.items():
+            self._register_cache_type(call_type, policy)
+
+    def _register_cache_type(self, call_type: str, policy: LLMCallPolicy) -> None:
+        ttl = policy.ttl_seconds
+        self.cache.cache_config[f"llm_{call_type}"] = {'l1_ttl': ttl, 'l2_ttl': ttl, 'l3_ttl': ttl}
+
+    async def initialize(self) -> bool:
+        """Connect the underlying cache tiers once"""
+        if not self._initialized:
+            await self.cache.initialize()
+            self._initialized = True
+        return True
+
+    def get_policy(self, call_type: str) -> LLMCallPolicy:
+        return self.policies.get(call_type) or self.policies['chat']
+
+    def is_cacheable(self, call_type: str, temperature: Optional[float] = None) -> bool:
+        """Whether a call with this sampling temperature may be served from cache"""
+        policy = self.get_policy(call_type)
+        return (
+            policy.max_temperature is None
+            or temperature is None
+            or temperature <= policy.max_temperature
+        )
+
+    async def get_or_call(
+        self,
+        call_site: str,
+        call_type: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        params: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+        semantic_scope: Optional[str] = None,
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Return a cached response for the request or perform ``call``.
+
+        ``call`` must return a JSON-serializable value. Results rejected by
+        ``should_cache`` (e.g. error payloads) are returned but never stored.
+        Near-duplicate lookup only runs for semantic call types when a
+        ``semantic_scope`` is given; prompts are only compared within a scope.
+        """
+        site = self.site_stats[call_site]
+        site['calls'] += 1
+
+        if not self.is_cacheable(call_type, params.get('temperature')):
+            self.stats['bypassed'] += 1
+            return await call()
+
+        await self.initialize()
+        policy = self.get_policy(call_type)
+        cache_type = f"llm_{call_type}"
+        key = build_request_key(call_type, model, messages, params)
+
+        entry = await self._lookup(key, cache_type)
+        if entry is not None:
+            self._record_hit(site, policy, entry, semantic=False)
+            if key in self._entry_sizes:
+                self._entry_sizes.move_to_end(key)
+            return copy.deepcopy(entry['response'])
+
+        embedding = None
+        if policy.semantic and semantic_scope:
+            embedding = self.embedder(self._prompt_text(messages))
+            entry = await self._semantic_lookup(call_type, semantic_scope, embedding, policy, cache_type)
+            if entry is not None:
+                self._record_hit(site, policy, entry, semantic=True)
+                return copy.deepcopy(entry['response'])
+
+        self.stats['misses'] += 1
+        started = time.perf_counter()
+        response = await call()
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        if should_cache is None or should_cache(response):
+            await self._store(key, cache_type, policy, response, latency_ms)
+            if embedding is not None:
+                self._index_embedding(call_type, semantic_scope, key, embedding)
+
+        return response
+
+    @staticmethod
+    def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+        return "\n".join(str(m.get('content', '')) for m in messages if m.get('role') != 'system')
+
+    async def _lookup(self, key: str, cache_type: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = await self.cache.get(key, cache_type)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"LLM cache lookup failed: {e}")
+            return None
+        return entry if isinstance(entry, dict) and 'response' in entry else None
+
+    async def _semantic_lookup(
+        self,
+        call_type: str,
+        scope: str,
+        embedding: np.ndarray,
+        policy: LLMCallPolicy,
+        cache_type: str
+    ) -> Optional[Dict[str, Any]]:
+        candidates = self._semantic_index.get((call_type, scope))
+        if not candidates:
+            return None
+
+        similarities = np.stack([vec for _, vec in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < policy.similarity_threshold:
+            return None
+
+        entry = await self._lookup(candidates[best][0], cache_type)
+        if entry is None:
+            # Underlying entry expired or was evicted; drop it from the index
+            candidates.pop(best)
+            self._semantic_size -= 1
+        return entry
+
+    def _index_embedding(self, call_type: str, scope: str, key: str, embedding: np.ndarray) -> None:
+        self._semantic_index[(call_type, scope)].append((key, embedding))
+        self._semantic_size += 1
+        if self._semantic_size > self.max_semantic_entries:
+            # Drop the oldest scope wholesale; scopes are small (one vehicle)
+            oldest = next(iter(self._semantic_index))
+            self._semantic_size -= len(self._semantic_index.pop(oldest))
+
+    def _record_hit(self, site: Dict[str, float], policy: LLMCallPolicy, entry: Dict[str, Any], semantic: bool) -> None:
+        self.stats['semantic_hits' if semantic else 'hits'] += 1
+        site['semantic_hits' if semantic else 'hits'] += 1
+        tokens = entry.get('tokens', 0)
+        site['tokens_saved'] += tokens
+        site['cost_saved_usd'] += tokens / 1000 * policy.cost_per_1k_tokens
+        site['latency_saved_ms'] += entry.get('latency_ms', 0.0)
+
+    async def _store(
+        self,
+        key: str,
+        cache_type: str,
+        policy: LLMCallPolicy,
+        response: Any,
+        latency_ms: float
+    ) -> None:
+        entry = {
+            'response': copy.deepcopy(response),
+            'tokens': estimate_tokens(response),
+            'latency_ms': latency_ms
+        }
+        try:
+            size = len(json.dumps(entry, default=str).encode())
+        except (TypeError, ValueError) as e:
+            self.stats['errors'] += 1
+            logger.warning(f"LLM response is not serializable, not caching: {e}")
+            return
+
+        if size > self.max_bytes:
+            return
+
+        if await self.cache.set(key, entry, cache_type, custom_ttl=policy.ttl_seconds):
+            self.total_bytes += size - self._entry_sizes.pop(key, 0)
+            self._entry_sizes[key] = size
+            await self._enforce_byte_budget()
+
+    async def _enforce_byte_budget(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entry_sizes:
+            key, size = self._entry_sizes.popitem(last=False)
+            self.total_bytes -= size
+            self.stats['evictions'] += 1
+            await self.cache.delete(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Overall hit rates plus per-call-site token, cost and latency savings"""
+        lookups = self.stats['hits'] + self.stats['semantic_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': (self.stats['hits'] + self.stats['semantic_hits']) / lookups if lookups else 0.0,
+            'entries': len(self._entry_sizes),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'semantic_entries': self._semantic_size,
+            'call_sites': {site: dict(values) for site, values in self.site_stats.items()}
+        }
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Process-wide LLM response cache configured from the environment"""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache(
+            cache=MultiLevelCache(
+                local_cache_size=int(os.getenv("LLM_CACHE_LOCAL_ENTRIES", "5000")),
+                redis_url=os.getenv("LLM_CACHE_REDIS_URL"),
+                enable_edge_cache=False
+            ),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        )
+    return _llm_response_cache
@@ -0,0 +1,217 @@
+"""
+Test Suite for the Dialogue State Store
+Bounded local tier, Redis hash tier and optimistic versioning
+"""
+
+import pytest
+import sys
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.cache.dialogue_state_store import (
+    DialogueStateStore,
+    BoundedLRUCache,
+    UserState,
+    encode_state_value,
+    decode_state_value,
+    register_state_type,
+    VERSION_FIELD
+)
+
+
+@register_state_type
+@dataclass
+class SampleDialogue:
+    stage: str
+    collected_info: Dict[str, Any] = field(default_factory=dict)
+
+
+class FakeRedis:
+    """Minimal async Redis stand-in shared by several 'workers'"""
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[bytes, bytes]] = {}
+
+    async def ping(self):
+        return True
+
+    async def hget(self, key, name):
+        return self.hashes.get(key, {}).get(name.encode())
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def register_script(self, script):
+        async def compare_and_set(keys, args):
+            data = self.hashes.setdefault(keys[0], {})
+            current = int(data.get(VERSION_FIELD.encode(), b"0"))
+            if current != int(args[0]):
+                return -1
+            pairs = args[2:]
+            for name, value in zip(pairs[0::2], pairs[1::2]):
+                data[name.encode()] = value
+            data[VERSION_FIELD.encode()] = str(current + 1).encode()
+            return current + 1
+        return compare_and_set
+
+
+def make_worker(shared: FakeRedis, **kwargs) -> DialogueStateStore:
+    store = DialogueStateStore(redis_url="redis://fake", **kwargs)
+    store.redis_client = shared
+    store._cas_script = shared.register_script("")
+    return store
+
+
+class TestBoundedLRUCache:
+    """Test the bounded local tier"""
+
+    def test_lru_eviction(self):
+        cache = BoundedLRUCache(max_entries=2, ttl_seconds=None)
+        cache["a"] = 1
+        cache["b"] = 2
+        _ = cache["a"]
+        cache["c"] = 3
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr("src.cache.dialogue_state_store.time.monotonic", lambda: clock[0])
+        cache = BoundedLRUCache(max_entries=10, ttl_seconds=5)
+        cache["a"] = 1
+        clock[0] += 10
+
+        assert cache.get("a") is None
+        assert len(list(cache)) == 0
+
+
+class TestSerialization:
+    """Test compact state encoding"""
+
+    def test_round_trip_small_and_large(self):
+        small = SampleDialogue(stage="greeting")
+        large = SampleDialogue(stage="discovery", collected_info={"notes": [f"note {i} " * 5 for i in range(50)]})
+
+        assert encode_state_value(small)[:1] == b"j"
+        assert encode_state_value(large)[:1] == b"c"
+        assert decode_state_value(encode_state_value(large)) == large
+
+    def test_round_trip_nested_types(self):
+        value = {"dialogue": SampleDialogue(stage="discovery"), "mileage": (12000, 15000), "tags": {"awd"}, 3: [None]}
+
+        assert decode_state_value(encode_state_value(value)) == value
+
+    def test_only_registered_types_are_decoded(self):
+        @dataclass
+        class Unregistered:
+            stage: str
+
+        with pytest.raises(TypeError):
+            encode_state_value(Unregistered(stage="greeting"))
+        forged = b'j{"__dataclass__":"os.system","fields":{}}'
+        with pytest.raises(ValueError):
+            decode_state_value(forged)
+        with pytest.raises(ValueError):
+            decode_state_value(b"p\x80\x04N.")  # legacy pickle payload is never unpickled
+
+
+class TestDialogueStateStore:
+    """Test load/save semantics across workers"""
+
+    @pytest.mark.asyncio
+    async def test_local_only_store(self):
+        store = DialogueStateStore(local_max_entries=2)
+        await store.initialize()
+
+        state = await store.load("user_1")
+        state.set("dialogue", SampleDialogue(stage="discovery"))
+        assert await store.save(state)
+
+        reloaded = await store.load("user_1")
+        assert reloaded.get("dialogue").stage == "discovery"
+
+        for i in range(5):
+            await store.load(f"user_{i + 2}")
+        assert store.local_size() == 2
+
+    @pytest.mark.asyncio
+    async def test_state_follows_user_between_workers(self):
+        shared = FakeRedis()
+        worker_a, worker_b = make_worker(shared), make_worker(shared)
+
+        state = await worker_a.load("user_1")
+        state.set("dialogue", SampleDialogue(stage="recommendation"))
+        await worker_a.save(state)
+
+        on_b = await worker_b.load("user_1")
+        assert on_b.get("dialogue").stage == "recommendation"
+        assert on_b.version == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_local_copy_skips_full_fetch(self):
+        shared = FakeRedis()
+        worker = make_worker(shared)
+
+        state = await worker.load("user_1")
+        state.set("dialogue", SampleDialogue(stage="greeting"))
+        await worker.save(state)
+        await worker.load("user_1")
+
+        assert worker.stats['local_hits'] == 1
+        assert worker.stats['remote_loads'] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_merge_namespaces(self):
+        shared = FakeRedis()
+        worker_a, worker_b = make_worker(shared), make_worker(shared)
+
+        state_a = await worker_a.load("user_1")
+        state_b = await worker_b.load("user_1")
+
+        state_a.set("dialogue", SampleDialogue(stage="discovery"))
+        await worker_a.save(state_a)
+
+        # worker_b read version 0, so its write conflicts and is re-applied on top
+        state_b.set("scenario", {"scenario_type": "family_vehicle", "step": 1})
+        assert await worker_b.save(state_b)
+        assert worker_b.stats['conflicts'] == 1
+
+        merged = await make_worker(shared).load("user_1")
+        assert merged.version == 2
+        assert merged.get("dialogue").stage == "discovery"
+        assert merged.get("scenario")["step"] == 1
+
+    @pytest.mark.asyncio
+    async def test_clean_state_is_not_written(self):
+        shared = FakeRedis()
+        worker = make_worker(shared)
+
+        state = await worker.load("user_1")
+        await worker.save(state)
+
+        assert worker.stats['skipped_saves'] == 1
+        assert shared.hashes == {}
+
+    @pytest.mark.asyncio
+    async def test_delete_clears_both_tiers(self):
+        shared = FakeRedis()
+        worker = make_worker(shared)
+
+        state = await worker.load("user_1")
+        state.set("dialogue", SampleDialogue(stage="closing"))
+        await worker.save(state)
+        await worker.delete("user_1")
+
+        fresh = await worker.load("user_1")
+        assert fresh.get("dialogue") is None
+        assert fresh.version == 0
@@ -0,0 +1,214 @@
+"""
+Test Suite for the LLM Response Cache
+Exact keys, near-duplicate lookup, byte budget and per-site savings
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, Mock
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.cache.multi_level_cache import MultiLevelCache
+from src.cache.llm_response_cache import (
+    LLMResponseCache,
+    LLMCallPolicy,
+    build_request_key,
+    hashed_text_embedding
+)
+from src.conversation.groq_client import GroqClient
+from src.services.price_forecast_service import PriceForecastService
+from src.services.external_research_service import ExternalResearchService
+
+
+def make_cache(**kwargs) -> LLMResponseCache:
+    return LLMResponseCache(cache=MultiLevelCache(redis_url=None, enable_edge_cache=False), **kwargs)
+
+
+def user_messages(text: str):
+    return [{"role": "system", "content": "You are a research expert."}, {"role": "user", "content": text}]
+
+
+class TestRequestKey:
+    """Test exact-match key construction"""
+
+    def test_parameters_are_part_of_the_key(self):
+        messages = user_messages("hello")
+        base = build_request_key("chat", "m", messages, {"temperature": 0.1})
+
+        assert base == build_request_key("chat", "m", messages, {"temperature": 0.1})
+        assert base != build_request_key("chat", "m", messages, {"temperature": 0.2})
+        assert base != build_request_key("chat", "other", messages, {"temperature": 0.1})
+
+    def test_embedding_is_normalized(self):
+        vector = hashed_text_embedding("2020 Honda Civic owner reviews")
+        assert float(vector @ vector) == pytest.approx(1.0, abs=1e-5)
+
+
+class TestLLMResponseCache:
+    """Test lookup paths and accounting"""
+
+    @pytest.mark.asyncio
+    async def test_exact_hit_skips_call_and_reports_savings(self):
+        cache = make_cache()
+        call = AsyncMock(return_value={"response": "ok", "usage": {"total_tokens": 1000}})
+
+        for _ in range(3):
+            result = await cache.get_or_call(
+                "site.a", "research", "m", user_messages("q"), {"temperature": 0.1}, call
+            )
+
+        assert result["response"] == "ok"
+        assert call.await_count == 1
+        site = cache.get_stats()["call_sites"]["site.a"]
+        assert site["hits"] == 2
+        assert site["tokens_saved"] == 2000
+        assert site["cost_saved_usd"] == pytest.approx(0.01)
+
+    @pytest.mark.asyncio
+    async def test_hits_are_isolated_from_caller_mutation(self):
+        cache = make_cache()
+        call = AsyncMock(return_value={"response": "ok"})
+
+        first = await cache.get_or_call("s", "research", "m", user_messages("q"), {}, call)
+        first["response"] = "mutated"
+        second = await cache.get_or_call("s", "research", "m", user_messages("q"), {}, call)
+
+        assert second["response"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_high_temperature_chat_bypasses_cache(self):
+        cache = make_cache()
+        call = AsyncMock(return_value={"response": "creative"})
+
+        for _ in range(2):
+            await cache.get_or_call("s", "chat", "m", user_messages("q"), {"temperature": 0.8}, call)
+
+        assert call.await_count == 2
+        assert cache.get_stats()["bypassed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rejected_results_are_not_stored(self):
+        cache = make_cache()
+        call = AsyncMock(return_value="")
+
+        for _ in range(2):
+            await cache.get_or_call("s", "research", "m", user_messages("q"), {}, call, should_cache=bool)
+
+        assert call.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_prompt_within_scope(self):
+        cache = make_cache()
+        call = AsyncMock(return_value="report")
+        prompt = "Research what owners say about the 2020 Honda Civic including reliability and common problems " * 3
+
+        await cache.get_or_call("s", "research", "m", user_messages(prompt), {}, call, semantic_scope="2020:honda:civic")
+        await cache.get_or_call(
+            "s", "research", "m", user_messages(prompt + " EX"), {}, call, semantic_scope="2020:honda:civic"
+        )
+        await cache.get_or_call(
+            "s", "research", "m", user_messages(prompt + " EX"), {}, call, semantic_scope="2021:honda:civic"
+        )
+
+        assert call.await_count == 2
+        assert cache.get_stats()["semantic_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_lookup_only_for_opted_in_types(self):
+        cache = make_cache()
+        call = AsyncMock(return_value="forecast")
+        prompt = "Search for current market prices of a 2019 Ford F-150 " * 5
+
+        await cache.get_or_call("s", "price_forecast", "m", user_messages(prompt), {}, call, semantic_scope="x")
+        await cache.get_or_call("s", "price_forecast", "m", user_messages(prompt + "!"), {}, call, semantic_scope="x")
+
+        assert call.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_evicts_oldest(self):
+        cache = make_cache(max_bytes=2000)
+        payload = "x" * 600
+
+        for i in range(5):
+            await cache.get_or_call("s", "research", "m", user_messages(f"q{i}"), {}, AsyncMock(return_value=payload))
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 2000
+        assert stats["evictions"] >= 2
+
+        refetch = AsyncMock(return_value=payload)
+        await cache.get_or_call("s", "research", "m", user_messages("q0"), {}, refetch)
+        assert refetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_per_call_type_ttl(self):
+        cache = make_cache(policies={"intent": LLMCallPolicy(ttl_seconds=42)})
+        assert cache.cache.cache_config["llm_intent"]["l1_ttl"] == 42
+        assert cache.cache.cache_config["llm_research"]["l1_ttl"] == 7 * 86400
+
+
+class TestCallSites:
+    """Test cache wiring in GroqClient and PriceForecastService"""
+
+    @pytest.mark.asyncio
+    async def test_groq_client_reuses_low_temperature_analysis(self):
+        client = GroqClient(api_key="test", response_cache=make_cache())
+        client.initialized = True
+        completion = Mock()
+        completion.choices = [Mock(message=Mock(content="{}", tool_calls=None), finish_reason="stop")]
+        completion.usage = Mock(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        client.client = Mock()
+        client.client.chat.completions.create = AsyncMock(return_value=completion)
+
+        for _ in range(2):
+            result = await client.generate_response(
+                [{"role": "user", "content": "analyze"}], temperature=0.2, call_type="intent"
+            )
+
+        assert result["success"]
+        client.client.chat.completions.create.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_price_forecast_caches_raw_completion(self):
+        service = PriceForecastService(response_cache=make_cache())
+        service._post_compound_request = AsyncMock(return_value={
+            "content": '{"estimated_price": 25000, "price_low": 22000, "price_high": 28000, "comparable_count": 6}',
+            "sources": ["web_search"]
+        })
+
+        first = await service._call_groq_compound("prompt", 2020, "Ford", "F-150")
+        second = await service._call_groq_compound("prompt", 2020, "Ford", "F-150")
+
+        assert first.estimated_price == second.estimated_price == 25000
+        assert not first.cache_hit and second.cache_hit
+        assert service.get_stats()["cache_hits"] == 1
+        service._post_compound_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_ownership_research_does_not_reuse_other_prompt_parameters(self):
+        service = ExternalResearchService(response_cache=make_cache())
+        service._post_compound_request = AsyncMock(return_value='{"total_5yr_cost": 40000, "confidence": 0.8}')
+
+        await service.get_ownership_costs(2021, "Toyota", "RAV4", trim="LE", purchase_price=28000, location="Denver, CO")
+        await service.get_ownership_costs(2021, "Toyota", "RAV4", trim="XSE Hybrid", purchase_price=39000,
+                                          annual_mileage=20000, location="Miami, FL")
+        await service.get_ownership_costs(2021, "Toyota", "RAV4", trim="LE", purchase_price=28000, location="Denver, CO")
+
+        assert service._post_compound_request.await_count == 2
+        assert service.stats["cache_hits"] == 1
+        assert not hasattr(service, "cache")
+
+    @pytest.mark.asyncio
+    async def test_owner_experiences_share_a_model_year_scope(self):
+        service = ExternalResearchService(response_cache=make_cache())
+        service._post_compound_request = AsyncMock(return_value='{"overall_satisfaction": 4.2, "confidence": 0.7}')
+
+        await service.get_owner_experiences(2020, "Honda", "Civic", trim="EX")
+        await service.get_owner_experiences(2020, "Honda", "Civic", trim="EX")
+        await service.get_owner_experiences(2019, "Honda", "Civic", trim="EX")
+
+        assert service._post_compound_request.await_count == 2
+        assert service._research_scope(2020, " Honda", "Civic ") == "2020:honda:civic"
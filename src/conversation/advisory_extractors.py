@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from enum import Enum
 
+from src.cache.dialogue_state_store import register_state_type
+
 # Avoid circular imports - we define intent types locally for pattern matching
 # The actual IntentType enum is in intent_models.py
 
@@ -147,6 +149,15 @@ class LifestyleProfile:
     decision_signals: List[DecisionSignal] = field(default_factory=list)
 
 
+# Extraction history and lifestyle profiles are persisted as dialogue state
+for _state_type in (
+    AdvisoryIntentType, CurrentVehicleEntity, CommutePattern, WorkPattern, RoadTripPattern,
+    ChargingInfrastructure, RangeRequirement, BudgetFlexibility, PriorityRanking, DecisionSignal,
+    LifestyleProfile
+):
+    register_state_type(_state_type)
+
+
 # ============================================================================
 # Lifestyle Entity Extractor
 # ============================================================================
@@ -5,6 +5,7 @@ Core conversation processing and management for vehicle discovery
 
 import json
 import logging
+import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
@@ -14,9 +15,17 @@ from src.memory.zep_client import ZepClient, ConversationContext, Message
 from src.conversation.groq_client import GroqClient
 from src.conversation.nlu_service import NLUService, NLUResult, Entity, UserPreference
 from src.conversation.intent_models import IntentClassifier, EntityExtractor, PreferenceDetector
+from src.conversation.intent_classifier import local_intent_classifier_from_env
 from src.conversation.response_generator import ResponseGenerator, GeneratedResponse
 from src.conversation.template_engine import ScenarioManager, TemplateRenderer, TemplateContext
 from src.cache.multi_level_cache import MultiLevelCache
+from src.cache.dialogue_state_store import (
+    DialogueStateStore,
+    BoundedLRUCache,
+    StateVersionConflict,
+    create_dialogue_state_store,
+    register_state_type
+)
 
 # Import new components for persistent memory
 from src.memory.temporal_memory import TemporalMemoryManager, MemoryType
@@ -73,6 +82,7 @@ class ConversationResponse:
     is_voice_input: bool = False  # Whether input came from voice
 
 
+@register_state_type
 @dataclass
 class DialogueState:
     """Tracks the current state of the conversation"""
@@ -91,20 +101,35 @@ class ConversationAgent:
         zep_client: Optional[ZepClient] = None,
         groq_client: Optional[GroqClient] = None,
         cache: Optional[MultiLevelCache] = None,
-        voice_service: Optional[VoiceInputService] = None
+        voice_service: Optional[VoiceInputService] = None,
+        state_store: Optional[DialogueStateStore] = None
     ):
         self.zep_client = zep_client or ZepClient(cache=cache)
-        self.groq_client = groq_client or GroqClient()
+        self.groq_client = groq_client or GroqClient(intent_classifier=local_intent_classifier_from_env())
         self.cache = cache
-        self.dialogue_states: Dict[str, DialogueState] = {}
         self.initialized = False
 
+        # Per-user state lives in the external store; only a bounded working set stays in memory
+        self.state_store = state_store or create_dialogue_state_store()
+        self.dialogue_states: BoundedLRUCache = BoundedLRUCache(
+            max_entries=self.state_store.local.max_entries,
+            ttl_seconds=self.state_store.local.ttl_seconds
+        )
+
         # Voice input service
         self.voice_service = voice_service or VoiceInputService()
         self.voice_enabled = False  # Track if voice is currently active
 
         # Initialize NLU components
-        self.nlu_service = NLUService(groq_client=self.groq_client, zep_client=self.zep_client, cache=cache)
+        self.nlu_service = NLUService(
+            groq_client=self.groq_client,
+            zep_client=self.zep_client,
+            cache=cache,
+            # One classifier serves both the NLU cascade and GroqClient.analyze_message_intent
+            local_intent_classifier=(
+                getattr(self.groq_client, 'intent_classifier', None) or local_intent_classifier_from_env()
+            )
+        )
         self.intent_classifier = IntentClassifier()
         self.entity_extractor = EntityExtractor()
         self.preference_detector = PreferenceDetector()
@@ -179,6 +204,9 @@ class ConversationAgent:
                 logger.error("NLU service initialization failed - cannot continue")
                 return False
 
+            # Initialize dialogue state store (falls back to local tier without Redis)
+            await self.state_store.initialize()
+
             # Initialize response generator
             response_initialized = await self.response_generator.initialize()
             if not response_initialized:
@@ -271,6 +299,7 @@ class ConversationAgent:
         start_time = datetime.now()
         is_voice_input = voice_result is not None
         voice_command = None
+        user_state = None
 
         try:
             # Handle voice input if provided
@@ -286,8 +315,9 @@ class ConversationAgent:
             else:
                 message_with_voice = message
 
-            # Get or create dialogue state
-            dialogue_state = await self._get_dialogue_state(user_id)
+            # Load per-user state once at turn start
+            user_state = await self._load_turn_state(user_id)
+            dialogue_state = self.dialogue_states[user_id]
 
             # Store user message with voice metadata
             await self._store_message(user_id, session_id, message_with_voice, 'user')
@@ -521,15 +551,48 @@ class ConversationAgent:
                 processing_time_ms=(datetime.now() - start_time).total_seconds() * 1000
             )
 
+        finally:
+            # Write per-user state back once at turn end
+            if user_state is not None:
+                await self._save_turn_state(user_id, user_state)
+
     async def _get_dialogue_state(self, user_id: str) -> DialogueState:
         """Get or create dialogue state for user"""
         if user_id not in self.dialogue_states:
-            self.dialogue_states[user_id] = DialogueState(
-                stage='greeting',
-                collected_info={}
-            )
+            await self._load_turn_state(user_id)
         return self.dialogue_states[user_id]
 
+    async def _load_turn_state(self, user_id: str):
+        """Lazily load a user's dialogue, scenario and lifestyle state from the state store"""
+        user_state = await self.state_store.load(user_id)
+
+        dialogue_state = user_state.get('dialogue')
+        if dialogue_state is None:
+            dialogue_state = DialogueState(stage='greeting', collected_info={})
+        self.dialogue_states[user_id] = dialogue_state
+
+        self.scenario_manager.import_state(user_id, user_state.get('scenario'))
+        self.nlu_service.import_user_state(user_id, user_state.get('nlu'))
+        return user_state
+
+    async def _save_turn_state(self, user_id: str, user_state) -> None:
+        """Write the turn's state back to the state store in one versioned update"""
+        try:
+            dialogue_state = self.dialogue_states.get(user_id)
+            if dialogue_state is not None:
+                user_state.set('dialogue', dialogue_state)
+            for namespace, value in (
+                ('scenario', self.scenario_manager.export_state(user_id)),
+                ('nlu', self.nlu_service.export_user_state(user_id))
+            ):
+                if value != user_state.get(namespace):
+                    user_state.set(namespace, value)
+            await self.state_store.save(user_state)
+        except StateVersionConflict as e:
+            logger.warning(f"Dropped dialogue state update: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save dialogue state for user {user_id}: {e}")
+
     async def _store_message(self, user_id: str, session_id: str, content: str, role: str):
         """Store message in Zep Cloud"""
         if self.zep_client.initialized:
@@ -1488,6 +1551,8 @@ class ConversationAgent:
             # Clear dialogue state
             if user_id in self.dialogue_states:
                 del self.dialogue_states[user_id]
+            self.scenario_manager.clear_scenario(user_id)
+            await self.state_store.delete(user_id)
 
             # Clear cache if available
             if self.cache:
@@ -1804,6 +1869,7 @@ class ConversationAgent:
             'zep_client': await self.zep_client.health_check() if self.zep_client else {'initialized': False},
             'groq_client': await self.groq_client.health_check() if self.groq_client else {'initialized': False},
             'active_dialogues': len(self.dialogue_states),
+            'dialogue_state_store': self.state_store.get_stats(),
             'voice_service': {
                 'initialized': self.voice_service is not None,
                 'browser_supported': self.voice_service.is_browser_supported() if self.voice_service else False,
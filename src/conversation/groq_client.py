@@ -17,6 +17,9 @@ except ImportError:
     OPENAI_AVAILABLE = False
     AsyncOpenAI = None
 
+from src.conversation.intent_classifier import LocalIntentClassifier, NON_DATA_INTENTS
+from src.cache.llm_response_cache import LLMResponseCache, get_llm_response_cache
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -24,7 +27,15 @@ logger = logging.getLogger(__name__)
 class GroqClient:
     """Client for interacting with Groq API through OpenRouter or direct Groq"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        intent_classifier: Optional[LocalIntentClassifier] = None,
+        response_cache: Optional[LLMResponseCache] = None
+    ):
+        self.intent_classifier = intent_classifier
+        self.response_cache = response_cache or get_llm_response_cache()
         self.api_key = api_key or os.getenv('GROQ_API_KEY') or os.getenv('OPENROUTER_API_KEY')
         self.base_url = base_url or os.getenv('OPENROUTER_BASE_URL', 'https://api.openai.com/v1')
         self.client = None
@@ -84,9 +95,16 @@ class GroqClient:
         max_tokens: Optional[int] = None,
         temperature: float = 0.7,
         system_prompt: Optional[str] = None,
-        tools: Optional[List[Dict[str, Any]]] = None
+        tools: Optional[List[Dict[str, Any]]] = None,
+        call_type: str = 'chat'
     ) -> Dict[str, Any]:
-        """Generate AI response using Groq compound-beta"""
+        """
+        Generate AI response using Groq compound-beta
+
+        Low-temperature calls are served from the shared LLM response cache
+        when an identical request (model, messages, parameters) was answered
+        recently; ``call_type`` selects the cache policy and TTL.
+        """
 
         if not self.initialized:
             return {
@@ -109,14 +127,42 @@ class GroqClient:
             # Add conversation messages
             formatted_messages.extend(messages)
 
-            # Make the request
+            params = {
+                'max_tokens': max_tokens or 500,
+                'temperature': temperature,
+                'tools': tools
+            }
+
+            return await self.response_cache.get_or_call(
+                call_site=f"groq_client.{call_type}",
+                call_type=call_type,
+                model=self.model,
+                messages=formatted_messages,
+                params=params,
+                call=lambda: self._create_completion(formatted_messages, params),
+                should_cache=lambda result: result['success'] and bool(result['response'] or result.get('tool_calls'))
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to generate response: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'response': None
+            }
+
+    async def _create_completion(
+        self,
+        formatted_messages: List[Dict[str, str]],
+        params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Call the chat completions API and normalize the result"""
+        try:
             completion = await self.client.chat.completions.create(
                 model=self.model,
                 messages=formatted_messages,
-                max_tokens=max_tokens or 500,
-                temperature=temperature,
-                tools=tools,
-                stream=False
+                stream=False,
+                **params
             )
 
             # Extract response
@@ -205,9 +251,38 @@ class GroqClient:
     async def analyze_message_intent(
         self,
         message: str,
-        conversation_context: Optional[Dict[str, Any]] = None
+        conversation_context: Optional[Dict[str, Any]] = None,
+        local_only: bool = False
     ) -> Dict[str, Any]:
-        """Analyze user message to understand intent and extract entities"""
+        """
+        Analyze user message to understand intent and extract entities
+
+        With local_only, never call the LLM: messages the local classifier
+        cannot answer confidently come back unsuccessful.
+        """
+
+        # Messages that need no entity extraction can be answered by the local classifier
+        if self.intent_classifier:
+            prediction, accepted = self.intent_classifier.classify(message)
+            if accepted and prediction.label in NON_DATA_INTENTS:
+                return {
+                    'success': True,
+                    'source': 'local',
+                    'analysis': {
+                        'intent': prediction.label if prediction.label == 'greet' else 'other',
+                        'entities': {},
+                        'sentiment': 'neutral',
+                        'requires_data': False,
+                        'confidence': prediction.confidence
+                    }
+                }
+
+        if local_only:
+            return {
+                'success': False,
+                'source': 'local',
+                'error': 'Local intent classifier not confident'
+            }
 
         system_prompt = """You are Otto AI's intent analyzer. Analyze the user's message and:
 1. Determine the primary intent (search, compare, ask_question, greet, etc.)
@@ -247,7 +322,8 @@ Respond with JSON format:
             messages=context_messages,
             system_prompt=system_prompt,
             temperature=0.3,  # Lower temperature for consistent analysis
-            max_tokens=200
+            max_tokens=200,
+            call_type='intent'
         )
 
         if response['success'] and response['response']:
@@ -368,5 +444,6 @@ If vehicle data is provided, incorporate it naturally into your response."""
             'api_key_configured': bool(self.api_key),
             'model': self.model,
             'base_url': self.base_url,
-            'openai_available': OPENAI_AVAILABLE
+            'openai_available': OPENAI_AVAILABLE,
+            'response_cache': self.response_cache.get_stats()
         }
\ No newline at end of file
@@ -0,0 +1,400 @@
+"""
+Local Intent Classifier for Otto AI
+Hashed n-gram linear model used as a fast path in front of LLM intent detection
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Primary intents understood by NLUService._detect_intent
+INTENT_LABELS = [
+    'search', 'compare', 'advice', 'information',
+    'greet', 'farewell', 'clarify', 'navigate'
+]
+
+# Intents that need no vehicle data or entities, so GroqClient can answer locally
+NON_DATA_INTENTS = {'greet', 'farewell', 'clarify', 'navigate'}
+
+MODEL_FORMAT_VERSION = 1
+DEFAULT_NUM_BUCKETS = 1 << 15
+DEFAULT_CONFIDENCE_THRESHOLD = 0.85
+DEFAULT_MARGIN_THRESHOLD = 0.4
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9$]+(?:'[a-z]+)?")
+
+# Seed phrases derived from the keyword rules in NLUService._fallback_intent_detection.
+# Used when no trained artifact is available so the fast path still works out of the box.
+_SEED_PHRASES: Dict[str, List[str]] = {
+    'greet': [
+        "hi", "hello", "hey", "hey there", "hi there", "hello otto", "good morning",
+        "good afternoon", "good evening", "hiya", "yo", "howdy", "hi otto",
+        "hello there", "hey otto how are you", "morning", "greetings"
+    ],
+    'farewell': [
+        "bye", "goodbye", "see you", "see you later", "thanks bye", "thank you",
+        "thanks", "thanks a lot", "that's all for now", "talk later", "bye for now",
+        "thank you so much", "cheers", "have a good day", "i'm done for today",
+        "catch you later", "thanks for your help"
+    ],
+    'search': [
+        "show me {v}", "show me some {v}", "i'm looking for a {v}", "looking for a {v}",
+        "find me a {v}", "find {v} under $30000", "search for {v}", "i need a {v}",
+        "any {v} available", "do you have {v}", "{v} under 25k", "{v} with low mileage",
+        "show me {b} {v}", "i want a {b}", "find a used {b}", "list {v} near me",
+        "show me cheaper {v}", "i need something with awd", "show me electric cars",
+        "find hybrids under 40k", "what {v} do you have in stock"
+    ],
+    'compare': [
+        "compare these two", "compare them", "compare the {b} and the {b2}",
+        "{b} vs {b2}", "{b} versus {b2}", "what's the difference between these",
+        "difference between the {b} and {b2}", "how does the {b} compare to the {b2}",
+        "compare {v}", "side by side comparison", "which is better the {b} or the {b2}",
+        "compare the first and second", "put them side by side", "compare these cars",
+        "how do these stack up"
+    ],
+    'advice': [
+        "what do you recommend", "what would you suggest", "any recommendations",
+        "what should i buy", "what should i get", "can you suggest a {v}",
+        "recommend a {v} for a family", "i need advice on a {v}",
+        "what's best for a long commute", "which {v} is right for me",
+        "help me decide", "what's a good first car", "suggest something reliable",
+        "recommend something fuel efficient", "is a {v} a good idea for me"
+    ],
+    'information': [
+        "what is the mpg of the {b}", "how reliable is the {b}", "what's the range",
+        "how much does insurance cost", "when was this model redesigned",
+        "tell me about the {b}", "what features does it have", "how many seats does it have",
+        "what's the towing capacity", "does it have apple carplay",
+        "what engine does the {b} have", "how long is the warranty", "who makes the {b}",
+        "what is the cargo space", "why is it priced higher"
+    ],
+    'clarify': [
+        "what do you mean", "i don't understand", "can you explain that",
+        "can you clarify", "sorry what", "what does that mean", "say that again",
+        "huh", "i'm confused", "could you rephrase that", "explain that please",
+        "what did you mean by that"
+    ],
+    'navigate': [
+        "go back", "go to my favorites", "open my favorites", "take me home",
+        "show my saved cars", "go to settings", "open the filters", "next page",
+        "previous page", "show me my profile", "back to results", "open my collections",
+        "scroll down", "return to search results"
+    ]
+}
+
+_SEED_VEHICLES = ['suv', 'suvs', 'sedan', 'truck', 'pickup', 'minivan', 'hybrid', 'ev', 'coupe', 'car']
+_SEED_BRANDS = ['toyota', 'honda', 'ford', 'tesla', 'bmw', 'subaru', 'chevy', 'lexus']
+
+
+@dataclass
+class IntentPrediction:
+    """Result of a local intent classification"""
+    label: str
+    confidence: float
+    margin: float
+    probabilities: Dict[str, float] = field(default_factory=dict)
+    latency_ms: float = 0.0
+
+    @property
+    def requires_data(self) -> bool:
+        return self.label in ('search', 'compare')
+
+
+def tokenize(message: str) -> List[str]:
+    """Lowercase word tokenization used by both training and inference"""
+    return _TOKEN_PATTERN.findall(message.lower())
+
+
+def extract_features(message: str) -> List[str]:
+    """Build word unigram, bigram and positional features for a message"""
+    tokens = tokenize(message)
+    if not tokens:
+        return ['<empty>']
+
+    features = [f"w:{t}" for t in tokens]
+    features.extend(f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+    features.append(f"first:{tokens[0]}")
+    features.append(f"last:{tokens[-1]}")
+    features.append(f"len:{min(len(tokens), 8)}")
+    if message.rstrip().endswith('?'):
+        features.append('q:?')
+    return features
+
+
+class LocalIntentClassifier:
+    """
+    Multinomial logistic regression over hashed n-gram features.
+
+    Weights are stored sparsely as bucket -> per-label weights so inference is a
+    handful of dict lookups and runs well under a millisecond without numpy.
+    """
+
+    def __init__(
+        self,
+        labels: Optional[List[str]] = None,
+        num_buckets: int = DEFAULT_NUM_BUCKETS,
+        confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+        margin_threshold: float = DEFAULT_MARGIN_THRESHOLD
+    ):
+        self.labels = list(labels or INTENT_LABELS)
+        self.num_buckets = num_buckets
+        self.confidence_threshold = confidence_threshold
+        self.margin_threshold = margin_threshold
+        self.weights: Dict[int, List[float]] = {}
+        self.bias: List[float] = [0.0] * len(self.labels)
+        self.trained = False
+        self.metadata: Dict[str, Any] = {}
+
+        # Cascade statistics
+        self.stats = {
+            'predictions': 0,
+            'accepted': 0,
+            'escalated': 0,
+            'total_latency_ms': 0.0
+        }
+
+    def _hash(self, feature: str) -> int:
+        return zlib.crc32(feature.encode('utf-8')) % self.num_buckets
+
+    def _buckets(self, message: str) -> List[int]:
+        return [self._hash(f) for f in extract_features(message)]
+
+    def _scores(self, buckets: Iterable[int]) -> List[float]:
+        scores = list(self.bias)
+        n = len(scores)
+        for bucket in buckets:
+            row = self.weights.get(bucket)
+            if row is not None:
+                for i in range(n):
+                    scores[i] += row[i]
+        return scores
+
+    @staticmethod
+    def _softmax(scores: List[float]) -> List[float]:
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, message: str) -> IntentPrediction:
+        """Classify a message without any network access"""
+        start = time.perf_counter()
+        probs = self._softmax(self._scores(self._buckets(message)))
+
+        ranked = sorted(range(len(probs)), key=probs.__getitem__, reverse=True)
+        best = ranked[0]
+        runner_up = probs[ranked[1]] if len(ranked) > 1 else 0.0
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        self.stats['predictions'] += 1
+        self.stats['total_latency_ms'] += latency_ms
+
+        return IntentPrediction(
+            label=self.labels[best],
+            confidence=probs[best],
+            margin=probs[best] - runner_up,
+            probabilities={label: probs[i] for i, label in enumerate(self.labels)},
+            latency_ms=latency_ms
+        )
+
+    def is_confident(self, prediction: IntentPrediction) -> bool:
+        """Confidence gate deciding whether a prediction may skip the LLM"""
+        return (
+            self.trained
+            and prediction.confidence >= self.confidence_threshold
+            and prediction.margin >= self.margin_threshold
+        )
+
+    def classify(self, message: str) -> Tuple[IntentPrediction, bool]:
+        """Predict and apply the confidence gate, recording cascade statistics"""
+        prediction = self.predict(message)
+        accepted = self.is_confident(prediction)
+        self.stats['accepted' if accepted else 'escalated'] += 1
+        return prediction, accepted
+
+    def train(
+        self,
+        examples: List[Tuple[str, str]],
+        epochs: int = 12,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 13
+    ) -> Dict[str, Any]:
+        """Fit the model with plain SGD on (message, label) pairs"""
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        data = [
+            (self._buckets(message), label_index[label])
+            for message, label in examples
+            if label in label_index
+        ]
+        if not data:
+            raise ValueError("No training examples with known intent labels")
+
+        rng = random.Random(seed)
+        n = len(self.labels)
+        self.weights = {}
+        self.bias = [0.0] * n
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            lr = learning_rate / (1 + epoch * 0.5)
+            for buckets, target in data:
+                probs = self._softmax(self._scores(buckets))
+                grads = [p - (1.0 if i == target else 0.0) for i, p in enumerate(probs)]
+                for i in range(n):
+                    self.bias[i] -= lr * grads[i]
+                for bucket in buckets:
+                    row = self.weights.setdefault(bucket, [0.0] * n)
+                    for i in range(n):
+                        row[i] -= lr * (grads[i] + l2 * row[i])
+
+        self.trained = True
+        self.metadata = {
+            'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'num_examples': len(data),
+            'epochs': epochs
+        }
+        return self.metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the model to a JSON-compatible artifact"""
+        return {
+            'format_version': MODEL_FORMAT_VERSION,
+            'labels': self.labels,
+            'num_buckets': self.num_buckets,
+            'confidence_threshold': self.confidence_threshold,
+            'margin_threshold': self.margin_threshold,
+            'bias': [round(b, 6) for b in self.bias],
+            'weights': {
+                str(bucket): [round(w, 6) for w in row]
+                for bucket, row in self.weights.items()
+                if any(abs(w) > 1e-6 for w in row)
+            },
+            'metadata': self.metadata
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LocalIntentClassifier':
+        """Restore a model from a serialized artifact"""
+        version = data.get('format_version')
+        if version != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported intent model format version: {version}")
+
+        model = cls(
+            labels=data['labels'],
+            num_buckets=data['num_buckets'],
+            confidence_threshold=data.get('confidence_threshold', DEFAULT_CONFIDENCE_THRESHOLD),
+            margin_threshold=data.get('margin_threshold', DEFAULT_MARGIN_THRESHOLD)
+        )
+        model.bias = list(data['bias'])
+        model.weights = {int(bucket): list(row) for bucket, row in data['weights'].items()}
+        model.metadata = data.get('metadata', {})
+        model.trained = True
+        return model
+
+    def save(self, path: str) -> None:
+        """Write the model artifact to disk"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cascade statistics"""
+        predictions = self.stats['predictions']
+        return {
+            **self.stats,
+            'skip_rate': self.stats['accepted'] / predictions if predictions else 0.0,
+            'avg_latency_ms': self.stats['total_latency_ms'] / predictions if predictions else 0.0
+        }
+
+
+def build_seed_examples() -> List[Tuple[str, str]]:
+    """Expand the keyword-rule seed phrases into labeled training examples"""
+    examples = []
+    for label, phrases in _SEED_PHRASES.items():
+        for phrase in phrases:
+            if '{' not in phrase:
+                examples.append((phrase, label))
+                continue
+            for i, vehicle in enumerate(_SEED_VEHICLES):
+                brand = _SEED_BRANDS[i % len(_SEED_BRANDS)]
+                brand2 = _SEED_BRANDS[(i + 3) % len(_SEED_BRANDS)]
+                examples.append((phrase.format(v=vehicle, b=brand, b2=brand2), label))
+    return examples
+
+
+def load_intent_log(path: str) -> List[Tuple[str, str]]:
+    """
+    Load logged intents from a JSONL file.
+
+    Each line is an object with a ``message`` and an ``intent`` (or ``primary_intent``) field.
+    """
+    examples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed intent log line: {line[:80]}")
+                continue
+            message = record.get('message')
+            label = record.get('intent') or record.get('primary_intent')
+            if message and label:
+                examples.append((message, label))
+    return examples
+
+
+def load_intent_model(path: str) -> LocalIntentClassifier:
+    """Load a trained intent model artifact from disk"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return LocalIntentClassifier.from_dict(json.load(f))
+
+
+_default_classifier: Optional[LocalIntentClassifier] = None
+
+
+def get_default_intent_classifier() -> LocalIntentClassifier:
+    """
+    Return the process-wide classifier.
+
+    Loads the artifact at ``OTTO_INTENT_MODEL_PATH`` when set, otherwise trains
+    on the keyword-rule seed corpus.
+    """
+    global _default_classifier
+    if _default_classifier is None:
+        model_path = os.getenv('OTTO_INTENT_MODEL_PATH')
+        if model_path and os.path.exists(model_path):
+            try:
+                _default_classifier = load_intent_model(model_path)
+                logger.info(f"Loaded local intent model from {model_path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Failed to load intent model {model_path}: {e}")
+
+        if _default_classifier is None:
+            _default_classifier = LocalIntentClassifier()
+            _default_classifier.train(build_seed_examples())
+            logger.info("Trained local intent model from seed rules")
+
+    return _default_classifier
+
+
+def local_intent_classifier_from_env() -> Optional[LocalIntentClassifier]:
+    """The default classifier unless ``OTTO_LOCAL_INTENT_ENABLED`` is false"""
+    if os.getenv('OTTO_LOCAL_INTENT_ENABLED', 'true').lower() == 'true':
+        return get_default_intent_classifier()
+    return None
@@ -12,6 +12,8 @@ from dataclasses import dataclass, asdict
 import asyncio
 
 from src.conversation.groq_client import GroqClient
+from src.conversation.intent_classifier import LocalIntentClassifier
+from src.cache.dialogue_state_store import BoundedLRUCache
 from src.memory.zep_client import ZepClient, ConversationContext, Message
 from src.conversation.advisory_extractors import (
     AdvisoryExtractor,
@@ -93,13 +95,17 @@ class NLUService:
         self,
         groq_client: GroqClient,
         zep_client: Optional[ZepClient] = None,
-        cache: Optional[Any] = None
+        cache: Optional[Any] = None,
+        local_intent_classifier: Optional[LocalIntentClassifier] = None
     ):
         self.groq_client = groq_client
         self.zep_client = zep_client
         self.cache = cache
         self.initialized = False
 
+        # Fast-path intent classifier; confident predictions skip the LLM call
+        self.local_intent_classifier = local_intent_classifier
+
         # Vehicle feature taxonomy
         self.vehicle_taxonomy = self._initialize_vehicle_taxonomy()
 
@@ -117,9 +123,10 @@ class NLUService:
         # Phase 1: Advisory extractor for lifestyle context and decision signals
         self.advisory_extractor = AdvisoryExtractor()
 
-        # Track lifestyle profile across conversation
-        self.user_lifestyle_profiles: Dict[str, LifestyleProfile] = {}
-        self.extraction_history: Dict[str, List[Dict[str, Any]]] = {}
+        # Track lifestyle profile across conversation (bounded working set; the
+        # authoritative copy is persisted per turn through the dialogue state store)
+        self.user_lifestyle_profiles: BoundedLRUCache = BoundedLRUCache(max_entries=10000, ttl_seconds=3600)
+        self.extraction_history: BoundedLRUCache = BoundedLRUCache(max_entries=10000, ttl_seconds=3600)
 
     async def initialize(self) -> bool:
         """Initialize the NLU service"""
@@ -247,6 +254,17 @@ class NLUService:
         Detect user intent with context awareness
         """
 
+        # Confidence-gated cascade: answer locally when the classifier is sure,
+        # escalate ambiguous messages to the LLM
+        if self.local_intent_classifier:
+            prediction, accepted = self.local_intent_classifier.classify(message)
+            if accepted:
+                return Intent(
+                    primary=prediction.label,
+                    confidence=prediction.confidence,
+                    requires_data=prediction.requires_data
+                )
+
         # Build context for intent detection
         context_messages = []
 
@@ -472,6 +490,26 @@ Respond with JSON array:
         """Get the aggregated lifestyle profile for a user"""
         return self.user_lifestyle_profiles.get(user_id)
 
+    def export_user_state(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Per-user advisory state to persist at turn end"""
+        history = self.extraction_history.get(user_id)
+        if not history:
+            return None
+        return {
+            'extraction_history': history,
+            'lifestyle_profile': self.user_lifestyle_profiles.get(user_id)
+        }
+
+    def import_user_state(self, user_id: str, state: Optional[Dict[str, Any]]):
+        """Restore per-user advisory state loaded at turn start"""
+        if not state:
+            self.extraction_history.pop(user_id, None)
+            self.user_lifestyle_profiles.pop(user_id, None)
+            return
+        self.extraction_history[user_id] = list(state.get('extraction_history') or [])
+        if state.get('lifestyle_profile') is not None:
+            self.user_lifestyle_profiles[user_id] = state['lifestyle_profile']
+
     def get_advisory_stats(self) -> Dict[str, Any]:
         """Get statistics from advisory extractors"""
         return self.advisory_extractor.get_stats()
@@ -525,6 +563,10 @@ Respond with JSON array:
                 user_preferences={}
             )
 
+        context_cache = getattr(self.zep_client, 'context_cache', None)
+        if context_cache:
+            context_cache.begin_turn(user_id)
+
         try:
             # Get recent working memory
             working_memory = await self.zep_client.get_conversation_history(
@@ -556,6 +598,9 @@ Respond with JSON array:
                 semantic_memory
             )
 
+            if context_cache:
+                logger.debug(f"Context cache for {user_id}: {context_cache.get_turn_report(user_id)}")
+
             return ConversationContext(
                 working_memory=ranked_context['working_memory'],
                 episodic_memory=ranked_context['episodic_memory'],
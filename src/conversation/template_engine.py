@@ -14,6 +14,7 @@ import asyncio
 
 from src.conversation.nlu_service import UserPreference, Entity
 from src.conversation.intent_models import EntityType
+from src.cache.dialogue_state_store import BoundedLRUCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -62,7 +63,7 @@ class ScenarioManager:
 
     def __init__(self):
         self.scenarios = self._initialize_scenarios()
-        self.active_scenarios: Dict[str, Dict[str, Any]] = {}
+        self.active_scenarios: BoundedLRUCache = BoundedLRUCache(max_entries=10000, ttl_seconds=3600)
 
     def _initialize_scenarios(self) -> Dict[ScenarioType, ConversationTemplate]:
         """Initialize all conversation scenario templates"""
@@ -475,6 +476,32 @@ class ScenarioManager:
         if user_id in self.active_scenarios:
             del self.active_scenarios[user_id]
 
+    def export_state(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Compact, serializable form of the user's active scenario"""
+        active = self.active_scenarios.get(user_id)
+        if not active:
+            return None
+        return {
+            'scenario_type': active['template'].scenario_type.value,
+            'started_at': active['started_at'].isoformat(),
+            'step': active['step']
+        }
+
+    def import_state(self, user_id: str, state: Optional[Dict[str, Any]]):
+        """Restore an active scenario exported by export_state"""
+        if not state:
+            self.active_scenarios.pop(user_id, None)
+            return
+        template = self.scenarios.get(ScenarioType(state['scenario_type']))
+        if template is None:
+            self.active_scenarios.pop(user_id, None)
+            return
+        self.active_scenarios[user_id] = {
+            'template': template,
+            'started_at': datetime.fromisoformat(state['started_at']),
+            'step': state.get('step', 0)
+        }
+
 
 class TemplateRenderer:
     """Renders conversation templates with dynamic content"""
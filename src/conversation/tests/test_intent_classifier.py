@@ -0,0 +1,141 @@
+"""
+Tests for the local fast-path intent classifier
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from src.conversation.intent_classifier import (
+    LocalIntentClassifier,
+    build_seed_examples,
+    load_intent_log,
+    load_intent_model
+)
+from src.conversation.nlu_service import NLUService
+from src.conversation.groq_client import GroqClient
+from src.memory.zep_client import ConversationContext
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    """Classifier trained on the seed corpus"""
+    model = LocalIntentClassifier()
+    model.train(build_seed_examples())
+    return model
+
+
+@pytest.fixture
+def sample_context():
+    return ConversationContext(
+        working_memory=[],
+        episodic_memory=[],
+        semantic_memory={},
+        user_preferences={}
+    )
+
+
+class TestLocalIntentClassifier:
+    """Test cases for LocalIntentClassifier"""
+
+    @pytest.mark.parametrize("message,expected", [
+        ("hi", "greet"),
+        ("show me SUVs", "search"),
+        ("compare these two", "compare"),
+        ("thanks, bye", "farewell"),
+        ("go back", "navigate"),
+    ])
+    def test_confident_predictions(self, classifier, message, expected):
+        prediction, accepted = classifier.classify(message)
+        assert prediction.label == expected
+        assert accepted
+
+    def test_ambiguous_message_escalates(self, classifier):
+        prediction, accepted = classifier.classify(
+            "I think I want something sporty but my wife wants a minivan, what do you think?"
+        )
+        assert not accepted
+
+    def test_untrained_model_never_accepts(self):
+        prediction, accepted = LocalIntentClassifier().classify("hi")
+        assert not accepted
+
+    def test_inference_latency_under_1ms(self, classifier):
+        latencies = [classifier.predict("show me hybrid sedans under 30k").latency_ms for _ in range(200)]
+        assert sorted(latencies)[len(latencies) // 2] < 1.0
+
+    def test_artifact_round_trip(self, classifier, tmp_path):
+        path = tmp_path / "intent_model.json"
+        classifier.save(str(path))
+        restored = load_intent_model(str(path))
+
+        original = classifier.predict("compare the honda and toyota")
+        loaded = restored.predict("compare the honda and toyota")
+        assert loaded.label == original.label
+        assert loaded.confidence == pytest.approx(original.confidence, abs=1e-3)
+
+    def test_load_intent_log(self, tmp_path):
+        path = tmp_path / "intents.jsonl"
+        path.write_text(
+            '{"message": "hello", "intent": "greet"}\n'
+            'not json\n'
+            '{"message": "show trucks", "primary_intent": "search"}\n'
+        )
+        assert load_intent_log(str(path)) == [("hello", "greet"), ("show trucks", "search")]
+
+
+class TestIntentCascade:
+    """Test the confidence-gated cascade in NLUService and GroqClient"""
+
+    @pytest.mark.asyncio
+    async def test_confident_intent_skips_llm(self, classifier, sample_context):
+        groq_client = Mock(spec=GroqClient)
+        groq_client.initialized = True
+        groq_client.generate_response = AsyncMock()
+
+        service = NLUService(groq_client=groq_client, local_intent_classifier=classifier)
+        intent = await service._detect_intent("show me SUVs", sample_context)
+
+        assert intent.primary == "search"
+        assert intent.requires_data
+        groq_client.generate_response.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ambiguous_intent_escalates_to_llm(self, classifier, sample_context):
+        groq_client = Mock(spec=GroqClient)
+        groq_client.initialized = True
+        groq_client.generate_response = AsyncMock(return_value={
+            'success': True,
+            'response': '{"primary_intent": "advice", "confidence": 0.9}'
+        })
+
+        service = NLUService(groq_client=groq_client, local_intent_classifier=classifier)
+        intent = await service._detect_intent(
+            "I think I want something sporty but my wife wants a minivan, what do you think?", sample_context
+        )
+
+        assert intent.primary == "advice"
+        groq_client.generate_response.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_groq_client_answers_greeting_locally(self, classifier):
+        client = GroqClient(api_key="test", intent_classifier=classifier)
+        client.generate_response = AsyncMock()
+
+        result = await client.analyze_message_intent("hello")
+
+        assert result['success']
+        assert result['source'] == 'local'
+        assert result['analysis']['intent'] == 'greet'
+        client.generate_response.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_local_only_analysis_never_calls_llm(self, classifier):
+        client = GroqClient(api_key="test", intent_classifier=classifier)
+        client.generate_response = AsyncMock()
+
+        result = await client.analyze_message_intent(
+            "I think I want something sporty but my wife wants a minivan, what do you think?", local_only=True
+        )
+
+        assert not result['success']
+        client.generate_response.assert_not_called()
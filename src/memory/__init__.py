@@ -8,9 +8,11 @@ Handles temporal memory and context storage including:
 """
 
 from .zep_client import ZepClient, ConversationData, ConversationContext
+from .session_context_cache import SessionContextCache
 
 __all__ = [
     'ZepClient',
     'ConversationData',
-    'ConversationContext'
+    'ConversationContext',
+    'SessionContextCache'
 ]
\ No newline at end of file
@@ -0,0 +1,374 @@
+"""
+Session Context Cache for Otto.AI
+Session-scoped working set of recent messages, search results and user facts
+
+Every conversation turn needs the user's recent history, relevant past
+conversations and reconstructed cross-session facts. Instead of re-fetching
+these from Zep on each turn, the cache keeps a per-session working set that is
+filled once on cold start and then extended incrementally as messages are
+stored. Zep is only contacted again after invalidation or TTL expiry.
+
+With several workers, each write bumps a per-user version counter in Redis and
+every lookup compares it with the version the local working set was built at;
+a mismatch means another worker stored messages, so the local copy is dropped.
+"""
+
+import os
+import json
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field, asdict, is_dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.cache.dialogue_state_store import BoundedLRUCache
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+LATEST_SESSION = "latest"
+
+
+def estimate_payload_bytes(payload: Any) -> int:
+    """Approximate wire size of a payload fetched from Zep"""
+    if is_dataclass(payload):
+        payload = asdict(payload)
+    elif isinstance(payload, list):
+        payload = [asdict(p) if is_dataclass(p) else p for p in payload]
+    try:
+        return len(json.dumps(payload, default=str).encode())
+    except (TypeError, ValueError):
+        return len(str(payload).encode())
+
+
+@dataclass
+class SessionWorkingSet:
+    """Cached context for one (user, session) pair"""
+    user_id: str
+    session_key: str
+    resolved_session_id: Optional[str] = None
+    messages: Deque[Any] = field(default_factory=deque)
+    warm: bool = False
+    complete: bool = False
+    loaded_at: float = 0.0
+    appended: int = 0
+
+
+@dataclass
+class TurnReport:
+    """Cache behaviour observed while building context for one turn"""
+    hits: int = 0
+    misses: int = 0
+    bytes_fetched: int = 0
+
+
+class SessionContextCache:
+    """Per-session working set in front of Zep memory lookups"""
+
+    def __init__(
+        self,
+        max_sessions: int = 5000,
+        max_messages: int = 50,
+        session_ttl_seconds: int = 1800,
+        search_ttl_seconds: int = 300,
+        facts_ttl_seconds: int = 600,
+        redis_url: Optional[str] = None,
+        version_ttl_seconds: int = 86400,
+        key_prefix: str = "session_context:v:"
+    ):
+        self.redis_url = redis_url
+        self.version_ttl_seconds = version_ttl_seconds
+        self.key_prefix = key_prefix
+        self.redis_client = None
+        self.max_messages = max_messages
+        self.search_ttl_seconds = search_ttl_seconds
+        self.facts_ttl_seconds = facts_ttl_seconds
+        # Working sets are keyed by concrete session id; "latest" lookups go
+        # through the per-user alias to the session they resolved to
+        self.sessions = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=session_ttl_seconds)
+        self.latest_sessions = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=session_ttl_seconds)
+        # Search results and facts are derived from the user's conversations, so
+        # they live in one bucket per user that every write drops
+        self.searches = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=None)
+        self.facts = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=None)
+        self.turns = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=session_ttl_seconds)
+        # Shared version each user's local context was built at
+        self.versions = BoundedLRUCache(max_entries=max_sessions, ttl_seconds=None)
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'appends': 0,
+            'invalidations': 0,
+            'stale_drops': 0,
+            'bytes_fetched': 0,
+            'turns': 0,
+            'errors': 0
+        }
+
+    async def initialize(self) -> bool:
+        """Connect the shared version counters; the cache stays usable (per worker) without them"""
+        if not self.redis_url:
+            logger.info("Session context cache running without shared versions")
+            return True
+
+        if not REDIS_AVAILABLE:
+            logger.warning("⚠️ Redis module not available, session context cache is per worker only")
+            return True
+
+        try:
+            client = redis.from_url(self.redis_url)
+            await client.ping()
+            self.redis_client = client
+            logger.info("✅ Session context cache connected to Redis")
+        except Exception as e:
+            logger.warning(f"⚠️ Session context Redis unavailable, caching per worker only: {e}")
+            self.redis_client = None
+
+        return True
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    async def _sync_version(self, user_id: str) -> None:
+        """Drop the user's local context if another worker wrote since it was cached"""
+        if not self.redis_client:
+            return
+
+        try:
+            remote = int(await self.redis_client.get(self._version_key(user_id)) or 0)
+        except Exception as e:
+            # Without the shared version a local copy cannot be trusted
+            self.stats['errors'] += 1
+            logger.warning(f"Failed to read session context version for {user_id}: {e}")
+            self._drop_local(user_id)
+            self.versions.pop(user_id, None)
+            return
+
+        known = self.versions.get(user_id)
+        if known != remote:
+            if known is not None:
+                self.stats['stale_drops'] += 1
+            self._drop_local(user_id)
+            self.versions[user_id] = remote
+
+    async def _publish_write(self, user_id: str) -> None:
+        """Bump the user's shared version so other workers drop their copies"""
+        if not self.redis_client:
+            return
+
+        try:
+            key = self._version_key(user_id)
+            version = int(await self.redis_client.incr(key))
+            await self.redis_client.expire(key, self.version_ttl_seconds)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Failed to publish session context write for {user_id}: {e}")
+            self._drop_local(user_id)
+            self.versions.pop(user_id, None)
+            return
+
+        if self.versions.get(user_id) != version - 1:
+            # Another worker wrote in between; the local copy may have missed it
+            self.stats['stale_drops'] += 1
+            self._drop_local(user_id)
+        self.versions[user_id] = version
+
+    @staticmethod
+    def _session_id_key(user_id: str, session_id: str) -> str:
+        return f"{user_id}:{session_id}"
+
+    @staticmethod
+    def _get_derived(cache: BoundedLRUCache, user_id: str, key: str) -> Any:
+        entry = (cache.get(user_id) or {}).get(key)
+        if entry is None or time.monotonic() > entry[0]:
+            return None
+        return entry[1]
+
+    @staticmethod
+    def _set_derived(cache: BoundedLRUCache, user_id: str, key: str, value: Any, ttl_seconds: float) -> None:
+        bucket = cache.get(user_id) or {}
+        bucket[key] = (time.monotonic() + ttl_seconds, value)
+        cache[user_id] = bucket
+
+    def begin_turn(self, user_id: str) -> None:
+        """Start per-turn accounting for a user"""
+        self.turns[user_id] = TurnReport()
+        self.stats['turns'] += 1
+
+    def get_turn_report(self, user_id: str) -> Dict[str, Any]:
+        """Hits, misses and bytes fetched for the user's current turn"""
+        report = self.turns.get(user_id) or TurnReport()
+        lookups = report.hits + report.misses
+        return {
+            **asdict(report),
+            'hit_rate': report.hits / lookups if lookups else 0.0
+        }
+
+    def _record(self, user_id: str, hit: bool, bytes_fetched: int = 0) -> None:
+        self.stats['hits' if hit else 'misses'] += 1
+        self.stats['bytes_fetched'] += bytes_fetched
+        report = self.turns.get(user_id)
+        if report is not None:
+            if hit:
+                report.hits += 1
+            else:
+                report.misses += 1
+            report.bytes_fetched += bytes_fetched
+
+    async def get_history(
+        self,
+        user_id: str,
+        session_id: Optional[str],
+        limit: int,
+        fetch: Callable[[], Awaitable[Tuple[List[Any], Optional[str]]]]
+    ) -> List[Any]:
+        """
+        Return the last ``limit`` messages for a session.
+
+        ``fetch`` is only awaited on cold start or after invalidation and must
+        return ``(messages, resolved_session_id)`` in chronological order.
+        """
+        await self._sync_version(user_id)
+        resolved = session_id or self.latest_sessions.get(user_id)
+        working_set: Optional[SessionWorkingSet] = (
+            self.sessions.get(self._session_id_key(user_id, resolved)) if resolved else None
+        )
+
+        # A warm set can serve the request if it holds enough messages, or if it
+        # holds the session's complete history (Zep returned fewer than asked for)
+        if working_set and working_set.warm and (
+            len(working_set.messages) >= limit
+            or (working_set.complete and len(working_set.messages) < self.max_messages)
+        ):
+            self._record(user_id, hit=True)
+            return list(working_set.messages)[-limit:]
+
+        messages, resolved_session_id = await fetch()
+        self._record(user_id, hit=False, bytes_fetched=estimate_payload_bytes(messages))
+        resolved_session_id = resolved_session_id or session_id
+        if not resolved_session_id:
+            # No session yet; nothing to key a working set by
+            return list(messages)[-limit:]
+
+        self.sessions[self._session_id_key(user_id, resolved_session_id)] = SessionWorkingSet(
+            user_id=user_id,
+            session_key=session_id or LATEST_SESSION,
+            resolved_session_id=resolved_session_id,
+            messages=deque(messages[-self.max_messages:], maxlen=self.max_messages),
+            warm=True,
+            complete=len(messages) < limit,
+            loaded_at=time.monotonic()
+        )
+        if not session_id:
+            self.latest_sessions[user_id] = resolved_session_id
+        return list(messages)[-limit:]
+
+    async def append_messages(self, user_id: str, session_id: str, messages: List[Any]) -> None:
+        """Extend the session's warm working set with newly stored messages instead of re-fetching"""
+        self.stats['appends'] += len(messages)
+        await self._publish_write(user_id)
+
+        working_set: Optional[SessionWorkingSet] = self.sessions.get(self._session_id_key(user_id, session_id))
+        if working_set and working_set.warm:
+            working_set.messages.extend(messages)
+            working_set.appended += len(messages)
+
+        latest = self.latest_sessions.get(user_id)
+        if latest is not None and latest != session_id:
+            # The user's latest session moved; the 'latest' view must be re-resolved
+            self.latest_sessions.pop(user_id, None)
+            self.stats['invalidations'] += 1
+
+        # Searches and facts were derived from the conversations before this write
+        self._invalidate_derived(user_id)
+
+    def _invalidate_derived(self, user_id: str) -> None:
+        self.searches.pop(user_id, None)
+        self.facts.pop(user_id, None)
+
+    async def get_search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        scope: str,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """Cache semantic search results per normalized query for a short TTL"""
+        await self._sync_version(user_id)
+        key = f"{scope}:{limit}:{' '.join(query.lower().split())}"
+        cached = self._get_derived(self.searches, user_id, key)
+        if cached is not None:
+            self._record(user_id, hit=True)
+            return cached
+
+        results = await fetch()
+        self._set_derived(self.searches, user_id, key, results, self.search_ttl_seconds)
+        self._record(user_id, hit=False, bytes_fetched=estimate_payload_bytes(results))
+        return results
+
+    async def get_facts(
+        self,
+        user_id: str,
+        name: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Cache derived per-user facts (e.g. cross-session reconstruction)"""
+        await self._sync_version(user_id)
+        cached = self._get_derived(self.facts, user_id, name)
+        if cached is not None:
+            self._record(user_id, hit=True)
+            return cached
+
+        facts = await fetch()
+        if facts:
+            self._set_derived(self.facts, user_id, name, facts, self.facts_ttl_seconds)
+        self._record(user_id, hit=False, bytes_fetched=estimate_payload_bytes(facts))
+        return facts
+
+    async def invalidate(self, user_id: str, session_id: Optional[str] = None) -> None:
+        """Drop cached context for a session, or everything for a user, on every worker"""
+        self.stats['invalidations'] += 1
+        await self._publish_write(user_id)
+        self._invalidate_derived(user_id)
+        if session_id:
+            self.sessions.pop(self._session_id_key(user_id, session_id), None)
+            if self.latest_sessions.get(user_id) == session_id:
+                self.latest_sessions.pop(user_id, None)
+            return
+
+        self._drop_local(user_id)
+
+    def _drop_local(self, user_id: str) -> None:
+        self._invalidate_derived(user_id)
+        self.latest_sessions.pop(user_id, None)
+        prefix = f"{user_id}:"
+        for key in [k for k in self.sessions if k.startswith(prefix)]:
+            self.sessions.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit rate and bytes transferred per turn"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        turns = self.stats['turns']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'bytes_per_turn': self.stats['bytes_fetched'] / turns if turns else 0.0,
+            'cached_sessions': len(self.sessions),
+            'shared_versions': self.redis_client is not None
+        }
+
+
+def create_session_context_cache() -> SessionContextCache:
+    """Build a cache from environment configuration"""
+    return SessionContextCache(
+        redis_url=os.getenv("SESSION_CONTEXT_REDIS_URL") or os.getenv("REDIS_URL"),
+        session_ttl_seconds=int(os.getenv("SESSION_CONTEXT_TTL_SECONDS", "1800"))
+    )
@@ -13,6 +13,7 @@ import asyncio
 from enum import Enum
 
 from src.memory.zep_client import ZepClient, ConversationContext, Message
+from src.memory.session_context_cache import SessionContextCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -233,6 +234,22 @@ class TemporalMemoryManager:
         if not self.initialized:
             return {}
 
+        # Reconstruction scans up to 100 past messages, so reuse it across turns
+        context_cache = getattr(self.zep_client, 'context_cache', None)
+        if isinstance(context_cache, SessionContextCache):
+            return await context_cache.get_facts(
+                user_id,
+                f"cross_session:{days_back}",
+                lambda: self._reconstruct_cross_session_context(user_id, days_back)
+            )
+        return await self._reconstruct_cross_session_context(user_id, days_back)
+
+    async def _reconstruct_cross_session_context(
+        self,
+        user_id: str,
+        days_back: int
+    ) -> Dict[str, Any]:
+        """Scan recent conversations for themes, brands and vehicle types"""
         try:
             # Get conversation history from Zep
             cutoff_date = datetime.now() - timedelta(days=days_back)
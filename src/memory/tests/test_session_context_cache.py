@@ -0,0 +1,233 @@
+"""
+Unit tests for the session-scoped context cache
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.memory.session_context_cache import SessionContextCache
+from src.memory.zep_client import ZepClient, ConversationData, Message
+
+
+def make_messages(count: int, prefix: str = "msg"):
+    return [Message(role="user", content=f"{prefix} {i}") for i in range(count)]
+
+
+class FakeRedis:
+    """Minimal async Redis stand-in shared by several 'workers'"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    async def expire(self, key, seconds):
+        return True
+
+
+def make_worker(shared: FakeRedis) -> SessionContextCache:
+    cache = SessionContextCache(redis_url="redis://fake")
+    cache.redis_client = shared
+    return cache
+
+
+class TestSessionContextCache:
+    """Test suite for SessionContextCache"""
+
+    @pytest.mark.asyncio
+    async def test_warm_history_is_served_without_fetch(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=(make_messages(20), "session_1"))
+
+        first = await cache.get_history("user_1", "session_1", 10, fetch)
+        second = await cache.get_history("user_1", "session_1", 10, fetch)
+
+        assert fetch.await_count == 1
+        assert [m.content for m in first] == [m.content for m in second]
+        assert cache.get_stats()['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_short_session_is_complete(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=(make_messages(3), "session_1"))
+
+        await cache.get_history("user_1", "session_1", 10, fetch)
+        history = await cache.get_history("user_1", "session_1", 10, fetch)
+
+        assert len(history) == 3
+        assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_appended_messages_extend_working_set(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=(make_messages(2), "session_1"))
+        await cache.get_history("user_1", None, 10, fetch)
+
+        await cache.append_messages("user_1", "session_1", make_messages(2, prefix="new"))
+        history = await cache.get_history("user_1", None, 10, fetch)
+
+        assert fetch.await_count == 1
+        assert [m.content for m in history][-2:] == ["new 0", "new 1"]
+
+    @pytest.mark.asyncio
+    async def test_latest_view_invalidated_when_session_changes(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=(make_messages(2), "session_1"))
+        await cache.get_history("user_1", None, 10, fetch)
+
+        await cache.append_messages("user_1", "session_2", make_messages(1))
+        await cache.get_history("user_1", None, 10, fetch)
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_search_cached_per_normalized_query(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=[{'session_id': 's1', 'score': 0.9}])
+
+        await cache.get_search("user_1", "Family SUV", 5, "messages", fetch)
+        await cache.get_search("user_1", "family   suv", 5, "messages", fetch)
+
+        assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_facts_are_not_cached(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value={})
+
+        await cache.get_facts("user_1", "cross_session:7", fetch)
+        await cache.get_facts("user_1", "cross_session:7", fetch)
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user(self):
+        cache = SessionContextCache()
+        await cache.get_history("user_1", "s1", 5, AsyncMock(return_value=(make_messages(5), "s1")))
+        await cache.get_facts("user_1", "facts", AsyncMock(return_value={'a': 1}))
+
+        await cache.invalidate("user_1")
+
+        assert cache.get_stats()['cached_sessions'] == 0
+        assert len(cache.facts) == 0
+
+    @pytest.mark.asyncio
+    async def test_sessions_do_not_share_a_working_set(self):
+        cache = SessionContextCache()
+        await cache.get_history("user_1", None, 10, AsyncMock(return_value=([], None)))
+        await cache.get_history("user_1", "s1", 10, AsyncMock(return_value=(make_messages(1, prefix="s1"), "s1")))
+
+        await cache.append_messages("user_1", "s2", make_messages(1, prefix="s2"))
+        await cache.append_messages("user_1", "s1", make_messages(1, prefix="s1 new"))
+        history = await cache.get_history("user_1", "s1", 10, AsyncMock())
+
+        assert [m.content for m in history] == ["s1 0", "s1 new 0"]
+        assert cache.get_stats()['cached_sessions'] == 1
+
+    @pytest.mark.asyncio
+    async def test_stored_messages_invalidate_derived_facts(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value={'mentioned_brands': [('honda', 1)]})
+        search = AsyncMock(return_value=[{'session_id': 's1', 'score': 0.9}])
+        await cache.get_facts("user_1", "cross_session:7", fetch)
+        await cache.get_search("user_1", "family suv", 5, "messages", search)
+
+        await cache.append_messages("user_1", "s1", make_messages(1))
+        await cache.get_facts("user_1", "cross_session:7", fetch)
+        await cache.get_search("user_1", "family suv", 5, "messages", search)
+
+        assert fetch.await_count == 2
+        assert search.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_write_on_another_worker_drops_local_working_set(self):
+        shared = FakeRedis()
+        worker_a, worker_b = make_worker(shared), make_worker(shared)
+        fetch = AsyncMock(return_value=(make_messages(2), "s1"))
+        await worker_a.get_history("user_1", "s1", 10, fetch)
+        await worker_a.get_history("user_1", "s1", 10, fetch)
+        assert fetch.await_count == 1
+
+        await worker_b.append_messages("user_1", "s1", make_messages(1, prefix="new"))
+        await worker_a.get_history("user_1", "s1", 10, fetch)
+
+        assert fetch.await_count == 2
+        assert worker_a.get_stats()['stale_drops'] == 1
+
+    @pytest.mark.asyncio
+    async def test_own_writes_keep_working_set_warm(self):
+        shared = FakeRedis()
+        worker = make_worker(shared)
+        fetch = AsyncMock(return_value=(make_messages(2), "s1"))
+        await worker.get_history("user_1", "s1", 10, fetch)
+
+        await worker.append_messages("user_1", "s1", make_messages(1, prefix="new"))
+        history = await worker.get_history("user_1", "s1", 10, fetch)
+
+        assert fetch.await_count == 1
+        assert history[-1].content == "new 0"
+
+    @pytest.mark.asyncio
+    async def test_missed_write_is_detected_on_own_write(self):
+        shared = FakeRedis()
+        worker_a, worker_b = make_worker(shared), make_worker(shared)
+        fetch = AsyncMock(return_value=(make_messages(2), "s1"))
+        await worker_a.get_history("user_1", "s1", 10, fetch)
+
+        await worker_b.append_messages("user_1", "s1", make_messages(1, prefix="b"))
+        await worker_a.append_messages("user_1", "s1", make_messages(1, prefix="a"))
+        await worker_a.get_history("user_1", "s1", 10, fetch)
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_turn_report(self):
+        cache = SessionContextCache()
+        fetch = AsyncMock(return_value=(make_messages(10), "s1"))
+
+        cache.begin_turn("user_1")
+        await cache.get_history("user_1", "s1", 10, fetch)
+        cache.begin_turn("user_1")
+        await cache.get_history("user_1", "s1", 10, fetch)
+
+        report = cache.get_turn_report("user_1")
+        assert report['hits'] == 1
+        assert report['bytes_fetched'] == 0
+        assert cache.get_stats()['bytes_per_turn'] > 0
+
+
+class TestZepClientContextCache:
+    """Test ZepClient integration with the context cache"""
+
+    @pytest.fixture
+    def zep_client(self):
+        client = ZepClient(api_key="test")
+        client.initialized = True
+        client.client = Mock()
+        client.client.session.list = AsyncMock(return_value=[])
+        client.client.message.get = AsyncMock(return_value=[
+            Mock(role="user", content="hello", metadata={}, created_at=None)
+        ])
+        client.client.memory.add = AsyncMock()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_repeated_history_reads_hit_zep_once(self, zep_client):
+        await zep_client.get_conversation_history("user_1", "session_1", limit=10)
+        history = await zep_client.get_conversation_history("user_1", "session_1", limit=10)
+
+        assert len(history) == 1
+        assert zep_client.client.message.get.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_errors_are_not_cached(self, zep_client):
+        zep_client.client.message.get = AsyncMock(side_effect=RuntimeError("zep down"))
+
+        assert await zep_client.get_conversation_history("user_1", "session_1") == []
+        assert zep_client.get_context_cache_stats()['cached_sessions'] == 0
@@ -20,6 +20,7 @@ except ImportError:
     ZepClientError = Exception
 
 from src.cache.multi_level_cache import MultiLevelCache
+from src.memory.session_context_cache import SessionContextCache, create_session_context_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -55,9 +56,16 @@ class ConversationContext:
 class ZepClient:
     """Client for interacting with Zep Cloud temporal memory"""
 
-    def __init__(self, api_key: Optional[str] = None, cache: Optional[MultiLevelCache] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[MultiLevelCache] = None,
+        context_cache: Optional[SessionContextCache] = None
+    ):
         self.api_key = api_key or os.getenv('ZEP_API_KEY')
         self.cache = cache
+        # Session-scoped working set; Zep is only queried on cold start or invalidation
+        self.context_cache = context_cache or create_session_context_cache()
         self.client = None
         self.initialized = False
 
@@ -77,6 +85,7 @@ class ZepClient:
 
             # Initialize Zep client
             self.client = Zep(api_key=self.api_key)
+            await self.context_cache.initialize()
 
             # Test connection
             await self._test_connection()
@@ -187,13 +196,21 @@ class ZepClient:
                 metadata=conversation.metadata or {}
             )
 
-            # Update cache
+            # Extend the session working set incrementally instead of re-fetching
+            await self.context_cache.append_messages(user_id, session_id, [
+                Message(
+                    role=msg.role,
+                    content=msg.content,
+                    metadata=msg.metadata,
+                    created_at=msg.created_at or datetime.now()
+                )
+                for msg in conversation.messages
+            ])
+
+            # The shared cache only held a partial history; drop it so it is rebuilt on next read
             if self.cache:
-                cache_key = f"conversation:{user_id}:{session_id}"
-                await self.cache.set(cache_key, {
-                    'messages': zep_messages,
-                    'updated_at': datetime.now().isoformat()
-                }, ttl=3600)  # 1 hour TTL
+                await self.cache.delete(f"conversation:{user_id}:{session_id}")
+                await self.cache.delete(f"conversation:{user_id}:latest")
 
             logger.debug(f"Stored {len(zep_messages)} messages in Zep session {session_id}")
             return True
@@ -213,55 +230,70 @@ class ZepClient:
             return []
 
         try:
-            # Check cache first
-            cache_key = f"conversation:{user_id}:{session_id or 'latest'}"
-            if self.cache:
-                cached = await self.cache.get(cache_key)
-                if cached:
-                    logger.debug(f"Retrieved conversation from cache: {cache_key}")
-                    return [
-                        Message(
-                            role=msg['role'],
-                            content=msg['content'],
-                            metadata=msg.get('metadata')
-                        )
-                        for msg in cached['messages']
-                    ]
-
-            # Get session
-            if not session_id:
-                # Get latest session for user
-                sessions = await self.client.session.list(user_id=user_id, limit=1)
-                if not sessions:
-                    return []
-                session_id = sessions[0].session_id
-
-            # Retrieve messages
-            messages = await self.client.message.get(session_id, limit=limit)
-
-            # Convert to Message objects
-            conversation_messages = []
-            for msg in messages:
-                conversation_messages.append(Message(
-                    role=msg.role,
-                    content=msg.content,
-                    metadata=msg.metadata,
-                    created_at=msg.created_at
-                ))
-
-            # Update cache
-            if self.cache and conversation_messages:
-                await self.cache.set(cache_key, {
-                    'messages': [asdict(msg) for msg in conversation_messages],
-                    'updated_at': datetime.now().isoformat()
-                }, ttl=3600)
-
-            return conversation_messages
+            return await self.context_cache.get_history(
+                user_id,
+                session_id,
+                limit,
+                lambda: self._fetch_conversation_history(user_id, session_id, limit)
+            )
 
         except Exception as e:
             logger.error(f"Failed to get conversation history: {e}")
             return []
 
+    async def _fetch_conversation_history(
+        self,
+        user_id: str,
+        session_id: Optional[str],
+        limit: int
+    ):
+        """Load history from the shared cache or Zep; returns (messages, resolved session id)"""
+        # Check shared cache first
+        cache_key = f"conversation:{user_id}:{session_id or 'latest'}"
+        if self.cache:
+            cached = await self.cache.get(cache_key)
+            if cached:
+                logger.debug(f"Retrieved conversation from cache: {cache_key}")
+                return [
+                    Message(
+                        role=msg['role'],
+                        content=msg['content'],
+                        metadata=msg.get('metadata')
+                    )
+                    for msg in cached['messages']
+                ], cached.get('session_id', session_id)
+
+        # Get session
+        if not session_id:
+            # Get latest session for user
+            sessions = await self.client.session.list(user_id=user_id, limit=1)
+            if not sessions:
+                return [], None
+            session_id = sessions[0].session_id
+
+        # Retrieve messages
+        messages = await self.client.message.get(session_id, limit=limit)
+
+        # Convert to Message objects
+        conversation_messages = []
+        for msg in messages:
+            conversation_messages.append(Message(
+                role=msg.role,
+                content=msg.content,
+                metadata=msg.metadata,
+                created_at=msg.created_at
+            ))
+
+        # Update cache
+        if self.cache and conversation_messages:
+            await self.cache.set(cache_key, {
+                'messages': [asdict(msg) for msg in conversation_messages],
+                'session_id': session_id,
+                'updated_at': datetime.now().isoformat()
+            }, ttl=3600)
+
+        return conversation_messages, session_id
+
     async def search_conversations(
         self,
         user_id: str,
@@ -274,34 +306,49 @@ class ZepClient:
             return []
 
         try:
-            # Perform search
-            results = await self.client.memory.search(
-                text=query,
-                user_id=user_id,
-                limit=limit,
-                search_scope=search_scope
+            return await self.context_cache.get_search(
+                user_id,
+                query,
+                limit,
+                search_scope,
+                lambda: self._fetch_search_results(user_id, query, limit, search_scope)
             )
 
-            # Process results
-            search_results = []
-            for result in results:
-                search_results.append({
-                    'session_id': result.session_id,
-                    'message': {
-                        'role': result.role,
-                        'content': result.content,
-                        'created_at': result.created_at.isoformat() if result.created_at else None
-                    },
-                    'score': result.score,
-                    'metadata': result.metadata
-                })
-
-            return search_results
-
         except Exception as e:
             logger.error(f"Failed to search conversations: {e}")
             return []
 
+    async def _fetch_search_results(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        search_scope: str
+    ) -> List[Dict[str, Any]]:
+        """Run a semantic search against Zep"""
+        results = await self.client.memory.search(
+            text=query,
+            user_id=user_id,
+            limit=limit,
+            search_scope=search_scope
+        )
+
+        # Process results
+        search_results = []
+        for result in results:
+            search_results.append({
+                'session_id': result.session_id,
+                'message': {
+                    'role': result.role,
+                    'content': result.content,
+                    'created_at': result.created_at.isoformat() if result.created_at else None
+                },
+                'score': result.score,
+                'metadata': result.metadata
+            })
+
+        return search_results
+
     async def get_contextual_memory(self, user_id: str, current_query: str) -> ConversationContext:
         """Get contextual memory for conversation"""
         try:
@@ -666,4 +713,8 @@ class ZepClient:
 
         except Exception as e:
             logger.error(f"Failed to get session stats: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    def get_context_cache_stats(self) -> Dict[str, Any]:
+        """Hit rate and bytes fetched per turn for the session context cache"""
+        return self.context_cache.get_stats()
@@ -12,11 +12,23 @@ from .notification_service import (
     NotificationMessage,
     UserNotificationPreferences
 )
+from .dispatch_pipeline import (
+    NotificationDispatcher,
+    VehicleEvent,
+    DispatchReport,
+    ChannelLimits,
+    MemorySink
+)
 
 __all__ = [
     'NotificationService',
     'NotificationType',
     'NotificationChannel',
     'NotificationMessage',
-    'UserNotificationPreferences'
+    'UserNotificationPreferences',
+    'NotificationDispatcher',
+    'VehicleEvent',
+    'DispatchReport',
+    'ChannelLimits',
+    'MemorySink'
 ]
\ No newline at end of file
@@ -0,0 +1,552 @@
+"""
+Otto.AI Notification Dispatch Pipeline
+
+Fans a vehicle event (price drop, availability change) out to every user
+following the vehicle in one pass:
+
+1. Preferences for all recipients are loaded with one query
+2. Each user's notification is built and filtered by their preferences
+3. Users on hourly/daily frequency, in quiet hours, or already notified within
+   the digest window are collected into a per-user digest instead. Quiet-hour
+   deferrals are also stored as 'deferred' rows, which are settled when their
+   digest goes out and reloaded into digests on startup
+4. Sends are grouped per channel; each channel has its own concurrency limit
+   and token-bucket rate limit matching its provider
+5. All resulting notification rows are written with multi-row inserts
+
+Delivery goes through sinks, so the pipeline runs against SMTP and the
+SMS/in-app placeholders in production and against in-memory sinks locally.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+import smtplib
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from src.cache.dialogue_state_store import BoundedLRUCache
+
+from .notification_service import (
+    NotificationChannel,
+    NotificationMessage,
+    NotificationType,
+    UserNotificationPreferences,
+    build_email_message
+)
+
+if TYPE_CHECKING:
+    from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Seconds until a digest is sent, by notification_frequency
+DIGEST_DELAYS = {
+    'hourly': 3600,
+    'daily': 86400
+}
+
+
+# ============================================================================
+# Sinks
+# ============================================================================
+
+class NotificationSink:
+    """Delivers notifications for one channel"""
+
+    channel: NotificationChannel
+
+    async def send(self, notification: NotificationMessage, address: Optional[str]) -> bool:
+        raise NotImplementedError
+
+
+class SMTPEmailSink(NotificationSink):
+    """Email over SMTP; the blocking client runs in a worker thread"""
+
+    channel = NotificationChannel.EMAIL
+
+    def __init__(self, email_config: Dict[str, Any]):
+        self.email_config = email_config
+
+    def _send_sync(self, notification: NotificationMessage, address: str) -> None:
+        msg = build_email_message(notification, self.email_config['from_email'], address)
+        with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
+            server.starttls()
+            server.login(self.email_config['smtp_username'], self.email_config['smtp_password'])
+            server.send_message(msg)
+
+    async def send(self, notification: NotificationMessage, address: Optional[str]) -> bool:
+        await asyncio.to_thread(self._send_sync, notification, address)
+        return True
+
+
+class LogSMSSink(NotificationSink):
+    """SMS placeholder until a provider (Twilio, AWS SNS, etc.) is integrated"""
+
+    channel = NotificationChannel.SMS
+
+    async def send(self, notification: NotificationMessage, address: Optional[str]) -> bool:
+        sms_content = f"Otto AI: {notification.subject}. {notification.content[:100]}..."
+        logger.info(f"📱 SMS would be sent to {address}: {sms_content}")
+        return True
+
+
+class LogInAppSink(NotificationSink):
+    """In-app placeholder until real-time delivery is wired to the WebSocket manager"""
+
+    channel = NotificationChannel.IN_APP
+
+    async def send(self, notification: NotificationMessage, address: Optional[str]) -> bool:
+        logger.info(f"🔔 In-app notification for user {notification.user_id}: {notification.subject}")
+        return True
+
+
+class MemorySink(NotificationSink):
+    """Local stand-in that records deliveries; optional latency and failing addresses"""
+
+    def __init__(self, channel: NotificationChannel, latency: float = 0.0, fail_addresses: Optional[set] = None):
+        self.channel = channel
+        self.latency = latency
+        self.fail_addresses = fail_addresses or set()
+        self.sent: List[Tuple[Optional[str], NotificationMessage]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, notification: NotificationMessage, address: Optional[str]) -> bool:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if address in self.fail_addresses:
+                return False
+            self.sent.append((address, notification))
+            return True
+        finally:
+            self.in_flight -= 1
+
+
+def local_sinks(**kwargs) -> Dict[NotificationChannel, MemorySink]:
+    """In-memory sinks for every channel"""
+    return {channel: MemorySink(channel, **kwargs) for channel in NotificationChannel}
+
+
+# ============================================================================
+# Limits
+# ============================================================================
+
+@dataclass
+class ChannelLimits:
+    """Concurrency and provider rate limit for one channel"""
+    concurrency: int = 10
+    rate_per_second: Optional[float] = None  # None = unlimited
+    burst: int = 1
+
+
+DEFAULT_CHANNEL_LIMITS = {
+    NotificationChannel.EMAIL: ChannelLimits(
+        concurrency=int(os.getenv('NOTIFICATION_EMAIL_CONCURRENCY', '10')),
+        rate_per_second=float(os.getenv('NOTIFICATION_EMAIL_RATE', '14')),
+        burst=14
+    ),
+    NotificationChannel.SMS: ChannelLimits(
+        concurrency=int(os.getenv('NOTIFICATION_SMS_CONCURRENCY', '5')),
+        rate_per_second=float(os.getenv('NOTIFICATION_SMS_RATE', '1')),
+        burst=1
+    ),
+    NotificationChannel.IN_APP: ChannelLimits(concurrency=100)
+}
+
+
+class TokenBucket:
+    """Async token bucket; acquire() waits until a token is available"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ============================================================================
+# Dispatcher
+# ============================================================================
+
+@dataclass
+class VehicleEvent:
+    """A change on one vehicle that its followers should hear about"""
+    vehicle_id: str
+    type: NotificationType
+    vehicle_details: Dict[str, Any] = field(default_factory=dict)
+    old_price: Optional[float] = None
+    new_price: Optional[float] = None
+    new_status: Optional[str] = None
+
+
+@dataclass
+class DispatchReport:
+    """Outcome of dispatching one event"""
+    recipients: int = 0
+    filtered: int = 0
+    immediate: int = 0
+    digested: int = 0
+    deferred: int = 0
+    sent: int = 0
+    failed: int = 0
+
+
+@dataclass
+class _PendingDigest:
+    preferences: UserNotificationPreferences
+    due_at: float
+    notifications: List[NotificationMessage] = field(default_factory=list)
+
+
+class NotificationDispatcher:
+    """Bulk fan-out of vehicle events with per-channel limits and digests"""
+
+    def __init__(
+        self,
+        service: "NotificationService",
+        sinks: Dict[NotificationChannel, NotificationSink],
+        limits: Optional[Dict[NotificationChannel, ChannelLimits]] = None,
+        digest_window_seconds: float = 300.0,
+        flush_interval_seconds: float = 30.0
+    ):
+        self.service = service
+        self.sinks = sinks
+        self.limits = {**DEFAULT_CHANNEL_LIMITS, **(limits or {})}
+        self.digest_window_seconds = digest_window_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._semaphores = {
+            channel: asyncio.Semaphore(limit.concurrency) for channel, limit in self.limits.items()
+        }
+        self._buckets = {
+            channel: TokenBucket(limit.rate_per_second, limit.burst)
+            for channel, limit in self.limits.items()
+            if limit.rate_per_second
+        }
+
+        self._digests: Dict[str, _PendingDigest] = {}
+        # Users notified recently; further events inside the window become a digest
+        self._recently_notified = BoundedLRUCache(max_entries=100000, ttl_seconds=digest_window_seconds)
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'events': 0,
+            'notifications_built': 0,
+            'sent': 0,
+            'failed': 0,
+            'digested': 0,
+            'deferred': 0,
+            'digests_sent': 0,
+            'rows_persisted': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the background digest flusher"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush_digests()
+            except Exception as e:
+                logger.error(f"❌ Error flushing notification digests: {e}")
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    async def dispatch(self, event: VehicleEvent, user_ids: Optional[List[str]] = None) -> DispatchReport:
+        """
+        Notify every follower of a vehicle about one event
+
+        Args:
+            event: The vehicle change
+            user_ids: Recipients; defaults to everyone who favorited the vehicle
+
+        Returns:
+            DispatchReport with per-stage counts
+        """
+        self.stats['events'] += 1
+        if user_ids is None:
+            user_ids = await self.service.get_vehicle_follower_ids(event.vehicle_id)
+
+        report = DispatchReport(recipients=len(user_ids))
+        if not user_ids:
+            return report
+
+        preferences_by_user = await self.service.get_user_notification_preferences_bulk(user_ids)
+        now = time.monotonic()
+        immediate: List[Tuple[NotificationMessage, UserNotificationPreferences]] = []
+        deferred: List[Tuple[NotificationMessage, UserNotificationPreferences]] = []
+
+        for user_id in user_ids:
+            preferences = preferences_by_user[user_id]
+            notification = self._build(event, user_id, preferences)
+            if notification is None:
+                report.filtered += 1
+                continue
+            self.stats['notifications_built'] += 1
+
+            if self._should_digest(user_id, preferences):
+                if self.service._is_quiet_hours(preferences):
+                    deferred.append((notification, preferences))
+                else:
+                    self._add_to_digest(notification, preferences, now)
+                report.digested += 1
+                continue
+
+            immediate.append((notification, preferences))
+            self._recently_notified[user_id] = now
+
+        report.immediate = len(immediate)
+        self.stats['digested'] += report.digested
+
+        await self.defer(deferred)
+        report.deferred = len(deferred)
+
+        rows = await self._deliver(immediate)
+        report.sent = sum(1 for row in rows if row.status == 'sent')
+        report.failed = sum(1 for row in rows if row.status == 'failed')
+        return report
+
+    def _build(
+        self,
+        event: VehicleEvent,
+        user_id: str,
+        preferences: UserNotificationPreferences
+    ) -> Optional[NotificationMessage]:
+        if event.type == NotificationType.PRICE_DROP:
+            if not preferences.price_drop_notifications or not event.old_price:
+                return None
+            price_drop_percentage = ((event.old_price - event.new_price) / event.old_price) * 100
+            if price_drop_percentage < preferences.min_price_drop_percentage:
+                return None
+            return self.service.build_price_drop_notification(
+                user_id, event.vehicle_id, event.old_price, event.new_price, event.vehicle_details
+            )
+
+        if event.type == NotificationType.AVAILABILITY_CHANGE:
+            if not preferences.availability_notifications:
+                return None
+            return self.service.build_availability_change_notification(
+                user_id, event.vehicle_id, event.new_status or '', event.vehicle_details
+            )
+
+        return None
+
+    async def defer(self, items: List[Tuple[NotificationMessage, UserNotificationPreferences]]) -> None:
+        """Hold notifications in their users' digests until quiet hours end, recorded with one insert"""
+        if not items:
+            return
+
+        now = time.monotonic()
+        for notification, preferences in items:
+            self._add_to_digest(notification, preferences, now)
+        await self.service._defer_notifications([notification for notification, _ in items])
+        self.stats['deferred'] += len(items)
+
+    async def restore_deferred(self) -> int:
+        """Rebuild digests from deferred rows a previous process left in the database"""
+        held = {n.id for digest in self._digests.values() for n in digest.notifications}
+        notifications = [
+            n for n in await self.service._load_deferred_notifications() if n.id not in held
+        ]
+        if not notifications:
+            return 0
+
+        preferences_by_user = await self.service.get_user_notification_preferences_bulk(
+            list(dict.fromkeys(n.user_id for n in notifications))
+        )
+        now = time.monotonic()
+        for notification in notifications:
+            self._add_to_digest(notification, preferences_by_user[notification.user_id], now)
+
+        logger.info(f"📬 Restored {len(notifications)} deferred notifications into digests")
+        return len(notifications)
+
+    def _should_digest(self, user_id: str, preferences: UserNotificationPreferences) -> bool:
+        return (
+            preferences.notification_frequency in DIGEST_DELAYS
+            or user_id in self._digests
+            or self._recently_notified.get(user_id) is not None
+            or self.service._is_quiet_hours(preferences)
+        )
+
+    def _add_to_digest(
+        self,
+        notification: NotificationMessage,
+        preferences: UserNotificationPreferences,
+        now: float
+    ) -> None:
+        digest = self._digests.get(notification.user_id)
+        if digest is None:
+            delay = DIGEST_DELAYS.get(preferences.notification_frequency, self.digest_window_seconds)
+            digest = _PendingDigest(preferences=preferences, due_at=now + delay)
+            self._digests[notification.user_id] = digest
+        digest.notifications.append(notification)
+
+    async def flush_digests(self, force: bool = False) -> int:
+        """Send digests that are due (all of them with ``force``); returns digests sent"""
+        now = time.monotonic()
+        ready: List[Tuple[NotificationMessage, UserNotificationPreferences]] = []
+        deferred: List[NotificationMessage] = []
+
+        for user_id, digest in list(self._digests.items()):
+            if not force and (digest.due_at > now or self.service._is_quiet_hours(digest.preferences)):
+                continue
+            del self._digests[user_id]
+            ready.append((self._digest_message(user_id, digest.notifications), digest.preferences))
+            deferred.extend(n for n in digest.notifications if n.status == 'deferred')
+            self._recently_notified[user_id] = now
+
+        if ready:
+            rows = await self._send(ready)
+            # Settle the stored deferrals with the outcome of their digest
+            delivered = {row.user_id for row in rows if row.status == 'sent'}
+            sent_at = datetime.utcnow()
+            for notification in deferred:
+                if notification.user_id in delivered:
+                    notification.status = 'sent'
+                    notification.sent_at = sent_at
+                else:
+                    notification.status = 'failed'
+            await self._persist(rows + deferred)
+            self.stats['digests_sent'] += len(ready)
+        return len(ready)
+
+    @staticmethod
+    def _digest_message(user_id: str, notifications: List[NotificationMessage]) -> NotificationMessage:
+        if len(notifications) == 1:
+            return notifications[0]
+
+        vehicle_ids = list(dict.fromkeys(n.vehicle_id for n in notifications))
+        content = "\n\n".join(f"• {n.subject}\n{n.content}" for n in notifications)
+        return NotificationMessage(
+            user_id=user_id,
+            vehicle_id=vehicle_ids[0],
+            type=NotificationType.DIGEST,
+            subject=f"Otto AI: {len(notifications)} updates on vehicles you follow",
+            content=content,
+            data={
+                'vehicle_ids': vehicle_ids,
+                'notification_types': [n.type.value for n in notifications],
+                'items': [n.data for n in notifications]
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    async def _deliver(
+        self,
+        notifications: List[Tuple[NotificationMessage, UserNotificationPreferences]]
+    ) -> List[NotificationMessage]:
+        """Send per channel in parallel, then persist every row in bulk"""
+        rows = await self._send(notifications)
+        await self._persist(rows)
+        return rows
+
+    async def _send(
+        self,
+        notifications: List[Tuple[NotificationMessage, UserNotificationPreferences]]
+    ) -> List[NotificationMessage]:
+        """One row per (notification, channel), with its send outcome"""
+        by_channel: Dict[NotificationChannel, List[Tuple[NotificationMessage, Optional[str]]]] = {
+            channel: [] for channel in NotificationChannel
+        }
+        for notification, preferences in notifications:
+            for channel, address in self._channel_targets(preferences):
+                copy = replace(notification, id=str(uuid.uuid4()), channel=channel)
+                by_channel[channel].append((copy, address))
+
+        await asyncio.gather(*(
+            self._send_channel(channel, items) for channel, items in by_channel.items() if items
+        ))
+
+        return [notification for items in by_channel.values() for notification, _ in items]
+
+    async def _persist(self, rows: List[NotificationMessage]) -> None:
+        await self.service._save_notifications(rows)
+        self.stats['rows_persisted'] += len(rows)
+
+    @staticmethod
+    def _channel_targets(preferences: UserNotificationPreferences) -> List[Tuple[NotificationChannel, Optional[str]]]:
+        targets: List[Tuple[NotificationChannel, Optional[str]]] = []
+        if preferences.email_enabled and preferences.email_address:
+            targets.append((NotificationChannel.EMAIL, preferences.email_address))
+        if preferences.sms_enabled and preferences.phone_number:
+            targets.append((NotificationChannel.SMS, preferences.phone_number))
+        if preferences.in_app_enabled:
+            targets.append((NotificationChannel.IN_APP, None))
+        return targets
+
+    async def _send_channel(
+        self,
+        channel: NotificationChannel,
+        items: List[Tuple[NotificationMessage, Optional[str]]]
+    ) -> None:
+        sink = self.sinks.get(channel)
+        semaphore = self._semaphores.get(channel) or asyncio.Semaphore(10)
+        bucket = self._buckets.get(channel)
+
+        async def send_one(notification: NotificationMessage, address: Optional[str]) -> None:
+            async with semaphore:
+                if bucket:
+                    await bucket.acquire()
+                try:
+                    ok = sink is not None and await sink.send(notification, address)
+                except Exception as e:
+                    logger.error(f"❌ Failed to send {channel.value} notification: {e}")
+                    ok = False
+
+            if ok:
+                notification.status = 'sent'
+                notification.sent_at = datetime.utcnow()
+                self.stats['sent'] += 1
+            else:
+                notification.status = 'failed'
+                self.stats['failed'] += 1
+
+        await asyncio.gather(*(send_one(notification, address) for notification, address in items))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'pending_digests': len(self._digests),
+            'pending_digest_items': sum(len(d.notifications) for d in self._digests.values())
+        }
@@ -11,6 +11,7 @@ Features:
 - Notification batching to prevent spam
 - User notification preferences management
 - Real-time notification delivery
+- Bulk fan-out of vehicle events with digests (see dispatch_pipeline)
 """
 
 import os
@@ -18,7 +19,7 @@ import asyncio
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import smtplib
 from email.mime.text import MIMEText
@@ -35,6 +36,7 @@ class NotificationType(Enum):
     PRICE_DROP = "price_drop"
     AVAILABILITY_CHANGE = "availability_change"
     NEW_SIMILAR_VEHICLE = "new_similar_vehicle"
+    DIGEST = "digest"
 
 class NotificationChannel(Enum):
     """Notification delivery channels"""
@@ -55,7 +57,7 @@ class NotificationMessage:
     data: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.utcnow)
     sent_at: Optional[datetime] = None
-    status: str = "pending"  # pending, sent, failed
+    status: str = "pending"  # pending, deferred, sent, failed
     retry_count: int = 0
     max_retries: int = 3
 
@@ -78,6 +80,36 @@ class UserNotificationPreferences:
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
 
+def build_email_message(notification: NotificationMessage, from_email: str, to_email: str) -> MIMEMultipart:
+    """Plain text + HTML email for a notification"""
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = notification.subject
+
+    html_content = f"""
+            <html>
+            <body>
+                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                    <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
+                        <h2 style="color: #333; margin-bottom: 20px;">{notification.subject}</h2>
+                        <div style="background-color: white; padding: 20px; border-radius: 6px; margin-bottom: 20px;">
+                            <pre style="white-space: pre-wrap; font-family: Arial, sans-serif; color: #666;">{notification.content}</pre>
+                        </div>
+                        <div style="text-align: center; color: #999; font-size: 12px;">
+                            <p>Sent by Otto AI Vehicle Discovery</p>
+                            <p>If you no longer want these notifications, you can update your preferences in your account settings.</p>
+                        </div>
+                    </div>
+                </div>
+            </body>
+            </html>
+            """
+
+    msg.attach(MIMEText(notification.content, 'plain'))
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
 class NotificationService:
     """
     Service for managing multi-channel notifications
@@ -97,6 +129,7 @@ class NotificationService:
             'smtp_password': os.getenv('SMTP_PASSWORD'),
             'from_email': os.getenv('FROM_EMAIL', 'noreply@otto.ai')
         }
+        self.dispatcher = None  # Lazy loaded
 
     async def initialize(self, supabase_url: str, supabase_key: str) -> bool:
         """
@@ -125,6 +158,12 @@ class NotificationService:
             await self._create_notifications_table()
             await self._create_notification_preferences_table()
 
+            # Digests are only sent by the dispatcher's background flusher;
+            # quiet-hour deferrals from a previous run rejoin their digests first
+            dispatcher = self.get_dispatcher()
+            await dispatcher.restore_deferred()
+            dispatcher.start()
+
             return True
 
         except Exception as e:
@@ -260,39 +299,8 @@ class NotificationService:
                 logger.info(f"Price drop {price_drop_percentage:.1f}% below threshold {preferences.min_price_drop_percentage}%")
                 return False
 
-            # Create notification content
-            savings_amount = old_price - new_price
-            subject = f"Price Alert: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')} price dropped by {price_drop_percentage:.1f}%"
-
-            content = f"""
-Great news! A vehicle you're following has dropped in price:
-
-Vehicle: {vehicle_details.get('year', '')} {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}
-Previous Price: ${old_price:,.2f}
-New Price: ${new_price:,.2f}
-You Save: ${savings_amount:,.2f} ({price_drop_percentage:.1f}%)
-
-View this vehicle now before someone else grabs this deal!
-{vehicle_details.get('url', 'Contact us for details')}
-
-Best regards,
-Otto AI Vehicle Discovery
-            """.strip()
-
-            # Create notification message
-            notification = NotificationMessage(
-                user_id=user_id,
-                vehicle_id=vehicle_id,
-                type=NotificationType.PRICE_DROP,
-                subject=subject,
-                content=content,
-                data={
-                    'old_price': old_price,
-                    'new_price': new_price,
-                    'savings_amount': savings_amount,
-                    'price_drop_percentage': price_drop_percentage,
-                    'vehicle_details': vehicle_details
-                }
+            notification = self.build_price_drop_notification(
+                user_id, vehicle_id, old_price, new_price, vehicle_details
             )
 
             # Send through preferred channels
@@ -309,6 +317,51 @@ Otto AI Vehicle Discovery
             logger.error(f"❌ Error sending price drop notification: {e}")
             return False
 
+    def build_price_drop_notification(
+        self,
+        user_id: str,
+        vehicle_id: str,
+        old_price: float,
+        new_price: float,
+        vehicle_details: Dict[str, Any]
+    ) -> NotificationMessage:
+        """Build the price drop message for one user (no preference checks)"""
+        price_drop_percentage = ((old_price - new_price) / old_price) * 100
+
+        # Create notification content
+        savings_amount = old_price - new_price
+        subject = f"Price Alert: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')} price dropped by {price_drop_percentage:.1f}%"
+
+        content = f"""
+Great news! A vehicle you're following has dropped in price:
+
+Vehicle: {vehicle_details.get('year', '')} {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}
+Previous Price: ${old_price:,.2f}
+New Price: ${new_price:,.2f}
+You Save: ${savings_amount:,.2f} ({price_drop_percentage:.1f}%)
+
+View this vehicle now before someone else grabs this deal!
+{vehicle_details.get('url', 'Contact us for details')}
+
+Best regards,
+Otto AI Vehicle Discovery
+        """.strip()
+
+        return NotificationMessage(
+            user_id=user_id,
+            vehicle_id=vehicle_id,
+            type=NotificationType.PRICE_DROP,
+            subject=subject,
+            content=content,
+            data={
+                'old_price': old_price,
+                'new_price': new_price,
+                'savings_amount': savings_amount,
+                'price_drop_percentage': price_drop_percentage,
+                'vehicle_details': vehicle_details
+            }
+        )
+
     async def send_availability_change_notification(
         self,
         user_id: str,
@@ -337,10 +390,36 @@ Otto AI Vehicle Discovery
                 logger.info(f"User {user_id} has disabled availability notifications")
                 return False
 
-            # Create notification content based on status
-            if new_status.lower() == 'sold':
-                subject = f"Sold: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')} is no longer available"
-                content = f"""
+            notification = self.build_availability_change_notification(
+                user_id, vehicle_id, new_status, vehicle_details
+            )
+
+            # Send through preferred channels
+            success = await self._send_notification_channels(notification, preferences)
+
+            if success:
+                logger.info(f"✅ Availability change notification sent for vehicle {vehicle_id} to user {user_id}")
+            else:
+                logger.error(f"❌ Failed to send availability change notification for vehicle {vehicle_id} to user {user_id}")
+
+            return success
+
+        except Exception as e:
+            logger.error(f"❌ Error sending availability change notification: {e}")
+            return False
+
+    def build_availability_change_notification(
+        self,
+        user_id: str,
+        vehicle_id: str,
+        new_status: str,
+        vehicle_details: Dict[str, Any]
+    ) -> NotificationMessage:
+        """Build the availability change message for one user (no preference checks)"""
+        # Create notification content based on status
+        if new_status.lower() == 'sold':
+            subject = f"Sold: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')} is no longer available"
+            content = f"""
 Unfortunately, a vehicle you were following has been sold:
 
 Vehicle: {vehicle_details.get('year', '')} {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}
@@ -350,10 +429,10 @@ Check your recommendations or adjust your search criteria.
 
 Happy car hunting!
 Otto AI Vehicle Discovery
-                """.strip()
-            else:
-                subject = f"Availability Update: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}"
-                content = f"""
+            """.strip()
+        else:
+            subject = f"Availability Update: {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}"
+            content = f"""
 Availability update for a vehicle you're following:
 
 Vehicle: {vehicle_details.get('year', '')} {vehicle_details.get('make', '')} {vehicle_details.get('model', '')}
@@ -363,34 +442,19 @@ New Status: {new_status}
 
 Best regards,
 Otto AI Vehicle Discovery
-                """.strip()
-
-            # Create notification message
-            notification = NotificationMessage(
-                user_id=user_id,
-                vehicle_id=vehicle_id,
-                type=NotificationType.AVAILABILITY_CHANGE,
-                subject=subject,
-                content=content,
-                data={
-                    'new_status': new_status,
-                    'vehicle_details': vehicle_details
-                }
-            )
-
-            # Send through preferred channels
-            success = await self._send_notification_channels(notification, preferences)
-
-            if success:
-                logger.info(f"✅ Availability change notification sent for vehicle {vehicle_id} to user {user_id}")
-            else:
-                logger.error(f"❌ Failed to send availability change notification for vehicle {vehicle_id} to user {user_id}")
-
-            return success
+            """.strip()
 
-        except Exception as e:
-            logger.error(f"❌ Error sending availability change notification: {e}")
-            return False
+        return NotificationMessage(
+            user_id=user_id,
+            vehicle_id=vehicle_id,
+            type=NotificationType.AVAILABILITY_CHANGE,
+            subject=subject,
+            content=content,
+            data={
+                'new_status': new_status,
+                'vehicle_details': vehicle_details
+            }
+        )
 
     async def _send_notification_channels(
         self,
@@ -413,29 +477,32 @@ Otto AI Vehicle Discovery
             # Check quiet hours
             if self._is_quiet_hours(preferences):
                 logger.info(f"Deferring notification for user {notification.user_id} due to quiet hours")
-                await self._defer_notification(notification)
+                await self._defer_notification(notification, preferences)
                 return True
 
             # Send through enabled channels
             if preferences.email_enabled and preferences.email_address:
-                email_notification = NotificationMessage(
-                    **notification.__dict__,
+                email_notification = replace(
+                    notification,
+                    id=str(uuid.uuid4()),
                     channel=NotificationChannel.EMAIL
                 )
                 if await self._send_email_notification(email_notification, preferences.email_address):
                     success_count += 1
 
             if preferences.sms_enabled and preferences.phone_number:
-                sms_notification = NotificationMessage(
-                    **notification.__dict__,
+                sms_notification = replace(
+                    notification,
+                    id=str(uuid.uuid4()),
                     channel=NotificationChannel.SMS
                 )
                 if await self._send_sms_notification(sms_notification, preferences.phone_number):
                     success_count += 1
 
             if preferences.in_app_enabled:
-                in_app_notification = NotificationMessage(
-                    **notification.__dict__,
+                in_app_notification = replace(
+                    notification,
+                    id=str(uuid.uuid4()),
                     channel=NotificationChannel.IN_APP
                 )
                 if await self._send_in_app_notification(in_app_notification):
@@ -464,33 +531,7 @@ Otto AI Vehicle Discovery
         """
         try:
             # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = self.email_config['from_email']
-            msg['To'] = email_address
-            msg['Subject'] = notification.subject
-
-            # Add HTML and plain text versions
-            html_content = f"""
-            <html>
-            <body>
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
-                        <h2 style="color: #333; margin-bottom: 20px;">{notification.subject}</h2>
-                        <div style="background-color: white; padding: 20px; border-radius: 6px; margin-bottom: 20px;">
-                            <pre style="white-space: pre-wrap; font-family: Arial, sans-serif; color: #666;">{notification.content}</pre>
-                        </div>
-                        <div style="text-align: center; color: #999; font-size: 12px;">
-                            <p>Sent by Otto AI Vehicle Discovery</p>
-                            <p>If you no longer want these notifications, you can update your preferences in your account settings.</p>
-                        </div>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-
-            msg.attach(MIMEText(notification.content, 'plain'))
-            msg.attach(MIMEText(html_content, 'html'))
+            msg = build_email_message(notification, self.email_config['from_email'], email_address)
 
             # Send email
             with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
@@ -608,18 +649,78 @@ Otto AI Vehicle Discovery
             if self.db_conn:
                 self.db_conn.rollback()
 
-    async def _defer_notification(self, notification: NotificationMessage) -> None:
-        """Save notification for later delivery during quiet hours"""
+    async def _save_notifications(self, notifications: List[NotificationMessage], chunk_size: int = 500) -> None:
+        """Save many notifications with multi-row inserts"""
+        if not notifications:
+            return
+
         try:
-            # TODO: Implement proper notification deferral system
-            # For now, just mark as deferred
-            notification.status = 'deferred'
-            await self._save_notification(notification)
+            with self.db_conn.cursor() as cur:
+                for start in range(0, len(notifications), chunk_size):
+                    chunk = notifications[start:start + chunk_size]
+                    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+                    params: List[Any] = []
+                    for notification in chunk:
+                        params.extend((
+                            notification.id, notification.user_id, notification.vehicle_id,
+                            notification.type.value, notification.channel.value,
+                            notification.subject, notification.content, json.dumps(notification.data, default=str),
+                            notification.created_at, notification.sent_at, notification.status,
+                            notification.retry_count, notification.max_retries
+                        ))
+
+                    cur.execute(f"""
+                        INSERT INTO notifications (
+                            id, user_id, vehicle_id, type, channel, subject, content,
+                            data, created_at, sent_at, status, retry_count, max_retries
+                        ) VALUES {values}
+                        ON CONFLICT (id) DO UPDATE SET
+                            sent_at = EXCLUDED.sent_at,
+                            status = EXCLUDED.status,
+                            retry_count = EXCLUDED.retry_count;
+                    """, params)
+
+                self.db_conn.commit()
+
+        except Exception as e:
+            logger.error(f"❌ Failed to save {len(notifications)} notifications: {e}")
+            if self.db_conn:
+                self.db_conn.rollback()
+
+    async def _defer_notification(
+        self,
+        notification: NotificationMessage,
+        preferences: UserNotificationPreferences
+    ) -> None:
+        """Hold a notification in the user's digest until quiet hours end"""
+        try:
+            await self.get_dispatcher().defer([(notification, preferences)])
             logger.info(f"Notification deferred for user {notification.user_id}")
 
         except Exception as e:
             logger.error(f"❌ Failed to defer notification: {e}")
 
+    async def _defer_notifications(self, notifications: List[NotificationMessage]) -> None:
+        """Record quiet-hour deferrals with multi-row inserts"""
+        for notification in notifications:
+            notification.status = 'deferred'
+        await self._save_notifications(notifications)
+
+    async def _load_deferred_notifications(self) -> List[NotificationMessage]:
+        """Deferred notifications not yet settled by a digest, oldest first"""
+        try:
+            with self.db_conn.cursor(row_factory=dict_row) as cur:
+                cur.execute("""
+                    SELECT * FROM notifications
+                    WHERE status = 'deferred'
+                    ORDER BY created_at;
+                """)
+                return [self._notification_from_row(row) for row in cur.fetchall()]
+
+        except Exception as e:
+            logger.error(f"❌ Failed to load deferred notifications: {e}")
+            return []
+
     def _is_quiet_hours(self, preferences: UserNotificationPreferences) -> bool:
         """Check if current time is within user's quiet hours"""
         if not preferences.quiet_hours_start or not preferences.quiet_hours_end:
@@ -659,23 +760,7 @@ Otto AI Vehicle Discovery
                 row = cur.fetchone()
 
                 if row:
-                    return UserNotificationPreferences(
-                        user_id=row['user_id'],
-                        price_drop_notifications=row['price_drop_notifications'],
-                        availability_notifications=row['availability_notifications'],
-                        new_similar_vehicle_notifications=row['new_similar_vehicle_notifications'],
-                        email_enabled=row['email_enabled'],
-                        sms_enabled=row['sms_enabled'],
-                        in_app_enabled=row['in_app_enabled'],
-                        email_address=row['email_address'],
-                        phone_number=row['phone_number'],
-                        min_price_drop_percentage=float(row['min_price_drop_percentage']),
-                        notification_frequency=row['notification_frequency'],
-                        quiet_hours_start=row['quiet_hours_start'].strftime("%H:%M") if row['quiet_hours_start'] else None,
-                        quiet_hours_end=row['quiet_hours_end'].strftime("%H:%M") if row['quiet_hours_end'] else None,
-                        created_at=row['created_at'],
-                        updated_at=row['updated_at']
-                    )
+                    return self._preferences_from_row(row)
                 else:
                     # Return default preferences
                     return UserNotificationPreferences(user_id=user_id)
@@ -684,6 +769,163 @@ Otto AI Vehicle Discovery
             logger.error(f"❌ Failed to get user notification preferences: {e}")
             return UserNotificationPreferences(user_id=user_id)
 
+    @staticmethod
+    def _preferences_from_row(row: Dict[str, Any]) -> UserNotificationPreferences:
+        """Build preferences from a user_notification_preferences row"""
+        return UserNotificationPreferences(
+            user_id=row['user_id'],
+            price_drop_notifications=row['price_drop_notifications'],
+            availability_notifications=row['availability_notifications'],
+            new_similar_vehicle_notifications=row['new_similar_vehicle_notifications'],
+            email_enabled=row['email_enabled'],
+            sms_enabled=row['sms_enabled'],
+            in_app_enabled=row['in_app_enabled'],
+            email_address=row['email_address'],
+            phone_number=row['phone_number'],
+            min_price_drop_percentage=float(row['min_price_drop_percentage']),
+            notification_frequency=row['notification_frequency'],
+            quiet_hours_start=row['quiet_hours_start'].strftime("%H:%M") if row['quiet_hours_start'] else None,
+            quiet_hours_end=row['quiet_hours_end'].strftime("%H:%M") if row['quiet_hours_end'] else None,
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
+        )
+
+    @staticmethod
+    def _notification_from_row(row: Dict[str, Any]) -> NotificationMessage:
+        return NotificationMessage(
+            id=str(row['id']),
+            user_id=row['user_id'],
+            vehicle_id=row['vehicle_id'],
+            type=NotificationType(row['type']),
+            channel=NotificationChannel(row['channel']),
+            subject=row['subject'],
+            content=row['content'],
+            data=row['data'] if isinstance(row['data'], dict) else json.loads(row['data'] or '{}'),
+            created_at=row['created_at'],
+            sent_at=row['sent_at'],
+            status=row['status'],
+            retry_count=row['retry_count'],
+            max_retries=row['max_retries']
+        )
+
+    async def get_user_notification_preferences_bulk(
+        self,
+        user_ids: List[str]
+    ) -> Dict[str, UserNotificationPreferences]:
+        """
+        Get notification preferences for many users with one query
+
+        Args:
+            user_ids: User identifiers
+
+        Returns:
+            Dict of user_id to preferences; users without a row get defaults
+        """
+        preferences = {user_id: UserNotificationPreferences(user_id=user_id) for user_id in user_ids}
+        if not user_ids:
+            return preferences
+
+        try:
+            with self.db_conn.cursor(row_factory=dict_row) as cur:
+                cur.execute("""
+                    SELECT * FROM user_notification_preferences WHERE user_id = ANY(%s);
+                """, (list(user_ids),))
+
+                for row in cur.fetchall():
+                    preferences[row['user_id']] = self._preferences_from_row(row)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get notification preferences for {len(user_ids)} users: {e}")
+
+        return preferences
+
+    async def get_vehicle_follower_ids(self, vehicle_id: str) -> List[str]:
+        """Users who favorited a vehicle"""
+        try:
+            with self.db_conn.cursor() as cur:
+                cur.execute("""
+                    SELECT DISTINCT user_id FROM user_favorites WHERE vehicle_id = %s;
+                """, (vehicle_id,))
+                return [row[0] for row in cur.fetchall()]
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get followers for vehicle {vehicle_id}: {e}")
+            return []
+
+    def get_dispatcher(self):
+        """
+        Bulk dispatch pipeline sharing this service's database connection
+
+        NOTIFICATION_SINKS=local swaps SMTP and the SMS/in-app placeholders for
+        in-memory sinks, for local development and tests.
+        """
+        if self.dispatcher is None:
+            from .dispatch_pipeline import (
+                LogInAppSink,
+                LogSMSSink,
+                NotificationDispatcher,
+                SMTPEmailSink,
+                local_sinks
+            )
+
+            if os.getenv('NOTIFICATION_SINKS', '').lower() == 'local':
+                sinks = local_sinks()
+            else:
+                sinks = {
+                    NotificationChannel.EMAIL: SMTPEmailSink(self.email_config),
+                    NotificationChannel.SMS: LogSMSSink(),
+                    NotificationChannel.IN_APP: LogInAppSink()
+                }
+
+            self.dispatcher = NotificationDispatcher(
+                self,
+                sinks,
+                digest_window_seconds=float(os.getenv('NOTIFICATION_DIGEST_WINDOW_SECONDS', '300'))
+            )
+        return self.dispatcher
+
+    async def dispatch_price_drop(
+        self,
+        vehicle_id: str,
+        old_price: float,
+        new_price: float,
+        vehicle_details: Dict[str, Any],
+        user_ids: Optional[List[str]] = None
+    ):
+        """Notify every follower of a vehicle about a price drop"""
+        from .dispatch_pipeline import VehicleEvent
+
+        return await self.get_dispatcher().dispatch(
+            VehicleEvent(
+                vehicle_id=vehicle_id,
+                type=NotificationType.PRICE_DROP,
+                vehicle_details=vehicle_details,
+                old_price=old_price,
+                new_price=new_price
+            ),
+            user_ids
+        )
+
+    async def dispatch_availability_change(
+        self,
+        vehicle_id: str,
+        new_status: str,
+        vehicle_details: Dict[str, Any],
+        user_ids: Optional[List[str]] = None
+    ):
+        """Notify every follower of a vehicle about an availability change"""
+        from .dispatch_pipeline import VehicleEvent
+
+        return await self.get_dispatcher().dispatch(
+            VehicleEvent(
+                vehicle_id=vehicle_id,
+                type=NotificationType.AVAILABILITY_CHANGE,
+                vehicle_details=vehicle_details,
+                new_status=new_status
+            ),
+            user_ids
+        )
+
     async def update_user_notification_preferences(
         self,
         preferences: UserNotificationPreferences
@@ -792,24 +1034,7 @@ Otto AI Vehicle Discovery
 
                 rows = cur.fetchall()
 
-                notifications = []
-                for row in rows:
-                    notification = NotificationMessage(
-                        id=str(row['id']),
-                        user_id=row['user_id'],
-                        vehicle_id=row['vehicle_id'],
-                        type=NotificationType(row['type']),
-                        channel=NotificationChannel(row['channel']),
-                        subject=row['subject'],
-                        content=row['content'],
-                        data=row['data'] if isinstance(row['data'], dict) else json.loads(row.get('{}', '{}')),
-                        created_at=row['created_at'],
-                        sent_at=row['sent_at'],
-                        status=row['status'],
-                        retry_count=row['retry_count'],
-                        max_retries=row['max_retries']
-                    )
-                    notifications.append(notification)
+                notifications = [self._notification_from_row(row) for row in rows]
 
                 logger.info(f"✅ Retrieved {len(notifications)} notifications for user {user_id}")
                 return notifications, total
@@ -820,6 +1045,8 @@ Otto AI Vehicle Discovery
 
     async def close(self) -> None:
         """Close database connection"""
+        if self.dispatcher:
+            await self.dispatcher.stop()
         if self.db_conn:
             self.db_conn.close()
             logger.info("✅ Notification Service connection closed")
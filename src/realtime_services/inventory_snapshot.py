@@ -0,0 +1,455 @@
+"""
+Otto.AI Inventory Snapshot
+
+Shared, versioned snapshot of the newest active listings for SSE clients.
+
+The snapshot is loaded from Supabase once and kept pre-serialized, so a new
+SSE connection costs no queries and no JSON encoding: it is sent the cached
+frame (optionally gzip or brotli compressed, also cached per version). When
+listings change, the snapshot is updated and a compact ``inventory_delta``
+event is published on the broker's inventory topic:
+
+    {"version": 1042, "baseVersion": 1017,
+     "added": [{...vehicle...}], "removed": ["<id>"],
+     "changed": {"<id>": {"price": 23900}}}
+
+Versions are broker sequence numbers, so a stream can skip deltas already
+contained in the snapshot it sent. Every worker applies inventory deltas from
+the broker, which keeps snapshots aligned when Redis pub/sub is enabled.
+"""
+
+import os
+import gzip
+import json
+import base64
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+from src.realtime_services.sse_event_broker import (
+    INVENTORY_TOPIC,
+    SSEEvent,
+    SSEEventBroker,
+    get_sse_broker
+)
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_DELTA_EVENT = "inventory_delta"
+INVENTORY_SNAPSHOT_EVENT = "inventory_snapshot"
+
+ENCODING_IDENTITY = "identity"
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+
+# Seconds to wait after a failed load before querying Supabase again
+LOAD_RETRY_SECONDS = 5.0
+
+SUPPORTED_ENCODINGS = (ENCODING_IDENTITY, ENCODING_GZIP) + ((ENCODING_BROTLI,) if BROTLI_AVAILABLE else ())
+
+VehicleMap = Dict[str, Dict[str, Any]]
+
+
+def transform_vehicle_for_frontend(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transform database row to frontend format.
+
+    Maps database field names to frontend expectations:
+    - odometer -> mileage
+    - description_text -> description
+    - exterior_color -> color
+    - body_style -> body_type
+    - asking_price -> price (fallback to estimated_price, auction_forecast)
+    - status -> availabilityStatus (active -> available)
+    """
+    # Map status to availabilityStatus
+    status = row.get('status', 'active')
+    availability_status = 'available' if status == 'active' else 'reserved'
+
+    # Get price with fallbacks
+    price = row.get('asking_price') or row.get('estimated_price') or row.get('auction_forecast')
+
+    return {
+        'id': row.get('id', ''),
+        'vin': row.get('vin', ''),
+        'year': row.get('year', 0),
+        'make': row.get('make', ''),
+        'model': row.get('model', ''),
+        'trim': row.get('trim'),
+        # Map odometer -> mileage
+        'mileage': row.get('odometer'),
+        'drivetrain': row.get('drivetrain'),
+        'transmission': row.get('transmission'),
+        # Map exterior_color -> color
+        'color': row.get('exterior_color'),
+        'fuel_type': row.get('fuel_type'),
+        # Map body_style -> body_type (fallback to vehicle_type)
+        'body_type': row.get('body_style') or row.get('vehicle_type'),
+        # Map condition_grade -> condition
+        'condition': row.get('condition_grade'),
+        # Map description_text -> description
+        'description': row.get('description_text'),
+        'images': [],  # Will be populated when image storage is implemented
+        'features': None,  # Will be populated from features table
+        'matchScore': row.get('condition_score'),
+        'availabilityStatus': availability_status,
+        'currentViewers': None,
+        'ottoRecommendation': None,
+        'range': None,  # Will be calculated for EVs
+        'isFavorited': False,
+        # Map asking_price -> price with fallbacks
+        'price': price,
+        'originalPrice': None,
+        'savings': None,
+        # Required field - use empty string if null
+        'seller_id': row.get('seller_id') or '',
+        'created_at': row.get('created_at'),
+        'updated_at': row.get('updated_at'),
+    }
+
+
+# ============================================================================
+# Supabase loaders
+# ============================================================================
+
+def _attach_images(supabase, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform listing rows and attach their images with one batch query"""
+    listing_ids = [row.get('id') for row in rows]
+    images_by_listing: Dict[str, List[Dict[str, Any]]] = {}
+    if listing_ids:
+        images_result = supabase.table('vehicle_images') \
+            .select('*') \
+            .in_('listing_id', listing_ids) \
+            .execute()
+
+        # Group images by listing_id
+        for img_row in images_result.data:
+            image_url = img_row.get('web_url') or img_row.get('detail_url') or img_row.get('thumbnail_url')
+            if image_url:
+                images_by_listing.setdefault(img_row.get('listing_id'), []).append({
+                    'url': image_url,
+                    'description': img_row.get('description') or '',
+                    'category': img_row.get('category') or 'hero',
+                    'altText': img_row.get('suggested_alt') or ''
+                })
+
+    vehicles = []
+    for row in rows:
+        vehicle = transform_vehicle_for_frontend(row)
+        vehicle['images'] = images_by_listing.get(row.get('id'), [])
+        vehicles.append(vehicle)
+    return vehicles
+
+
+def load_active_vehicles(limit: int) -> List[Dict[str, Any]]:
+    """Newest active listings in frontend format"""
+    from src.services.supabase_client import get_supabase_client_singleton
+
+    supabase = get_supabase_client_singleton()
+    response = supabase.table('vehicle_listings') \
+        .select('*') \
+        .eq('status', 'active') \
+        .order('created_at', desc=True) \
+        .limit(limit) \
+        .execute()
+    return _attach_images(supabase, response.data or [])
+
+
+def load_vehicles_by_id(listing_ids: List[str]) -> List[Dict[str, Any]]:
+    """Active listings among ``listing_ids`` in frontend format; missing ids were removed"""
+    from src.services.supabase_client import get_supabase_client_singleton
+
+    supabase = get_supabase_client_singleton()
+    response = supabase.table('vehicle_listings') \
+        .select('*') \
+        .in_('id', listing_ids) \
+        .eq('status', 'active') \
+        .execute()
+    return _attach_images(supabase, response.data or [])
+
+
+# ============================================================================
+# Deltas and framing
+# ============================================================================
+
+def vehicle_delta(old: VehicleMap, new: VehicleMap) -> Dict[str, Any]:
+    """Added vehicles, removed ids and changed fields between two snapshots"""
+    changed: Dict[str, Dict[str, Any]] = {}
+    for vehicle_id, vehicle in new.items():
+        previous = old.get(vehicle_id)
+        if previous is None:
+            continue
+        fields = {k: v for k, v in vehicle.items() if previous.get(k) != v}
+        fields.update({k: None for k in previous.keys() - vehicle.keys()})
+        if fields:
+            changed[vehicle_id] = fields
+
+    return {
+        'added': [vehicle for vehicle_id, vehicle in new.items() if vehicle_id not in old],
+        'removed': [vehicle_id for vehicle_id in old if vehicle_id not in new],
+        'changed': changed
+    }
+
+
+def apply_vehicle_delta(vehicles: VehicleMap, delta: Dict[str, Any], limit: int) -> VehicleMap:
+    """New snapshot map with ``delta`` applied, newest first and capped at ``limit``"""
+    result = dict(vehicles)
+    for vehicle_id in delta.get('removed', ()):
+        result.pop(vehicle_id, None)
+    for vehicle_id, fields in delta.get('changed', {}).items():
+        if vehicle_id in result:
+            result[vehicle_id] = {**result[vehicle_id], **fields}
+    for vehicle in delta.get('added', ()):
+        result[vehicle['id']] = vehicle
+    return _newest_first(result, limit)
+
+
+def _newest_first(vehicles: VehicleMap, limit: int) -> VehicleMap:
+    ordered = sorted(vehicles.values(), key=lambda v: v.get('created_at') or '', reverse=True)
+    return {vehicle['id']: vehicle for vehicle in ordered[:limit]}
+
+
+def encode_payload(text: str, encoding: str) -> str:
+    """Compress ``text`` and base64 it so it fits in an SSE data line"""
+    raw = text.encode('utf-8')
+    if encoding == ENCODING_GZIP:
+        compressed = gzip.compress(raw, compresslevel=6)
+    elif encoding == ENCODING_BROTLI and BROTLI_AVAILABLE:
+        compressed = brotli.compress(raw, quality=5)
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    return base64.b64encode(compressed).decode('ascii')
+
+
+def decode_payload(payload: str, encoding: str) -> str:
+    """Inverse of encode_payload"""
+    compressed = base64.b64decode(payload)
+    if encoding == ENCODING_GZIP:
+        return gzip.decompress(compressed).decode('utf-8')
+    if encoding == ENCODING_BROTLI and BROTLI_AVAILABLE:
+        return brotli.decompress(compressed).decode('utf-8')
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Pick the first supported encoding from a comma-separated preference list"""
+    for candidate in (requested or "").split(","):
+        candidate = candidate.strip().lower()
+        if candidate in SUPPORTED_ENCODINGS:
+            return candidate
+    return ENCODING_IDENTITY
+
+
+# ============================================================================
+# Snapshot
+# ============================================================================
+
+class InventorySnapshot:
+    """Versioned, pre-serialized inventory snapshot with delta publishing"""
+
+    def __init__(
+        self,
+        broker: Optional[SSEEventBroker] = None,
+        limit: int = 100,
+        max_age_seconds: float = 300.0,
+        debounce_seconds: float = 0.5,
+        loader: Optional[Callable[[int], List[Dict[str, Any]]]] = None,
+        listing_loader: Optional[Callable[[List[str]], List[Dict[str, Any]]]] = None
+    ):
+        self.broker = broker or get_sse_broker()
+        self.limit = limit
+        self.max_age_seconds = max_age_seconds
+        self.debounce_seconds = debounce_seconds
+        self.loader = loader or load_active_vehicles
+        self.listing_loader = listing_loader or load_vehicles_by_id
+
+        self.vehicles: VehicleMap = {}
+        self.version = 0
+        self.updated_at: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+        self._failed_at: Optional[datetime] = None
+
+        # encoding -> frame text for the current version
+        self._frames: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self._pending_ids: set = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'loads': 0,
+            'load_failures': 0,
+            'frames_served': 0,
+            'frames_built': 0,
+            'deltas_published': 0,
+            'deltas_applied': 0,
+            'listing_changes': 0
+        }
+
+        self.broker.add_listener(INVENTORY_TOPIC, self._on_inventory_event)
+
+    # ------------------------------------------------------------------
+    # Snapshot access
+    # ------------------------------------------------------------------
+
+    def _is_stale(self) -> bool:
+        now = datetime.utcnow()
+        if self._failed_at and (now - self._failed_at).total_seconds() < LOAD_RETRY_SECONDS:
+            return False
+        if self.loaded_at is None:
+            return True
+        return (now - self.loaded_at).total_seconds() > self.max_age_seconds
+
+    async def ensure_loaded(self) -> None:
+        """Load or periodically reconcile the snapshot; concurrent callers share one load"""
+        if not self._is_stale():
+            return
+        async with self._lock:
+            if self._is_stale():
+                await self._reload()
+
+    async def _reload(self) -> None:
+        try:
+            rows = await asyncio.to_thread(self.loader, self.limit)
+        except Exception as e:
+            self.stats['load_failures'] += 1
+            logger.error(f"[SSE] Failed to load inventory snapshot: {e}")
+            # Serve what we have; a burst of connections must not retry in lockstep
+            self._failed_at = datetime.utcnow()
+            return
+
+        self._failed_at = None
+        self.stats['loads'] += 1
+        fresh = _newest_first({vehicle['id']: vehicle for vehicle in rows}, self.limit)
+        if self.updated_at is None:
+            self._set(fresh, self.broker.last_seq)
+        else:
+            # Periodic reconcile: connected clients converge through a delta
+            await self._publish_diff(fresh)
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"[SSE] Inventory snapshot loaded: {len(fresh)} vehicles, version {self.version}")
+
+    def _set(self, vehicles: VehicleMap, version: int) -> None:
+        self.vehicles = vehicles
+        self.version = version
+        self.updated_at = datetime.utcnow()
+        self._frames.clear()
+
+    async def snapshot_frame(self, encoding: str = ENCODING_IDENTITY) -> Tuple[str, int]:
+        """
+        SSE frame (without id line) carrying the current snapshot, and its version.
+
+        Identity frames keep the ``vehicle_update`` shape the grid already
+        consumes; compressed frames are ``inventory_snapshot`` events wrapping
+        the same JSON.
+        """
+        await self.ensure_loaded()
+        frame = self._frames.get(encoding)
+        if frame is None:
+            frame = self._build_frame(encoding)
+            self._frames[encoding] = frame
+            self.stats['frames_built'] += 1
+        self.stats['frames_served'] += 1
+        return frame, self.version
+
+    def _build_frame(self, encoding: str) -> str:
+        payload = json.dumps({
+            'vehicles': list(self.vehicles.values()),
+            'timestamp': (self.updated_at or datetime.utcnow()).isoformat(),
+            'requestId': 'connection-established',
+            'version': self.version
+        }, default=str)
+
+        if encoding == ENCODING_IDENTITY:
+            return f"event: vehicle_update\ndata: {payload}\n\n"
+
+        wrapped = json.dumps({
+            'version': self.version,
+            'encoding': encoding,
+            'payload': encode_payload(payload, encoding)
+        })
+        return f"event: {INVENTORY_SNAPSHOT_EVENT}\ndata: {wrapped}\n\n"
+
+    # ------------------------------------------------------------------
+    # Listing changes
+    # ------------------------------------------------------------------
+
+    def notify_listings_changed(self, listing_ids: Iterable[str]) -> None:
+        """Queue listings for a refresh; bursts are coalesced into one query and one delta"""
+        self._pending_ids.update(listing_ids)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self) -> None:
+        # Listings queued while a refresh is in flight see this task as running,
+        # so keep draining until nothing is left rather than stranding them
+        while self._pending_ids:
+            await asyncio.sleep(self.debounce_seconds)
+            listing_ids, self._pending_ids = list(self._pending_ids), set()
+            try:
+                await self.apply_listing_changes(listing_ids)
+            except Exception as e:
+                logger.error(f"[SSE] Failed to refresh {len(listing_ids)} changed listings: {e}")
+
+    async def apply_listing_changes(self, listing_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """Reload the given listings and publish the resulting delta, if any"""
+        await self.ensure_loaded()
+        async with self._lock:
+            self.stats['listing_changes'] += len(listing_ids)
+            rows = await asyncio.to_thread(self.listing_loader, list(listing_ids))
+            current = {vehicle['id']: vehicle for vehicle in rows}
+
+            updated = {k: v for k, v in self.vehicles.items() if k not in listing_ids}
+            updated.update(current)
+            return await self._publish_diff(_newest_first(updated, self.limit))
+
+    async def _publish_diff(self, new_vehicles: VehicleMap) -> Optional[Dict[str, Any]]:
+        delta = vehicle_delta(self.vehicles, new_vehicles)
+        if not (delta['added'] or delta['removed'] or delta['changed']):
+            return None
+
+        seq = await self.broker.next_seq()
+        data = {'version': seq, 'baseVersion': self.version, **delta}
+        # Update locally first; our own event comes back through the listener and is skipped
+        self._set(new_vehicles, seq)
+        await self.broker.publish(INVENTORY_TOPIC, INVENTORY_DELTA_EVENT, data, seq=seq)
+        self.stats['deltas_published'] += 1
+        return data
+
+    def _on_inventory_event(self, event: SSEEvent) -> None:
+        """Apply inventory deltas published by any worker"""
+        if event.event != INVENTORY_DELTA_EVENT or event.seq <= self.version:
+            return
+        delta = json.loads(event.data)
+        self._set(apply_vehicle_delta(self.vehicles, delta, self.limit), event.seq)
+        self.stats['deltas_applied'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'version': self.version,
+            'vehicles': len(self.vehicles),
+            'cached_encodings': sorted(self._frames),
+            'supported_encodings': list(SUPPORTED_ENCODINGS)
+        }
+
+
+_inventory_snapshot: Optional[InventorySnapshot] = None
+
+
+def get_inventory_snapshot() -> InventorySnapshot:
+    """Process-wide inventory snapshot configured from the environment"""
+    global _inventory_snapshot
+    if _inventory_snapshot is None:
+        _inventory_snapshot = InventorySnapshot(
+            limit=int(os.getenv("SSE_SNAPSHOT_LIMIT", "100")),
+            max_age_seconds=float(os.getenv("SSE_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+        )
+    return _inventory_snapshot
@@ -0,0 +1,365 @@
+"""
+Otto.AI SSE Event Broker
+
+Topic-based fan-out for Server-Sent Events streams.
+
+Every SSE connection subscribes to its user's topic and the global inventory
+topic and owns a bounded asyncio queue that the stream drains. Publishing
+serializes the event once; each connection only gets a per-connection id line
+prepended to the shared frame body.
+
+Events carry a sequence number from one global counter (Redis INCR when Redis
+is configured, otherwise an in-process counter seeded from the clock). Each
+topic keeps a bounded ring buffer of recent events, so a client reconnecting
+with Last-Event-ID is sent what it missed rather than a full snapshot. The
+event id is the connection's per-topic cursor list, e.g. ``1042:1017``.
+
+With Redis, publishes go through pub/sub and every worker receives them on a
+pattern subscription, so a user's stream can live on any worker.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+from uuid import uuid4
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+from src.cache.dialogue_state_store import BoundedLRUCache
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_TOPIC = "inventory"
+USER_TOPIC_PREFIX = "user:"
+
+# Put on a subscription queue when it overflowed; the stream ends and the
+# client reconnects with Last-Event-ID to replay from the ring buffer
+OVERFLOW = object()
+
+
+def user_topic(user_id: str) -> str:
+    return f"{USER_TOPIC_PREFIX}{user_id}"
+
+
+@dataclass
+class SSEEvent:
+    """One published event, serialized once for all subscribers"""
+    topic: str
+    seq: int
+    event: str
+    data: str
+
+    @property
+    def body(self) -> str:
+        return f"event: {self.event}\ndata: {self.data}\n\n"
+
+
+class TopicRing:
+    """Bounded buffer of a topic's recent events"""
+
+    def __init__(self, size: int, floor: int):
+        self.events: Deque[SSEEvent] = deque(maxlen=size)
+        # Every event on this topic with seq > floor is either buffered or was appended later
+        self.floor = floor
+
+    @property
+    def last_seq(self) -> int:
+        return self.events[-1].seq if self.events else self.floor
+
+    def append(self, event: SSEEvent) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.floor = self.events[0].seq
+        self.events.append(event)
+
+    def since(self, cursor: int) -> Optional[List[SSEEvent]]:
+        """Events after ``cursor``, or None when some of them were already evicted"""
+        if cursor < self.floor:
+            return None
+        return [e for e in self.events if e.seq > cursor]
+
+
+@dataclass
+class SSESubscription:
+    """One SSE connection's view of the broker"""
+    connection_id: str
+    user_id: str
+    topics: List[str]
+    queue: asyncio.Queue
+    cursors: Dict[str, int] = field(default_factory=dict)
+    overflowed: bool = False
+
+    @property
+    def last_event_id(self) -> str:
+        return ":".join(str(self.cursors.get(topic, 0)) for topic in self.topics)
+
+
+class SSEEventBroker:
+    """Per-connection queues over per-topic pub/sub with Last-Event-ID replay"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ring_buffer_size: int = 256,
+        queue_size: int = 128,
+        max_topics: int = 50000,
+        channel_prefix: str = "otto_ai:sse:"
+    ):
+        self.redis_url = redis_url
+        self.ring_buffer_size = ring_buffer_size
+        self.queue_size = queue_size
+        self.channel_prefix = channel_prefix
+
+        self.rings = BoundedLRUCache(max_entries=max_topics, ttl_seconds=None)
+        self.subscribers: Dict[str, Set[str]] = defaultdict(set)
+        self.subscriptions: Dict[str, SSESubscription] = {}
+        # In-process consumers of a topic, e.g. the inventory snapshot applying deltas
+        self.listeners: Dict[str, List[Callable[[SSEEvent], None]]] = defaultdict(list)
+
+        # In-process sequence seeded from the clock so ids stay monotonic across restarts
+        self._seq = int(time.time() * 1000)
+        self._floor = self._seq
+        self._evicted_rings = 0
+
+        self.redis_client = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._started = False
+
+        self.stats = {
+            'published': 0,
+            'delivered': 0,
+            'overflows': 0,
+            'replays': 0,
+            'replay_misses': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> bool:
+        """Connect Redis pub/sub if configured; otherwise run in-process"""
+        if self._started:
+            return True
+        self._started = True
+
+        if not self.redis_url or not REDIS_AVAILABLE:
+            logger.info("[SSE] Event broker running in-process")
+            return True
+
+        try:
+            client = redis.from_url(self.redis_url)
+            await client.ping()
+            self._seq = int(await client.get(self._seq_key) or 0)
+            self._floor = self._seq
+            pubsub = client.pubsub()
+            await pubsub.psubscribe(f"{self.channel_prefix}topic:*")
+            self.redis_client = client
+            self._listener_task = asyncio.create_task(self._listen(pubsub))
+            logger.info("[SSE] Event broker connected to Redis pub/sub")
+        except Exception as e:
+            logger.warning(f"[SSE] Redis pub/sub unavailable, broker running in-process: {e}")
+            self.redis_client = None
+
+        return True
+
+    async def stop(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+        self._started = False
+
+    @property
+    def last_seq(self) -> int:
+        """Highest sequence number this worker has published or received"""
+        return self._seq
+
+    @property
+    def _seq_key(self) -> str:
+        return f"{self.channel_prefix}seq"
+
+    async def _listen(self, pubsub) -> None:
+        async for message in pubsub.listen():
+            if message.get('type') != 'pmessage':
+                continue
+            try:
+                payload = json.loads(message['data'])
+                self._deliver(SSEEvent(**payload))
+            except Exception as e:
+                logger.error(f"[SSE] Dropping malformed pub/sub message: {e}")
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def _ring(self, topic: str) -> TopicRing:
+        ring = self.rings.get(topic)
+        if ring is None:
+            if self.rings.evictions != self._evicted_rings:
+                # A ring was dropped; anything at or below the current seq may be lost
+                self._evicted_rings = self.rings.evictions
+                self._floor = self._seq
+            ring = TopicRing(self.ring_buffer_size, self._floor)
+            self.rings[topic] = ring
+        return ring
+
+    def subscribe(self, user_id: str, topics: Optional[List[str]] = None) -> SSESubscription:
+        """Register a connection on the inventory topic and its user topic"""
+        topics = topics or [INVENTORY_TOPIC, user_topic(user_id)]
+        subscription = SSESubscription(
+            connection_id=f"{user_id}-{uuid4().hex[:8]}",
+            user_id=user_id,
+            topics=topics,
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            cursors={topic: self._ring(topic).last_seq for topic in topics}
+        )
+        self.subscriptions[subscription.connection_id] = subscription
+        for topic in topics:
+            self.subscribers[topic].add(subscription.connection_id)
+        return subscription
+
+    def add_listener(self, topic: str, callback: Callable[[SSEEvent], None]) -> None:
+        """Call ``callback`` synchronously for every event delivered on ``topic``"""
+        self.listeners[topic].append(callback)
+
+    def unsubscribe(self, subscription: SSESubscription) -> None:
+        self.subscriptions.pop(subscription.connection_id, None)
+        for topic in subscription.topics:
+            ids = self.subscribers.get(topic)
+            if ids is not None:
+                ids.discard(subscription.connection_id)
+                if not ids:
+                    del self.subscribers[topic]
+
+    def replay(self, subscription: SSESubscription, last_event_id: Optional[str]) -> Optional[List[SSEEvent]]:
+        """
+        Events the client missed since ``last_event_id``.
+
+        Returns None when the id is missing, malformed or older than what the
+        ring buffers still hold; the caller then sends a full snapshot.
+        """
+        if not last_event_id:
+            return None
+        try:
+            cursors = [int(part) for part in last_event_id.split(":")]
+        except ValueError:
+            return None
+        if len(cursors) != len(subscription.topics):
+            return None
+
+        missed: List[SSEEvent] = []
+        for topic, cursor in zip(subscription.topics, cursors):
+            events = self._ring(topic).since(cursor)
+            if events is None:
+                self.stats['replay_misses'] += 1
+                return None
+            missed.extend(events)
+            subscription.cursors[topic] = cursor
+
+        # Events queued since subscribe() may also be in the ring; skip what replay covers
+        self.stats['replays'] += 1
+        missed.sort(key=lambda e: e.seq)
+        return missed
+
+    def format_frame(self, subscription: SSESubscription, event: SSEEvent) -> Optional[str]:
+        """SSE frame for this connection, or None if the event was already sent"""
+        if event.seq <= subscription.cursors.get(event.topic, 0):
+            return None
+        subscription.cursors[event.topic] = event.seq
+        return f"id: {subscription.last_event_id}\n{event.body}"
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def next_seq(self) -> int:
+        """Reserve a sequence number, for events whose payload must carry it"""
+        if self.redis_client:
+            return await self.redis_client.incr(self._seq_key)
+        self._seq += 1
+        return self._seq
+
+    async def publish(self, topic: str, event: str, data: Any, seq: Optional[int] = None) -> Optional[SSEEvent]:
+        """Publish an event to a topic; ``data`` is serialized once here"""
+        payload = data if isinstance(data, str) else json.dumps(data, default=str)
+        self.stats['published'] += 1
+
+        if seq is None:
+            seq = await self.next_seq()
+
+        if self.redis_client:
+            message = {'topic': topic, 'seq': seq, 'event': event, 'data': payload}
+            await self.redis_client.publish(f"{self.channel_prefix}topic:{topic}", json.dumps(message))
+            return SSEEvent(**message)
+
+        sse_event = SSEEvent(topic=topic, seq=seq, event=event, data=payload)
+        self._deliver(sse_event)
+        return sse_event
+
+    def _deliver(self, event: SSEEvent) -> int:
+        self._seq = max(self._seq, event.seq)
+        self._ring(event.topic).append(event)
+
+        for callback in self.listeners.get(event.topic, ()):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"[SSE] Listener failed for {event.topic}: {e}")
+
+        delivered = 0
+        for connection_id in list(self.subscribers.get(event.topic, ())):
+            subscription = self.subscriptions.get(connection_id)
+            if subscription is None or subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                # Slow reader: end its stream; it resumes from the ring buffer on reconnect
+                subscription.overflowed = True
+                self.stats['overflows'] += 1
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(OVERFLOW)
+
+        self.stats['delivered'] += delivered
+        return delivered
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'subscriptions': len(self.subscriptions),
+            'topics': len(self.rings),
+            'redis_enabled': self.redis_client is not None
+        }
+
+
+_sse_broker: Optional[SSEEventBroker] = None
+
+
+def get_sse_broker() -> SSEEventBroker:
+    """Process-wide SSE broker configured from the environment"""
+    global _sse_broker
+    if _sse_broker is None:
+        _sse_broker = SSEEventBroker(
+            redis_url=os.getenv("SSE_REDIS_URL"),
+            ring_buffer_size=int(os.getenv("SSE_RING_BUFFER_SIZE", "256")),
+            queue_size=int(os.getenv("SSE_QUEUE_SIZE", "128"))
+        )
+    return _sse_broker
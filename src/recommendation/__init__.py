@@ -7,6 +7,11 @@ Contains vehicle comparison and recommendation engines.
 from .comparison_engine import ComparisonEngine
 from .recommendation_engine import RecommendationEngine
 from .interaction_tracker import InteractionTracker
+from .collaborative_filtering import CollaborativeFilteringEngine, get_collaborative_filtering_engine
+from .vehicle_signals import VehicleSignalTable
+from .similarity_graph import VehicleSimilarityGraph, get_vehicle_similarity_graph
+from .taste_vectors import TasteVectorStore, get_taste_vector_store
+from .interaction_log import InteractionEventLog, get_interaction_event_log
 from .favorites_recommendation_engine import (
     FavoritesRecommendationEngine,
     VehicleSimilarityScore,
@@ -18,6 +23,15 @@ __all__ = [
     'ComparisonEngine',
     'RecommendationEngine',
     'InteractionTracker',
+    'CollaborativeFilteringEngine',
+    'get_collaborative_filtering_engine',
+    'VehicleSignalTable',
+    'VehicleSimilarityGraph',
+    'get_vehicle_similarity_graph',
+    'TasteVectorStore',
+    'get_taste_vector_store',
+    'InteractionEventLog',
+    'get_interaction_event_log',
     'FavoritesRecommendationEngine',
     'VehicleSimilarityScore',
     'RecommendationRequest',
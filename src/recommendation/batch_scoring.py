@@ -0,0 +1,343 @@
+"""
+Otto.AI Batch Candidate Scoring
+
+Vectorized scoring of recommendation candidates.
+
+Candidate attributes are encoded once per request into columnar NumPy
+arrays (price, year, mileage, make/type codes, packed feature bitsets and
+normalized embeddings) and user preferences into a weight vector over the
+same vocabulary. Content scores for every candidate then come from one
+vectorized pass, and similarity to the context vehicles from one matrix
+product.
+"""
+
+import json
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Content score weights (see RecommendationEngine._calculate_content_similarity)
+BRAND_WEIGHT = 0.3
+PRICE_WEIGHT = 0.25
+PRICE_BELOW_RANGE_SCORE = 0.15  # Still good if cheaper
+TYPE_WEIGHT = 0.2
+FEATURE_WEIGHT = 0.25
+MUST_HAVE_SCORE = 0.15
+AVOID_PENALTY = 0.1
+QUERY_WEIGHT = 0.1
+
+# Bits set per byte value, for popcounts over packed feature bitsets
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def _parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """Embedding as a float32 vector (lists, arrays or pgvector text)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    try:
+        array = np.asarray(value, dtype=np.float32).ravel()
+    except (TypeError, ValueError):
+        return None
+    return array if array.size else None
+
+
+def _codes(values: Iterable[Any], vocabulary: Dict[str, int]) -> np.ndarray:
+    return np.fromiter((vocabulary.get(value, -1) for value in values), dtype=np.int32)
+
+
+def _one_hot(codes: np.ndarray, size: int) -> np.ndarray:
+    """One-hot rows; code -1 (unknown) maps to an all-zero row"""
+    matrix = np.zeros((len(codes), size + 1), dtype=np.float32)
+    matrix[np.arange(len(codes)), codes] = 1.0
+    return matrix[:, :size]
+
+
+@dataclass
+class CandidateVocabulary:
+    """Make, vehicle type and feature codes shared by a request's batches"""
+    makes: Dict[str, int]
+    types: Dict[str, int]
+    features: Dict[str, int]
+
+    @classmethod
+    def from_vehicles(cls, vehicles: Iterable[Dict[str, Any]]) -> 'CandidateVocabulary':
+        makes, types, features = {}, {}, {}
+        for vehicle in vehicles:
+            if isinstance(vehicle.get('make'), str):
+                makes.setdefault(vehicle['make'], len(makes))
+            if isinstance(vehicle.get('vehicle_type'), str):
+                types.setdefault(vehicle['vehicle_type'], len(types))
+            for feature in vehicle.get('features') or []:
+                features.setdefault(feature, len(features))
+        return cls(makes=makes, types=types, features=features)
+
+    def pack(self, feature_sets: Iterable[Iterable[str]]) -> np.ndarray:
+        """Packed uint8 bitset row per feature set (unknown features dropped)"""
+        feature_sets = list(feature_sets)
+        bits = np.zeros((len(feature_sets), max(len(self.features), 1)), dtype=bool)
+        rows, cols = [], []
+        for row, features in enumerate(feature_sets):
+            for feature in features:
+                col = self.features.get(feature)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        bits[rows, cols] = True
+        return np.packbits(bits, axis=1)
+
+
+@dataclass
+class PreferenceWeights:
+    """A user preference vector encoded against a candidate vocabulary"""
+    make_mask: np.ndarray       # bool per make code, plus a trailing False for unknown
+    type_mask: np.ndarray
+    price_min: float
+    price_max: float
+    must_have_bits: np.ndarray  # packed uint8 bitset
+    must_have_count: int
+    avoid_bits: np.ndarray
+    avoid_count: int
+
+    @classmethod
+    def from_preference_vector(
+        cls,
+        preference_vector: Dict[str, Any],
+        vocabulary: CandidateVocabulary
+    ) -> 'PreferenceWeights':
+        def mask(values, codes):
+            selected = np.zeros(len(codes) + 1, dtype=bool)
+            selected[[codes[value] for value in values if value in codes]] = True
+            return selected
+
+        price_range = preference_vector.get('price_range') or {}
+        must_have = set(preference_vector.get('must_have_features') or [])
+        avoid = set(preference_vector.get('avoid_features') or [])
+        return cls(
+            make_mask=mask(preference_vector.get('brands') or [], vocabulary.makes),
+            type_mask=mask(preference_vector.get('vehicle_types') or [], vocabulary.types),
+            price_min=float(price_range.get('min', 0)),
+            price_max=float(price_range.get('max', float('inf'))),
+            must_have_bits=vocabulary.pack([must_have])[0],
+            must_have_count=len(must_have),
+            avoid_bits=vocabulary.pack([avoid])[0],
+            avoid_count=len(avoid)
+        )
+
+
+class CandidateBatch:
+    """Columnar encoding of candidate vehicles"""
+
+    def __init__(
+        self,
+        vehicles: Iterable[Dict[str, Any]],
+        vocabulary: Optional[CandidateVocabulary] = None,
+        numeric_ranges: Optional[np.ndarray] = None
+    ):
+        """
+        Encode vehicles into columns
+
+        Args:
+            vehicles: Vehicle dicts (id, make, vehicle_type, price, year, mileage, features, embedding)
+            vocabulary: Codes to encode against (built from these vehicles by default)
+            numeric_ranges: (3, 2) min/max of price, year, mileage used to scale
+                attribute vectors (taken from these vehicles by default)
+        """
+        self.vehicles = list(vehicles)
+        self.ids = [vehicle.get('id') for vehicle in self.vehicles]
+        self.vocabulary = vocabulary or CandidateVocabulary.from_vehicles(self.vehicles)
+
+        # Presence masks follow the scalar scorer: a key counts when it is present
+        self.has_make = np.array(['make' in v for v in self.vehicles], dtype=bool)
+        self.has_type = np.array(['vehicle_type' in v for v in self.vehicles], dtype=bool)
+        self.has_features = np.array(['features' in v for v in self.vehicles], dtype=bool)
+        self.has_price = np.array([v.get('price') is not None for v in self.vehicles], dtype=bool)
+
+        self.make_codes = _codes((v.get('make') for v in self.vehicles), self.vocabulary.makes)
+        self.type_codes = _codes((v.get('vehicle_type') for v in self.vehicles), self.vocabulary.types)
+        self.numeric = np.array(
+            [[_number(v.get('price')), _number(v.get('year')), _number(v.get('mileage'))] for v in self.vehicles],
+            dtype=np.float32
+        ).reshape(len(self.vehicles), 3)
+        self.feature_bits = self.vocabulary.pack(v.get('features') or [] for v in self.vehicles)
+
+        self.numeric_ranges = numeric_ranges if numeric_ranges is not None else self._ranges(self.numeric)
+        self.embeddings, self.has_embedding = self._encode_embeddings(self.vehicles)
+
+        self._tokens: Optional[Dict[str, np.ndarray]] = None
+        self._attribute_vectors: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.vehicles)
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.numeric[:, 0]
+
+    def encode_like(self, vehicles: Iterable[Dict[str, Any]]) -> 'CandidateBatch':
+        """Encode other vehicles (e.g. context vehicles) against this batch's vocabulary and scales"""
+        return CandidateBatch(vehicles, vocabulary=self.vocabulary, numeric_ranges=self.numeric_ranges)
+
+    @staticmethod
+    def _ranges(numeric: np.ndarray) -> np.ndarray:
+        if not len(numeric) or np.isnan(numeric).all():
+            return np.array([[0.0, 1.0]] * 3, dtype=np.float32)
+        with warnings.catch_warnings():
+            # All-NaN columns (e.g. no mileage anywhere) fall back below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanmin(numeric, axis=0), np.nanmax(numeric, axis=0)
+        low = np.nan_to_num(low, nan=0.0)
+        high = np.nan_to_num(high, nan=1.0)
+        return np.stack([low, high], axis=1).astype(np.float32)
+
+    @staticmethod
+    def _encode_embeddings(vehicles: List[Dict[str, Any]]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Unit-normalized embedding rows; rows without a matching-dimension embedding are flagged"""
+        parsed = [_parse_embedding(v.get('embedding')) for v in vehicles]
+        dims = [embedding.size for embedding in parsed if embedding is not None]
+        has_embedding = np.zeros(len(vehicles), dtype=bool)
+        if not dims:
+            return None, has_embedding
+
+        dim = max(set(dims), key=dims.count)
+        matrix = np.zeros((len(vehicles), dim), dtype=np.float32)
+        for row, embedding in enumerate(parsed):
+            if embedding is not None and embedding.size == dim:
+                norm = float(np.linalg.norm(embedding))
+                if norm > 0:
+                    matrix[row] = embedding / norm
+                    has_embedding[row] = True
+        return matrix, has_embedding
+
+    # ---- Content scoring ----
+
+    def preference_weights(self, preference_vector: Dict[str, Any]) -> PreferenceWeights:
+        return PreferenceWeights.from_preference_vector(preference_vector, self.vocabulary)
+
+    def content_scores(self, preferences: PreferenceWeights, search_query: Optional[str] = None) -> np.ndarray:
+        """
+        Content similarity (<= 1.0) of every candidate to the user's preferences.
+
+        Each criterion only counts towards the normalizing total when the
+        vehicle has that attribute, exactly as the per-vehicle scorer did.
+        """
+        score = np.zeros(len(self), dtype=np.float32)
+        total = np.zeros(len(self), dtype=np.float32)
+
+        score += BRAND_WEIGHT * (preferences.make_mask[self.make_codes] & self.has_make)
+        total += BRAND_WEIGHT * self.has_make
+
+        price = np.where(self.has_price, self.price, 0.0)
+        in_range = (price >= preferences.price_min) & (price <= preferences.price_max)
+        below = price < preferences.price_min
+        score += np.where(in_range, PRICE_WEIGHT, np.where(below, PRICE_BELOW_RANGE_SCORE, 0.0)) * self.has_price
+        total += PRICE_WEIGHT * self.has_price
+
+        score += TYPE_WEIGHT * (preferences.type_mask[self.type_codes] & self.has_type)
+        total += TYPE_WEIGHT * self.has_type
+
+        feature_score = np.zeros(len(self), dtype=np.float32)
+        if preferences.must_have_count:
+            matches = _POPCOUNT[self.feature_bits & preferences.must_have_bits].sum(axis=1)
+            feature_score += MUST_HAVE_SCORE * matches / preferences.must_have_count
+        if preferences.avoid_count:
+            avoided = _POPCOUNT[self.feature_bits & preferences.avoid_bits].sum(axis=1)
+            feature_score -= AVOID_PENALTY * avoided / preferences.avoid_count
+        score += feature_score * self.has_features
+        total += FEATURE_WEIGHT * self.has_features
+
+        if search_query:
+            score += QUERY_WEIGHT * self.query_relevance(search_query)
+            total += QUERY_WEIGHT
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, np.minimum(score / total, 1.0), 0.0).astype(np.float32)
+
+    def query_relevance(self, query: str) -> np.ndarray:
+        """Share of query words found in each vehicle's make/model/description/features"""
+        words = set(query.lower().split())
+        relevance = np.zeros(len(self), dtype=np.float32)
+        if not words:
+            return relevance
+
+        tokens = self._token_index()
+        for word in words:
+            rows = tokens.get(word)
+            if rows is not None:
+                relevance[rows] += 1.0
+        return np.minimum(relevance / len(words), 1.0)
+
+    def _token_index(self) -> Dict[str, np.ndarray]:
+        """word -> candidate rows containing it, built on first query"""
+        if self._tokens is None:
+            index: Dict[str, List[int]] = {}
+            for row, vehicle in enumerate(self.vehicles):
+                text = (
+                    f"{vehicle.get('make') or ''} {vehicle.get('model') or ''} "
+                    f"{vehicle.get('description') or ''} {' '.join(vehicle.get('features') or [])}"
+                ).lower()
+                for word in set(text.split()):
+                    index.setdefault(word, []).append(row)
+            self._tokens = {word: np.array(rows, dtype=np.int32) for word, rows in index.items()}
+        return self._tokens
+
+    # ---- Context similarity ----
+
+    def attribute_vectors(self) -> np.ndarray:
+        """Unit rows of one-hot make/type, feature bits and scaled price/year/mileage"""
+        if self._attribute_vectors is None:
+            features = np.unpackbits(self.feature_bits, axis=1)[:, :len(self.vocabulary.features)]
+            features = features.astype(np.float32)
+            counts = features.sum(axis=1, keepdims=True)
+            features /= np.sqrt(np.maximum(counts, 1.0))
+
+            low, high = self.numeric_ranges[:, 0], self.numeric_ranges[:, 1]
+            scaled = (self.numeric - low) / np.where(high > low, high - low, 1.0)
+            scaled = np.clip(np.nan_to_num(scaled, nan=0.5), 0.0, 1.0)
+
+            vectors = np.hstack([
+                _one_hot(self.make_codes, len(self.vocabulary.makes)),
+                _one_hot(self.type_codes, len(self.vocabulary.types)),
+                features,
+                scaled
+            ])
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._attribute_vectors = vectors / np.where(norms > 0, norms, 1.0)
+        return self._attribute_vectors
+
+    def context_similarity(self, context: 'CandidateBatch') -> np.ndarray:
+        """
+        (candidates x context) cosine similarity clipped to [0, 1].
+
+        Stored embeddings are used where both vehicles have one of the same
+        dimension; the attribute vectors cover the rest.
+        """
+        similarity = self.attribute_vectors() @ context.attribute_vectors().T
+        if (
+            self.embeddings is not None and context.embeddings is not None
+            and self.embeddings.shape[1] == context.embeddings.shape[1]
+        ):
+            both = self.has_embedding[:, None] & context.has_embedding[None, :]
+            similarity = np.where(both, self.embeddings @ context.embeddings.T, similarity)
+        return np.clip(similarity, 0.0, 1.0)
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def top_indices(scores: np.ndarray, limit: int, threshold: Optional[float] = None) -> np.ndarray:
+    """Indices of the best ``limit`` scores above ``threshold``, best first"""
+    candidates = np.flatnonzero(scores > threshold) if threshold is not None else np.arange(len(scores))
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
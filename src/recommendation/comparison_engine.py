@@ -3,22 +3,29 @@ Otto.AI Vehicle Comparison Engine
 
 Implements vehicle-to-vehicle comparison with detailed feature analysis,
 semantic similarity scoring, and market price analysis.
+Semantic similarity reuses stored listing embeddings (embedding only the
+missing ones, in one batch) and scores every pair from one Gram matrix.
+Finished comparisons are cached per vehicle set and listing version.
 Part of Story 1-5: Build Vehicle Comparison and Recommendation Engine
 """
 
 import asyncio
 import logging
+import os
 import time
 from typing import List, Dict, Any, Optional, Tuple, Set
-from datetime import datetime
+from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+
 from src.models.vehicle_models import (
     VehicleComparisonResult, VehicleSpecification, VehicleFeatures,
     FeatureDifference, PriceAnalysis, SemanticSimilarity,
     ComparisonFeatureType, FeatureDifferenceType
 )
+from src.recommendation.batch_scoring import _parse_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +76,18 @@ class ComparisonEngine:
             'interior': ['interior_color', 'dashboard_features', 'storage']
         }
 
+        # Finished comparisons keyed by vehicle set, listing versions and options
+        self.result_cache: Dict[Tuple, Tuple[ComparisonResult, datetime]] = {}
+        self.result_cache_ttl = timedelta(seconds=int(os.getenv('COMPARISON_CACHE_TTL_SECONDS', '900')))
+        self.max_result_cache_entries = 1000
+
+        self.stats = {
+            'comparisons': 0,
+            'cache_hits': 0,
+            'embeddings_reused': 0,
+            'embeddings_generated': 0
+        }
+
     async def compare_vehicles(
         self,
         vehicle_ids: List[str],
@@ -107,6 +126,18 @@ class ComparisonEngine:
                 missing_ids = set(vehicle_ids) - set(v['id'] for v in vehicles)
                 raise ValueError(f"Vehicles not found: {missing_ids}")
 
+            # Canonical order, so every permutation of the same set shares one result
+            vehicles = sorted(vehicles, key=lambda v: str(v['id']))
+            self.stats['comparisons'] += 1
+            cache_key = self._result_cache_key(
+                vehicles, criteria, include_semantic_similarity, include_price_analysis, user_id
+            )
+            cached = self._get_cached_result(cache_key)
+            if cached:
+                self.stats['cache_hits'] += 1
+                logger.info(f"Comparison served from cache in {time.time() - start_time:.3f}s")
+                return cached
+
             # Generate comparison results
             comparison_results = []
             for vehicle in vehicles:
@@ -133,17 +164,54 @@ class ComparisonEngine:
             processing_time = time.time() - start_time
             logger.info(f"Comparison completed in {processing_time:.3f}s")
 
-            return ComparisonResult(
+            result = ComparisonResult(
                 comparison_results=comparison_results,
                 feature_differences=feature_differences,
                 semantic_similarity=semantic_similarity,
                 recommendation_summary=recommendation_summary
             )
+            self._cache_result(cache_key, result)
+            return result
 
         except Exception as e:
             logger.error(f"Comparison engine error: {str(e)}")
             raise
 
+    def _result_cache_key(
+        self,
+        vehicles: List[Dict[str, Any]],
+        criteria: Optional[List[str]],
+        include_semantic_similarity: bool,
+        include_price_analysis: bool,
+        user_id: Optional[str]
+    ) -> Tuple:
+        """Sorted vehicle IDs plus listing versions, so any listing edit misses the cache"""
+        return (
+            tuple(str(v['id']) for v in vehicles),
+            tuple(str(v.get('updated_at') or '') for v in vehicles),
+            tuple(sorted(criteria)) if criteria else None,
+            include_semantic_similarity,
+            include_price_analysis,
+            # The summary only differs by whether it is personalized
+            user_id is not None
+        )
+
+    def _get_cached_result(self, cache_key: Tuple) -> Optional[ComparisonResult]:
+        if cache_key in self.result_cache:
+            result, timestamp = self.result_cache[cache_key]
+            if datetime.now() - timestamp < self.result_cache_ttl:
+                return result
+            del self.result_cache[cache_key]
+        return None
+
+    def _cache_result(self, cache_key: Tuple, result: ComparisonResult):
+        self.result_cache[cache_key] = (result, datetime.now())
+        while len(self.result_cache) > self.max_result_cache_entries:
+            del self.result_cache[next(iter(self.result_cache))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'cached_comparisons': len(self.result_cache)}
+
     async def _fetch_vehicles(self, vehicle_ids: List[str]) -> List[Dict[str, Any]]:
         """Fetch vehicle data from database using efficient batch retrieval"""
         try:
@@ -612,29 +680,20 @@ class ComparisonEngine:
         if len(vehicles) < 2:
             return similarities
 
-        # Generate embeddings for all vehicles
-        embeddings = {}
-        for vehicle in vehicles:
-            try:
-                # Create vehicle description for embedding
-                description = await self._create_vehicle_description(vehicle)
-                embedding_result = await self.embedding_service.generate_embeddings([description])
-                embeddings[vehicle['id']] = embedding_result.embeddings[0]
-            except Exception as e:
-                logger.error(f"Error generating embedding for vehicle {vehicle['id']}: {str(e)}")
-                continue
+        embeddings, has_embedding = await self._vehicle_embedding_matrix(vehicles)
+        if embeddings is None:
+            return similarities
+
+        # One Gram matrix of unit vectors gives every pairwise cosine
+        gram = embeddings @ embeddings.T
 
-        # Calculate pairwise similarities
         for i in range(len(vehicles)):
             for j in range(i + 1, len(vehicles)):
                 vehicle_a = vehicles[i]
                 vehicle_b = vehicles[j]
 
-                if vehicle_a['id'] in embeddings and vehicle_b['id'] in embeddings:
-                    similarity_score = await self._calculate_cosine_similarity(
-                        embeddings[vehicle_a['id']],
-                        embeddings[vehicle_b['id']]
-                    )
+                if has_embedding[i] and has_embedding[j]:
+                    similarity_score = float(np.clip(gram[i, j], 0.0, 1.0))
 
                     # Analyze shared and unique features
                     features_a = set(vehicle_a.get('features', []))
@@ -659,6 +718,58 @@ class ComparisonEngine:
 
         return similarities
 
+    async def _vehicle_embedding_matrix(
+        self,
+        vehicles: List[Dict[str, Any]]
+    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Unit-normalized embedding rows for the vehicles.
+
+        Stored listing embeddings are reused, preferring the text embedding
+        (what generated descriptions are embedded as) over the combined
+        text+image one; vehicles without either are embedded together in a
+        single call. Rows whose dimension differs from the majority, or that
+        are all zeros, are flagged as missing.
+        """
+        vectors = [
+            _parse_embedding(v.get('text_embedding') if v.get('text_embedding') is not None else v.get('embedding'))
+            for v in vehicles
+        ]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.stats['embeddings_reused'] += len(vehicles) - len(missing)
+
+        if missing:
+            try:
+                descriptions = [await self._create_vehicle_description(vehicles[i]) for i in missing]
+                generated = await self._embed_descriptions(descriptions)
+                for i, embedding in zip(missing, generated):
+                    vectors[i] = _parse_embedding(embedding)
+                self.stats['embeddings_generated'] += len(missing)
+            except Exception as e:
+                logger.error(f"Error generating embeddings for {len(missing)} vehicles: {str(e)}")
+
+        has_embedding = np.zeros(len(vehicles), dtype=bool)
+        dims = [vector.size for vector in vectors if vector is not None]
+        if not dims:
+            return None, has_embedding
+
+        dim = max(set(dims), key=dims.count)
+        matrix = np.zeros((len(vehicles), dim), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            if vector is not None and vector.size == dim:
+                norm = float(np.linalg.norm(vector))
+                if norm > 0:
+                    matrix[row] = vector / norm
+                    has_embedding[row] = True
+        return matrix, has_embedding
+
+    async def _embed_descriptions(self, descriptions: List[str]) -> List[List[float]]:
+        """Embed all descriptions with one embedding service call"""
+        if hasattr(self.embedding_service, 'generate_embeddings'):
+            embedding_result = await self.embedding_service.generate_embeddings(descriptions)
+            return embedding_result.embeddings
+        return await self.embedding_service.generate_text_embeddings(descriptions)
+
     async def _create_vehicle_description(self, vehicle: Dict[str, Any]) -> str:
         """Create vehicle description for semantic analysis"""
 
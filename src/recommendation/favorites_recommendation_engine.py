@@ -14,17 +14,75 @@ Features:
 
 import os
 import asyncio
+import contextvars
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 import json
 import uuid
 import psycopg
 from psycopg.rows import dict_row
+import numpy as np
+
+from .favorites_scoring import (
+    OVERALL_WEIGHTS,
+    SIMILARITY_WEIGHTS,
+    confidence_scores,
+    similarity_subscores,
+    weighted
+)
+from .similarity_graph import VehicleSimilarityGraph, get_vehicle_similarity_graph
 
 logger = logging.getLogger(__name__)
 
+
+class _RetrieverDeadline:
+    """
+    Cancels a retriever once it has run for its timeout, not counting the
+    time it spends queued for the shared connection.
+    """
+
+    def __init__(self, timeout: float):
+        self.remaining = timeout
+        self.expired = False
+        self._task: Optional[asyncio.Task] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._resumed_at = 0.0
+
+    def start(self, task: asyncio.Task) -> None:
+        self._task = task
+        self.resume()
+
+    def pause(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+            self.remaining -= asyncio.get_running_loop().time() - self._resumed_at
+
+    def resume(self) -> None:
+        if not self._handle and not self.expired:
+            loop = asyncio.get_running_loop()
+            self._resumed_at = loop.time()
+            self._handle = loop.call_later(max(self.remaining, 0.0), self._expire)
+
+    def cancel(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+
+    def _expire(self) -> None:
+        self._handle = None
+        self.expired = True
+        self._task.cancel()
+
+
+# Deadline of the retriever running in the current task (None outside _run_retriever)
+_retriever_deadline: contextvars.ContextVar[Optional[_RetrieverDeadline]] = contextvars.ContextVar(
+    'retriever_deadline', default=None
+)
+
 @dataclass
 class VehicleSimilarityScore:
     """Vehicle similarity score data model"""
@@ -63,10 +121,24 @@ class FavoritesRecommendationEngine:
     Service for generating vehicle recommendations when favorites become unavailable
     """
 
-    def __init__(self):
+    def __init__(self, similarity_graph: Optional[VehicleSimilarityGraph] = None):
         """Initialize recommendation engine"""
         self.db_conn = None
         self.rag_service = None
+        self.similarity_graph = similarity_graph or get_vehicle_similarity_graph()
+
+        # Statements on the shared connection run one at a time; the running one can be
+        # cancelled on the server when its retriever times out. Queries queue for their turn
+        # on the event loop, so a retriever's timeout only runs once its query has started.
+        self._connection_turn = asyncio.Lock()
+        self._query_lock = threading.Lock()
+        self._running_lock = threading.Lock()
+        self._running_query: Optional[threading.Event] = None
+
+        # Candidate retrievers run concurrently; a slow one is dropped after its timeout
+        self.default_retriever_timeout = float(os.getenv('FAVORITES_RETRIEVER_TIMEOUT_SECONDS', '2.0'))
+        self.retriever_timeouts: Dict[str, float] = {}
+        self.stats = {'retriever_timeouts': 0, 'retriever_errors': 0, 'queries_cancelled': 0}
         self.min_similarity_threshold = 0.6
         self.price_tolerance_percent = 20.0
         self.location_tolerance_km = 100.0
@@ -187,59 +259,38 @@ class FavoritesRecommendationEngine:
             # Extract key attributes from the original vehicle
             original_attrs = self._extract_vehicle_attributes(request.original_vehicle_data)
 
-            # Find similar vehicles using multiple strategies
-            similar_vehicles = []
-
-            # Strategy 1: Similar make/model/year
-            make_model_similar = await self._find_similar_make_model(original_attrs)
-            similar_vehicles.extend(make_model_similar)
-
-            # Strategy 2: Similar price range
-            price_similar = await self._find_similar_price_range(original_attrs, request.user_preferences)
-            similar_vehicles.extend(price_similar)
-
-            # Strategy 3: Similar features and specifications
-            feature_similar = await self._find_similar_features(original_attrs)
-            similar_vehicles.extend(feature_similar)
+            # Run every candidate retriever concurrently, each under its own timeout
+            candidate_lists = await asyncio.gather(*(
+                self._run_retriever(name, retrieve)
+                for name, retrieve in self._candidate_retrievers(original_attrs, request.user_preferences)
+            ))
 
-            # Strategy 4: User preference-based recommendations
-            preference_based = await self._find_preference_based_recommendations(
-                request.user_preferences,
-                original_attrs
+            # Remove duplicates and score every candidate in one vectorized pass
+            unique_vehicles = self._deduplicate_vehicles(
+                [vehicle for candidates in candidate_lists for vehicle in candidates]
             )
-            similar_vehicles.extend(preference_based)
-
-            # Strategy 5: Semantic similarity if RAG-Anything is available
-            if self.rag_service:
-                semantic_similar = await self._find_semantically_similar_vehicles(original_attrs)
-                similar_vehicles.extend(semantic_similar)
-
-            # Remove duplicates and sort by similarity
-            unique_vehicles = self._deduplicate_vehicles(similar_vehicles)
-            ranked_vehicles = self._rank_recommendations(unique_vehicles, original_attrs, request.user_preferences)
+            subscores = similarity_subscores(unique_vehicles, original_attrs, request.user_preferences)
+            ranking = np.argsort(-weighted(subscores, OVERALL_WEIGHTS), kind='stable')[:request.max_recommendations]
+            similarity = weighted(subscores, SIMILARITY_WEIGHTS)
+            confidence = confidence_scores(subscores)
 
             # Create recommendation objects
             recommendations = []
-            for i, vehicle_data in enumerate(ranked_vehicles[:request.max_recommendations]):
-                similarity_score = self._calculate_similarity_score(vehicle_data, original_attrs)
-                match_reasons = self._generate_match_reasons(vehicle_data, original_attrs)
-                confidence_score = self._calculate_confidence_score(vehicle_data, original_attrs, request.user_preferences)
-
-                recommendation = Recommendation(
+            for index in ranking.tolist():
+                vehicle_data = unique_vehicles[index]
+                recommendations.append(Recommendation(
                     vehicle_id=vehicle_data.get('id', ''),
                     vehicle_data=vehicle_data,
-                    similarity_score=similarity_score,
-                    match_reasons=match_reasons,
-                    confidence_score=confidence_score,
+                    similarity_score=float(similarity[index]),
+                    match_reasons=self._generate_match_reasons(vehicle_data, original_attrs),
+                    confidence_score=float(confidence[index]),
                     price_comparison=self._compare_prices(vehicle_data, original_attrs),
                     location_comparison=self._compare_locations(vehicle_data, original_attrs) if request.include_location else None,
                     recommendation_type=self._determine_recommendation_type(vehicle_data, original_attrs)
-                )
-
-                recommendations.append(recommendation)
+                ))
 
-                # Track recommendations in database
-                await self._track_recommendation(request.user_id, request.unavailable_vehicle_id, recommendation)
+            # Track all recommendations in one batch insert
+            await self._track_recommendations(request.user_id, request.unavailable_vehicle_id, recommendations)
 
             logger.info(f"✅ Generated {len(recommendations)} recommendations for vehicle {request.unavailable_vehicle_id}")
             return recommendations
@@ -269,39 +320,132 @@ class FavoritesRecommendationEngine:
             'description': vehicle_data.get('description', '').lower()
         }
 
+    def _candidate_retrievers(
+        self,
+        original_attrs: Dict[str, Any],
+        user_preferences: Dict[str, Any]
+    ) -> List[Tuple[str, Callable[[], Awaitable[List[Dict[str, Any]]]]]]:
+        """Independent candidate sources as (name, coroutine factory) pairs"""
+        return [
+            ('make_model', lambda: self._find_similar_make_model(original_attrs)),
+            ('price_range', lambda: self._find_similar_price_range(original_attrs, user_preferences)),
+            ('features', lambda: self._find_similar_features(original_attrs)),
+            ('preferences', lambda: self._find_preference_based_recommendations(user_preferences, original_attrs)),
+            ('semantic', lambda: self._find_semantically_similar_vehicles(original_attrs)),
+        ]
+
+    async def _run_retriever(
+        self,
+        name: str,
+        retrieve: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one retriever; a timeout or error drops its candidates instead of failing the request.
+
+        The timeout is paused while the retriever waits for the shared connection.
+        """
+        timeout = self.retriever_timeouts.get(name, self.default_retriever_timeout)
+        deadline = _RetrieverDeadline(timeout)
+        token = _retriever_deadline.set(deadline)
+        try:
+            task = asyncio.ensure_future(retrieve())
+        finally:
+            _retriever_deadline.reset(token)
+        deadline.start(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not deadline.expired:
+                raise
+            self.stats['retriever_timeouts'] += 1
+            logger.warning(f"⚠️ Candidate retriever '{name}' timed out after {timeout}s")
+        except Exception as e:
+            self.stats['retriever_errors'] += 1
+            logger.error(f"❌ Candidate retriever '{name}' failed: {e}")
+        finally:
+            deadline.cancel()
+        return []
+
+    async def _fetch_vehicles(self, query: str, params) -> List[Dict[str, Any]]:
+        """Run a vehicles query off the event loop so retrievers can overlap"""
+        deadline = _retriever_deadline.get()
+        abandoned = threading.Event()
+        try:
+            if deadline:
+                deadline.pause()
+            async with self._connection_turn:
+                if deadline:
+                    deadline.resume()
+                return await asyncio.to_thread(self._fetch_vehicles_sync, query, params, abandoned=abandoned)
+        except asyncio.CancelledError:
+            # The retriever timed out: skip the query if it has not started, otherwise
+            # cancel it on the server so the connection is released for the others
+            abandoned.set()
+            asyncio.get_running_loop().run_in_executor(None, self._cancel_query, abandoned)
+            raise
+
+    def _fetch_vehicles_sync(
+        self,
+        query: str,
+        params,
+        abandoned: Optional[threading.Event] = None
+    ) -> List[Dict[str, Any]]:
+        with self._query_lock:
+            if abandoned is not None and abandoned.is_set():
+                return []
+            with self._running_lock:
+                self._running_query = abandoned
+            try:
+                with self.db_conn.cursor(row_factory=dict_row) as cur:
+                    cur.execute(query, params)
+                    return [dict(row) for row in cur.fetchall()]
+            except Exception:
+                self.db_conn.rollback()  # a cancelled or failed query aborts the transaction
+                raise
+            finally:
+                with self._running_lock:
+                    self._running_query = None
+
+    def _cancel_query(self, abandoned: threading.Event) -> None:
+        """Cancel the statement running on the connection if it is the abandoned one"""
+        with self._running_lock:
+            if self._running_query is not abandoned:
+                return
+            try:
+                self.db_conn.cancel_safe()
+                self.stats['queries_cancelled'] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to cancel timed-out query: {e}")
+
     async def _find_similar_make_model(self, original_attrs: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Find vehicles with similar make, model, and year"""
         try:
-            with self.db_conn.cursor(row_factory=dict_row) as cur:
-                # Build query for similar make/model/year
-                year_range = 2  # ±2 years
-                make = original_attrs.get('make', '')
-                model = original_attrs.get('model', '')
-                year = original_attrs.get('year')
+            # Build query for similar make/model/year
+            year_range = 2  # ±2 years
+            make = original_attrs.get('make', '')
+            model = original_attrs.get('model', '')
+            year = original_attrs.get('year')
 
-                if not make or not year:
-                    return []
-
-                cur.execute("""
-                    SELECT DISTINCT v.*
-                    FROM vehicles v
-                    WHERE LOWER(v.make) = %s
-                      AND LOWER(v.model) LIKE %s
-                      AND v.year BETWEEN %s AND %s
-                      AND v.id != %s
-                      AND v.availability_status = 'available'
-                      AND v.price IS NOT NULL
-                    LIMIT 10;
-                """, (
-                    make,
-                    f"%{model}%",
-                    year - year_range,
-                    year + year_range,
-                    original_attrs.get('id')
-                ))
+            if not make or not year:
+                return []
 
-                results = cur.fetchall()
-                return [dict(row) for row in results]
+            return await self._fetch_vehicles("""
+                SELECT DISTINCT v.*
+                FROM vehicles v
+                WHERE LOWER(v.make) = %s
+                  AND LOWER(v.model) LIKE %s
+                  AND v.year BETWEEN %s AND %s
+                  AND v.id != %s
+                  AND v.availability_status = 'available'
+                  AND v.price IS NOT NULL
+                LIMIT 10;
+            """, (
+                make,
+                f"%{model}%",
+                year - year_range,
+                year + year_range,
+                original_attrs.get('id')
+            ))
 
         except Exception as e:
             logger.error(f"❌ Error finding similar make/model: {e}")
@@ -329,21 +473,17 @@ class FavoritesRecommendationEngine:
                 min_price = original_price * (1 - tolerance)
                 max_price = original_price * (1 + tolerance)
 
-            with self.db_conn.cursor(row_factory=dict_row) as cur:
-                cur.execute("""
-                    SELECT DISTINCT v.*
-                    FROM vehicles v
-                    WHERE v.price BETWEEN %s AND %s
-                      AND v.id != %s
-                      AND v.availability_status = 'available'
-                      AND v.make IS NOT NULL
-                      AND v.model IS NOT NULL
-                    ORDER BY v.price
-                    LIMIT 20;
-                """, (min_price, max_price, original_attrs.get('id')))
-
-                results = cur.fetchall()
-                return [dict(row) for row in results]
+            return await self._fetch_vehicles("""
+                SELECT DISTINCT v.*
+                FROM vehicles v
+                WHERE v.price BETWEEN %s AND %s
+                  AND v.id != %s
+                  AND v.availability_status = 'available'
+                  AND v.make IS NOT NULL
+                  AND v.model IS NOT NULL
+                ORDER BY v.price
+                LIMIT 20;
+            """, (min_price, max_price, original_attrs.get('id')))
 
         except Exception as e:
             logger.error(f"❌ Error finding similar price range: {e}")
@@ -360,46 +500,34 @@ class FavoritesRecommendationEngine:
             if not any([features, body_type, fuel_type, transmission]):
                 return []
 
-            with self.db_conn.cursor(row_factory=dict_row) as cur:
-                # Build conditions for feature matching
-                conditions = []
-                params = []
-                param_idx = 1
+            # Build conditions for feature matching
+            conditions = ["v.id != %s"]
+            params = [original_attrs.get('id')]
 
-                conditions.append("v.id != %s")
-                params.append(original_attrs.get('id'))
-                param_idx += 1
+            conditions.append("v.availability_status = 'available'")
+            conditions.append("v.price IS NOT NULL")
 
-                conditions.append("v.availability_status = 'available'")
-                conditions.append("v.price IS NOT NULL")
+            if body_type:
+                conditions.append("LOWER(v.body_type) = %s")
+                params.append(body_type)
 
-                if body_type:
-                    conditions.append(f"LOWER(v.body_type) = %{param_idx}s")
-                    params.append(body_type)
-                    param_idx += 1
+            if fuel_type:
+                conditions.append("LOWER(v.fuel_type) = %s")
+                params.append(fuel_type)
 
-                if fuel_type:
-                    conditions.append(f"LOWER(v.fuel_type) = %{param_idx}s")
-                    params.append(fuel_type)
-                    param_idx += 1
+            if transmission:
+                conditions.append("LOWER(v.transmission) = %s")
+                params.append(transmission)
 
-                if transmission:
-                    conditions.append(f"LOWER(v.transmission) = %{param_idx}s")
-                    params.append(transmission)
-                    param_idx += 1
+            where_clause = " AND ".join(conditions)
 
-                where_clause = " AND ".join(conditions)
-
-                cur.execute(f"""
-                    SELECT DISTINCT v.*
-                    FROM vehicles v
-                    WHERE {where_clause}
-                    ORDER BY v.price
-                    LIMIT 15;
-                """, params)
-
-                results = cur.fetchall()
-                return [dict(row) for row in results]
+            return await self._fetch_vehicles(f"""
+                SELECT DISTINCT v.*
+                FROM vehicles v
+                WHERE {where_clause}
+                ORDER BY v.price
+                LIMIT 15;
+            """, params)
 
         except Exception as e:
             logger.error(f"❌ Error finding similar features: {e}")
@@ -417,15 +545,12 @@ class FavoritesRecommendationEngine:
 
             conditions = []
             params = []
-            param_idx = 1
 
             # Apply user preferences to query
             preferred_makes = user_preferences.get('preferred_brands', [])
             if preferred_makes:
-                make_conditions = [f"LOWER(v.make) = %{param_idx}s" for _ in preferred_makes]
-                conditions.append(f"({(' OR '.join(make_conditions))})")
-                params.extend([make.lower() for make in preferred_makes])
-                param_idx += len(preferred_makes)
+                conditions.append("LOWER(v.make) = ANY(%s)")
+                params.append([make.lower() for make in preferred_makes])
 
             preferred_features = user_preferences.get('must_have_features', [])
             if preferred_features:
@@ -439,31 +564,26 @@ class FavoritesRecommendationEngine:
                 "v.id != %s"
             ])
             params.append(original_attrs.get('id'))
-            param_idx += 1
 
             where_clause = " AND ".join(conditions) if conditions else "1=1"
 
-            with self.db_conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(f"""
-                    SELECT DISTINCT v.*
-                    FROM vehicles v
-                    WHERE {where_clause}
-                    ORDER BY v.make, v.model, v.year DESC
-                    LIMIT 25;
-                """, params)
+            vehicles = await self._fetch_vehicles(f"""
+                SELECT DISTINCT v.*
+                FROM vehicles v
+                WHERE {where_clause}
+                ORDER BY v.make, v.model, v.year DESC
+                LIMIT 25;
+            """, params)
 
-                results = cur.fetchall()
-                vehicles = [dict(row) for row in results]
-
-                # Post-process for feature matching if needed
-                if preferred_features:
-                    vehicles = [
-                        v for v in vehicles
-                        if any(feature.lower() in [f.lower() for f in v.get('features', [])]
-                           for feature in preferred_features)
-                    ]
+            # Post-process for feature matching if needed
+            if preferred_features:
+                vehicles = [
+                    v for v in vehicles
+                    if any(feature.lower() in [f.lower() for f in v.get('features', [])]
+                       for feature in preferred_features)
+                ]
 
-                return vehicles
+            return vehicles
 
         except Exception as e:
             logger.error(f"❌ Error finding preference-based recommendations: {e}")
@@ -473,8 +593,23 @@ class FavoritesRecommendationEngine:
         self,
         original_attrs: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
-        """Find semantically similar vehicles using RAG-Anything"""
+        """Find semantically similar vehicles (kNN graph lookup, RAG-Anything search otherwise)"""
         try:
+            if original_attrs.get('id') in self.similarity_graph:
+                neighbor_ids = [
+                    vehicle_id for vehicle_id, _ in self.similarity_graph.similar(original_attrs['id'], limit=20)
+                ]
+                if not neighbor_ids:
+                    return []
+                rows = await self._fetch_vehicles("""
+                    SELECT v.*
+                    FROM vehicles v
+                    WHERE v.id::text = ANY(%s)
+                      AND v.availability_status = 'available';
+                """, (neighbor_ids,))
+                rows = {str(row['id']): row for row in rows}
+                return [rows[vehicle_id] for vehicle_id in neighbor_ids if vehicle_id in rows]
+
             if not self.rag_service:
                 return []
 
@@ -535,16 +670,8 @@ class FavoritesRecommendationEngine:
     ) -> List[Dict[str, Any]]:
         """Rank recommendations by similarity and user preferences"""
         try:
-            scored_vehicles = []
-            for vehicle in vehicles:
-                score = self._calculate_overall_score(vehicle, original_attrs, user_preferences)
-                scored_vehicles.append((score, vehicle))
-
-            # Sort by score (highest first)
-            scored_vehicles.sort(key=lambda x: x[0], reverse=True)
-
-            # Return just the vehicles (without scores)
-            return [vehicle for score, vehicle in scored_vehicles]
+            scores = weighted(similarity_subscores(vehicles, original_attrs, user_preferences), OVERALL_WEIGHTS)
+            return [vehicles[i] for i in np.argsort(-scores, kind='stable').tolist()]
 
         except Exception as e:
             logger.error(f"❌ Error ranking recommendations: {e}")
@@ -558,242 +685,42 @@ class FavoritesRecommendationEngine:
     ) -> float:
         """Calculate overall similarity score for ranking"""
         try:
-            scores = []
-
-            # Make/model similarity (30% weight)
-            make_score = self._calculate_make_model_similarity(vehicle, original_attrs)
-            scores.append(('make_model', make_score, 0.3))
-
-            # Price similarity (25% weight)
-            price_score = self._calculate_price_similarity(vehicle, original_attrs)
-            scores.append(('price', price_score, 0.25))
-
-            # Feature similarity (25% weight)
-            feature_score = self._calculate_feature_similarity(vehicle, original_attrs)
-            scores.append(('features', feature_score, 0.25))
-
-            # User preference alignment (20% weight)
-            preference_score = self._calculate_preference_alignment(vehicle, user_preferences)
-            scores.append(('preferences', preference_score, 0.2))
-
-            # Calculate weighted score
-            total_score = sum(score * weight for score, weight in scores)
-            return total_score
-
+            subscores = similarity_subscores([vehicle], original_attrs, user_preferences)
+            return float(weighted(subscores, OVERALL_WEIGHTS)[0])
         except Exception as e:
             logger.error(f"❌ Error calculating overall score: {e}")
             return 0.0
 
     def _calculate_make_model_similarity(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate make/model similarity score"""
-        score = 0.0
-
-        # Make match (40% of this category)
-        if vehicle.get('make', '').lower() == original_attrs.get('make', '').lower():
-            score += 0.4
-
-        # Model similarity (60% of this category)
-        vehicle_model = vehicle.get('model', '').lower()
-        original_model = original_attrs.get('model', '').lower()
-
-        if vehicle_model == original_model:
-            score += 0.6
-        elif original_model in vehicle_model or vehicle_model in original_model:
-            score += 0.3  # Partial match
-        else:
-            # Use simple string similarity for remaining
-            similarity = self._simple_string_similarity(vehicle_model, original_model)
-            score += similarity * 0.6
-
-        return score
+        return float(similarity_subscores([vehicle], original_attrs, {})['make_model'][0])
 
     def _calculate_price_similarity(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate price similarity score"""
-        try:
-            vehicle_price = vehicle.get('price')
-            original_price = original_attrs.get('price')
-
-            if not vehicle_price or not original_price:
-                return 0.5  # Neutral score if prices are missing
-
-            # Calculate percentage difference
-            price_diff = abs(vehicle_price - original_price)
-            price_diff_percent = (price_diff / original_price) * 100
-
-            # Convert to similarity score (closer price = higher score)
-            if price_diff_percent <= 10:
-                return 1.0
-            elif price_diff_percent <= 25:
-                return 0.8
-            elif price_diff_percent <= 50:
-                return 0.6
-            elif price_diff_percent <= 100:
-                return 0.4
-            else:
-                return 0.2
-
-        except Exception:
-            return 0.5
+        return float(similarity_subscores([vehicle], original_attrs, {})['price'][0])
 
     def _calculate_feature_similarity(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate feature similarity score"""
-        try:
-            vehicle_features = set(f.lower() for f in vehicle.get('features', []))
-            original_features = set(f.lower() for f in original_attrs.get('features', []))
-
-            if not vehicle_features and not original_features:
-                return 0.5  # Neutral score if no features
-
-            if not vehicle_features or not original_features:
-                return 0.0  # No match possible if one has no features
-
-            # Calculate Jaccard similarity
-            intersection = vehicle_features & original_features
-            union = vehicle_features | original_features
-
-            similarity = len(intersection) / len(union) if union else 0
-
-            return similarity
-
-        except Exception:
-            return 0.5
+        return float(similarity_subscores([vehicle], original_attrs, {})['features'][0])
 
     def _calculate_preference_alignment(self, vehicle: Dict[str, Any], user_preferences: Dict[str, Any]) -> float:
         """Calculate how well vehicle aligns with user preferences"""
-        try:
-            if not user_preferences:
-                return 0.5  # Neutral score if no preferences
-
-            score = 0.0
-            total_checks = 0
-
-            # Preferred brands check
-            preferred_makes = user_preferences.get('preferred_brands', [])
-            if preferred_makes:
-                total_checks += 1
-                if vehicle.get('make', '').lower() in [make.lower() for make in preferred_makes]:
-                    score += 1.0
-
-            # Must-have features check
-            must_have_features = user_preferences.get('must_have_features', [])
-            if must_have_features:
-                total_checks += 1
-                vehicle_features = [f.lower() for f in vehicle.get('features', [])]
-                if all(feature.lower() in vehicle_features for feature in must_have_features):
-                    score += 1.0
-
-            # Price range check
-            price_range = user_preferences.get('price_range')
-            if price_range:
-                total_checks += 1
-                vehicle_price = vehicle.get('price')
-                min_price = price_range.get('min', 0)
-                max_price = price_range.get('max', float('inf'))
-                if vehicle_price and min_price <= vehicle_price <= max_price:
-                    score += 1.0
-
-            # Avoid features check
-            avoid_features = user_preferences.get('avoid_features', [])
-            if avoid_features:
-                total_checks += 1
-                vehicle_features = [f.lower() for f in vehicle.get('features', [])]
-                if not any(feature.lower() in vehicle_features for feature in avoid_features):
-                    score += 1.0
-
-            return score / total_checks if total_checks > 0 else 0.5
-
-        except Exception:
-            return 0.5
-
-    def _simple_string_similarity(self, str1: str, str2: str) -> float:
-        """Simple string similarity calculation"""
-        try:
-            if not str1 or not str2:
-                return 0.0
-
-            # Check for exact match
-            if str1 == str2:
-                return 1.0
-
-            # Check if one is substring of the other
-            if str1 in str2 or str2 in str1:
-                return 0.8
-
-            # Simple character-based similarity
-            common_chars = set(str1) & set(str2)
-            total_chars = set(str1) | set(str2)
-
-            return len(common_chars) / len(total_chars) if total_chars else 0.0
-
-        except Exception:
-            return 0.0
+        return float(similarity_subscores([vehicle], {}, user_preferences)['preferences'][0])
 
     def _calculate_similarity_score(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate detailed similarity score between two vehicles"""
         try:
-            scores = []
-            weights = {
-                'make_model': 0.3,
-                'price': 0.25,
-                'year': 0.15,
-                'features': 0.2,
-                'body_type': 0.1
-            }
-
-            # Calculate individual scores
-            scores.append(('make_model', self._calculate_make_model_similarity(vehicle, original_attrs)))
-            scores.append(('price', self._calculate_price_similarity(vehicle, original_attrs)))
-            scores.append(('year', self._calculate_year_similarity(vehicle, original_attrs)))
-            scores.append(('features', self._calculate_feature_similarity(vehicle, original_attrs)))
-            scores.append(('body_type', self._calculate_body_type_similarity(vehicle, original_attrs)))
-
-            # Weighted average
-            total_score = sum(score * weights.get(metric, 0) for metric, score in scores)
-            return total_score
-
+            return float(weighted(similarity_subscores([vehicle], original_attrs, {}), SIMILARITY_WEIGHTS)[0])
         except Exception:
             return 0.5
 
     def _calculate_year_similarity(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate year similarity score"""
-        try:
-            vehicle_year = vehicle.get('year')
-            original_year = original_attrs.get('year')
-
-            if not vehicle_year or not original_year:
-                return 0.5
-
-            year_diff = abs(vehicle_year - original_year)
-
-            if year_diff == 0:
-                return 1.0
-            elif year_diff <= 1:
-                return 0.9
-            elif year_diff <= 2:
-                return 0.8
-            elif year_diff <= 3:
-                return 0.6
-            elif year_diff <= 5:
-                return 0.4
-            else:
-                return 0.2
-
-        except Exception:
-            return 0.5
+        return float(similarity_subscores([vehicle], original_attrs, {})['year'][0])
 
     def _calculate_body_type_similarity(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> float:
         """Calculate body type similarity score"""
-        try:
-            vehicle_body = vehicle.get('body_type', '').lower()
-            original_body = original_attrs.get('body_type', '').lower()
-
-            if not vehicle_body or not original_body:
-                return 0.5
-
-            return 1.0 if vehicle_body == original_body else 0.0
-
-        except Exception:
-            return 0.5
+        return float(similarity_subscores([vehicle], original_attrs, {})['body_type'][0])
 
     def _generate_match_reasons(self, vehicle: Dict[str, Any], original_attrs: Dict[str, Any]) -> List[str]:
         """Generate reasons why this vehicle is a good match"""
@@ -850,21 +777,7 @@ class FavoritesRecommendationEngine:
     ) -> float:
         """Calculate confidence score for the recommendation"""
         try:
-            base_confidence = self._calculate_similarity_score(vehicle, original_attrs)
-
-            # Boost confidence based on data completeness
-            data_completeness = 0.0
-            required_fields = ['make', 'model', 'year', 'price', 'features']
-            for field in required_fields:
-                if vehicle.get(field):
-                    data_completeness += 0.2
-
-            # Boost confidence based on user preference alignment
-            preference_boost = self._calculate_preference_alignment(vehicle, user_preferences) * 0.1
-
-            confidence = (base_confidence * 0.7) + (data_completeness * 0.2) + preference_boost
-            return min(1.0, confidence)
-
+            return float(confidence_scores(similarity_subscores([vehicle], original_attrs, user_preferences))[0])
         except Exception:
             return 0.5
 
@@ -958,29 +871,51 @@ class FavoritesRecommendationEngine:
         recommendation: Recommendation
     ) -> None:
         """Track recommendation in database for analytics"""
-        try:
-            with self.db_conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO vehicle_recommendations (
-                        user_id, unavailable_vehicle_id, recommended_vehicle_id,
-                        similarity_score, match_reasons, confidence_score, recommendation_type
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s);
-                """, (
-                    user_id,
-                    unavailable_vehicle_id,
-                    recommendation.vehicle_id,
-                    recommendation.similarity_score,
-                    recommendation.match_reasons,
-                    recommendation.confidence_score,
-                    recommendation.recommendation_type
-                ))
+        await self._track_recommendations(user_id, unavailable_vehicle_id, [recommendation])
 
-                self.db_conn.commit()
+    async def _track_recommendations(
+        self,
+        user_id: str,
+        unavailable_vehicle_id: str,
+        recommendations: List[Recommendation]
+    ) -> None:
+        """Track all recommendations of one request with a single batch insert and commit"""
+        if not recommendations or not self.db_conn:
+            return
+        rows = [
+            (
+                user_id,
+                unavailable_vehicle_id,
+                recommendation.vehicle_id,
+                recommendation.similarity_score,
+                recommendation.match_reasons,
+                recommendation.confidence_score,
+                recommendation.recommendation_type
+            )
+            for recommendation in recommendations
+        ]
+        try:
+            async with self._connection_turn:
+                await asyncio.to_thread(self._insert_recommendations, rows)
 
         except Exception as e:
-            logger.error(f"❌ Failed to track recommendation: {e}")
-            if self.db_conn:
+            logger.error(f"❌ Failed to track recommendations: {e}")
+
+    def _insert_recommendations(self, rows: List[Tuple]) -> None:
+        with self._query_lock:
+            try:
+                with self.db_conn.cursor() as cur:
+                    cur.executemany("""
+                        INSERT INTO vehicle_recommendations (
+                            user_id, unavailable_vehicle_id, recommended_vehicle_id,
+                            similarity_score, match_reasons, confidence_score, recommendation_type
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s);
+                    """, rows)
+
+                self.db_conn.commit()
+            except Exception:
                 self.db_conn.rollback()
+                raise
 
     async def record_recommendation_feedback(
         self,
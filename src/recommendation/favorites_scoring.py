@@ -0,0 +1,179 @@
+"""
+Otto.AI Favorites Candidate Scoring
+
+Vectorized similarity sub-scores for replacement candidates of an
+unavailable favorite.
+
+Candidates are encoded once into columns (lowercased make/model/body
+codes, price and year arrays, a boolean feature matrix) and every
+sub-score used by FavoritesRecommendationEngine is computed for all of
+them in one pass: make/model, price, year, features, body type,
+preference alignment and data completeness.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Ranking score weights (see FavoritesRecommendationEngine._calculate_overall_score)
+OVERALL_WEIGHTS = {'make_model': 0.3, 'price': 0.25, 'features': 0.25, 'preferences': 0.2}
+
+# Detailed similarity weights (see FavoritesRecommendationEngine._calculate_similarity_score)
+SIMILARITY_WEIGHTS = {'make_model': 0.3, 'price': 0.25, 'year': 0.15, 'features': 0.2, 'body_type': 0.1}
+
+COMPLETENESS_FIELDS = ['make', 'model', 'year', 'price', 'features']
+
+# (upper bound of % price difference, score), first match wins
+_PRICE_BANDS = [(10, 1.0), (25, 0.8), (50, 0.6), (100, 0.4)]
+_PRICE_FLOOR = 0.2
+
+# (upper bound of year difference, score), first match wins
+_YEAR_BANDS = [(0, 1.0), (1, 0.9), (2, 0.8), (3, 0.6), (5, 0.4)]
+_YEAR_FLOOR = 0.2
+
+NEUTRAL_SCORE = 0.5
+
+
+def _lower(value: Any) -> str:
+    return str(value).lower() if value else ''
+
+
+def _numbers(values: List[Any]) -> np.ndarray:
+    """Floats with NaN for missing and zero values (treated as missing by the scalar rules)"""
+    numbers = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            if value:
+                numbers[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return numbers
+
+
+def _banded(differences: np.ndarray, bands, floor: float) -> np.ndarray:
+    return np.select([differences <= bound for bound, _ in bands], [score for _, score in bands], floor)
+
+
+def _model_similarity(candidate: str, original: str) -> float:
+    """Model part of the make/model score (at most 0.6)"""
+    if candidate == original:
+        return 0.6
+    if original in candidate or candidate in original:
+        return 0.3
+    union = set(candidate) | set(original)
+    return 0.6 * len(set(candidate) & set(original)) / len(union) if union else 0.0
+
+
+def similarity_subscores(
+    vehicles: List[Dict[str, Any]],
+    original_attrs: Dict[str, Any],
+    user_preferences: Dict[str, Any]
+) -> Dict[str, np.ndarray]:
+    """
+    Every sub-score for every candidate.
+
+    Returns arrays keyed by make_model, price, features, preferences,
+    year, body_type and completeness, each of length len(vehicles).
+    """
+    n = len(vehicles)
+    user_preferences = user_preferences or {}
+
+    makes = np.array([_lower(v.get('make')) for v in vehicles], dtype=object)
+    models = [_lower(v.get('model')) for v in vehicles]
+    original_model = _lower(original_attrs.get('model'))
+
+    # Make/model: 0.4 for the make, the model part once per distinct model
+    model_scores = {model: _model_similarity(model, original_model) for model in set(models)}
+    make_model = np.where(makes == _lower(original_attrs.get('make')), 0.4, 0.0) + \
+        np.array([model_scores[model] for model in models], dtype=np.float64)
+
+    # Price and year bands
+    prices = _numbers([v.get('price') for v in vehicles])
+    original_price = _numbers([original_attrs.get('price')])[0]
+    price = np.full(n, NEUTRAL_SCORE)
+    if not np.isnan(original_price):
+        known = ~np.isnan(prices)
+        price[known] = _banded(np.abs(prices[known] - original_price) / original_price * 100, _PRICE_BANDS, _PRICE_FLOOR)
+
+    years = _numbers([v.get('year') for v in vehicles])
+    original_year = _numbers([original_attrs.get('year')])[0]
+    year = np.full(n, NEUTRAL_SCORE)
+    if not np.isnan(original_year):
+        known = ~np.isnan(years)
+        year[known] = _banded(np.abs(years[known] - original_year), _YEAR_BANDS, _YEAR_FLOOR)
+
+    # Body type
+    bodies = np.array([_lower(v.get('body_type')) for v in vehicles], dtype=object)
+    original_body = _lower(original_attrs.get('body_type'))
+    body_type = np.full(n, NEUTRAL_SCORE)
+    if original_body:
+        known = bodies != ''
+        body_type[known] = (bodies[known] == original_body).astype(np.float64)
+
+    # Features: one boolean matrix over every feature seen, Jaccard against the original
+    vehicle_features = [{_lower(f) for f in (v.get('features') or [])} for v in vehicles]
+    original_features = {_lower(f) for f in (original_attrs.get('features') or [])}
+    vocabulary = {feature: i for i, feature in enumerate(set(original_features).union(*vehicle_features))}
+    matrix = np.zeros((n, len(vocabulary)), dtype=bool)
+    rows = [i for i, features in enumerate(vehicle_features) for _ in features]
+    cols = [vocabulary[feature] for features in vehicle_features for feature in features]
+    matrix[rows, cols] = True
+    original_vector = np.zeros(len(vocabulary), dtype=bool)
+    original_vector[[vocabulary[feature] for feature in original_features]] = True
+
+    counts = matrix.sum(axis=1)
+    intersection = (matrix & original_vector).sum(axis=1)
+    union = counts + len(original_features) - intersection
+    features = np.where(union > 0, intersection / np.maximum(union, 1), 0.0)
+    if not original_features:
+        features = np.where(counts == 0, NEUTRAL_SCORE, 0.0)
+    else:
+        features[counts == 0] = 0.0
+
+    # Preference alignment: share of stated preferences the vehicle satisfies
+    checks = []
+    preferred_makes = user_preferences.get('preferred_brands', [])
+    if preferred_makes:
+        checks.append(np.isin(makes, [_lower(make) for make in preferred_makes]))
+    must_have = [_lower(f) for f in user_preferences.get('must_have_features', [])]
+    if must_have:
+        if all(feature in vocabulary for feature in must_have):
+            checks.append(matrix[:, [vocabulary[feature] for feature in must_have]].all(axis=1))
+        else:
+            checks.append(np.zeros(n, dtype=bool))
+    price_range = user_preferences.get('price_range')
+    if price_range:
+        with np.errstate(invalid='ignore'):
+            checks.append(
+                (prices >= price_range.get('min', 0)) & (prices <= price_range.get('max', float('inf')))
+            )
+    avoid = [vocabulary[_lower(f)] for f in user_preferences.get('avoid_features', []) if _lower(f) in vocabulary]
+    if user_preferences.get('avoid_features'):
+        checks.append(~matrix[:, avoid].any(axis=1) if avoid else np.ones(n, dtype=bool))
+    preferences = np.mean(checks, axis=0) if checks else np.full(n, NEUTRAL_SCORE)
+
+    completeness = 0.2 * np.sum(
+        [[bool(v.get(field)) for field in COMPLETENESS_FIELDS] for v in vehicles], axis=1
+    ) if n else np.zeros(0)
+
+    return {
+        'make_model': make_model,
+        'price': price,
+        'features': features,
+        'preferences': preferences.astype(np.float64),
+        'year': year,
+        'body_type': body_type,
+        'completeness': completeness,
+    }
+
+
+def weighted(subscores: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    return sum(subscores[name] * weight for name, weight in weights.items())
+
+
+def confidence_scores(subscores: Dict[str, np.ndarray]) -> np.ndarray:
+    """Similarity, data completeness and preference alignment, capped at 1"""
+    similarity = weighted(subscores, SIMILARITY_WEIGHTS)
+    return np.minimum(
+        1.0, similarity * 0.7 + subscores['completeness'] * 0.2 + subscores['preferences'] * 0.1
+    )
@@ -0,0 +1,675 @@
+"""
+Otto.AI Interaction Event Log
+
+Append-only, columnar store of typed user interaction events.
+
+Each tracked interaction becomes one fixed-width row per vehicle
+(timestamp, user, session, vehicle, search query, type). Strings are
+dictionary-encoded to uint32 ids in an append-only strings file. Rows are
+buffered and then written as immutable segment files, partitioned by UTC
+day (<dir>/<YYYY-MM-DD>/<writer>-<n>.seg). Every segment stores its columns
+contiguously, sorted by (user, timestamp), so a user's rows are two binary
+searches away. A background compactor merges each day's segments into
+one. Queries memory-map only the columns they touch and aggregate them
+with numpy.
+
+Several processes can share a directory: each claims a writer namespace
+(w0, w1, ...) by holding an exclusive lock on <dir>/<writer>.lock, and
+only writes, compacts and cleans up its own strings-<writer>.jsonl and
+segments. Segments of other writers present at open are read through a
+translation of their string ids into this process's dictionary.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .taste_vectors import _epoch
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype; segment files hold the columns in this order
+EVENT_COLUMNS: Dict[str, np.dtype] = {
+    'timestamp': np.dtype('<f8'),  # epoch seconds
+    'user': np.dtype('<u4'),
+    'session': np.dtype('<u4'),
+    'vehicle': np.dtype('<u4'),  # NO_ID for interactions without vehicles
+    'query': np.dtype('<u4'),  # search text, NO_ID otherwise
+    'type': np.dtype('u1'),
+    'lead': np.dtype('u1'),  # 1 on the first row of each interaction (rows per interaction = vehicles)
+}
+
+# Stable type codes (never reorder: codes are persisted)
+EVENT_TYPES = (
+    'view', 'save', 'compare', 'search', 'recommendation_click', 'filter_change',
+    'session_start', 'session_end', 'favorite', 'inquiry',
+)
+TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+UNKNOWN_TYPE = 255
+
+NO_ID = np.uint32(0xFFFFFFFF)
+SECONDS_PER_DAY = 86400
+
+DEFAULT_FLUSH_SECONDS = 5
+DEFAULT_COMPACT_SECONDS = 15 * 60
+# Today's partition is compacted once it holds this many segments; earlier days always
+COMPACT_MIN_SEGMENTS = 16
+# Buffered rows that trigger a flush without waiting for the interval
+FLUSH_ROWS = 4096
+
+_HEADER = np.dtype('<u8')  # row count
+
+# Dictionary-encoded columns, translated when reading another writer's segments
+STRING_COLUMNS = ('user', 'session', 'vehicle', 'query')
+
+
+def _type_code(interaction_type: Any) -> int:
+    value = str(getattr(interaction_type, 'value', interaction_type)).lower()
+    return TYPE_CODES.get(value, UNKNOWN_TYPE)
+
+
+def _day_name(day: int) -> str:
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=timezone.utc).date().isoformat()
+
+
+def _empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in EVENT_COLUMNS.items()}
+
+
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return _empty_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name in EVENT_COLUMNS}
+
+
+def _sorted_by_user(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    order = np.lexsort((columns['timestamp'], columns['user']))
+    return {name: np.ascontiguousarray(column[order]) for name, column in columns.items()}
+
+
+class _StringDictionary:
+    """Append-only string <-> uint32 id table, persisted as one JSON string per line"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._persisted = 0
+
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break  # torn final write; rows referencing it were never written
+                    value = json.loads(line)
+                    self.ids.setdefault(value, len(self.values))
+                    self.values.append(value)
+            self._persisted = len(self.values)
+
+    def id(self, value: Optional[str]) -> int:
+        if value is None or value == '':
+            return int(NO_ID)
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+    def translation(self, values: List[str]) -> np.ndarray:
+        """Local ids for another dictionary's values, indexed by that dictionary's ids"""
+        return np.array([self.id(value) for value in values], dtype=EVENT_COLUMNS['user'])
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        return None if value is None else self.ids.get(str(value))
+
+    def decode(self, ids: Iterable[int]) -> List[Optional[str]]:
+        return [None if i == NO_ID else self.values[i] for i in ids]
+
+    def persist(self) -> None:
+        """Append strings added since the last call (before any rows that use them)"""
+        end = len(self.values)  # appends may add strings while this one writes
+        if not self.path or self._persisted == end:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for value in self.values[self._persisted:end]:
+                f.write(json.dumps(value) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._persisted = end
+
+
+class _Segment:
+    """
+    Immutable columns of one segment, sorted by (user, timestamp).
+
+    A segment of another writer carries ``translation`` (its string ids ->
+    local ids); its rows stay sorted by that writer's user ids.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        path: Optional[str] = None,
+        translation: Optional[np.ndarray] = None
+    ):
+        self.columns = columns
+        self.path = path
+        self.translation = translation
+        self._foreign_users: Optional[Dict[int, int]] = None  # local user id -> this segment's
+
+    @property
+    def own(self) -> bool:
+        return self.translation is None
+
+    def __len__(self) -> int:
+        return len(self.columns['user'])
+
+    @classmethod
+    def write(cls, path: str, columns: Dict[str, np.ndarray]) -> '_Segment':
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(np.array([len(columns['user'])], dtype=_HEADER).tobytes())
+            for name, dtype in EVENT_COLUMNS.items():
+                f.write(columns[name].astype(dtype, copy=False).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str, translation: Optional[np.ndarray] = None) -> '_Segment':
+        rows = int(np.fromfile(path, dtype=_HEADER, count=1)[0])
+        columns, offset = {}, _HEADER.itemsize
+        for name, dtype in EVENT_COLUMNS.items():
+            columns[name] = (
+                np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+                if rows else np.zeros(0, dtype=dtype)
+            )
+            offset += rows * dtype.itemsize
+        return cls(columns, path, translation)
+
+    def select(self, user: Optional[int], since: float, until: float) -> Dict[str, np.ndarray]:
+        """Rows of one user (all users when None) with since <= timestamp < until, in local ids"""
+        if user is None:
+            timestamps = self.columns['timestamp']
+            mask = (timestamps >= since) & (timestamps < until)
+            return self._localize({name: np.asarray(column[mask]) for name, column in self.columns.items()})
+
+        if not self.own:
+            if self._foreign_users is None:
+                self._foreign_users = {int(local): foreign for foreign, local in enumerate(self.translation.tolist())}
+            user = self._foreign_users.get(int(user))
+            if user is None:
+                return _empty_columns()
+
+        users = self.columns['user']
+        lo = int(np.searchsorted(users, np.uint32(user), side='left'))
+        hi = int(np.searchsorted(users, np.uint32(user), side='right'))
+        # Within one user the rows are in time order
+        timestamps = self.columns['timestamp'][lo:hi]
+        start = lo + int(np.searchsorted(timestamps, since, side='left'))
+        stop = lo + int(np.searchsorted(timestamps, until, side='left'))
+        return self._localize({name: np.asarray(column[start:stop]) for name, column in self.columns.items()})
+
+    def _localize(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        if self.own:
+            return columns
+        for name in STRING_COLUMNS:
+            ids = columns[name]
+            local = np.full(len(ids), NO_ID, dtype=ids.dtype)
+            known = ids != NO_ID
+            local[known] = self.translation[ids[known]]
+            columns[name] = local
+        return columns
+
+
+class InteractionEventLog:
+    """Append-only columnar interaction log with day partitions and background compaction"""
+
+    def __init__(self, directory: Optional[str] = None, flush_rows: int = FLUSH_ROWS):
+        """
+        Initialize interaction event log
+
+        Args:
+            directory: Where segments are written; None keeps segments in memory only
+            flush_rows: Buffered rows that trigger a flush without waiting for the interval
+        """
+        self.directory = directory
+        self.flush_rows = flush_rows
+
+        self.writer: Optional[str] = None
+        self._writer_lock = None  # open lock file, held for the life of the log
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._claim_writer()
+
+        self.strings = _StringDictionary(self._strings_path(self.writer) if directory else None)
+        self._buffer: List[Tuple] = []
+        self._flushing: Optional[Dict[str, np.ndarray]] = None  # rows being written, still queryable
+        self._partitions: Dict[int, List[_Segment]] = {}  # UTC day -> segments
+        self._next_segment = 0
+        # _lock guards the in-memory state and is only held briefly; _write_lock serializes
+        # segment writes (flushes and compactions) and is taken before _lock
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self.flush_task = None
+        self.compact_task = None
+        self.pending_flush: Optional[asyncio.Task] = None  # flush of a full buffer, off the event loop
+
+        self.stats = {
+            'events': 0,
+            'rows_written': 0,
+            'segments_written': 0,
+            'compactions': 0,
+            'queries': 0
+        }
+
+        if directory:
+            self._open_directory()
+
+    def _claim_writer(self) -> None:
+        """Take the first writer namespace no live process holds"""
+        slot = 0
+        while True:
+            lock_file = open(os.path.join(self.directory, f"w{slot}.lock"), 'a')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+                continue
+            self.writer, self._writer_lock = f"w{slot}", lock_file
+            # Exists before any segment of this writer, so readers always find it
+            open(os.path.join(self.directory, f"{self.writer}.compact.lock"), 'a').close()
+            return
+
+    def _strings_path(self, writer: str) -> str:
+        return os.path.join(self.directory, f"strings-{writer}.jsonl")
+
+    def close(self) -> None:
+        """Flush buffered rows and release the writer namespace"""
+        self.flush()
+        if self._writer_lock:
+            self._writer_lock.close()
+            self._writer_lock = None
+
+    def _open_directory(self) -> None:
+        # Other writers cannot swap sources for a merged segment while their segments are listed and opened
+        compaction_locks = []
+        for file_name in sorted(os.listdir(self.directory)):
+            if file_name.endswith('.compact.lock') and file_name != f"{self.writer}.compact.lock":
+                lock_file = open(os.path.join(self.directory, file_name), 'a')
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)
+                compaction_locks.append(lock_file)
+        try:
+            self._open_segments()
+        finally:
+            for lock_file in compaction_locks:
+                lock_file.close()
+
+    def _open_segments(self) -> None:
+        # Segments are listed before the dictionaries: a writer persists strings before the rows using them
+        found: List[Tuple[int, str, str, str]] = []
+        for day_name in sorted(os.listdir(self.directory)):
+            day_path = os.path.join(self.directory, day_name)
+            if not os.path.isdir(day_path):
+                continue
+            day = int(datetime.fromisoformat(day_name).replace(tzinfo=timezone.utc).timestamp()) // SECONDS_PER_DAY
+            for file_name in sorted(os.listdir(day_path)):
+                writer, _, number = file_name.partition('-')
+                path = os.path.join(day_path, file_name)
+                if writer != self.writer:
+                    if file_name.endswith('.seg'):
+                        found.append((day, writer, number, path))
+                elif file_name.endswith('.tmp'):
+                    os.remove(path)  # our interrupted write or compaction; its sources are still in place
+                elif file_name.endswith('.seg'):
+                    found.append((day, writer, number, path))
+                    self._next_segment = max(self._next_segment, int(number.split('.')[0]) + 1)
+
+        translations: Dict[str, np.ndarray] = {}
+        for day, writer, _, path in found:
+            if writer == self.writer:
+                segment = _Segment.open(path)
+            else:
+                if writer not in translations:
+                    translations[writer] = self.strings.translation(
+                        _StringDictionary(self._strings_path(writer)).values
+                    )
+                segment = _Segment.open(path, translations[writer])
+            self._partitions.setdefault(day, []).append(segment)
+
+        segments = sum(len(segments) for segments in self._partitions.values())
+        logger.info(
+            f"✅ Interaction log opened as writer {self.writer}: {len(self._partitions)} days, "
+            f"{segments} segments ({len(translations)} other writers)"
+        )
+
+    # ---- Writes ----
+
+    def append(
+        self,
+        user_id: str,
+        session_id: Optional[str],
+        interaction_type: Any,
+        vehicle_ids: Optional[Iterable[str]] = None,
+        timestamp: Any = None,
+        query: Optional[str] = None
+    ) -> None:
+        """
+        Record one interaction (one row per vehicle, one row when there are none).
+
+        Only buffers the rows; a full buffer is flushed by a worker thread when
+        called on the event loop, inline otherwise.
+        """
+        if isinstance(vehicle_ids, str):
+            vehicle_ids = [vehicle_ids]
+        timestamp = _epoch(timestamp)
+
+        with self._lock:
+            user = self.strings.id(user_id)
+            session = self.strings.id(session_id)
+            query_id = self.strings.id(query) if query else int(NO_ID)
+            code = _type_code(interaction_type)
+            vehicles = [self.strings.id(vehicle_id) for vehicle_id in (vehicle_ids or [])] or [int(NO_ID)]
+
+            self._buffer.extend(
+                (timestamp, user, session, vehicle, query_id, code, int(i == 0))
+                for i, vehicle in enumerate(vehicles)
+            )
+            self.stats['events'] += 1
+            full = len(self._buffer) >= self.flush_rows
+
+        if full:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # no event loop to block
+            return
+        if not self.pending_flush:
+            self.pending_flush = loop.create_task(asyncio.to_thread(self.flush))
+            self.pending_flush.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self.pending_flush = None
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Interaction log flush failed: {str(task.exception())}")
+
+    def flush(self) -> int:
+        """Write buffered rows as new segments; returns rows written"""
+        with self._write_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                columns = _sorted_by_user(self._buffer_columns())
+                self._buffer = []
+                self._flushing = columns
+
+            # Appends and queries carry on while the segments are written
+            try:
+                self.strings.persist()
+                days = (columns['timestamp'] // SECONDS_PER_DAY).astype(np.int64)
+                written = [
+                    # Masking keeps the (user, timestamp) order
+                    (day, self._write_segment(day, {name: column[days == day] for name, column in columns.items()}))
+                    for day in np.unique(days).tolist()
+                ]
+            finally:
+                with self._lock:
+                    self._flushing = None
+
+            with self._lock:
+                for day, segment in written:
+                    self._partitions.setdefault(day, []).append(segment)
+                self.stats['rows_written'] += len(days)
+            return len(days)
+
+    def _buffer_columns(self) -> Dict[str, np.ndarray]:
+        if not self._buffer:
+            return _empty_columns()
+        rows = list(zip(*self._buffer))
+        return {name: np.array(values, dtype=dtype) for (name, dtype), values in zip(EVENT_COLUMNS.items(), rows)}
+
+    def _write_segment(self, day: int, columns: Dict[str, np.ndarray]) -> _Segment:
+        self.stats['segments_written'] += 1
+        if not self.directory:
+            return _Segment(columns)
+
+        day_path = os.path.join(self.directory, _day_name(day))
+        os.makedirs(day_path, exist_ok=True)
+        path = os.path.join(day_path, f"{self.writer}-{self._next_segment:08d}.seg")
+        self._next_segment += 1
+        return _Segment.write(path, columns)
+
+    # ---- Compaction ----
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Merge this writer's segments of finished days (and of today once it has many); returns days merged"""
+        today = int(_epoch(now) // SECONDS_PER_DAY)
+        with self._lock:
+            days = []
+            for day, segments in self._partitions.items():
+                own = sum(segment.own for segment in segments)
+                if own > 1 and (day < today or own >= COMPACT_MIN_SEGMENTS):
+                    days.append(day)
+        for day in days:
+            self._compact_day(day)
+        return len(days)
+
+    def _compact_day(self, day: int) -> None:
+        # Other writers' segments are left alone: they may still be compacting them
+        with self._lock:
+            sources = [segment for segment in self._partitions[day] if segment.own]
+
+        # Merge without the lock: segments are immutable and appends only add new ones
+        merged_columns = _sorted_by_user(_concat([
+            {name: np.asarray(column) for name, column in segment.columns.items()} for segment in sources
+        ]))
+        lock_file = None
+        if self.directory:
+            # Readers opening the directory never see both the merged segment and its sources
+            lock_file = open(os.path.join(self.directory, f"{self.writer}.compact.lock"), 'a')
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            with self._write_lock:
+                merged = self._write_segment(day, merged_columns)
+            with self._lock:
+                self._partitions[day] = [merged] + [
+                    segment for segment in self._partitions[day] if not any(segment is source for source in sources)
+                ]
+
+            for segment in sources:
+                if segment.path:
+                    os.remove(segment.path)
+        finally:
+            if lock_file:
+                lock_file.close()
+        self.stats['compactions'] += 1
+        logger.debug(f"Compacted {len(sources)} interaction segments for {_day_name(day)}")
+
+    def start_background_tasks(
+        self,
+        flush_interval: float = DEFAULT_FLUSH_SECONDS,
+        compact_interval: float = DEFAULT_COMPACT_SECONDS
+    ) -> None:
+        """Flush the buffer and compact partitions periodically"""
+        if not self.flush_task:
+            self.flush_task = asyncio.create_task(self._background_flush(flush_interval))
+        if not self.compact_task:
+            self.compact_task = asyncio.create_task(self._background_compact(compact_interval))
+
+    async def _background_flush(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"❌ Interaction log flush failed: {str(e)}")
+
+    async def _background_compact(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                logger.error(f"❌ Interaction log compaction failed: {str(e)}")
+
+    async def stop_background_tasks(self) -> None:
+        for task in (self.flush_task, self.compact_task, self.pending_flush):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.flush_task = self.compact_task = None
+        self.flush()
+
+    # ---- Queries ----
+
+    def columns(
+        self,
+        user_id: Optional[str] = None,
+        since: Any = 0.0,
+        until: Any = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Event columns in [since, until), for one user or everyone.
+
+        Args:
+            user_id: User to select (all users when None)
+            since: Start time (datetime, ISO string or epoch seconds)
+            until: End time (open-ended when None)
+
+        Returns:
+            Column name -> array, including rows not yet flushed
+        """
+        since = float(since) if isinstance(since, (int, float)) else _epoch(since)
+        until = np.inf if until is None else _epoch(until)
+
+        with self._lock:
+            self.stats['queries'] += 1
+            user = None
+            if user_id is not None:
+                user = self.strings.lookup(user_id)
+                if user is None:
+                    return _empty_columns()
+
+            first_day = since // SECONDS_PER_DAY
+            last_day = until // SECONDS_PER_DAY if np.isfinite(until) else np.inf
+            parts = [
+                segment.select(user, since, until)
+                for day, segments in self._partitions.items() if first_day <= day <= last_day
+                for segment in segments
+            ]
+            if self._flushing is not None:
+                parts.append(_Segment(self._flushing).select(user, since, until))
+            if self._buffer:
+                parts.append(_Segment(_sorted_by_user(self._buffer_columns())).select(user, since, until))
+        return _concat(parts)
+
+    def interaction_stats(self, user_id: str, days: int = 30, now: Any = None) -> Dict[str, Any]:
+        """Interaction counts, per-type and per-day (UTC) activity and vehicle engagement"""
+        now = _epoch(now)
+        events = self.columns(user_id, since=now - days * SECONDS_PER_DAY)
+
+        lead = events['lead'].astype(bool)
+        types, days_active = events['type'][lead], (events['timestamp'][lead] // SECONDS_PER_DAY).astype(np.int64)
+        type_codes, type_counts = np.unique(types, return_counts=True)
+        day_numbers, day_counts = np.unique(days_active, return_counts=True)
+
+        return {
+            'total_interactions': int(lead.sum()),
+            'interaction_types': {
+                (EVENT_TYPES[code] if code < len(EVENT_TYPES) else 'unknown'): int(count)
+                for code, count in zip(type_codes.tolist(), type_counts.tolist())
+            },
+            'daily_activity': {
+                _day_name(day): int(count) for day, count in zip(day_numbers.tolist(), day_counts.tolist())
+            },
+            'vehicle_engagement': {
+                'unique_vehicles_viewed': self._unique_vehicles(events, 'view'),
+                'total_vehicles_saved': self._unique_vehicles(events, 'save'),
+                'total_comparisons': int((types == TYPE_CODES['compare']).sum())
+            }
+        }
+
+    def behavior_summary(self, user_id: str) -> Dict[str, Any]:
+        """Session-level totals over a user's whole history (for behavior profiles)"""
+        events = self.columns(user_id)
+        lead = events['lead'].astype(bool)
+        if not lead.any():
+            return {'total_interactions': 0, 'total_sessions': 0}
+
+        sessions, session_index = np.unique(events['session'], return_inverse=True)
+        # Session spans: first to last interaction
+        first = np.full(len(sessions), np.inf)
+        last = np.full(len(sessions), -np.inf)
+        np.minimum.at(first, session_index, events['timestamp'])
+        np.maximum.at(last, session_index, events['timestamp'])
+
+        searches = lead & (events['type'] == TYPE_CODES['search'])
+        queries, query_counts = np.unique(events['query'][searches & (events['query'] != NO_ID)], return_counts=True)
+        query_texts = self.strings.decode(queries.tolist())
+        searched_words = np.array([len(text.split()) for text in query_texts])
+
+        return {
+            'total_interactions': int(lead.sum()),
+            'total_sessions': len(sessions),
+            'total_views': self._session_vehicle_pairs(events, 'view'),
+            'total_saves': self._session_vehicle_pairs(events, 'save'),
+            'total_comparisons': int((lead & (events['type'] == TYPE_CODES['compare'])).sum()),
+            'total_searches': int(query_counts.sum()),
+            'avg_session_duration': float((last - first).mean()),
+            'avg_interactions_per_session': float(lead.sum() / len(sessions)),
+            'avg_search_length': float((searched_words * query_counts).sum() / query_counts.sum()) if len(queries) else 0,
+            'unique_search_terms': len(set(' '.join(query_texts).split())),
+            'viewed_vehicles': self.strings.decode(self._vehicles(events, 'view').tolist()),
+        }
+
+    def _vehicles(self, events: Dict[str, np.ndarray], interaction_type: str) -> np.ndarray:
+        matches = (events['type'] == TYPE_CODES[interaction_type]) & (events['vehicle'] != NO_ID)
+        return np.unique(events['vehicle'][matches])
+
+    def _unique_vehicles(self, events: Dict[str, np.ndarray], interaction_type: str) -> int:
+        return len(self._vehicles(events, interaction_type))
+
+    def _session_vehicle_pairs(self, events: Dict[str, np.ndarray], interaction_type: str) -> int:
+        """Distinct (session, vehicle) pairs, i.e. vehicles counted once per session"""
+        matches = (events['type'] == TYPE_CODES[interaction_type]) & (events['vehicle'] != NO_ID)
+        pairs = (events['session'][matches].astype(np.uint64) << np.uint64(32)) | events['vehicle'][matches]
+        return len(np.unique(pairs))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'buffered_rows': len(self._buffer),
+            'partitions': len(self._partitions),
+            'segments': sum(len(segments) for segments in self._partitions.values()),
+            'strings': len(self.strings.values),
+        }
+
+
+# Global log instance
+_interaction_event_log: Optional[InteractionEventLog] = None
+
+
+def get_interaction_event_log() -> InteractionEventLog:
+    """Get or create the shared interaction log (directory from INTERACTION_LOG_DIR)"""
+    global _interaction_event_log
+    if _interaction_event_log is None:
+        _interaction_event_log = InteractionEventLog(
+            os.getenv('INTERACTION_LOG_DIR', os.path.join('data', 'interaction_log'))
+        )
+    return _interaction_event_log
@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .interaction_log import InteractionEventLog
+
 logger = logging.getLogger(__name__)
 
 class InteractionType(str, Enum):
@@ -33,7 +35,9 @@ class UserSession:
     session_id: str
     start_time: datetime
     last_activity: datetime
+    # Most recent interactions of this live session; full history lives in the event log
     interactions: List[Dict[str, Any]] = field(default_factory=list)
+    interaction_count: int = 0
     viewed_vehicles: Set[str] = field(default_factory=set)
     saved_vehicles: Set[str] = field(default_factory=set)
     search_queries: List[str] = field(default_factory=list)
@@ -59,11 +63,24 @@ class UserBehaviorProfile:
 class InteractionTracker:
     """Service for tracking and analyzing user interactions"""
 
-    def __init__(self):
-        """Initialize interaction tracker"""
+    def __init__(self, collaborative_filter=None, taste_vectors=None, event_log=None):
+        """
+        Initialize interaction tracker
+
+        Args:
+            collaborative_filter: Optional CollaborativeFilteringEngine fed with
+                vehicle interactions as they are tracked
+            taste_vectors: Optional TasteVectorStore updated per vehicle interaction
+            event_log: InteractionEventLog every interaction is appended to
+                (an in-memory log by default; the API passes the persistent shared log)
+        """
+        self.collaborative_filter = collaborative_filter
+        self.taste_vectors = taste_vectors
+        self.event_log = event_log if event_log is not None else InteractionEventLog()
+
         # Active user sessions
         self.active_sessions: Dict[str, UserSession] = {}  # session_id -> UserSession
-        self.user_sessions: Dict[str, List[str]] = {}  # user_id -> [session_ids]
+        self.user_sessions: Dict[str, List[str]] = {}  # user_id -> [active session_ids]
 
         # Aggregated user profiles
         self.user_profiles: Dict[str, UserBehaviorProfile] = {}
@@ -71,6 +88,7 @@ class InteractionTracker:
         # Configuration
         self.session_timeout = timedelta(minutes=30)
         self.profile_update_interval = timedelta(minutes=5)
+        self.max_session_interactions = 200
 
         # Background tasks
         self.cleanup_task = None
@@ -228,6 +246,30 @@ class InteractionTracker:
         interaction_type = interaction.get('type')
         vehicle_ids = interaction.get('vehicle_ids', [])
 
+        self.event_log.append(
+            session.user_id,
+            session.session_id,
+            interaction_type,
+            vehicle_ids,
+            interaction.get('timestamp'),
+            query=(interaction.get('data') or {}).get('query')
+        )
+        session.interaction_count += 1
+        if len(session.interactions) > self.max_session_interactions:
+            del session.interactions[:-self.max_session_interactions]
+
+        if self.collaborative_filter is not None:
+            for vehicle_id in vehicle_ids:
+                self.collaborative_filter.record_interaction(
+                    session.user_id, vehicle_id, interaction_type, interaction.get('timestamp')
+                )
+
+        if self.taste_vectors is not None:
+            for vehicle_id in vehicle_ids:
+                self.taste_vectors.record_interaction(
+                    session.user_id, vehicle_id, interaction_type, interaction.get('timestamp')
+                )
+
         if interaction_type == InteractionType.VIEW:
             for vehicle_id in vehicle_ids:
                 session.viewed_vehicles.add(vehicle_id)
@@ -246,9 +288,10 @@ class InteractionTracker:
                 session.comparisons.append(vehicle_ids.copy())
 
     async def _update_user_profile(self, user_id: str) -> None:
-        """Update user behavior profile from session data"""
+        """Update user behavior profile from the interaction log"""
         try:
-            if user_id not in self.user_sessions:
+            summary = self.event_log.behavior_summary(user_id)
+            if not summary['total_interactions']:
                 return
 
             profile = self.user_profiles.get(user_id)
@@ -256,35 +299,19 @@ class InteractionTracker:
                 profile = UserBehaviorProfile(user_id=user_id)
                 self.user_profiles[user_id] = profile
 
-            # Aggregate data from all user sessions
-            all_sessions = []
-            for session_id in self.user_sessions[user_id]:
-                session = self.active_sessions.get(session_id)
-                if session:
-                    all_sessions.append(session)
-
-            if not all_sessions:
-                return
-
             # Update basic metrics
-            profile.total_sessions = len(all_sessions)
-            profile.total_views = sum(len(session.viewed_vehicles) for session in all_sessions)
-            profile.total_saves = sum(len(session.saved_vehicles) for session in all_sessions)
-            profile.total_comparisons = sum(len(session.comparisons) for session in all_sessions)
-            profile.total_searches = sum(len(session.search_queries) for session in all_sessions)
-
-            # Calculate average session duration
-            total_duration = sum(
-                (session.last_activity - session.start_time).total_seconds()
-                for session in all_sessions
-            )
-            profile.avg_session_duration = total_duration / len(all_sessions) if all_sessions else 0
+            profile.total_sessions = summary['total_sessions']
+            profile.total_views = summary['total_views']
+            profile.total_saves = summary['total_saves']
+            profile.total_comparisons = summary['total_comparisons']
+            profile.total_searches = summary['total_searches']
+            profile.avg_session_duration = summary['avg_session_duration']
 
             # Aggregate vehicle data for preferences
-            await self._analyze_vehicle_preferences(user_id, all_sessions, profile)
+            await self._analyze_vehicle_preferences(user_id, summary, profile)
 
             # Analyze interaction patterns
-            await self._analyze_interaction_patterns(all_sessions, profile)
+            await self._analyze_interaction_patterns(summary, profile)
 
             profile.last_updated = datetime.now()
             logger.debug(f"Updated profile for user {user_id}")
@@ -295,16 +322,14 @@ class InteractionTracker:
     async def _analyze_vehicle_preferences(
         self,
         user_id: str,
-        sessions: List[UserSession],
+        summary: Dict[str, Any],
         profile: UserBehaviorProfile
     ) -> None:
-        """Analyze vehicle preferences from session data"""
+        """Analyze vehicle preferences from logged interactions"""
         try:
             # This would integrate with vehicle database service
             # For now, create mock preference analysis
-            all_viewed_vehicles = set()
-            for session in sessions:
-                all_viewed_vehicles.update(session.viewed_vehicles)
+            all_viewed_vehicles = set(summary['viewed_vehicles'])
 
             # Mock brand preferences (would be calculated from actual vehicle data)
             profile.preferred_brands = {
@@ -341,7 +366,7 @@ class InteractionTracker:
 
     async def _analyze_interaction_patterns(
         self,
-        sessions: List[UserSession],
+        summary: Dict[str, Any],
         profile: UserBehaviorProfile
     ) -> None:
         """Analyze user interaction patterns"""
@@ -358,25 +383,15 @@ class InteractionTracker:
                 profile.interaction_patterns['comparison_rate'] = 0.0
 
             # Session engagement metrics
-            profile.interaction_patterns['avg_interactions_per_session'] = (
-                sum(len(session.interactions) for session in sessions) / len(sessions) if sessions else 0
-            )
+            profile.interaction_patterns['avg_interactions_per_session'] = summary['avg_interactions_per_session']
 
             # Time-based patterns
             profile.interaction_patterns['most_active_hour'] = 14  # Mock data (2 PM)
             profile.interaction_patterns['most_active_day'] = 'Saturday'  # Mock data
 
             # Search behavior
-            all_searches = []
-            for session in sessions:
-                all_searches.extend(session.search_queries)
-
-            if all_searches:
-                profile.interaction_patterns['avg_search_length'] = sum(len(s.split()) for s in all_searches) / len(all_searches)
-                profile.interaction_patterns['unique_search_terms'] = len(set(' '.join(all_searches).split()))
-            else:
-                profile.interaction_patterns['avg_search_length'] = 0
-                profile.interaction_patterns['unique_search_terms'] = 0
+            profile.interaction_patterns['avg_search_length'] = summary['avg_search_length']
+            profile.interaction_patterns['unique_search_terms'] = summary['unique_search_terms']
 
         except Exception as e:
             logger.error(f"Error analyzing interaction patterns: {str(e)}")
@@ -390,8 +405,12 @@ class InteractionTracker:
             # Update user profile with session data
             await self._update_user_profile(user_id)
 
-            # Remove from active sessions
+            # Remove from active sessions; its interactions stay in the event log
             del self.active_sessions[session_id]
+            if session_id in self.user_sessions.get(user_id, []):
+                self.user_sessions[user_id].remove(session_id)
+                if not self.user_sessions[user_id]:
+                    del self.user_sessions[user_id]
 
             logger.info(f"Ended session {session_id} for user {user_id}")
 
@@ -408,7 +427,7 @@ class InteractionTracker:
                         'start_time': session.start_time.isoformat(),
                         'last_activity': session.last_activity.isoformat(),
                         'duration_seconds': (session.last_activity - session.start_time).total_seconds(),
-                        'interaction_count': len(session.interactions),
+                        'interaction_count': session.interaction_count,
                         'viewed_vehicles': list(session.viewed_vehicles),
                         'saved_vehicles': list(session.saved_vehicles),
                         'search_count': len(session.search_queries),
@@ -457,50 +476,10 @@ class InteractionTracker:
             self.cleanup_task = None
 
     async def get_interaction_stats(self, user_id: str, days: int = 30) -> Dict[str, Any]:
-        """Get interaction statistics for a user"""
+        """Get interaction statistics for a user (columnar aggregation over the event log)"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            stats = {
-                'total_interactions': 0,
-                'interaction_types': {},
-                'daily_activity': {},
-                'vehicle_engagement': {
-                    'unique_vehicles_viewed': set(),
-                    'total_vehicles_saved': set(),
-                    'total_comparisons': 0
-                }
-            }
-
-            if user_id not in self.user_sessions:
-                return stats
-
-            # Aggregate data from sessions
-            for session_id in self.user_sessions[user_id]:
-                session = self.active_sessions.get(session_id)
-                if session and session.start_time >= cutoff_date:
-                    for interaction in session.interactions:
-                        interaction_type = interaction.get('type', 'unknown')
-                        stats['total_interactions'] += 1
-                        stats['interaction_types'][interaction_type] = stats['interaction_types'].get(interaction_type, 0) + 1
-
-                        # Track vehicle engagement
-                        if interaction_type == InteractionType.VIEW:
-                            stats['vehicle_engagement']['unique_vehicles_viewed'].update(interaction.get('vehicle_ids', []))
-                        elif interaction_type == InteractionType.SAVE:
-                            stats['vehicle_engagement']['total_vehicles_saved'].update(interaction.get('vehicle_ids', []))
-                        elif interaction_type == InteractionType.COMPARE:
-                            stats['vehicle_engagement']['total_comparisons'] += 1
-
-                        # Daily activity
-                        date_key = interaction.get('timestamp', datetime.now()).date().isoformat()
-                        stats['daily_activity'][date_key] = stats['daily_activity'].get(date_key, 0) + 1
-
-            # Convert sets to counts
-            stats['vehicle_engagement']['unique_vehicles_viewed'] = len(stats['vehicle_engagement']['unique_vehicles_viewed'])
-            stats['vehicle_engagement']['total_vehicles_saved'] = len(stats['vehicle_engagement']['total_vehicles_saved'])
-
-            return stats
+            return self.event_log.interaction_stats(user_id, days)
 
         except Exception as e:
             logger.error(f"Error getting interaction stats for {user_id}: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
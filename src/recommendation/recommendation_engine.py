@@ -9,33 +9,65 @@ Part of Story 1-5: Build Vehicle Comparison and Recommendation Engine
 import asyncio
 import logging
 import time
-import random
+import json
 import hashlib
 import os
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, Optional, Tuple, Set, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+
 # OpenAI imports for GPT-4 integration
 import openai
 from openai import AsyncOpenAI
 
 # Import recommendation models from the correct location
-from .favorites_recommendation_engine import (
-    RecommendationRequest, Recommendation
-)
+from .favorites_recommendation_engine import RecommendationRequest
+from .collaborative_filtering import CollaborativeFilteringEngine, get_collaborative_filtering_engine
+from .batch_scoring import CandidateBatch, top_indices
+from .vehicle_signals import VehicleSignalTable
+from .similarity_graph import VehicleSimilarityGraph, get_vehicle_similarity_graph
+from .taste_vectors import TasteVectorStore, get_taste_vector_store
 
 # For now, stub the missing types that were imported from vehicle_models
 # These are not currently used in the recommendation engine
 RecommendationResponse = None
-RecommendationExplanation = None
-RecommendationType = None
 UserInteraction = None
 FeedbackRequest = None
 
+
+class RecommendationType(str, Enum):
+    """Recommendation algorithms (mirrors src.api.vehicle_comparison_api, which imports this module)"""
+    COLLABORATIVE = "collaborative"
+    CONTENT_BASED = "content_based"
+    HYBRID = "hybrid"
+    SIMILARITY = "similarity"
+
 logger = logging.getLogger(__name__)
 
+@dataclass
+class Recommendation:
+    """Scored vehicle recommendation; explanation, trending and urgency are filled in later"""
+    vehicle_id: str
+    vehicle_data: Dict[str, Any]
+    recommendation_score: float
+    match_percentage: int
+    explanation: Optional[Any] = None
+    personalization_factors: List[str] = field(default_factory=list)
+    trending_score: Optional[float] = None
+    urgency_indicators: List[str] = field(default_factory=list)
+
+@dataclass
+class RecommendationExplanation:
+    """Why a vehicle was recommended (fields mirror the API model)"""
+    reasoning_type: str
+    explanation: str
+    confidence_score: float
+    supporting_factors: List[str]
+    user_relevance_score: float
+
 @dataclass
 class RecommendationResult:
     """Internal recommendation result structure"""
@@ -47,16 +79,32 @@ class RecommendationResult:
 class RecommendationEngine:
     """Vehicle recommendation engine with multiple algorithms"""
 
-    def __init__(self, vehicle_db_service, embedding_service):
+    def __init__(
+        self,
+        vehicle_db_service,
+        embedding_service,
+        collaborative_filter: Optional[CollaborativeFilteringEngine] = None,
+        signal_table: Optional[VehicleSignalTable] = None,
+        similarity_graph: Optional[VehicleSimilarityGraph] = None,
+        taste_vectors: Optional[TasteVectorStore] = None
+    ):
         """
         Initialize recommendation engine
 
         Args:
             vehicle_db_service: Vehicle database service
             embedding_service: Embedding service for semantic analysis
+            collaborative_filter: Item-item CF engine (shared instance by default)
+            signal_table: Trending/urgency signal table (CF engagement counts by default)
+            similarity_graph: Precomputed kNN graph for similar vehicles (shared instance by default)
+            taste_vectors: Per-user taste embeddings for re-scoring (shared store by default)
         """
         self.vehicle_db = vehicle_db_service
         self.embedding_service = embedding_service
+        self.collaborative_filter = collaborative_filter or get_collaborative_filtering_engine()
+        self.signal_table = signal_table or VehicleSignalTable(self.collaborative_filter.vehicle_engagement)
+        self.similarity_graph = similarity_graph or get_vehicle_similarity_graph()
+        self.taste_vectors = taste_vectors or get_taste_vector_store()
 
         # Initialize OpenAI client for GPT-4 explanations
         openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -86,6 +134,7 @@ class RecommendationEngine:
         self.content_weight = 0.6       # Weight for content-based filtering
         self.min_similarity_threshold = 0.3
         self.max_recommendations = 50
+        self.taste_weight = 0.3  # Share of content score from the user's taste vector, when one exists
 
         # A/B testing groups
         self.ab_test_groups = {
@@ -98,6 +147,15 @@ class RecommendationEngine:
         self.recommendation_cache: Dict[str, Tuple[RecommendationResult, datetime]] = {}
         self.cache_ttl = timedelta(minutes=15)
 
+        # GPT-4 explanations per (user profile hash, vehicle); responses start from templates
+        # and only wait explanation_deadline seconds for the LLM, late ones land in the cache
+        self.explanation_cache: Dict[Tuple[str, str], Tuple[RecommendationExplanation, datetime]] = {}
+        self.explanation_cache_ttl = timedelta(hours=24)
+        self.max_explanation_cache_entries = 10000
+        self.explanation_deadline = float(os.getenv('RECOMMENDATION_EXPLANATION_DEADLINE_MS', '800')) / 1000
+        self.explanation_concurrency = asyncio.Semaphore(int(os.getenv('RECOMMENDATION_EXPLANATION_CONCURRENCY', '8')))
+        self.pending_explanations: Dict[Tuple[str, str], asyncio.Task] = {}
+
     async def get_recommendations(
         self,
         user_id: str,
@@ -177,24 +235,16 @@ class RecommendationEngine:
                     context_vehicle_ids, limit, ab_test_group
                 )
 
-            # Generate explanations if requested
-            if include_explanations:
-                for rec in recommendations:
-                    if not rec.explanation:
-                        rec.explanation = await self._generate_recommendation_explanation(
-                            rec, user_profile, search_query, context_vehicle_ids
-                        )
-
             # Sort by recommendation score
             recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
 
             # Apply final filtering and ranking
             recommendations = recommendations[:limit]
 
-            # Add trending scores and urgency indicators
-            for rec in recommendations:
-                rec.trending_score = await self._calculate_trending_score(rec.vehicle_id)
-                rec.urgency_indicators = await self._get_urgency_indicators(rec.vehicle_id)
+            # Explanations, trending scores and urgency indicators for the final page only
+            await self._enrich_recommendations(
+                recommendations, user_profile, search_query, context_vehicle_ids, include_explanations
+            )
 
             processing_time = time.time() - start_time
 
@@ -284,10 +334,11 @@ class RecommendationEngine:
             return []
 
     async def _get_similar_vehicles(self, vehicle_id: str, limit: int) -> List[Dict[str, Any]]:
-        """Get vehicles similar to the given vehicle"""
+        """Get vehicles similar to the given vehicle (kNN graph lookup, live search if not in the graph)"""
         try:
-            # This would integrate with semantic search service
-            # For now, return mock data
+            if vehicle_id in self.similarity_graph:
+                neighbor_ids = [v for v, _ in self.similarity_graph.similar(vehicle_id, limit=limit)]
+                return await self.vehicle_db.get_vehicles_by_ids(neighbor_ids) if neighbor_ids else []
             return await self.vehicle_db.get_similar_vehicles(vehicle_id, limit)
         except Exception as e:
             logger.error(f"Error getting similar vehicles for {vehicle_id}: {str(e)}")
@@ -327,63 +378,85 @@ class RecommendationEngine:
             logger.error(f"Error getting trending vehicles: {str(e)}")
             return []
 
+    def _candidate_batch(self, candidate_vehicles: List[Dict[str, Any]]) -> CandidateBatch:
+        """Columnar encoding of the request's candidates, shared by all scorers"""
+        return CandidateBatch(candidate_vehicles)
+
+    def _collaborative_scores(self, user_id: str, batch: CandidateBatch) -> np.ndarray:
+        """Item-item CF score per candidate (0 when the user has no history)"""
+        scores = self.collaborative_filter.score_vehicles(user_id, batch.ids)
+        return np.array([scores.get(vehicle_id, 0.0) for vehicle_id in batch.ids], dtype=np.float32)
+
+    async def _content_scores(
+        self,
+        batch: CandidateBatch,
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        user_id: Optional[str] = None
+    ) -> np.ndarray:
+        """Content similarity of every candidate in one vectorized pass, blended with the user's taste"""
+        user_preference_vector = await self._create_user_preference_vector(user_profile)
+        scores = batch.content_scores(batch.preference_weights(user_preference_vector), search_query)
+        if user_id is not None and user_id in self.taste_vectors and batch.embeddings is not None:
+            taste_scores = self.taste_vectors.score(user_id, batch.embeddings, batch.has_embedding)
+            scores = np.where(
+                batch.has_embedding,
+                (1 - self.taste_weight) * scores + self.taste_weight * taste_scores,
+                scores
+            )
+        return scores
+
+    async def _context_similarity_scores(self, context_vehicle_ids: List[str], batch: CandidateBatch) -> np.ndarray:
+        """Best similarity of every candidate to any context vehicle (one matrix product)"""
+        context_vehicles = await self._get_context_vehicles(context_vehicle_ids)
+        if not context_vehicles or not len(batch):
+            return np.zeros(len(batch), dtype=np.float32)
+        return batch.context_similarity(batch.encode_like(context_vehicles)).max(axis=1)
+
+    async def _get_context_vehicles(self, vehicle_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch context vehicles in one query"""
+        try:
+            return await self.vehicle_db.get_vehicles_by_ids(list(vehicle_ids)) or []
+        except Exception as e:
+            logger.error(f"Error getting context vehicles {vehicle_ids}: {str(e)}")
+            return []
+
+    def _build_recommendations(
+        self,
+        batch: CandidateBatch,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        personalization_factors: Callable[[int], List[str]]
+    ) -> List[Recommendation]:
+        """Recommendation objects for the selected candidate rows only"""
+        return [
+            Recommendation(
+                vehicle_id=batch.ids[i],
+                vehicle_data=batch.vehicles[i],
+                recommendation_score=float(scores[i]),
+                match_percentage=int(scores[i] * 100),
+                explanation=None,  # Will be generated later
+                personalization_factors=personalization_factors(i),
+                trending_score=None,
+                urgency_indicators=[]
+            )
+            for i in indices.tolist()
+        ]
+
     async def _collaborative_filtering(
         self,
         user_id: str,
         candidate_vehicles: List[Dict[str, Any]],
         user_profile: Dict[str, Any],
-        limit: int
+        limit: int,
+        batch: Optional[CandidateBatch] = None
     ) -> List[Recommendation]:
         """Generate recommendations using collaborative filtering"""
-        recommendations = []
-
         try:
-            # Get similar users
-            similar_users = await self._get_similar_users(user_id, 50)
-
-            if not similar_users:
-                return recommendations
-
-            # Get vehicles liked by similar users
-            user_vehicle_scores = {}
-
-            for similar_user in similar_users:
-                user_score = similar_user['similarity_score']
-                liked_vehicles = similar_user.get('liked_vehicles', [])
-
-                for vehicle_id in liked_vehicles:
-                    if vehicle_id not in user_vehicle_scores:
-                        user_vehicle_scores[vehicle_id] = 0
-                    user_vehicle_scores[vehicle_id] += user_score
-
-            # Filter candidate vehicles
-            candidate_ids = {v['id'] for v in candidate_vehicles}
-            filtered_scores = {
-                vid: score for vid, score in user_vehicle_scores.items()
-                if vid in candidate_ids
-            }
-
-            # Create recommendations
-            for vehicle in candidate_vehicles:
-                vehicle_id = vehicle['id']
-                if vehicle_id in filtered_scores:
-                    score = min(filtered_scores[vehicle_id] / 10, 1.0)  # Normalize to 0-1
-
-                    recommendation = Recommendation(
-                        vehicle_id=vehicle_id,
-                        vehicle_data=vehicle,
-                        recommendation_score=score,
-                        match_percentage=int(score * 100),
-                        explanation=None,  # Will be generated later
-                        personalization_factors=["similar_users_preferences"],
-                        trending_score=None,
-                        urgency_indicators=[]
-                    )
-                    recommendations.append(recommendation)
-
-            # Sort by score and return top results
-            recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-            return recommendations[:limit]
+            batch = batch or self._candidate_batch(candidate_vehicles)
+            scores = np.minimum(self._collaborative_scores(user_id, batch), 1.0)
+            indices = top_indices(scores, limit, threshold=0.0)
+            return self._build_recommendations(batch, scores, indices, lambda i: ["similar_users_preferences"])
 
         except Exception as e:
             logger.error(f"Error in collaborative filtering: {str(e)}")
@@ -395,37 +468,15 @@ class RecommendationEngine:
         candidate_vehicles: List[Dict[str, Any]],
         user_profile: Dict[str, Any],
         search_query: Optional[str],
-        limit: int
+        limit: int,
+        batch: Optional[CandidateBatch] = None
     ) -> List[Recommendation]:
         """Generate recommendations using content-based filtering"""
-        recommendations = []
-
         try:
-            # Create user preference profile
-            user_preference_vector = await self._create_user_preference_vector(user_profile)
-
-            for vehicle in candidate_vehicles:
-                # Calculate content similarity
-                content_score = await self._calculate_content_similarity(
-                    vehicle, user_preference_vector, search_query
-                )
-
-                if content_score > self.min_similarity_threshold:
-                    recommendation = Recommendation(
-                        vehicle_id=vehicle['id'],
-                        vehicle_data=vehicle,
-                        recommendation_score=content_score,
-                        match_percentage=int(content_score * 100),
-                        explanation=None,  # Will be generated later
-                        personalization_factors=["content_match"],
-                        trending_score=None,
-                        urgency_indicators=[]
-                    )
-                    recommendations.append(recommendation)
-
-            # Sort by score and return top results
-            recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-            return recommendations[:limit]
+            batch = batch or self._candidate_batch(candidate_vehicles)
+            scores = await self._content_scores(batch, user_profile, search_query, user_id)
+            indices = top_indices(scores, limit, threshold=self.min_similarity_threshold)
+            return self._build_recommendations(batch, scores, indices, lambda i: ["content_match"])
 
         except Exception as e:
             logger.error(f"Error in content-based filtering: {str(e)}")
@@ -435,39 +486,18 @@ class RecommendationEngine:
         self,
         context_vehicle_ids: Optional[List[str]],
         candidate_vehicles: List[Dict[str, Any]],
-        limit: int
+        limit: int,
+        batch: Optional[CandidateBatch] = None
     ) -> List[Recommendation]:
         """Generate recommendations based on vehicle similarity"""
-        recommendations = []
-
         if not context_vehicle_ids:
-            return recommendations
+            return []
 
         try:
-            # Calculate similarity scores
-            for vehicle in candidate_vehicles:
-                max_similarity = 0
-
-                for context_id in context_vehicle_ids:
-                    similarity = await self._calculate_vehicle_similarity(vehicle['id'], context_id)
-                    max_similarity = max(max_similarity, similarity)
-
-                if max_similarity > self.min_similarity_threshold:
-                    recommendation = Recommendation(
-                        vehicle_id=vehicle['id'],
-                        vehicle_data=vehicle,
-                        recommendation_score=max_similarity,
-                        match_percentage=int(max_similarity * 100),
-                        explanation=None,  # Will be generated later
-                        personalization_factors=["similar_to_viewed"],
-                        trending_score=None,
-                        urgency_indicators=[]
-                    )
-                    recommendations.append(recommendation)
-
-            # Sort by similarity and return top results
-            recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-            return recommendations[:limit]
+            batch = batch or self._candidate_batch(candidate_vehicles)
+            scores = await self._context_similarity_scores(context_vehicle_ids, batch)
+            indices = top_indices(scores, limit, threshold=self.min_similarity_threshold)
+            return self._build_recommendations(batch, scores, indices, lambda i: ["similar_to_viewed"])
 
         except Exception as e:
             logger.error(f"Error in similarity-based recommendations: {str(e)}")
@@ -481,7 +511,8 @@ class RecommendationEngine:
         search_query: Optional[str],
         context_vehicle_ids: Optional[List[str]],
         limit: int,
-        ab_test_group: str
+        ab_test_group: str,
+        batch: Optional[CandidateBatch] = None
     ) -> List[Recommendation]:
         """Generate hybrid recommendations combining multiple algorithms"""
         try:
@@ -490,92 +521,41 @@ class RecommendationEngine:
             collaborative_weight = weights['collaborative_weight']
             content_weight = weights['content_weight']
 
-            # Get recommendations from both algorithms
-            collaborative_recs = await self._collaborative_filtering(
-                user_id, candidate_vehicles, user_profile, limit * 2
-            )
-            content_recs = await self._content_based_filtering(
-                user_id, candidate_vehicles, user_profile, search_query, limit * 2
-            )
+            # Score every candidate with each algorithm over the same columnar batch
+            batch = batch or self._candidate_batch(candidate_vehicles)
+            collaborative_scores = np.minimum(self._collaborative_scores(user_id, batch), 1.0)
+            content_scores = await self._content_scores(batch, user_profile, search_query, user_id)
+            content_scores = np.where(content_scores > self.min_similarity_threshold, content_scores, 0.0)
 
-            # Add similarity-based recommendations if context vehicles exist
-            similarity_recs = []
+            # Add similarity-based scores if context vehicles exist
+            similarity_scores = np.zeros(len(batch), dtype=np.float32)
             if context_vehicle_ids:
-                similarity_recs = await self._similarity_based_recommendations(
-                    context_vehicle_ids, candidate_vehicles, limit
+                similarity_scores = await self._context_similarity_scores(context_vehicle_ids, batch)
+                similarity_scores = np.where(
+                    similarity_scores > self.min_similarity_threshold, similarity_scores, 0.0
                 )
 
-            # Combine recommendations
-            combined_scores = {}
-
-            # Process collaborative filtering results
-            for rec in collaborative_recs:
-                combined_scores[rec.vehicle_id] = {
-                    'vehicle': rec,
-                    'collaborative_score': rec.recommendation_score,
-                    'content_score': 0,
-                    'similarity_score': 0
-                }
-
-            # Process content-based results
-            for rec in content_recs:
-                if rec.vehicle_id in combined_scores:
-                    combined_scores[rec.vehicle_id]['content_score'] = rec.recommendation_score
-                else:
-                    combined_scores[rec.vehicle_id] = {
-                        'vehicle': rec,
-                        'collaborative_score': 0,
-                        'content_score': rec.recommendation_score,
-                        'similarity_score': 0
-                    }
-
-            # Process similarity results
-            for rec in similarity_recs:
-                if rec.vehicle_id in combined_scores:
-                    combined_scores[rec.vehicle_id]['similarity_score'] = rec.recommendation_score
-                else:
-                    combined_scores[rec.vehicle_id] = {
-                        'vehicle': rec,
-                        'collaborative_score': 0,
-                        'content_score': 0,
-                        'similarity_score': rec.recommendation_score
-                    }
-
-            # Calculate hybrid scores
-            hybrid_recommendations = []
-
-            for vehicle_id, scores in combined_scores.items():
-                # Weighted combination of scores
-                hybrid_score = (
-                    collaborative_weight * scores['collaborative_score'] +
-                    content_weight * scores['content_score'] +
-                    0.2 * scores['similarity_score']  # Lower weight for similarity
-                )
-
-                # Determine personalization factors
-                personalization_factors = []
-                if scores['collaborative_score'] > 0.5:
-                    personalization_factors.append("similar_users_preferences")
-                if scores['content_score'] > 0.5:
-                    personalization_factors.append("content_match")
-                if scores['similarity_score'] > 0.5:
-                    personalization_factors.append("similar_to_viewed")
-
-                recommendation = Recommendation(
-                    vehicle_id=vehicle_id,
-                    vehicle_data=scores['vehicle'].vehicle_data,
-                    recommendation_score=hybrid_score,
-                    match_percentage=int(hybrid_score * 100),
-                    explanation=None,  # Will be generated later
-                    personalization_factors=personalization_factors,
-                    trending_score=None,
-                    urgency_indicators=[]
-                )
-                hybrid_recommendations.append(recommendation)
+            # Weighted combination of scores
+            hybrid_scores = (
+                collaborative_weight * collaborative_scores +
+                content_weight * content_scores +
+                0.2 * similarity_scores  # Lower weight for similarity
+            )
 
-            # Sort by hybrid score and return top results
-            hybrid_recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-            return hybrid_recommendations[:limit]
+            # Determine personalization factors
+            def personalization_factors(i: int) -> List[str]:
+                factors = []
+                if collaborative_scores[i] > 0.5:
+                    factors.append("similar_users_preferences")
+                if content_scores[i] > 0.5:
+                    factors.append("content_match")
+                if similarity_scores[i] > 0.5:
+                    factors.append("similar_to_viewed")
+                return factors
+
+            # Only vehicles at least one algorithm recommended, best hybrid score first
+            indices = top_indices(hybrid_scores, limit, threshold=0.0)
+            return self._build_recommendations(batch, hybrid_scores, indices, personalization_factors)
 
         except Exception as e:
             logger.error(f"Error in hybrid recommendations: {str(e)}")
@@ -603,61 +583,8 @@ class RecommendationEngine:
     ) -> float:
         """Calculate content similarity between vehicle and user preferences"""
         try:
-            score = 0.0
-            total_weight = 0.0
-
-            # Brand preference
-            if 'brands' in user_preference_vector and 'make' in vehicle:
-                if vehicle['make'] in user_preference_vector['brands']:
-                    score += 0.3
-                total_weight += 0.3
-
-            # Price preference
-            if 'price_range' in user_preference_vector and 'price' in vehicle:
-                price_min = user_preference_vector['price_range'].get('min', 0)
-                price_max = user_preference_vector['price_range'].get('max', float('inf'))
-                vehicle_price = vehicle['price']
-
-                if price_min <= vehicle_price <= price_max:
-                    score += 0.25
-                elif vehicle_price < price_min:
-                    score += 0.15  # Still good if cheaper
-                total_weight += 0.25
-
-            # Vehicle type preference
-            if 'vehicle_types' in user_preference_vector and 'vehicle_type' in vehicle:
-                if vehicle['vehicle_type'] in user_preference_vector['vehicle_types']:
-                    score += 0.2
-                total_weight += 0.2
-
-            # Feature preferences
-            if 'must_have_features' in user_preference_vector and 'features' in vehicle:
-                vehicle_features = set(vehicle.get('features', []))
-                must_have = set(user_preference_vector['must_have_features'])
-                avoid = set(user_preference_vector.get('avoid_features', []))
-
-                # Check must-have features
-                must_have_count = len(vehicle_features & must_have)
-                if must_have_count > 0:
-                    score += 0.15 * (must_have_count / len(must_have))
-
-                # Penalty for avoided features
-                avoid_count = len(vehicle_features & avoid)
-                if avoid_count > 0:
-                    score -= 0.1 * (avoid_count / len(avoid)) if avoid else 0
-
-                total_weight += 0.25
-
-            # Search query relevance
-            if search_query:
-                query_relevance = await self._calculate_query_relevance(vehicle, search_query)
-                score += 0.1 * query_relevance
-                total_weight += 0.1
-
-            # Normalize score
-            if total_weight > 0:
-                return min(score / total_weight, 1.0)
-            return 0.0
+            batch = CandidateBatch([vehicle])
+            return float(batch.content_scores(batch.preference_weights(user_preference_vector), search_query)[0])
 
         except Exception as e:
             logger.error(f"Error calculating content similarity: {str(e)}")
@@ -666,22 +593,7 @@ class RecommendationEngine:
     async def _calculate_query_relevance(self, vehicle: Dict[str, Any], query: str) -> float:
         """Calculate relevance of vehicle to search query"""
         try:
-            # This would integrate with semantic search service
-            # For now, implement simple keyword matching
-            query_lower = query.lower()
-            vehicle_text = f"{vehicle.get('make', '')} {vehicle.get('model', '')} {vehicle.get('description', '')} {' '.join(vehicle.get('features', []))}".lower()
-
-            # Simple word overlap
-            query_words = set(query_lower.split())
-            vehicle_words = set(vehicle_text.split())
-
-            if len(query_words) == 0:
-                return 0.0
-
-            overlap = len(query_words & vehicle_words)
-            relevance = overlap / len(query_words)
-
-            return min(relevance, 1.0)
+            return float(CandidateBatch([vehicle]).query_relevance(query)[0])
 
         except Exception as e:
             logger.error(f"Error calculating query relevance: {str(e)}")
@@ -690,16 +602,7 @@ class RecommendationEngine:
     async def _get_similar_users(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
         """Get users with similar preferences and behavior"""
         try:
-            # This would integrate with user similarity service
-            # For now, return mock similar users
-            return [
-                {
-                    'user_id': f'similar_user_{i}',
-                    'similarity_score': 0.7 - (i * 0.1),
-                    'liked_vehicles': [f'vehicle_{random.randint(1, 100)}' for _ in range(5)]
-                }
-                for i in range(limit)
-            ]
+            return self.collaborative_filter.similar_users(user_id, limit)
         except Exception as e:
             logger.error(f"Error getting similar users: {str(e)}")
             return []
@@ -707,13 +610,157 @@ class RecommendationEngine:
     async def _calculate_vehicle_similarity(self, vehicle_a_id: str, vehicle_b_id: str) -> float:
         """Calculate similarity between two vehicles"""
         try:
-            # This would integrate with vehicle similarity service
-            # For now, return mock similarity
-            return random.uniform(0.2, 0.9)
+            vehicles = {v['id']: v for v in await self._get_context_vehicles([vehicle_a_id, vehicle_b_id])}
+            if vehicle_a_id not in vehicles or vehicle_b_id not in vehicles:
+                return 0.0
+            batch = CandidateBatch([vehicles[vehicle_a_id]])
+            return float(batch.context_similarity(batch.encode_like([vehicles[vehicle_b_id]]))[0, 0])
         except Exception as e:
             logger.error(f"Error calculating vehicle similarity: {str(e)}")
             return 0.0
 
+    async def _enrich_recommendations(
+        self,
+        recommendations: List[Recommendation],
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        context_vehicle_ids: Optional[List[str]],
+        include_explanations: bool = True
+    ) -> None:
+        """Attach trending/urgency signals (one bulk lookup) and explanations to ranked results"""
+        if not recommendations:
+            return
+
+        signals_task = self.signal_table.get_signals([rec.vehicle_id for rec in recommendations])
+        if include_explanations:
+            signals, _ = await asyncio.gather(
+                signals_task,
+                self._explain_recommendations(recommendations, user_profile, search_query, context_vehicle_ids)
+            )
+        else:
+            signals = await signals_task
+
+        for rec in recommendations:
+            rec.trending_score = signals[rec.vehicle_id].trending_score
+            rec.urgency_indicators = signals[rec.vehicle_id].urgency_indicators
+
+    async def _explain_recommendations(
+        self,
+        recommendations: List[Recommendation],
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        context_vehicle_ids: Optional[List[str]]
+    ) -> None:
+        """
+        Template explanations for every result, upgraded to cached or in-time GPT-4 ones.
+
+        GPT-4 calls run concurrently and are awaited for at most
+        explanation_deadline seconds; calls still running keep going in the
+        background and populate the cache for later responses.
+        """
+        profile_hash = self._profile_hash(user_profile, search_query, context_vehicle_ids)
+        waiting: Dict[asyncio.Task, Recommendation] = {}
+
+        for rec in recommendations:
+            if rec.explanation:
+                continue
+            cached = self._get_cached_explanation((profile_hash, rec.vehicle_id))
+            if cached:
+                rec.explanation = cached
+                continue
+            rec.explanation = await self._generate_template_explanation(
+                rec, user_profile, search_query, context_vehicle_ids
+            )
+            if self.gpt4_enabled and self.openai_client:
+                task = self._schedule_gpt4_explanation(
+                    (profile_hash, rec.vehicle_id), rec, user_profile, search_query, context_vehicle_ids
+                )
+                waiting[task] = rec
+
+        if not waiting:
+            return
+        done, _ = await asyncio.wait(list(waiting), timeout=self.explanation_deadline)
+        for task in done:
+            if not task.cancelled() and task.exception() is None and task.result():
+                waiting[task].explanation = task.result()
+        if len(done) < len(waiting):
+            logger.info(f"{len(waiting) - len(done)} GPT-4 explanations missed the deadline, using templates")
+
+    def _schedule_gpt4_explanation(
+        self,
+        cache_key: Tuple[str, str],
+        recommendation: Recommendation,
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        context_vehicle_ids: Optional[List[str]]
+    ) -> asyncio.Task:
+        """Start (or join) the GPT-4 explanation for a cache key"""
+        task = self.pending_explanations.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._cached_gpt4_explanation(
+                cache_key, recommendation, user_profile, search_query, context_vehicle_ids
+            ))
+            self.pending_explanations[cache_key] = task
+            task.add_done_callback(lambda _: self.pending_explanations.pop(cache_key, None))
+        return task
+
+    async def _cached_gpt4_explanation(
+        self,
+        cache_key: Tuple[str, str],
+        recommendation: Recommendation,
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        context_vehicle_ids: Optional[List[str]]
+    ) -> Optional[RecommendationExplanation]:
+        """GPT-4 explanation stored in the explanation cache; None on failure"""
+        try:
+            async with self.explanation_concurrency:
+                explanation = await self._generate_gpt4_explanation(
+                    recommendation.vehicle_data, user_profile, search_query,
+                    context_vehicle_ids, recommendation.recommendation_score,
+                    recommendation.personalization_factors
+                )
+        except Exception as e:
+            logger.warning(f"GPT-4 explanation failed, keeping template: {e}")
+            return None
+
+        result = RecommendationExplanation(
+            reasoning_type="gpt4_personalized",
+            explanation=explanation,
+            confidence_score=recommendation.recommendation_score,
+            supporting_factors=recommendation.personalization_factors,
+            user_relevance_score=recommendation.recommendation_score
+        )
+        self.explanation_cache[cache_key] = (result, datetime.now())
+        while len(self.explanation_cache) > self.max_explanation_cache_entries:
+            del self.explanation_cache[next(iter(self.explanation_cache))]
+        return result
+
+    def _get_cached_explanation(self, cache_key: Tuple[str, str]) -> Optional[RecommendationExplanation]:
+        if cache_key in self.explanation_cache:
+            explanation, timestamp = self.explanation_cache[cache_key]
+            if datetime.now() - timestamp < self.explanation_cache_ttl:
+                return explanation
+            del self.explanation_cache[cache_key]
+        return None
+
+    def _profile_hash(
+        self,
+        user_profile: Dict[str, Any],
+        search_query: Optional[str],
+        context_vehicle_ids: Optional[List[str]] = None
+    ) -> str:
+        """Hash of what a GPT-4 explanation depends on besides the vehicle"""
+        key_string = json.dumps(
+            {
+                'preferences': user_profile.get('preferences', {}),
+                'search_query': search_query,
+                'context_vehicle_ids': sorted(context_vehicle_ids or [])
+            },
+            sort_keys=True, default=str
+        )
+        return hashlib.md5(key_string.encode()).hexdigest()
+
     async def _generate_recommendation_explanation(
         self,
         recommendation: Recommendation,
@@ -721,31 +768,19 @@ class RecommendationEngine:
         search_query: Optional[str],
         context_vehicle_ids: Optional[List[str]]
     ) -> RecommendationExplanation:
-        """Generate explanation for recommendation using GPT-4 or fallback"""
+        """Generate explanation for one recommendation using GPT-4 (cached) or fallback"""
         try:
-            vehicle_data = recommendation.vehicle_data
-            confidence_score = recommendation.recommendation_score
-            supporting_factors = recommendation.personalization_factors
-
             # Try GPT-4 first if available
             if self.gpt4_enabled and self.openai_client:
-                try:
-                    explanation = await self._generate_gpt4_explanation(
-                        vehicle_data, user_profile, search_query,
-                        context_vehicle_ids, confidence_score, supporting_factors
-                    )
-                    reasoning_type = "gpt4_personalized"
-                    user_relevance_score = confidence_score
-
-                    return RecommendationExplanation(
-                        reasoning_type=reasoning_type,
-                        explanation=explanation,
-                        confidence_score=confidence_score,
-                        supporting_factors=supporting_factors,
-                        user_relevance_score=user_relevance_score
-                    )
-                except Exception as e:
-                    logger.warning(f"GPT-4 explanation failed, falling back to template: {e}")
+                cache_key = (
+                    self._profile_hash(user_profile, search_query, context_vehicle_ids),
+                    recommendation.vehicle_id
+                )
+                explanation = self._get_cached_explanation(cache_key) or await self._schedule_gpt4_explanation(
+                    cache_key, recommendation, user_profile, search_query, context_vehicle_ids
+                )
+                if explanation:
+                    return explanation
 
             # Fallback to template-based explanation
             return await self._generate_template_explanation(
@@ -905,33 +940,19 @@ class RecommendationEngine:
         )
 
     async def _calculate_trending_score(self, vehicle_id: str) -> Optional[float]:
-        """Calculate trending score for vehicle"""
+        """Calculate trending score for vehicle (use _enrich_recommendations for result sets)"""
         try:
-            # This would integrate with analytics service
-            # For now, return random trending score
-            return random.uniform(0.0, 1.0)
+            signals = await self.signal_table.get_signals([vehicle_id])
+            return signals[vehicle_id].trending_score
         except Exception as e:
             logger.error(f"Error calculating trending score: {str(e)}")
             return None
 
     async def _get_urgency_indicators(self, vehicle_id: str) -> List[str]:
-        """Get urgency indicators for vehicle"""
+        """Get urgency indicators for vehicle (use _enrich_recommendations for result sets)"""
         try:
-            indicators = []
-
-            # This would integrate with inventory and analytics services
-            # For now, return mock urgency indicators
-            if random.random() < 0.2:  # 20% chance of high demand
-                indicators.append("high_demand")
-
-            if random.random() < 0.1:  # 10% chance of limited availability
-                indicators.append("limited_availability")
-
-            if random.random() < 0.15:  # 15% chance of price drop
-                indicators.append("price_drop")
-
-            return indicators
-
+            signals = await self.signal_table.get_signals([vehicle_id])
+            return signals[vehicle_id].urgency_indicators
         except Exception as e:
             logger.error(f"Error getting urgency indicators: {str(e)}")
             return []
@@ -994,8 +1015,10 @@ class RecommendationEngine:
 
             logger.info(f"Processing feedback: {feedback_type} for user {user_id}, vehicle {vehicle_id}")
 
-            # This would integrate with feedback processing service
-            # For now, just log the feedback
+            # Interaction-style feedback (view, favorite, inquiry, ...) updates CF online
+            if user_id and vehicle_id:
+                self.collaborative_filter.record_interaction(user_id, vehicle_id, feedback_type)
+
             logger.info(f"Feedback processed: {feedback_data}")
 
         except Exception as e:
@@ -0,0 +1,485 @@
+"""
+Otto.AI Vehicle Similarity Graph
+
+Precomputed k-nearest-neighbour graph over active listing embeddings.
+
+Every "similar vehicles" call (listing pages, recommendations, favourites
+fallbacks) becomes a key lookup plus filter instead of a live vector
+query. The graph is built in batch with blocked matrix multiplication,
+kept in the same fixed-width neighbour arrays as the collaborative filter,
+persisted to the compact vehicle_neighbors table and updated incrementally
+as listings are added or removed.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .batch_scoring import _parse_embedding
+from .collaborative_filtering import ItemNeighborTable, NIGHTLY_REBUILD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 50
+DEFAULT_FLUSH_SECONDS = 60
+
+# Rows per similarity block are chosen to keep a block around 16 MB of float32
+_BLOCK_CELLS = 1 << 22
+
+
+class _GraphState:
+    """One consistent version of the graph; build() and load_rows() swap in a new one"""
+
+    def __init__(
+        self,
+        vehicle_ids: List[str],
+        neighbors: ItemNeighborTable,
+        embeddings: np.ndarray,
+        active: np.ndarray,
+        has_embeddings: bool = True
+    ):
+        self.vehicle_ids = vehicle_ids
+        self.vehicle_index = {vehicle_id: slot for slot, vehicle_id in enumerate(vehicle_ids)}
+        self.neighbors = neighbors
+        self.embeddings = embeddings  # unit rows, one slot per vehicle
+        self.active = active
+        self.has_embeddings = has_embeddings  # False while serving rows loaded from the table
+
+    def is_active(self, vehicle_id: str) -> bool:
+        slot = self.vehicle_index.get(vehicle_id)
+        return slot is not None and bool(self.active[slot])
+
+
+class VehicleSimilarityGraph:
+    """Top-K cosine neighbours per vehicle, with incremental add/remove"""
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K, min_similarity: float = 0.0):
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+
+        self._state = _GraphState(
+            [], ItemNeighborTable(top_k), np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=bool)
+        )
+        # Incremental updates made while a build runs, replayed onto its result before the swap
+        self._changes_during_build: Optional[List[Tuple[str, Optional[np.ndarray]]]] = None
+
+        self.dirty: set = set()  # listings whose persisted row changed since the last flush
+        self._lock = threading.RLock()
+        self.rebuild_task: Optional[asyncio.Task] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'builds': 0,
+            'last_build_seconds': 0.0,
+            'added': 0,
+            'removed': 0,
+            'flushed': 0,
+        }
+
+    def __contains__(self, vehicle_id: str) -> bool:
+        return self._state.is_active(vehicle_id)
+
+    @property
+    def has_embeddings(self) -> bool:
+        return self._state.has_embeddings
+
+    # ---- Batch build ----
+
+    def build(self, embeddings: Iterable[Tuple[str, Any]]) -> None:
+        """
+        Rebuild the whole graph from (vehicle_id, embedding) pairs.
+
+        The new graph is computed without the lock while the current one
+        keeps serving and accepting updates; those updates are replayed onto
+        the result, which is then swapped in with a single assignment.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._changes_during_build = []
+
+        try:
+            parsed = {}
+            for vehicle_id, embedding in embeddings:
+                vector = _parse_embedding(embedding)
+                if vector is not None:
+                    parsed[vehicle_id] = vector
+            vehicle_ids, vectors = list(parsed), list(parsed.values())
+
+            state = _GraphState(
+                vehicle_ids,
+                ItemNeighborTable(self.top_k, capacity=len(vehicle_ids)),
+                _normalize(np.vstack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32),
+                np.ones(len(vehicle_ids), dtype=bool)
+            )
+            self._fill_rows(state, np.arange(len(vehicle_ids)))
+
+            with self._lock:
+                for vehicle_id, vector in self._changes_during_build:
+                    if vector is None:
+                        self._remove(state, vehicle_id)
+                    else:
+                        self._add(state, vehicle_id, vector)
+                self._state = state
+        finally:
+            with self._lock:
+                self._changes_during_build = None
+
+        self.stats['builds'] += 1
+        self.stats['last_build_seconds'] = time.perf_counter() - started
+        logger.info(
+            f"✅ Vehicle similarity graph built: {len(vehicle_ids)} vehicles, "
+            f"top-{self.top_k} in {self.stats['last_build_seconds']:.2f}s"
+        )
+
+    def _fill_rows(self, state: _GraphState, slots: np.ndarray) -> None:
+        """Recompute the neighbour rows of the given slots against all active vehicles"""
+        n = len(state.vehicle_ids)
+        k = min(self.top_k, n - 1)
+        if not len(slots) or k <= 0:
+            for slot in slots.tolist():
+                state.neighbors.neighbors[slot] = -1
+                state.neighbors.scores[slot] = 0.0
+            return
+
+        embeddings = state.embeddings[:n]
+        inactive = ~state.active[:n]
+        block_rows = max(1, _BLOCK_CELLS // n)
+        for start in range(0, len(slots), block_rows):
+            block = slots[start:start + block_rows]
+            similarities = embeddings[block] @ embeddings.T
+            similarities[:, inactive] = -np.inf
+            similarities[np.arange(len(block)), block] = -np.inf
+
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            keep = (top_scores > 0) & (top_scores >= self.min_similarity)
+            state.neighbors.neighbors[block] = -1
+            state.neighbors.scores[block] = 0.0
+            state.neighbors.neighbors[block, :k] = np.where(keep, top, -1)
+            state.neighbors.scores[block, :k] = np.where(keep, top_scores, 0.0)
+
+    async def rebuild_from(self, load_embeddings: Callable[[], Any]) -> None:
+        """Load (vehicle_id, embedding) pairs (sync or async loader) and rebuild off the event loop"""
+        embeddings = load_embeddings()
+        if asyncio.iscoroutine(embeddings):
+            embeddings = await embeddings
+        await asyncio.to_thread(self.build, list(embeddings))
+
+    def start_background_rebuild(
+        self,
+        load_embeddings: Callable[[], Any],
+        interval_seconds: float = NIGHTLY_REBUILD_SECONDS,
+        on_rebuilt: Optional[Callable[['VehicleSimilarityGraph'], Any]] = None
+    ) -> None:
+        """Rebuild now and then every interval; on_rebuilt can persist the rows"""
+        if not self.rebuild_task:
+            self.rebuild_task = asyncio.create_task(
+                self._background_rebuild(load_embeddings, interval_seconds, on_rebuilt)
+            )
+
+    async def _background_rebuild(self, load_embeddings, interval_seconds: float, on_rebuilt) -> None:
+        while True:
+            try:
+                await self.rebuild_from(load_embeddings)
+                if on_rebuilt:
+                    result = on_rebuilt(self)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception as e:
+                logger.error(f"❌ Vehicle similarity graph rebuild failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+    async def stop_background_rebuild(self) -> None:
+        if self.rebuild_task:
+            self.rebuild_task.cancel()
+            try:
+                await self.rebuild_task
+            except asyncio.CancelledError:
+                pass
+            self.rebuild_task = None
+
+    # ---- Incremental updates ----
+
+    def add_vehicle(self, vehicle_id: str, embedding: Any) -> bool:
+        """
+        Insert (or re-embed) one listing.
+
+        Its own row is computed against every active vehicle; other rows
+        only change where the new vehicle beats their current K-th score.
+        """
+        vector = _parse_embedding(embedding)
+        if vector is None:
+            return False
+
+        with self._lock:
+            if self._changes_during_build is not None:
+                self._changes_during_build.append((vehicle_id, vector))
+            if not self._add(self._state, vehicle_id, vector):
+                return False
+
+        self.stats['added'] += 1
+        return True
+
+    def _add(self, state: _GraphState, vehicle_id: str, vector: np.ndarray) -> bool:
+        if not state.has_embeddings:
+            return False
+        if state.is_active(vehicle_id):
+            self._remove(state, vehicle_id)
+        if len(state.embeddings) and vector.size != state.embeddings.shape[1]:
+            logger.warning(f"⚠️ Embedding size mismatch for {vehicle_id}, skipping similarity graph update")
+            return False
+
+        slot = state.vehicle_index.get(vehicle_id)
+        if slot is None:
+            slot = len(state.vehicle_ids)
+            self._ensure_capacity(state, slot + 1, vector.size)
+            state.vehicle_ids.append(vehicle_id)
+            state.vehicle_index[vehicle_id] = slot
+        state.embeddings[slot] = _normalize(vector[np.newaxis])[0]
+        state.active[slot] = True
+
+        self._fill_rows(state, np.array([slot]))
+
+        n = len(state.vehicle_ids)
+        similarities = state.embeddings[:n] @ state.embeddings[slot]
+        full = state.neighbors.neighbors[:n, -1] >= 0
+        threshold = np.maximum(np.where(full, state.neighbors.scores[:n, -1], 0.0), self.min_similarity)
+        improves = (similarities > threshold) & (similarities > 0) & state.active[:n]
+        improves[slot] = False
+        others = np.flatnonzero(improves).tolist()
+        for other in others:
+            state.neighbors.upsert(other, slot, float(similarities[other]))
+        self._mark_dirty(state, [slot] + others)
+        return True
+
+    def remove_vehicle(self, vehicle_id: str) -> bool:
+        """Drop a listing; rows that pointed at it are refilled from the active set"""
+        with self._lock:
+            if self._changes_during_build is not None:
+                self._changes_during_build.append((vehicle_id, None))
+            if not self._remove(self._state, vehicle_id):
+                return False
+
+        self.stats['removed'] += 1
+        return True
+
+    def _remove(self, state: _GraphState, vehicle_id: str) -> bool:
+        if not state.is_active(vehicle_id):
+            return False
+        slot = state.vehicle_index[vehicle_id]
+        state.active[slot] = False
+        state.neighbors.neighbors[slot] = -1
+        state.neighbors.scores[slot] = 0.0
+
+        # Without embeddings the rows keep the removed vehicle and similar() skips it
+        affected = []
+        if state.has_embeddings:
+            n = len(state.vehicle_ids)
+            affected = np.flatnonzero((state.neighbors.neighbors[:n] == slot).any(axis=1))
+            self._fill_rows(state, affected)
+            affected = affected.tolist()
+        self._mark_dirty(state, [slot] + affected)
+        return True
+
+    def _mark_dirty(self, state: _GraphState, slots: List[int]) -> None:
+        # Only the serving graph is flushed; a build in progress is saved whole by on_rebuilt
+        if state is self._state:
+            self.dirty.update(state.vehicle_ids[slot] for slot in slots)
+
+    @staticmethod
+    def _ensure_capacity(state: _GraphState, n_items: int, dimensions: int) -> None:
+        state.neighbors.ensure_capacity(n_items)
+        capacity = len(state.embeddings)
+        if n_items <= capacity:
+            return
+        capacity = max(n_items, capacity * 2, 16)
+        embeddings = np.zeros((capacity, dimensions), dtype=np.float32)
+        active = np.zeros(capacity, dtype=bool)
+        if len(state.embeddings):
+            embeddings[:len(state.embeddings)] = state.embeddings
+        active[:len(state.active)] = state.active
+        state.embeddings, state.active = embeddings, active
+
+    # ---- Serving ----
+
+    def similar(
+        self,
+        vehicle_id: str,
+        limit: int = 10,
+        exclude_ids: Optional[Iterable[str]] = None,
+        predicate: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """Precomputed neighbours of a vehicle, best first, after filtering"""
+        with self._lock:
+            state = self._state
+            slot = state.vehicle_index.get(vehicle_id)
+            if slot is None:
+                return []
+            indices, scores = state.neighbors.row(slot)
+            candidates = [
+                (state.vehicle_ids[neighbor], float(score))
+                for neighbor, score in zip(indices.tolist(), scores.tolist()) if state.active[neighbor]
+            ]
+
+        # Filters (which may be arbitrary callables) run without the lock
+        exclude = set(exclude_ids or ())
+        similar = []
+        for neighbor_id, score in candidates:
+            if neighbor_id in exclude or (predicate and not predicate(neighbor_id)):
+                continue
+            similar.append((neighbor_id, score))
+            if len(similar) >= limit:
+                break
+        return similar
+
+    def embedding(self, vehicle_id: str) -> Optional[np.ndarray]:
+        """Unit embedding of an active vehicle (None when unknown or serving loaded rows)"""
+        with self._lock:
+            state = self._state
+            if not state.has_embeddings or not state.is_active(vehicle_id):
+                return None
+            return state.embeddings[state.vehicle_index[vehicle_id]].copy()
+
+    # ---- Persistence (vehicle_neighbors table) ----
+
+    def to_rows(self, vehicle_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """One vehicle_neighbors row per active vehicle (all active vehicles by default)"""
+        with self._lock:
+            state = self._state
+            if vehicle_ids is None:
+                slots = np.flatnonzero(state.active[:len(state.vehicle_ids)]).tolist()
+            else:
+                slots = [state.vehicle_index[v] for v in vehicle_ids if state.is_active(v)]
+            rows = []
+            for slot in slots:
+                indices, scores = state.neighbors.row(slot)
+                rows.append({
+                    'listing_id': state.vehicle_ids[slot],
+                    'neighbor_ids': [state.vehicle_ids[i] for i in indices.tolist()],
+                    'scores': [round(s, 6) for s in scores.tolist()],
+                })
+            return rows
+
+    def take_dirty_rows(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Rows changed by incremental updates since the last call, plus the removed listing ids"""
+        with self._lock:
+            vehicle_ids, self.dirty = self.dirty, set()
+            removed = [v for v in vehicle_ids if not self._state.is_active(v)]
+            return self.to_rows(vehicle_ids), removed
+
+    def start_background_flush(
+        self,
+        save_rows: Callable[[List[Dict[str, Any]]], Any],
+        delete_rows: Callable[[List[str]], Any],
+        interval_seconds: float = DEFAULT_FLUSH_SECONDS
+    ) -> None:
+        """Persist incremental updates every interval_seconds"""
+        if not self.flush_task:
+            self.flush_task = asyncio.create_task(
+                self._background_flush(save_rows, delete_rows, interval_seconds)
+            )
+
+    async def _background_flush(self, save_rows, delete_rows, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.flush(save_rows, delete_rows)
+
+    async def flush(
+        self,
+        save_rows: Callable[[List[Dict[str, Any]]], Any],
+        delete_rows: Callable[[List[str]], Any]
+    ) -> None:
+        """Upsert rows changed since the last flush and delete rows of removed listings"""
+        rows, removed = self.take_dirty_rows()
+        try:
+            for write, items in ((save_rows, rows), (delete_rows, removed)):
+                if items:
+                    result = write(items)
+                    if asyncio.iscoroutine(result):
+                        await result
+            self.stats['flushed'] += len(rows) + len(removed)
+        except Exception as e:
+            # Retry these listings on the next flush
+            with self._lock:
+                self.dirty.update(row['listing_id'] for row in rows)
+                self.dirty.update(removed)
+            logger.error(f"❌ Vehicle similarity graph flush failed: {str(e)}")
+
+    async def stop_background_flush(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+    def load_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Serve from persisted rows until the next build.
+
+        Rows carry no embeddings, so incremental adds only become possible
+        after a full build.
+        """
+        rows = list(rows)
+        vehicle_ids = list(dict.fromkeys(
+            [row['listing_id'] for row in rows] +
+            [neighbor for row in rows for neighbor in row.get('neighbor_ids') or []]
+        ))
+        state = _GraphState(
+            vehicle_ids,
+            ItemNeighborTable(self.top_k, capacity=len(vehicle_ids)),
+            np.zeros((0, 0), dtype=np.float32),
+            np.zeros(len(vehicle_ids), dtype=bool),
+            has_embeddings=False
+        )
+        for row in rows:
+            ids = [state.vehicle_index[neighbor] for neighbor in (row.get('neighbor_ids') or [])][:self.top_k]
+            slot = state.vehicle_index[row['listing_id']]
+            state.neighbors.neighbors[slot, :len(ids)] = ids
+            state.neighbors.scores[slot, :len(ids)] = (row.get('scores') or [])[:len(ids)]
+        state.active[[state.vehicle_index[row['listing_id']] for row in rows]] = True
+
+        with self._lock:
+            self._state = state
+        logger.info(f"✅ Vehicle similarity graph loaded: {len(rows)} vehicles")
+
+    def get_stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            **self.stats,
+            'vehicles': int(state.active.sum()),
+            'pending_flush': len(self.dirty),
+            'top_k': self.top_k,
+            'neighbor_table_bytes': state.neighbors.nbytes,
+            'embedding_bytes': state.embeddings.nbytes,
+        }
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+# Global graph instance
+_vehicle_similarity_graph: Optional[VehicleSimilarityGraph] = None
+
+
+def get_vehicle_similarity_graph() -> VehicleSimilarityGraph:
+    """Get or create the shared vehicle similarity graph"""
+    global _vehicle_similarity_graph
+    if _vehicle_similarity_graph is None:
+        _vehicle_similarity_graph = VehicleSimilarityGraph(
+            top_k=int(os.getenv('VEHICLE_KNN_TOP_K', DEFAULT_TOP_K))
+        )
+    return _vehicle_similarity_graph
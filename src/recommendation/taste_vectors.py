@@ -0,0 +1,302 @@
+"""
+Otto.AI User Taste Vectors
+
+Per-user taste embedding: an exponentially decayed, interaction-weighted
+average of the embeddings of vehicles the user viewed, saved/favorited
+or inquired about.
+
+Each interaction updates the user's vector in O(d) (decay the running
+mean, blend in one vehicle embedding), so personalization needs no replay
+of interaction history, LLM call or database query at request time:
+candidates are re-scored with one dot product against the taste vector.
+Vectors are persisted as float16 bytes (3 KB for a 1536-d embedding).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .batch_scoring import _parse_embedding
+from .collaborative_filtering import INTERACTION_WEIGHTS
+from .similarity_graph import get_vehicle_similarity_graph
+
+logger = logging.getLogger(__name__)
+
+# Interactions that say something about taste, weighted like implicit feedback
+TASTE_WEIGHTS = {
+    interaction_type: INTERACTION_WEIGHTS[interaction_type]
+    for interaction_type in ('view', 'save', 'favorite', 'inquiry')
+}
+
+DEFAULT_HALF_LIFE_DAYS = 14.0
+DEFAULT_FLUSH_SECONDS = 60
+
+
+@dataclass
+class UserTasteVector:
+    """Decayed weighted mean of interacted vehicle embeddings"""
+    vector: np.ndarray  # float32, mean of unit embeddings (norm <= 1)
+    weight: float  # decayed total interaction weight behind the mean
+    updated_at: float  # epoch seconds of the newest interaction
+
+    def update(self, embedding: np.ndarray, weight: float, timestamp: float, half_life_seconds: float) -> None:
+        """Blend in one unit embedding; older events (out of order) are decayed instead"""
+        if timestamp >= self.updated_at:
+            carried = self.weight * 0.5 ** ((timestamp - self.updated_at) / half_life_seconds)
+            self.updated_at = timestamp
+        else:
+            carried = self.weight
+            weight *= 0.5 ** ((self.updated_at - timestamp) / half_life_seconds)
+
+        total = carried + weight
+        if total <= 0:
+            return
+        self.vector *= carried / total
+        self.vector += embedding * (weight / total)
+        self.weight = total
+
+    def to_bytes(self) -> bytes:
+        return self.vector.astype('<f2').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, weight: float, updated_at: float) -> 'UserTasteVector':
+        vector = np.frombuffer(bytes(data), dtype='<f2').astype(np.float32)
+        return cls(vector=vector, weight=float(weight), updated_at=float(updated_at))
+
+
+def _epoch(value: Any) -> float:
+    """Epoch seconds from a datetime, ISO string or number (now when missing)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        return value.timestamp()
+    return value.astimezone(timezone.utc).timestamp()
+
+
+class TasteVectorStore:
+    """user_id -> taste vector, updated per interaction and scored with one dot product"""
+
+    def __init__(
+        self,
+        embedding_lookup: Optional[Callable[[str], Optional[np.ndarray]]] = None,
+        half_life_days: float = DEFAULT_HALF_LIFE_DAYS
+    ):
+        """
+        Initialize taste vector store
+
+        Args:
+            embedding_lookup: vehicle_id -> embedding (the shared similarity graph by default)
+            half_life_days: Age at which an interaction counts half as much
+        """
+        self.embedding_lookup = embedding_lookup or (lambda vehicle_id: get_vehicle_similarity_graph().embedding(vehicle_id))
+        self.half_life_seconds = half_life_days * 24 * 60 * 60
+
+        self.tastes: Dict[str, UserTasteVector] = {}
+        self.dirty: set = set()  # users changed since the last flush
+        self._lock = threading.Lock()
+        self.flush_task = None
+
+        self.stats = {
+            'updates': 0,
+            'missing_embeddings': 0,
+            'flushed': 0
+        }
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.tastes
+
+    # ---- Updates ----
+
+    def record_interaction(
+        self,
+        user_id: str,
+        vehicle_id: str,
+        interaction_type: Any,
+        timestamp: Any = None
+    ) -> bool:
+        """Fold one interaction into the user's taste vector (O(d))"""
+        weight = TASTE_WEIGHTS.get(str(getattr(interaction_type, 'value', interaction_type)).lower())
+        if not weight or not user_id or not vehicle_id:
+            return False
+
+        embedding = _parse_embedding(self.embedding_lookup(vehicle_id))
+        if embedding is None:
+            self.stats['missing_embeddings'] += 1
+            return False
+        norm = float(np.linalg.norm(embedding))
+        if norm == 0:
+            return False
+        embedding = embedding / norm
+
+        with self._lock:
+            taste = self.tastes.get(user_id)
+            if taste is None or taste.vector.size != embedding.size:
+                taste = UserTasteVector(np.zeros(embedding.size, dtype=np.float32), 0.0, _epoch(timestamp))
+                self.tastes[user_id] = taste
+            taste.update(embedding, weight, _epoch(timestamp), self.half_life_seconds)
+            self.dirty.add(user_id)
+
+        self.stats['updates'] += 1
+        return True
+
+    # ---- Scoring ----
+
+    def taste_vector(self, user_id: str) -> Optional[np.ndarray]:
+        """Unit taste direction, or None for users without history"""
+        taste = self.tastes.get(user_id)
+        if taste is None:
+            return None
+        norm = float(np.linalg.norm(taste.vector))
+        return taste.vector / norm if norm > 0 else None
+
+    def score(
+        self,
+        user_id: str,
+        embeddings: Optional[np.ndarray],
+        has_embedding: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Cosine of every candidate to the user's taste, clipped to [0, 1].
+
+        Args:
+            user_id: User identifier
+            embeddings: Unit-normalized candidate embedding rows
+            has_embedding: Rows that hold a real embedding (all by default)
+
+        Returns:
+            One score per row; zeros when the user or candidates have no embedding
+        """
+        n = 0 if embeddings is None else len(embeddings)
+        taste = self.taste_vector(user_id)
+        if taste is None or not n or embeddings.shape[1] != taste.size:
+            return np.zeros(n, dtype=np.float32)
+
+        scores = np.clip(embeddings @ taste, 0.0, 1.0).astype(np.float32)
+        if has_embedding is not None:
+            scores[~has_embedding] = 0.0
+        return scores
+
+    def score_ids(self, user_id: str, vehicle_ids: List[str]) -> np.ndarray:
+        """Taste scores for vehicles by ID, embeddings from the lookup"""
+        taste = self.taste_vector(user_id)
+        if taste is None or not vehicle_ids:
+            return np.zeros(len(vehicle_ids), dtype=np.float32)
+
+        embeddings = np.zeros((len(vehicle_ids), taste.size), dtype=np.float32)
+        has_embedding = np.zeros(len(vehicle_ids), dtype=bool)
+        for row, vehicle_id in enumerate(vehicle_ids):
+            embedding = _parse_embedding(self.embedding_lookup(vehicle_id))
+            if embedding is not None and embedding.size == taste.size:
+                norm = float(np.linalg.norm(embedding))
+                if norm > 0:
+                    embeddings[row] = embedding / norm
+                    has_embedding[row] = True
+        return self.score(user_id, embeddings, has_embedding)
+
+    # ---- Persistence (user_taste_vectors table) ----
+
+    def to_rows(self, user_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """One user_taste_vectors row per user (all users by default)"""
+        with self._lock:
+            user_ids = list(self.tastes) if user_ids is None else [u for u in user_ids if u in self.tastes]
+            return [
+                {
+                    'user_id': user_id,
+                    'taste': self.tastes[user_id].to_bytes(),
+                    'weight': self.tastes[user_id].weight,
+                    'last_interaction_at': datetime.fromtimestamp(
+                        self.tastes[user_id].updated_at, tz=timezone.utc
+                    ).isoformat()
+                }
+                for user_id in user_ids
+            ]
+
+    def take_dirty_rows(self) -> List[Dict[str, Any]]:
+        """Rows for users changed since the last call"""
+        with self._lock:
+            user_ids, self.dirty = self.dirty, set()
+        return self.to_rows(user_ids)
+
+    def load_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Restore persisted vectors; users already updated in memory keep their vector"""
+        loaded = 0
+        with self._lock:
+            for row in rows:
+                if row['user_id'] in self.tastes:
+                    continue
+                self.tastes[row['user_id']] = UserTasteVector.from_bytes(
+                    row['taste'], row.get('weight') or 0.0, _epoch(row.get('last_interaction_at'))
+                )
+                loaded += 1
+        logger.info(f"✅ Loaded {loaded} user taste vectors")
+
+    def start_background_flush(
+        self,
+        save_rows: Callable[[List[Dict[str, Any]]], Any],
+        interval_seconds: float = DEFAULT_FLUSH_SECONDS
+    ) -> None:
+        """Persist changed vectors every interval_seconds"""
+        if not self.flush_task:
+            self.flush_task = asyncio.create_task(self._background_flush(save_rows, interval_seconds))
+
+    async def _background_flush(self, save_rows, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.flush(save_rows)
+
+    async def flush(self, save_rows: Callable[[List[Dict[str, Any]]], Any]) -> None:
+        rows = self.take_dirty_rows()
+        if not rows:
+            return
+        try:
+            result = save_rows(rows)
+            if asyncio.iscoroutine(result):
+                await result
+            self.stats['flushed'] += len(rows)
+        except Exception as e:
+            # Retry these users on the next flush
+            with self._lock:
+                self.dirty.update(row['user_id'] for row in rows)
+            logger.error(f"❌ User taste vector flush failed: {str(e)}")
+
+    async def stop_background_flush(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'users': len(self.tastes),
+            'pending_flush': len(self.dirty),
+            'vector_bytes': sum(taste.vector.size * 2 for taste in self.tastes.values())
+        }
+
+
+# Global store instance
+_taste_vector_store: Optional[TasteVectorStore] = None
+
+
+def get_taste_vector_store() -> TasteVectorStore:
+    """Get or create the shared taste vector store (half-life from TASTE_HALF_LIFE_DAYS)"""
+    global _taste_vector_store
+    if _taste_vector_store is None:
+        _taste_vector_store = TasteVectorStore(
+            half_life_days=float(os.getenv('TASTE_HALF_LIFE_DAYS', DEFAULT_HALF_LIFE_DAYS))
+        )
+    return _taste_vector_store
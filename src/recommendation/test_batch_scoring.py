@@ -0,0 +1,217 @@
+"""
+Unit Tests for Batch Candidate Scoring
+
+Checks the vectorized content scorer against the original per-vehicle
+rules, context similarity and the batched RecommendationEngine scorers.
+"""
+
+import pytest
+import random
+from unittest.mock import Mock, AsyncMock
+
+import numpy as np
+
+from src.recommendation.batch_scoring import CandidateBatch, top_indices
+from src.recommendation.collaborative_filtering import CollaborativeFilteringEngine, InteractionEvent
+from src.recommendation.recommendation_engine import RecommendationEngine
+
+MAKES = ['Toyota', 'Honda', 'Ford', 'BMW', 'Tesla']
+TYPES = ['SUV', 'Sedan', 'Truck']
+FEATURES = ['bluetooth', 'backup camera', 'sunroof', 'manual transmission', 'awd', 'heated seats']
+
+PREFERENCES = {
+    'brands': ['Toyota', 'Honda'],
+    'price_range': {'min': 20000, 'max': 40000},
+    'vehicle_types': ['SUV', 'Sedan'],
+    'must_have_features': ['bluetooth', 'backup camera', 'lane assist'],
+    'avoid_features': ['manual transmission'],
+    'price_sensitivity': 0.7,
+    'feature_importance': 0.8
+}
+
+
+def make_vehicles(count, seed=3, embedding_dim=None):
+    rng = random.Random(seed)
+    vehicles = []
+    for i in range(count):
+        vehicle = {
+            'id': f'vehicle_{i}',
+            'make': rng.choice(MAKES),
+            'model': rng.choice(['Camry', 'Civic', 'F-150', 'X5']),
+            'vehicle_type': rng.choice(TYPES),
+            'price': rng.uniform(10000, 60000),
+            'year': rng.randint(2015, 2024),
+            'mileage': rng.randint(0, 120000),
+            'description': rng.choice(['family hauler', 'sporty commuter', 'work truck']),
+            'features': rng.sample(FEATURES, rng.randint(0, 4)),
+        }
+        # Sparse records exercise the presence masks
+        for key in ('make', 'vehicle_type', 'price', 'features'):
+            if rng.random() < 0.1:
+                del vehicle[key]
+        if embedding_dim:
+            vehicle['embedding'] = [rng.gauss(0, 1) for _ in range(embedding_dim)]
+        vehicles.append(vehicle)
+    return vehicles
+
+
+def reference_content_score(vehicle, preferences, search_query):
+    """The per-vehicle rules the vectorized scorer replaces"""
+    score = total = 0.0
+    if 'make' in vehicle:
+        score += 0.3 if vehicle['make'] in preferences['brands'] else 0.0
+        total += 0.3
+    if 'price' in vehicle:
+        price_min = preferences['price_range'].get('min', 0)
+        price_max = preferences['price_range'].get('max', float('inf'))
+        if price_min <= vehicle['price'] <= price_max:
+            score += 0.25
+        elif vehicle['price'] < price_min:
+            score += 0.15
+        total += 0.25
+    if 'vehicle_type' in vehicle:
+        score += 0.2 if vehicle['vehicle_type'] in preferences['vehicle_types'] else 0.0
+        total += 0.2
+    if 'features' in vehicle:
+        features = set(vehicle['features'])
+        must_have, avoid = set(preferences['must_have_features']), set(preferences['avoid_features'])
+        score += 0.15 * len(features & must_have) / len(must_have)
+        score -= 0.1 * len(features & avoid) / len(avoid)
+        total += 0.25
+    if search_query:
+        words = set(search_query.lower().split())
+        text = f"{vehicle.get('make', '')} {vehicle.get('model', '')} {vehicle.get('description', '')} " \
+               f"{' '.join(vehicle.get('features', []))}".lower()
+        score += 0.1 * min(len(words & set(text.split())) / len(words), 1.0)
+        total += 0.1
+    return min(score / total, 1.0) if total > 0 else 0.0
+
+
+class TestCandidateBatch:
+    """Test suite for CandidateBatch"""
+
+    @pytest.mark.parametrize('search_query', [None, 'sporty toyota with sunroof'])
+    def test_content_scores_match_per_vehicle_rules(self, search_query):
+        vehicles = make_vehicles(300)
+        batch = CandidateBatch(vehicles)
+
+        scores = batch.content_scores(batch.preference_weights(PREFERENCES), search_query)
+
+        expected = [reference_content_score(v, PREFERENCES, search_query) for v in vehicles]
+        assert np.allclose(scores, expected, atol=1e-5)
+
+    def test_columns_are_compact(self):
+        batch = CandidateBatch(make_vehicles(50))
+
+        assert batch.feature_bits.dtype == np.uint8 and batch.feature_bits.shape == (50, 1)
+        assert batch.make_codes.dtype == np.int32
+        assert batch.numeric.shape == (50, 3)
+
+    def test_context_similarity_uses_embeddings_when_available(self):
+        vehicles = make_vehicles(20, embedding_dim=16)
+        vehicles[3].pop('embedding')
+        batch = CandidateBatch(vehicles)
+        context = batch.encode_like([vehicles[0], vehicles[3]])
+
+        similarity = batch.context_similarity(context)
+
+        embeddings = np.array([v['embedding'] for v in vehicles if 'embedding' in v], dtype=np.float32)
+        first = embeddings[0] / np.linalg.norm(embeddings[0])
+        assert similarity.shape == (20, 2)
+        assert similarity[0, 0] == pytest.approx(1.0, abs=1e-5)
+        assert similarity[1, 0] == pytest.approx(
+            max(0.0, float(first @ embeddings[1] / np.linalg.norm(embeddings[1]))), abs=1e-5
+        )
+        assert similarity[3, 1] == pytest.approx(1.0, abs=1e-5)  # attribute vectors, self-match
+        assert ((similarity >= 0) & (similarity <= 1)).all()
+
+    def test_attribute_similarity_prefers_same_make_and_type(self):
+        base = {'id': 'ctx', 'make': 'Toyota', 'vehicle_type': 'SUV', 'price': 30000, 'year': 2021,
+                'mileage': 20000, 'features': ['awd', 'sunroof']}
+        twin = dict(base, id='twin', price=31000)
+        other = {'id': 'other', 'make': 'Ford', 'vehicle_type': 'Truck', 'price': 55000, 'year': 2016,
+                 'mileage': 90000, 'features': ['manual transmission']}
+        batch = CandidateBatch([twin, other])
+
+        similarity = batch.context_similarity(batch.encode_like([base]))[:, 0]
+
+        assert similarity[0] > 0.95 and similarity[1] < 0.3
+
+    def test_top_indices(self):
+        scores = np.array([0.2, 0.9, 0.5, 0.1, 0.7], dtype=np.float32)
+
+        assert top_indices(scores, 3).tolist() == [1, 4, 2]
+        assert top_indices(scores, 10, threshold=0.3).tolist() == [1, 4, 2]
+        assert top_indices(scores, 2, threshold=0.95).tolist() == []
+
+
+class TestBatchedRecommenders:
+    """Test the RecommendationEngine scorers on top of CandidateBatch"""
+
+    @pytest.fixture
+    def vehicles(self):
+        return make_vehicles(200)
+
+    @pytest.fixture
+    def engine(self, vehicles):
+        vehicle_db = Mock()
+        by_id = {v['id']: v for v in vehicles}
+        vehicle_db.get_vehicles_by_ids = AsyncMock(side_effect=lambda ids: [by_id[i] for i in ids if i in by_id])
+
+        collaborative_filter = CollaborativeFilteringEngine()
+        collaborative_filter.rebuild([
+            InteractionEvent('buyer', 'vehicle_0', 'inquiry'), InteractionEvent('other', 'vehicle_0', 'view'),
+            InteractionEvent('other', 'vehicle_7', 'favorite')
+        ])
+        return RecommendationEngine(vehicle_db, Mock(), collaborative_filter=collaborative_filter)
+
+    @pytest.mark.asyncio
+    async def test_content_based_matches_scalar_scorer(self, engine, vehicles):
+        profile = await engine._get_user_profile('buyer')
+        preference_vector = await engine._create_user_preference_vector(profile)
+
+        recommendations = await engine._content_based_filtering('buyer', vehicles, profile, 'suv', 10)
+
+        expected = sorted(
+            [(await engine._calculate_content_similarity(v, preference_vector, 'suv'), v['id']) for v in vehicles],
+            key=lambda item: item[0], reverse=True
+        )
+        assert [r.recommendation_score for r in recommendations] == pytest.approx([s for s, _ in expected[:10]])
+        assert all(r.personalization_factors == ['content_match'] for r in recommendations)
+
+    @pytest.mark.asyncio
+    async def test_similarity_fetches_context_once(self, engine, vehicles):
+        recommendations = await engine._similarity_based_recommendations(
+            ['vehicle_1', 'vehicle_2'], vehicles[3:], 5
+        )
+
+        engine.vehicle_db.get_vehicles_by_ids.assert_awaited_once_with(['vehicle_1', 'vehicle_2'])
+        assert len(recommendations) == 5
+        assert all(r.recommendation_score > engine.min_similarity_threshold for r in recommendations)
+        scores = [r.recommendation_score for r in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_hybrid_combines_all_scores(self, engine, vehicles):
+        profile = await engine._get_user_profile('buyer')
+
+        recommendations = await engine._hybrid_recommendations(
+            'buyer', vehicles, profile, None, ['vehicle_1'], 10, 'control'
+        )
+
+        assert len(recommendations) == 10
+        scores = [r.recommendation_score for r in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+        everything = {r.vehicle_id: r for r in await engine._hybrid_recommendations(
+            'buyer', vehicles, profile, None, ['vehicle_1'], len(vehicles), 'control'
+        )}
+        stranger = {r.vehicle_id: r for r in await engine._hybrid_recommendations(
+            'stranger', vehicles, profile, None, ['vehicle_1'], len(vehicles), 'control'
+        )}
+        # vehicle_7 was co-interacted with vehicle_0, which the buyer inquired about
+        cf_score = engine.collaborative_filter.score_vehicles('buyer')['vehicle_7']
+        assert everything['vehicle_7'].recommendation_score == pytest.approx(
+            stranger['vehicle_7'].recommendation_score + 0.4 * cf_score
+        )
+        assert 'vehicle_0' not in engine.collaborative_filter.score_vehicles('buyer')  # already inquired about
@@ -0,0 +1,169 @@
+"""
+Unit Tests for Comparison Embedding Reuse and Result Caching
+
+Checks that ComparisonEngine reuses stored listing embeddings, embeds the
+missing ones in one call, scores pairs from a Gram matrix that matches the
+per-pair cosine, and serves repeated comparisons from its result cache.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+
+import src.recommendation.comparison_engine as comparison_module
+from src.recommendation.comparison_engine import ComparisonEngine
+
+DIM = 8
+
+
+def make_vehicles(count, stored=True, seed=3):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'id': f'vehicle_{i}',
+            'make': 'Toyota',
+            'model': f'Model {i}',
+            'year': 2020 + i,
+            'features': ['bluetooth', 'awd', f'feature_{i}'],
+            'updated_at': '2026-10-01T00:00:00',
+            'embedding': rng.standard_normal(DIM).tolist() if stored else None,
+            'text_embedding': None,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def plain_similarity(monkeypatch):
+    """Record the constructor arguments instead of building the shared model"""
+    monkeypatch.setattr(comparison_module, 'SemanticSimilarity', lambda **kwargs: SimpleNamespace(**kwargs))
+
+
+@pytest.fixture
+def embedding_service():
+    service = Mock(spec=['generate_embeddings'])
+    service.generate_embeddings = AsyncMock(
+        side_effect=lambda texts: SimpleNamespace(embeddings=[[float(len(t)), 1.0] + [0.5] * (DIM - 2) for t in texts])
+    )
+    return service
+
+
+@pytest.fixture
+def vehicle_db():
+    db = Mock()
+    db.get_vehicles_by_ids = AsyncMock()
+    return db
+
+
+@pytest.fixture
+def engine(vehicle_db, embedding_service):
+    return ComparisonEngine(vehicle_db, embedding_service)
+
+
+class TestSemanticSimilarity:
+    """Test embedding reuse and Gram-matrix similarity"""
+
+    @pytest.mark.asyncio
+    async def test_stored_embeddings_are_reused(self, engine, embedding_service):
+        vehicles = make_vehicles(4)
+
+        similarities = await engine._calculate_semantic_similarity(vehicles)
+
+        embedding_service.generate_embeddings.assert_not_called()
+        assert len(similarities) == 6
+        for i in range(4):
+            for j in range(i + 1, 4):
+                expected = await engine._calculate_cosine_similarity(vehicles[i]['embedding'], vehicles[j]['embedding'])
+                score = similarities[f"vehicle_{i}_vs_vehicle_{j}"].similarity_score
+                assert score == pytest.approx(min(max(expected, 0.0), 1.0), abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_missing_embeddings_are_generated_in_one_call(self, engine, embedding_service):
+        vehicles = make_vehicles(4)
+        vehicles[1]['embedding'] = None
+        vehicles[3]['embedding'] = None
+        vehicles[3]['text_embedding'] = '[' + ','.join(['0.25'] * DIM) + ']'
+        vehicles[2]['embedding'] = None
+
+        similarities = await engine._calculate_semantic_similarity(vehicles)
+
+        embedding_service.generate_embeddings.assert_called_once()
+        assert len(embedding_service.generate_embeddings.call_args[0][0]) == 2
+        assert len(similarities) == 6
+        assert engine.stats['embeddings_reused'] == 2
+        assert engine.stats['embeddings_generated'] == 2
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_skips_unembedded_pairs(self, engine, embedding_service):
+        vehicles = make_vehicles(3)
+        vehicles[0]['embedding'] = None
+        embedding_service.generate_embeddings.side_effect = Exception("Embedding service error")
+
+        similarities = await engine._calculate_semantic_similarity(vehicles)
+
+        assert list(similarities) == ['vehicle_1_vs_vehicle_2']
+
+    @pytest.mark.asyncio
+    async def test_batch_text_embedding_service(self, vehicle_db):
+        service = Mock(spec=['generate_text_embeddings'])
+        service.generate_text_embeddings = AsyncMock(return_value=[[1.0, 0.0], [1.0, 1.0]])
+        engine = ComparisonEngine(vehicle_db, service)
+
+        similarities = await engine._calculate_semantic_similarity(make_vehicles(2, stored=False))
+
+        service.generate_text_embeddings.assert_called_once()
+        assert similarities['vehicle_0_vs_vehicle_1'].similarity_score == pytest.approx(2 ** -0.5)
+
+
+class TestComparisonResultCache:
+    """Test caching of finished comparisons"""
+
+    @pytest.fixture
+    def stubbed_engine(self, engine, monkeypatch):
+        monkeypatch.setattr(engine, '_create_vehicle_comparison_result', AsyncMock(
+            side_effect=lambda vehicle, *args: SimpleNamespace(vehicle_id=vehicle['id'])
+        ))
+        monkeypatch.setattr(engine, '_analyze_feature_differences', AsyncMock(return_value=[]))
+        monkeypatch.setattr(engine, '_generate_recommendation_summary', AsyncMock(return_value='summary'))
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_repeated_comparison_is_served_from_cache(self, stubbed_engine, vehicle_db, embedding_service):
+        vehicles = make_vehicles(3, stored=False)
+        vehicle_db.get_vehicles_by_ids.return_value = list(reversed(vehicles))
+
+        first = await stubbed_engine.compare_vehicles(['vehicle_2', 'vehicle_0', 'vehicle_1'])
+        second = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1', 'vehicle_2'])
+
+        assert second is first
+        assert [r.vehicle_id for r in first.comparison_results] == ['vehicle_0', 'vehicle_1', 'vehicle_2']
+        assert embedding_service.generate_embeddings.call_count == 1
+        assert stubbed_engine._create_vehicle_comparison_result.call_count == 3
+        assert stubbed_engine.get_stats()['cache_hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_listing_update_or_options_miss_the_cache(self, stubbed_engine, vehicle_db):
+        vehicles = make_vehicles(2)
+        vehicle_db.get_vehicles_by_ids.return_value = vehicles
+
+        first = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1'])
+        vehicle_db.get_vehicles_by_ids.return_value = [vehicles[0], {**vehicles[1], 'updated_at': '2026-10-02'}]
+        updated = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1'])
+        personalized = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1'], user_id='buyer')
+
+        assert updated is not first
+        assert personalized is not updated
+        assert stubbed_engine.stats['cache_hits'] == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_results_are_recomputed(self, stubbed_engine, vehicle_db):
+        vehicle_db.get_vehicles_by_ids.return_value = make_vehicles(2)
+        stubbed_engine.result_cache_ttl = comparison_module.timedelta(0)
+
+        first = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1'])
+        second = await stubbed_engine.compare_vehicles(['vehicle_0', 'vehicle_1'])
+
+        assert second is not first
+        assert len(stubbed_engine.result_cache) == 1
@@ -279,6 +279,20 @@ class TestComparisonEngine:
             assert isinstance(similarity.unique_features_b, list)
             assert similarity.similarity_explanation is not None
 
+    @pytest.mark.asyncio
+    async def test_embedding_matrix_prefers_text_embeddings(self, comparison_engine, sample_vehicles, mock_embedding_service):
+        """Test that stored text embeddings are compared rather than combined ones"""
+        vehicles = [
+            {**sample_vehicles[0], 'text_embedding': [1.0, 0.0, 0.0], 'embedding': [0.0, 1.0, 0.0]},
+            {**sample_vehicles[1], 'text_embedding': [1.0, 0.0, 0.0], 'embedding': [0.0, 0.0, 1.0]},
+        ]
+
+        embeddings, has_embedding = await comparison_engine._vehicle_embedding_matrix(vehicles)
+
+        assert has_embedding.all()
+        assert float(embeddings[0] @ embeddings[1]) == pytest.approx(1.0)
+        mock_embedding_service.generate_embeddings.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_cosine_similarity_calculation(self, comparison_engine):
         """Test cosine similarity calculation"""
@@ -0,0 +1,279 @@
+"""
+Unit Tests for Favorites Candidate Generation and Scoring
+
+Checks the vectorized sub-scores against the original per-vehicle rules,
+and the concurrent retrievers, timeouts and batched tracking of
+FavoritesRecommendationEngine.
+"""
+
+import asyncio
+import pytest
+import random
+import time
+import threading
+from unittest.mock import MagicMock
+
+from src.recommendation.favorites_recommendation_engine import (
+    FavoritesRecommendationEngine,
+    RecommendationRequest
+)
+from src.recommendation.favorites_scoring import (
+    OVERALL_WEIGHTS,
+    SIMILARITY_WEIGHTS,
+    confidence_scores,
+    similarity_subscores,
+    weighted
+)
+from src.recommendation.similarity_graph import VehicleSimilarityGraph
+
+FEATURES = ['Bluetooth', 'sunroof', 'AWD', 'heated seats', 'backup camera', 'tow package']
+
+ORIGINAL = {
+    'id': 'original', 'make': 'toyota', 'model': 'rav4', 'year': 2020, 'price': 28000,
+    'body_type': 'suv', 'features': ['bluetooth', 'awd', 'sunroof']
+}
+
+PREFERENCES = {
+    'preferred_brands': ['Toyota', 'Honda'],
+    'must_have_features': ['bluetooth'],
+    'avoid_features': ['tow package'],
+    'price_range': {'min': 20000, 'max': 35000}
+}
+
+
+def make_vehicles(count, seed=9):
+    rng = random.Random(seed)
+    vehicles = []
+    for i in range(count):
+        vehicle = {
+            'id': f'vehicle_{i}',
+            'make': rng.choice(['Toyota', 'Honda', 'Ford', 'toyota']),
+            'model': rng.choice(['RAV4', 'rav4 hybrid', 'CR-V', 'Escape', 'av']),
+            'year': rng.randint(2012, 2024),
+            'price': rng.choice([rng.uniform(8000, 70000), 0]),
+            'body_type': rng.choice(['SUV', 'sedan', '']),
+            'features': rng.sample(FEATURES, rng.randint(0, 4)),
+        }
+        for key in ('make', 'model', 'price', 'features', 'year'):
+            if rng.random() < 0.1:
+                del vehicle[key]
+        vehicles.append(vehicle)
+    return vehicles
+
+
+def reference_subscores(vehicle, original, preferences):
+    """The per-vehicle rules the vectorized scorer replaces"""
+    make_model = 0.4 if vehicle.get('make', '').lower() == original.get('make', '').lower() else 0.0
+    vm, om = vehicle.get('model', '').lower(), original.get('model', '').lower()
+    if vm == om:
+        make_model += 0.6
+    elif om in vm or vm in om:
+        make_model += 0.3
+    else:
+        make_model += 0.6 * len(set(vm) & set(om)) / len(set(vm) | set(om))
+
+    vp, op = vehicle.get('price'), original.get('price')
+    if not vp or not op:
+        price = 0.5
+    else:
+        pct = abs(vp - op) / op * 100
+        price = 1.0 if pct <= 10 else 0.8 if pct <= 25 else 0.6 if pct <= 50 else 0.4 if pct <= 100 else 0.2
+
+    vf = set(f.lower() for f in vehicle.get('features', []))
+    of = set(f.lower() for f in original.get('features', []))
+    if not vf and not of:
+        features = 0.5
+    elif not vf or not of:
+        features = 0.0
+    else:
+        features = len(vf & of) / len(vf | of)
+
+    vy, oy = vehicle.get('year'), original.get('year')
+    if not vy or not oy:
+        year = 0.5
+    else:
+        diff = abs(vy - oy)
+        year = 1.0 if diff == 0 else 0.9 if diff <= 1 else 0.8 if diff <= 2 else 0.6 if diff <= 3 else \
+            0.4 if diff <= 5 else 0.2
+
+    vb, ob = vehicle.get('body_type', '').lower(), original.get('body_type', '').lower()
+    body_type = 0.5 if not vb or not ob else (1.0 if vb == ob else 0.0)
+
+    if not preferences:
+        alignment = 0.5
+    else:
+        checks = []
+        if preferences.get('preferred_brands'):
+            checks.append(vehicle.get('make', '').lower() in [m.lower() for m in preferences['preferred_brands']])
+        if preferences.get('must_have_features'):
+            checks.append(all(f.lower() in vf for f in preferences['must_have_features']))
+        if preferences.get('price_range'):
+            low, high = preferences['price_range'].get('min', 0), preferences['price_range'].get('max', float('inf'))
+            checks.append(bool(vp and low <= vp <= high))
+        if preferences.get('avoid_features'):
+            checks.append(not any(f.lower() in vf for f in preferences['avoid_features']))
+        alignment = sum(checks) / len(checks) if checks else 0.5
+
+    completeness = 0.2 * sum(bool(vehicle.get(f)) for f in ['make', 'model', 'year', 'price', 'features'])
+    return {
+        'make_model': make_model, 'price': price, 'features': features, 'preferences': alignment,
+        'year': year, 'body_type': body_type, 'completeness': completeness
+    }
+
+
+class TestSimilaritySubscores:
+    """Test suite for the vectorized favorites scorer"""
+
+    @pytest.mark.parametrize('preferences', [{}, PREFERENCES])
+    def test_matches_per_vehicle_rules(self, preferences):
+        vehicles = make_vehicles(300)
+
+        subscores = similarity_subscores(vehicles, ORIGINAL, preferences)
+
+        for name in subscores:
+            expected = [reference_subscores(v, ORIGINAL, preferences)[name] for v in vehicles]
+            assert subscores[name] == pytest.approx(expected), name
+
+    def test_combined_scores(self):
+        vehicles = make_vehicles(50)
+        subscores = similarity_subscores(vehicles, ORIGINAL, PREFERENCES)
+
+        references = [reference_subscores(v, ORIGINAL, PREFERENCES) for v in vehicles]
+        similarity = [sum(r[k] * w for k, w in SIMILARITY_WEIGHTS.items()) for r in references]
+        assert weighted(subscores, OVERALL_WEIGHTS) == pytest.approx(
+            [sum(r[k] * w for k, w in OVERALL_WEIGHTS.items()) for r in references]
+        )
+        assert confidence_scores(subscores) == pytest.approx([
+            min(1.0, s * 0.7 + r['completeness'] * 0.2 + r['preferences'] * 0.1)
+            for s, r in zip(similarity, references)
+        ])
+
+    def test_no_candidates(self):
+        subscores = similarity_subscores([], ORIGINAL, PREFERENCES)
+
+        assert all(len(values) == 0 for values in subscores.values())
+
+
+class TestConcurrentCandidateGeneration:
+    """Test FavoritesRecommendationEngine candidate generation"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = FavoritesRecommendationEngine(similarity_graph=VehicleSimilarityGraph())
+        engine.db_conn = MagicMock()
+        return engine
+
+    @staticmethod
+    def request(max_recommendations=5):
+        return RecommendationRequest(
+            user_id='buyer',
+            unavailable_vehicle_id='original',
+            original_vehicle_data={**ORIGINAL, 'make': 'Toyota', 'model': 'RAV4'},
+            user_preferences=PREFERENCES,
+            max_recommendations=max_recommendations
+        )
+
+    @pytest.mark.asyncio
+    async def test_retrievers_overlap_and_slow_one_is_dropped(self, engine):
+        vehicles = make_vehicles(20)
+
+        def retriever(candidates, delay):
+            async def retrieve():
+                await asyncio.sleep(delay)
+                return candidates
+            return retrieve
+
+        engine._candidate_retrievers = lambda attrs, prefs: [
+            ('make_model', retriever(vehicles[:8], 0.1)),
+            ('price_range', retriever(vehicles[5:14], 0.1)),
+            ('features', retriever(vehicles[10:], 0.1)),
+            ('semantic', retriever([{'id': 'late'}], 5)),
+        ]
+        engine.retriever_timeouts = {'semantic': 0.2}
+
+        started = time.perf_counter()
+        recommendations = await engine.generate_recommendations_for_unavailable_favorite(self.request(30))
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.3
+        assert engine.stats['retriever_timeouts'] == 1
+        assert sorted(r.vehicle_id for r in recommendations) == sorted(v['id'] for v in vehicles)
+        overall = weighted(similarity_subscores(vehicles, engine._extract_vehicle_attributes(
+            self.request().original_vehicle_data), PREFERENCES), OVERALL_WEIGHTS)
+        by_id = dict(zip([v['id'] for v in vehicles], overall))
+        ranked = [by_id[r.vehicle_id] for r in recommendations]
+        assert ranked == sorted(ranked, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_tracking_is_one_batch_insert(self, engine):
+        vehicles = make_vehicles(10)
+        cursor = MagicMock()
+        engine.db_conn.cursor.return_value.__enter__.return_value = cursor
+
+        async def retrieve():
+            return vehicles
+
+        engine._candidate_retrievers = lambda attrs, prefs: [('make_model', retrieve)]
+
+        recommendations = await engine.generate_recommendations_for_unavailable_favorite(self.request(5))
+
+        assert len(recommendations) == 5
+        cursor.executemany.assert_called_once()
+        rows = cursor.executemany.call_args[0][1]
+        assert [row[2] for row in rows] == [r.vehicle_id for r in recommendations]
+        cursor.execute.assert_not_called()
+        engine.db_conn.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_query_is_cancelled_on_the_server(self, engine):
+        cancelled = threading.Event()
+
+        def execute(query, params):
+            if query == 'slow' and not cancelled.wait(timeout=5):
+                raise AssertionError('query was never cancelled')
+            if query == 'slow':
+                raise RuntimeError('canceling statement due to user request')
+
+        cursor = MagicMock()
+        cursor.execute.side_effect = execute
+        cursor.fetchall.return_value = [{'id': 'vehicle_1'}]
+        engine.db_conn.cursor.return_value.__enter__.return_value = cursor
+        engine.db_conn.cancel_safe.side_effect = cancelled.set
+        engine.retriever_timeouts = {'slow': 0.05}
+
+        assert await engine._run_retriever('slow', lambda: engine._fetch_vehicles('slow', ())) == []
+        # The connection is released for the next query
+        rows = await asyncio.wait_for(engine._fetch_vehicles('fast', ()), timeout=1)
+
+        assert rows == [{'id': 'vehicle_1'}]
+        assert engine.stats['queries_cancelled'] == 1
+        engine.db_conn.rollback.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_timeout_starts_when_the_query_starts(self, engine):
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda query, params: time.sleep(0.15 if query == 'slow' else 0.02)
+        cursor.fetchall.side_effect = lambda: [{'id': cursor.execute.call_args[0][0]}]
+        engine.db_conn.cursor.return_value.__enter__.return_value = cursor
+        engine.retriever_timeouts = {'slow': 1.0, 'queued': 0.1}
+
+        slow, queued = await asyncio.gather(
+            engine._run_retriever('slow', lambda: engine._fetch_vehicles('slow', ())),
+            engine._run_retriever('queued', lambda: engine._fetch_vehicles('queued', ()))
+        )
+
+        # 'queued' waited longer than its timeout for the connection, but its own query was quick
+        assert (slow, queued) == ([{'id': 'slow'}], [{'id': 'queued'}])
+        assert engine.stats['retriever_timeouts'] == 0
+
+    @pytest.mark.asyncio
+    async def test_sql_retrievers_use_positional_placeholders(self, engine):
+        engine._fetch_vehicles_sync = MagicMock(return_value=[])
+        attrs = engine._extract_vehicle_attributes(self.request().original_vehicle_data)
+
+        await engine._find_similar_features(attrs)
+        await engine._find_preference_based_recommendations(PREFERENCES, attrs)
+
+        for call in engine._fetch_vehicles_sync.call_args_list:
+            query, params = call[0]
+            assert query.count('%s') == len(params)
@@ -0,0 +1,238 @@
+"""
+Unit Tests for the Columnar Interaction Event Log
+
+Checks the vectorized stats against a scalar recount of the raw events
+across buffered, flushed, compacted and reopened segments, crash leftovers,
+and the InteractionTracker integration.
+"""
+
+import asyncio
+import os
+import pytest
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.recommendation.collaborative_filtering import events_from_tracker
+from src.recommendation.interaction_log import COMPACT_MIN_SEGMENTS, InteractionEventLog
+from src.recommendation.interaction_tracker import InteractionTracker, InteractionType
+
+NOW = datetime(2026, 10, 18, 12, 0)
+TYPES = ['view', 'save', 'compare', 'search', 'recommendation_click']
+
+
+def make_events(count, seed=8):
+    rng = np.random.default_rng(seed)
+    events = []
+    for _ in range(count):
+        kind = TYPES[rng.integers(len(TYPES))]
+        vehicles = [] if kind == 'search' else [f'vehicle_{v}' for v in rng.choice(30, size=rng.integers(1, 4), replace=False)]
+        events.append({
+            'user_id': f'user_{rng.integers(6)}',
+            'session_id': f'session_{rng.integers(15)}',
+            'type': kind,
+            'vehicle_ids': vehicles,
+            'timestamp': NOW - timedelta(minutes=int(rng.integers(0, 60 * 24 * 40))),
+            'query': f'family suv {rng.integers(5)}' if kind == 'search' else None,
+        })
+    return events
+
+
+def reference_stats(events, user_id, days):
+    """What the old per-session list scan computed, over the raw events"""
+    cutoff = NOW - timedelta(days=days)
+    selected = [e for e in events if e['user_id'] == user_id and e['timestamp'] >= cutoff]
+    types, daily = {}, {}
+    for event in selected:
+        types[event['type']] = types.get(event['type'], 0) + 1
+        day = datetime.fromtimestamp(event['timestamp'].timestamp(), tz=timezone.utc).date().isoformat()
+        daily[day] = daily.get(day, 0) + 1
+    return {
+        'total_interactions': len(selected),
+        'interaction_types': types,
+        'daily_activity': daily,
+        'vehicle_engagement': {
+            'unique_vehicles_viewed': len({v for e in selected if e['type'] == 'view' for v in e['vehicle_ids']}),
+            'total_vehicles_saved': len({v for e in selected if e['type'] == 'save' for v in e['vehicle_ids']}),
+            'total_comparisons': sum(e['type'] == 'compare' for e in selected),
+        },
+    }
+
+
+def append_all(log, events):
+    for event in events:
+        log.append(
+            event['user_id'], event['session_id'], event['type'], event['vehicle_ids'], event['timestamp'], event['query']
+        )
+
+
+class TestInteractionEventLog:
+    """Test suite for segment storage and columnar queries"""
+
+    @pytest.mark.parametrize('flush_rows', [10 ** 6, 37])
+    def test_stats_match_event_recount(self, flush_rows):
+        events = make_events(600)
+        log = InteractionEventLog(flush_rows=flush_rows)
+        append_all(log, events)
+
+        for user_id in ['user_0', 'user_3', 'user_5']:
+            for days in [1, 7, 30]:
+                assert log.interaction_stats(user_id, days, now=NOW) == reference_stats(events, user_id, days)
+        assert log.interaction_stats('nobody', 30, now=NOW)['total_interactions'] == 0
+
+    def test_persisted_segments_survive_reopen_and_compaction(self, tmp_path):
+        events = make_events(400)
+        log = InteractionEventLog(str(tmp_path), flush_rows=50)
+        append_all(log, events)
+        log.flush()
+        segments_before = log.get_stats()['segments']
+
+        merged_days = log.compact(now=NOW)
+        reopened = InteractionEventLog(str(tmp_path))
+
+        assert merged_days > 0
+        assert reopened.get_stats()['segments'] < segments_before
+        for user_id in ['user_1', 'user_4']:
+            assert reopened.interaction_stats(user_id, 45, now=NOW) == reference_stats(events, user_id, 45)
+        assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+
+    def test_today_is_compacted_only_once_it_has_many_segments(self):
+        log = InteractionEventLog(flush_rows=1)
+        for i in range(COMPACT_MIN_SEGMENTS - 1):
+            log.append('buyer', 'session', 'view', [f'vehicle_{i}'], NOW)
+
+        assert log.compact(now=NOW) == 0
+        log.append('buyer', 'session', 'view', ['vehicle_x'], NOW)
+        assert log.compact(now=NOW) == 1
+        assert log.get_stats()['segments'] == 1
+        assert log.interaction_stats('buyer', 1, now=NOW)['vehicle_engagement']['unique_vehicles_viewed'] == COMPACT_MIN_SEGMENTS
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_is_flushed_off_the_event_loop(self, tmp_path, monkeypatch):
+        log = InteractionEventLog(str(tmp_path), flush_rows=3)
+        write_segment, release = log._write_segment, threading.Event()
+
+        def slow_write(day, columns):
+            assert release.wait(timeout=5), 'segment write never released'
+            return write_segment(day, columns)
+
+        monkeypatch.setattr(log, '_write_segment', slow_write)
+        for i in range(3):
+            log.append('buyer', 'session', 'view', [f'vehicle_{i}'], NOW)
+
+        # The write is stuck, yet appends and queries on the loop still go through
+        await asyncio.sleep(0.05)
+        assert log.pending_flush is not None and not log.pending_flush.done()
+        log.append('buyer', 'session', 'save', ['vehicle_9'], NOW)
+        assert log.interaction_stats('buyer', 1, now=NOW)['interaction_types'] == {'view': 3, 'save': 1}
+
+        release.set()
+        await log.pending_flush
+        assert log.get_stats()['rows_written'] == 3 and log.get_stats()['buffered_rows'] == 1
+        log.close()
+        assert InteractionEventLog(str(tmp_path)).interaction_stats('buyer', 1, now=NOW)['total_interactions'] == 4
+
+    def test_torn_writes_are_ignored_on_reopen(self, tmp_path):
+        log = InteractionEventLog(str(tmp_path))
+        log.append('buyer', 'session', 'save', ['vehicle_1'], NOW)
+        log.close()
+        with open(tmp_path / 'strings-w0.jsonl', 'a') as f:
+            f.write('"half-writ')
+        day_dir = next(path for path in tmp_path.iterdir() if path.is_dir())
+        (day_dir / 'w0-00000099.seg.tmp').write_bytes(b'\x00' * 7)
+
+        reopened = InteractionEventLog(str(tmp_path))
+
+        assert reopened.writer == 'w0'
+        assert reopened.interaction_stats('buyer', 1, now=NOW)['interaction_types'] == {'save': 1}
+        assert not (day_dir / 'w0-00000099.seg.tmp').exists()
+
+    def test_concurrent_writers_keep_their_own_segments(self, tmp_path):
+        events = make_events(300)
+        first = InteractionEventLog(str(tmp_path), flush_rows=40)
+        second = InteractionEventLog(str(tmp_path), flush_rows=40)
+        append_all(first, events[:150])
+        append_all(second, events[150:])
+        first.flush()
+        second.flush()
+        unfinished = tmp_path / next(path.name for path in tmp_path.iterdir() if path.is_dir()) / 'w1-00009999.seg.tmp'
+        unfinished.write_bytes(b'\x00' * 7)
+
+        # A third process reads both writers; compaction only merges (and deletes) its own segments
+        first.close()
+        reader = InteractionEventLog(str(tmp_path))
+        reader.compact(now=NOW)
+        second.compact(now=NOW)
+
+        assert (first.writer, second.writer, reader.writer) == ('w0', 'w1', 'w0')
+        assert unfinished.exists()
+        for log in (reader, InteractionEventLog(str(tmp_path))):
+            for user_id in ['user_0', 'user_2', 'user_5']:
+                assert log.interaction_stats(user_id, 45, now=NOW) == reference_stats(events, user_id, 45)
+
+    def test_behavior_summary(self):
+        log = InteractionEventLog()
+        log.append('buyer', 's1', 'view', ['a', 'b'], NOW)
+        log.append('buyer', 's1', 'view', ['a'], NOW + timedelta(minutes=5))
+        log.append('buyer', 's1', 'search', [], NOW + timedelta(minutes=6), query='red family suv')
+        log.append('buyer', 's2', 'view', ['a'], NOW + timedelta(days=1))
+        log.append('buyer', 's2', 'save', ['a'], NOW + timedelta(days=1, minutes=10))
+
+        summary = log.behavior_summary('buyer')
+
+        assert summary['total_sessions'] == 2
+        assert summary['total_views'] == 3  # a and b in s1, a again in s2
+        assert summary['total_saves'] == 1
+        assert summary['total_searches'] == 1
+        assert summary['avg_session_duration'] == pytest.approx((6 * 60 + 10 * 60) / 2)
+        assert summary['avg_interactions_per_session'] == pytest.approx(2.5)
+        assert summary['avg_search_length'] == 3
+        assert sorted(summary['viewed_vehicles']) == ['a', 'b']
+
+
+class TestTrackerOnEventLog:
+    """Test the InteractionTracker integration"""
+
+    @pytest.mark.asyncio
+    async def test_history_outlives_sessions(self):
+        tracker = InteractionTracker()
+        await tracker.track_interaction(
+            {'user_id': 'buyer', 'interaction_type': InteractionType.VIEW, 'vehicle_ids': ['vehicle_1', 'vehicle_2']}
+        )
+        await tracker.track_interaction(
+            {'user_id': 'buyer', 'interaction_type': InteractionType.SEARCH, 'interaction_data': {'query': 'awd wagon'}}
+        )
+        session_id = tracker.user_sessions['buyer'][0]
+
+        await tracker._end_session(session_id)
+        stats = await tracker.get_interaction_stats('buyer', days=1)
+        profile = await tracker.get_user_profile('buyer')
+
+        assert 'buyer' not in tracker.user_sessions
+        assert stats['total_interactions'] == 2
+        assert stats['interaction_types'] == {'view': 1, 'search': 1}
+        assert stats['vehicle_engagement']['unique_vehicles_viewed'] == 2
+        assert profile.total_sessions == 1
+        assert profile.total_views == 2
+        assert profile.interaction_patterns['unique_search_terms'] == 2
+        assert {(e.user_id, e.vehicle_id, e.interaction_type) for e in events_from_tracker(tracker)} == {
+            ('buyer', 'vehicle_1', 'view'), ('buyer', 'vehicle_2', 'view')
+        }
+
+    @pytest.mark.asyncio
+    async def test_session_keeps_only_recent_interactions(self):
+        tracker = InteractionTracker()
+        tracker.max_session_interactions = 5
+        for i in range(12):
+            await tracker.track_interaction(
+                {'user_id': 'buyer', 'interaction_type': InteractionType.VIEW, 'vehicle_ids': [f'vehicle_{i}']}
+            )
+
+        session = tracker.active_sessions[tracker.user_sessions['buyer'][0]]
+        sessions = await tracker.get_user_sessions('buyer')
+
+        assert len(session.interactions) == 5
+        assert session.interactions[-1]['vehicle_ids'] == ['vehicle_11']
+        assert sessions[0]['interaction_count'] == 12
+        assert (await tracker.get_interaction_stats('buyer'))['total_interactions'] == 12
@@ -0,0 +1,205 @@
+"""
+Unit Tests for the Vehicle Similarity Graph
+
+Checks the blocked top-K build against brute force, incremental
+add/remove against a full rebuild, persistence rows and the lookups used
+by RecommendationEngine and FavoritesRecommendationEngine.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import Mock, AsyncMock, MagicMock
+
+import numpy as np
+
+from src.recommendation import similarity_graph
+from src.recommendation.collaborative_filtering import CollaborativeFilteringEngine
+from src.recommendation.favorites_recommendation_engine import FavoritesRecommendationEngine
+from src.recommendation.recommendation_engine import RecommendationEngine
+from src.recommendation.similarity_graph import VehicleSimilarityGraph
+
+
+def make_embeddings(count, dim=16, seed=5):
+    rng = np.random.default_rng(seed)
+    return [(f'vehicle_{i}', rng.standard_normal(dim).astype(np.float32)) for i in range(count)]
+
+
+def brute_force(embeddings, vehicle_id, k):
+    ids = [vehicle for vehicle, _ in embeddings]
+    matrix = np.array([vector / np.linalg.norm(vector) for _, vector in embeddings])
+    scores = matrix @ matrix[ids.index(vehicle_id)]
+    ranked = [(ids[i], float(scores[i])) for i in np.argsort(-scores) if ids[i] != vehicle_id and scores[i] > 0]
+    return ranked[:k]
+
+
+def assert_same_neighbors(actual, expected):
+    assert [vehicle for vehicle, _ in actual] == [vehicle for vehicle, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected], abs=1e-5)
+
+
+class TestVehicleSimilarityGraph:
+    """Test suite for VehicleSimilarityGraph"""
+
+    def test_build_matches_brute_force(self, monkeypatch):
+        monkeypatch.setattr(similarity_graph, '_BLOCK_CELLS', 64)  # several blocks
+        embeddings = make_embeddings(40)
+        graph = VehicleSimilarityGraph(top_k=5)
+
+        graph.build(embeddings)
+
+        for vehicle_id in ('vehicle_0', 'vehicle_17', 'vehicle_39'):
+            assert_same_neighbors(graph.similar(vehicle_id, limit=5), brute_force(embeddings, vehicle_id, 5))
+
+    def test_incremental_updates_match_rebuild(self):
+        embeddings = make_embeddings(30)
+        graph = VehicleSimilarityGraph(top_k=5)
+        graph.build(embeddings[:20])
+
+        for vehicle_id, vector in embeddings[20:]:
+            assert graph.add_vehicle(vehicle_id, vector.tolist())
+        for vehicle_id in ('vehicle_3', 'vehicle_25'):
+            assert graph.remove_vehicle(vehicle_id)
+
+        remaining = [(v, e) for v, e in embeddings if v not in ('vehicle_3', 'vehicle_25')]
+        rebuilt = VehicleSimilarityGraph(top_k=5)
+        rebuilt.build(remaining)
+        for vehicle_id, _ in remaining:
+            assert_same_neighbors(graph.similar(vehicle_id, limit=5), rebuilt.similar(vehicle_id, limit=5))
+        assert 'vehicle_3' not in graph and graph.similar('vehicle_3') == []
+
+    def test_updates_during_build_do_not_block_and_survive_the_swap(self, monkeypatch):
+        embeddings = make_embeddings(30)
+        graph = VehicleSimilarityGraph(top_k=5)
+        graph.build(embeddings[:20])
+        fill_rows, served, building = graph._fill_rows, [], []
+
+        def update_while_building(*args):
+            if not building:
+                building.append(True)
+                worker = threading.Thread(target=lambda: (
+                    graph.add_vehicle(*embeddings[29]),
+                    graph.remove_vehicle('vehicle_3'),
+                    served.append(graph.similar('vehicle_0', limit=5))
+                ))
+                worker.start()
+                worker.join(timeout=5)
+                assert not worker.is_alive(), 'updates blocked on the build'
+            return fill_rows(*args)
+
+        monkeypatch.setattr(graph, '_fill_rows', update_while_building)
+        graph.build(embeddings[:25])
+
+        assert len(served[0]) == 5  # the previous graph kept serving
+        expected = [(v, e) for v, e in embeddings[:25] + embeddings[29:] if v != 'vehicle_3']
+        rebuilt = VehicleSimilarityGraph(top_k=5)
+        rebuilt.build(expected)
+        for vehicle_id, _ in expected:
+            assert_same_neighbors(graph.similar(vehicle_id, limit=5), rebuilt.similar(vehicle_id, limit=5))
+        assert 'vehicle_3' not in graph
+
+    def test_lookup_filters(self):
+        graph = VehicleSimilarityGraph(top_k=10)
+        graph.build(make_embeddings(20))
+
+        everything = [vehicle for vehicle, _ in graph.similar('vehicle_0', limit=10)]
+        filtered = graph.similar(
+            'vehicle_0', limit=3, exclude_ids=[everything[0]], predicate=lambda v: v != everything[1]
+        )
+
+        assert [vehicle for vehicle, _ in filtered] == everything[2:5]
+
+    def test_rows_round_trip(self):
+        graph = VehicleSimilarityGraph(top_k=4)
+        graph.build(make_embeddings(12))
+        rows = graph.to_rows()
+
+        loaded = VehicleSimilarityGraph(top_k=4)
+        loaded.load_rows(rows)
+
+        assert len(rows) == 12 and len(rows[0]['neighbor_ids']) == 4
+        for vehicle_id in ('vehicle_0', 'vehicle_5'):
+            assert_same_neighbors(loaded.similar(vehicle_id), graph.similar(vehicle_id))
+        # Loaded rows have no embeddings: removals are filtered, adds wait for a build
+        loaded.remove_vehicle(graph.similar('vehicle_0')[0][0])
+        assert_same_neighbors(loaded.similar('vehicle_0'), graph.similar('vehicle_0')[1:])
+        assert not loaded.add_vehicle('vehicle_new', np.ones(16))
+
+    def test_dirty_rows_cover_incremental_updates(self):
+        embeddings = make_embeddings(20)
+        graph = VehicleSimilarityGraph(top_k=4)
+        graph.build(embeddings[:15])
+        before = {row['listing_id']: row for row in graph.to_rows()}
+
+        graph.add_vehicle(*embeddings[15])
+        graph.remove_vehicle('vehicle_3')
+        rows, removed = graph.take_dirty_rows()
+
+        assert removed == ['vehicle_3']
+        after = {row['listing_id']: row for row in graph.to_rows()}
+        changed = {v for v, row in after.items() if before.get(v) != row}
+        assert changed and changed <= {row['listing_id'] for row in rows}
+        assert graph.take_dirty_rows() == ([], [])
+
+    @pytest.mark.asyncio
+    async def test_flush_persists_changes_and_retries_failures(self):
+        embeddings = make_embeddings(12)
+        graph = VehicleSimilarityGraph(top_k=4)
+        graph.build(embeddings[:10])
+        graph.add_vehicle(*embeddings[10])
+        graph.remove_vehicle('vehicle_2')
+
+        save_rows = AsyncMock(side_effect=[Exception("Supabase down"), None])
+        delete_rows = AsyncMock()
+        await graph.flush(save_rows, delete_rows)
+        assert graph.get_stats()['pending_flush'] > 0
+
+        await graph.flush(save_rows, delete_rows)
+        saved = {row['listing_id'] for row in save_rows.call_args[0][0]}
+        assert 'vehicle_10' in saved and 'vehicle_2' not in saved
+        delete_rows.assert_awaited_once_with(['vehicle_2'])
+        assert graph.get_stats()['pending_flush'] == 0
+
+
+class TestSimilarVehicleLookups:
+    """Similar-vehicle calls served from the graph"""
+
+    @pytest.fixture
+    def graph(self):
+        graph = VehicleSimilarityGraph(top_k=5)
+        graph.build(make_embeddings(10))
+        return graph
+
+    @pytest.mark.asyncio
+    async def test_recommendation_engine_uses_graph(self, graph):
+        vehicle_db = Mock()
+        vehicle_db.get_vehicles_by_ids = AsyncMock(side_effect=lambda ids: [{'id': i} for i in ids])
+        vehicle_db.get_similar_vehicles = AsyncMock()
+        engine = RecommendationEngine(
+            vehicle_db, Mock(), collaborative_filter=CollaborativeFilteringEngine(), similarity_graph=graph
+        )
+
+        similar = await engine._get_similar_vehicles('vehicle_0', 3)
+
+        assert [v['id'] for v in similar] == [v for v, _ in graph.similar('vehicle_0', limit=3)]
+        vehicle_db.get_similar_vehicles.assert_not_awaited()
+
+        await engine._get_similar_vehicles('unknown', 3)
+        vehicle_db.get_similar_vehicles.assert_awaited_once_with('unknown', 3)
+
+    @pytest.mark.asyncio
+    async def test_favorites_engine_uses_graph(self, graph):
+        engine = FavoritesRecommendationEngine(similarity_graph=graph)
+        engine.rag_service = Mock(search=AsyncMock())
+        expected_ids = [v for v, _ in graph.similar('vehicle_0', limit=20)]
+        cursor = MagicMock()
+        # The database returns rows in its own order (and drops unavailable vehicles)
+        cursor.fetchall.return_value = [{'id': expected_ids[2]}, {'id': expected_ids[0]}]
+        engine.db_conn = MagicMock()
+        engine.db_conn.cursor.return_value.__enter__.return_value = cursor
+
+        similar = await engine._find_semantically_similar_vehicles({'id': 'vehicle_0'})
+
+        assert cursor.execute.call_args[0][1] == (expected_ids,)
+        assert [v['id'] for v in similar] == [expected_ids[0], expected_ids[2]]
+        engine.rag_service.search.assert_not_awaited()
@@ -0,0 +1,184 @@
+"""
+Unit Tests for User Taste Vectors
+
+Checks the incremental O(d) update against the decayed weighted average
+recomputed from full history, float16 persistence, and the taste re-scoring
+used by InteractionTracker, RecommendationEngine and semantic search.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import numpy as np
+
+from src.recommendation.interaction_tracker import InteractionTracker, InteractionType
+from src.recommendation.recommendation_engine import RecommendationEngine
+from src.recommendation.taste_vectors import TASTE_WEIGHTS, TasteVectorStore, UserTasteVector
+
+DIM = 64
+HALF_LIFE_DAYS = 7.0
+START = datetime(2026, 9, 1)
+
+
+def unit(vector):
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def embeddings():
+    rng = np.random.default_rng(5)
+    return {f'vehicle_{i}': rng.standard_normal(DIM).astype(np.float32) for i in range(40)}
+
+
+@pytest.fixture
+def store(embeddings):
+    return TasteVectorStore(embedding_lookup=embeddings.get, half_life_days=HALF_LIFE_DAYS)
+
+
+def reference_taste(events, embeddings, now):
+    """Decayed weighted average recomputed from the whole history"""
+    half_life = HALF_LIFE_DAYS * 24 * 60 * 60
+    weights = np.array([
+        TASTE_WEIGHTS[kind] * 0.5 ** ((now - when).total_seconds() / half_life) for _, kind, when in events
+    ])
+    vectors = np.array([unit(embeddings[vehicle_id]) for vehicle_id, _, _ in events])
+    return (weights[:, np.newaxis] * vectors).sum(axis=0) / weights.sum()
+
+
+def make_events(count, seed=2, shuffle=False):
+    rng = np.random.default_rng(seed)
+    events = [
+        (f'vehicle_{rng.integers(40)}', rng.choice(list(TASTE_WEIGHTS)), START + timedelta(hours=6 * i))
+        for i in range(count)
+    ]
+    if shuffle:
+        rng.shuffle(events)
+    return events
+
+
+class TestTasteVectorStore:
+    """Test suite for incremental taste vectors"""
+
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_incremental_update_matches_full_recompute(self, store, embeddings, shuffle):
+        events = make_events(120, shuffle=shuffle)
+        for vehicle_id, kind, when in events:
+            assert store.record_interaction('buyer', vehicle_id, kind, when)
+
+        newest = max(when for _, _, when in events)
+        np.testing.assert_allclose(
+            store.tastes['buyer'].vector, reference_taste(events, embeddings, newest), atol=1e-5
+        )
+
+    def test_ignored_interactions(self, store):
+        assert not store.record_interaction('buyer', 'vehicle_1', InteractionType.SEARCH)
+        assert not store.record_interaction('buyer', 'unknown_vehicle', InteractionType.VIEW)
+
+        assert 'buyer' not in store
+        assert store.stats['missing_embeddings'] == 1
+
+    def test_scores_are_one_dot_product(self, store, embeddings):
+        for vehicle_id, kind, when in make_events(30):
+            store.record_interaction('buyer', vehicle_id, kind, when)
+        candidates = np.array([unit(embeddings[f'vehicle_{i}']) for i in range(40)])
+
+        scores = store.score('buyer', candidates)
+
+        expected = np.clip(candidates @ unit(store.tastes['buyer'].vector), 0, 1)
+        np.testing.assert_allclose(scores, expected, atol=1e-6)
+        np.testing.assert_allclose(
+            store.score_ids('buyer', [f'vehicle_{i}' for i in range(40)]), expected, atol=1e-6
+        )
+        assert not store.score('newcomer', candidates).any()
+
+    def test_float16_rows_round_trip(self, store, embeddings):
+        for vehicle_id, kind, when in make_events(50):
+            store.record_interaction('buyer', vehicle_id, kind, when)
+
+        rows = store.take_dirty_rows()
+        restored = TasteVectorStore(embedding_lookup=embeddings.get, half_life_days=HALF_LIFE_DAYS)
+        restored.load_rows(rows)
+
+        assert len(rows[0]['taste']) == DIM * 2
+        assert store.take_dirty_rows() == []
+        original, loaded = store.tastes['buyer'], restored.tastes['buyer']
+        np.testing.assert_allclose(loaded.vector, original.vector, atol=1e-3)
+        assert loaded.weight == pytest.approx(original.weight)
+        assert loaded.updated_at == pytest.approx(original.updated_at)
+
+    def test_bytes_are_little_endian_float16(self):
+        taste = UserTasteVector(np.array([0.5, -0.25], dtype=np.float32), 1.0, 0.0)
+
+        assert taste.to_bytes() == np.array([0.5, -0.25], dtype='<f2').tobytes()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, store):
+        store.record_interaction('buyer', 'vehicle_1', 'view')
+        saved = []
+
+        def failing_save(rows):
+            raise RuntimeError("database unavailable")
+
+        await store.flush(failing_save)
+        await store.flush(saved.extend)
+
+        assert [row['user_id'] for row in saved] == ['buyer']
+        assert store.stats['flushed'] == 1
+
+
+class TestTastePersonalization:
+    """Test the tracker, recommendation and search integrations"""
+
+    @pytest.mark.asyncio
+    async def test_tracker_updates_taste_per_vehicle(self, store):
+        tracker = InteractionTracker(taste_vectors=store)
+
+        await tracker.track_interaction(
+            {'user_id': 'buyer', 'interaction_type': InteractionType.VIEW, 'vehicle_ids': ['vehicle_1', 'vehicle_2']}
+        )
+        await tracker.track_interaction(
+            {'user_id': 'buyer', 'interaction_type': InteractionType.SAVE, 'vehicle_ids': ['vehicle_3']}
+        )
+
+        assert store.stats['updates'] == 3
+        assert store.tastes['buyer'].weight == pytest.approx(5.0, rel=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_content_scores_blend_taste(self, store, embeddings):
+        engine = RecommendationEngine(Mock(), Mock(), taste_vectors=store)
+        vehicles = [
+            {'id': vehicle_id, 'make': 'Toyota', 'price': 30000, 'embedding': embedding.tolist()}
+            for vehicle_id, embedding in embeddings.items()
+        ]
+        store.record_interaction('buyer', 'vehicle_7', 'inquiry')
+        batch = engine._candidate_batch(vehicles)
+
+        plain = await engine._content_scores(batch, {}, None)
+        personalized = await engine._content_scores(batch, {}, None, 'buyer')
+
+        np.testing.assert_allclose(await engine._content_scores(batch, {}, None, 'newcomer'), plain)
+        expected = 0.7 * plain + 0.3 * store.score('buyer', batch.embeddings)
+        np.testing.assert_allclose(personalized, expected, atol=1e-6)
+        assert batch.ids[int(np.argmax(personalized))] == 'vehicle_7'
+
+    def test_search_results_reranked_by_taste(self, store, embeddings):
+        from src.api.semantic_search_api import SemanticSearchRequest, SemanticSearchResponse, SemanticSearchService
+
+        service = SemanticSearchService()
+        service.taste_vectors = store
+        store.record_interaction('buyer', 'vehicle_3', 'favorite')
+        results = [
+            Mock(id=f'vehicle_{i}', similarity_score=0.80 - i * 0.001) for i in range(5)
+        ]
+        response = SemanticSearchResponse.model_construct(results=results, search_metadata={})
+
+        personalized = service._personalize(response, SemanticSearchRequest(query='suv', user_id='buyer'))
+        by_price = service._personalize(
+            SemanticSearchResponse.model_construct(results=list(results), search_metadata={}),
+            SemanticSearchRequest(query='suv', user_id='buyer', sort_by='price')
+        )
+
+        assert personalized.results[0].id == 'vehicle_3'
+        assert personalized.search_metadata['personalized'] is True
+        assert [r.id for r in by_price.results] == [f'vehicle_{i}' for i in range(5)]
@@ -0,0 +1,199 @@
+"""
+Unit Tests for Vehicle Signal Table and Recommendation Enrichment
+
+Bulk trending/urgency lookups, table refresh, and template-first
+explanations with deadline-bound, cached GPT-4 upgrades.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from src.recommendation.collaborative_filtering import CollaborativeFilteringEngine, InteractionEvent
+from src.recommendation.recommendation_engine import Recommendation, RecommendationEngine
+from src.recommendation.vehicle_signals import VehicleSignals, VehicleSignalTable
+
+METRICS = {
+    f'vehicle_{i}': {'interested_users': i, 'favorites': i // 2, 'inquiries': i // 4}
+    for i in range(10)
+}
+METRICS['vehicle_3']['available_units'] = 1
+METRICS['vehicle_4']['price_drop'] = 0.05
+
+
+class RecordingLoader:
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self.calls = []
+
+    async def __call__(self, vehicle_ids):
+        self.calls.append(vehicle_ids)
+        if vehicle_ids is None:
+            return dict(self.metrics)
+        return {v: self.metrics[v] for v in vehicle_ids if v in self.metrics}
+
+
+class TestVehicleSignalTable:
+    """Test suite for VehicleSignalTable"""
+
+    @pytest.mark.asyncio
+    async def test_missing_ids_fetched_in_one_call(self):
+        loader = RecordingLoader()
+        table = VehicleSignalTable(loader)
+        await table.refresh()
+
+        ids = ['vehicle_1', 'new_a', 'new_b', 'new_a']
+        signals = await table.get_signals(ids)
+        await table.get_signals(['new_b'])
+
+        assert loader.calls == [None, ['new_a', 'new_b']]
+        assert set(signals) == {'vehicle_1', 'new_a', 'new_b'}
+        assert signals['new_a'].trending_score == 0.0
+        assert table.stats['table_hits'] == 2
+
+    @pytest.mark.asyncio
+    async def test_neutral_until_first_full_refresh(self):
+        loader = RecordingLoader()
+        table = VehicleSignalTable(loader)
+
+        signals = await table.get_signals(['vehicle_9'])
+        assert signals['vehicle_9'] == VehicleSignals()
+
+        await asyncio.sleep(0)  # the lookup started the background refresh
+        signals = await table.get_signals(['vehicle_9'])
+        await table.stop_background_refresh()
+
+        assert loader.calls == [None]
+        assert signals['vehicle_9'].trending_score == pytest.approx(0.9)
+        assert table.stats['neutral_lookups'] == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_ranks_against_whole_catalogue(self):
+        loader = RecordingLoader()
+        table = VehicleSignalTable(loader)
+        await table.refresh()
+
+        signals = await table.get_signals(['vehicle_9', 'vehicle_3', 'vehicle_4', 'vehicle_0'])
+
+        assert loader.calls == [None]
+        assert signals['vehicle_9'].trending_score == pytest.approx(0.9)
+        assert signals['vehicle_9'].urgency_indicators == ['high_demand']
+        assert signals['vehicle_3'].urgency_indicators == ['limited_availability']
+        assert signals['vehicle_4'].urgency_indicators == ['price_drop']
+        assert signals['vehicle_0'].trending_score == 0.0
+
+    @pytest.mark.asyncio
+    async def test_stale_rows_are_reloaded(self):
+        loader = RecordingLoader()
+        table = VehicleSignalTable(loader, refresh_seconds=0)
+        await table.refresh()
+
+        await asyncio.sleep(0.001)
+        await table.get_signals(['vehicle_1'])
+        await asyncio.sleep(0.001)
+        await table.get_signals(['vehicle_1'])
+
+        assert loader.calls == [None, ['vehicle_1'], ['vehicle_1']]
+
+    def test_engagement_counts_from_collaborative_filter(self):
+        engine = CollaborativeFilteringEngine()
+        engine.rebuild([
+            InteractionEvent('a', 'v1', 'view'), InteractionEvent('b', 'v1', 'favorite'),
+            InteractionEvent('c', 'v1', 'inquiry'), InteractionEvent('c', 'v2', 'view')
+        ])
+        engine.record_interaction('d', 'v2', 'save')
+
+        assert engine.vehicle_engagement(['v1', 'v2', 'missing']) == {
+            'v1': {'interested_users': 3, 'favorites': 2, 'inquiries': 1},
+            'v2': {'interested_users': 2, 'favorites': 1, 'inquiries': 0},
+        }
+
+
+class TestRecommendationEnrichment:
+    """Test the bulk enrichment stage of RecommendationEngine"""
+
+    @pytest.fixture
+    def loader(self):
+        return RecordingLoader()
+
+    @pytest.fixture
+    def engine(self, loader):
+        engine = RecommendationEngine(
+            Mock(), Mock(), collaborative_filter=CollaborativeFilteringEngine(),
+            signal_table=VehicleSignalTable(loader)
+        )
+        engine.explanation_deadline = 0.05
+        return engine
+
+    @staticmethod
+    def recommendations(count=5):
+        return [
+            Recommendation(
+                vehicle_id=f'vehicle_{i}',
+                vehicle_data={'make': 'Toyota', 'model': 'Camry'},
+                recommendation_score=0.8,
+                match_percentage=80,
+                personalization_factors=['content_match']
+            )
+            for i in range(count)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_signals_loaded_once_for_all_results(self, engine, loader):
+        recommendations = self.recommendations(12)  # vehicle_10 and vehicle_11 are not in the table
+        await engine.signal_table.refresh()
+
+        await engine._enrich_recommendations(recommendations, {'preferences': {}}, None, None)
+
+        assert loader.calls == [None, ['vehicle_10', 'vehicle_11']]
+        assert all(rec.trending_score is not None for rec in recommendations)
+        assert all(rec.explanation.reasoning_type == 'template_personalized' for rec in recommendations)
+
+    @pytest.mark.asyncio
+    async def test_slow_gpt4_falls_back_to_template_then_cached(self, engine):
+        engine.gpt4_enabled, engine.openai_client = True, Mock()
+        calls = []
+
+        async def gpt4(vehicle_data, *args):
+            calls.append(vehicle_data)
+            await asyncio.sleep(0.2 if len(calls) == 1 else 0)
+            return "A great match."
+
+        engine._generate_gpt4_explanation = gpt4
+        profile = {'preferences': {'preferred_brands': ['Toyota']}}
+
+        first = self.recommendations(3)
+        await engine._enrich_recommendations(first, profile, 'sedan', None)
+        reasoning = [rec.explanation.reasoning_type for rec in first]
+        assert reasoning == ['template_personalized', 'gpt4_personalized', 'gpt4_personalized']
+
+        await asyncio.sleep(0.25)  # the late explanation finishes in the background
+        second = self.recommendations(3)
+        await engine._enrich_recommendations(second, profile, 'sedan', None)
+
+        assert len(calls) == 3
+        assert all(rec.explanation.reasoning_type == 'gpt4_personalized' for rec in second)
+
+        # A different profile is not served another profile's explanations
+        third = self.recommendations(1)
+        await engine._enrich_recommendations(third, {'preferences': {}}, 'sedan', None)
+        assert len(calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_cached_explanations_are_keyed_by_context_vehicles(self, engine):
+        engine.gpt4_enabled, engine.openai_client = True, Mock()
+        calls = []
+
+        async def gpt4(vehicle_data, *args):
+            calls.append(vehicle_data)
+            return "A great match."
+
+        engine._generate_gpt4_explanation = gpt4
+        profile = {'preferences': {}}
+
+        await engine._enrich_recommendations(self.recommendations(1), profile, 'sedan', ['v1', 'v2'])
+        await engine._enrich_recommendations(self.recommendations(1), profile, 'sedan', ['v2', 'v1'])
+        assert len(calls) == 1
+
+        await engine._enrich_recommendations(self.recommendations(1), profile, 'sedan', ['v3'])
+        assert len(calls) == 2
@@ -0,0 +1,184 @@
+"""
+Otto.AI Vehicle Signal Table
+
+In-memory table of per-vehicle demand signals (trending score and urgency
+indicators) used to enrich recommendation results.
+
+The table is refreshed in full periodically from a bulk loader. Vehicles
+missing from it (or stale) are fetched with one loader call per request,
+so enriching N results costs at most one query instead of N. Trending
+scores are percentiles against the whole catalogue, so until the first
+full refresh completes every vehicle gets neutral signals (the first
+lookup starts the background refresh if nothing else has).
+
+A loader takes a list of vehicle IDs (or None for everything) and returns
+raw metrics per vehicle:
+- interested_users, favorites, inquiries: engagement counts
+- available_units (optional): matching units left in inventory
+- price_drop (optional): fractional price reduction
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .collaborative_filtering import INTERACTION_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 300
+HIGH_DEMAND_PERCENTILE = 0.8
+LIMITED_AVAILABILITY_UNITS = 1
+
+
+@dataclass
+class VehicleSignals:
+    """Enrichment signals for one vehicle"""
+    trending_score: Optional[float] = None
+    urgency_indicators: List[str] = field(default_factory=list)
+
+
+def engagement(metrics: Dict[str, Any]) -> float:
+    """Weighted engagement, using the implicit-feedback weights"""
+    return (
+        INTERACTION_WEIGHTS['view'] * (metrics.get('interested_users') or 0) +
+        INTERACTION_WEIGHTS['favorite'] * (metrics.get('favorites') or 0) +
+        INTERACTION_WEIGHTS['inquiry'] * (metrics.get('inquiries') or 0)
+    )
+
+
+class VehicleSignalTable:
+    """Periodically refreshed vehicle_id -> metrics table with bulk lookups"""
+
+    def __init__(self, loader: Callable[[Optional[List[str]]], Any], refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        """
+        Initialize signal table
+
+        Args:
+            loader: Bulk metrics loader (sync or async), see module docstring
+            refresh_seconds: Full refresh interval; also the max age of on-demand rows
+        """
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._sorted_engagement: Optional[np.ndarray] = None
+        self._refreshed = False  # a full refresh has completed
+        self._lock = asyncio.Lock()
+        self.refresh_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'lookups': 0,
+            'table_hits': 0,
+            'loader_calls': 0,
+            'refreshes': 0,
+            'neutral_lookups': 0,
+        }
+
+    async def _load(self, vehicle_ids: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+        self.stats['loader_calls'] += 1
+        result = self.loader(vehicle_ids)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result or {}
+
+    async def refresh(self) -> None:
+        """Reload every vehicle's metrics in one loader call"""
+        metrics = await self._load(None)
+        now = time.monotonic()
+        async with self._lock:
+            self._metrics = dict(metrics)
+            self._loaded_at = {vehicle_id: now for vehicle_id in self._metrics}
+            self._sorted_engagement = None
+            self._refreshed = True
+        self.stats['refreshes'] += 1
+        logger.info(f"♻️ Vehicle signal table refreshed: {len(metrics)} vehicles")
+
+    async def get_signals(self, vehicle_ids: Iterable[str]) -> Dict[str, VehicleSignals]:
+        """Signals for all IDs; missing or stale rows are fetched together in one call"""
+        vehicle_ids = list(dict.fromkeys(vehicle_ids))
+        self.stats['lookups'] += len(vehicle_ids)
+        if not self._refreshed:
+            # Percentiles over a partial table would rank against whichever vehicles were looked up
+            self.start_background_refresh()
+            self.stats['neutral_lookups'] += len(vehicle_ids)
+            return {vehicle_id: VehicleSignals() for vehicle_id in vehicle_ids}
+
+        now = time.monotonic()
+        missing = [
+            vehicle_id for vehicle_id in vehicle_ids
+            if now - self._loaded_at.get(vehicle_id, float('-inf')) > self.refresh_seconds
+        ]
+        self.stats['table_hits'] += len(vehicle_ids) - len(missing)
+
+        if missing:
+            try:
+                fetched = await self._load(missing)
+            except Exception as e:
+                logger.error(f"Error loading vehicle signals: {str(e)}")
+                fetched = {}
+            async with self._lock:
+                for vehicle_id in missing:
+                    # Vehicles without metrics are remembered too, so they are not re-queried
+                    self._metrics[vehicle_id] = fetched.get(vehicle_id) or {}
+                    self._loaded_at[vehicle_id] = now
+                self._sorted_engagement = None
+
+        return self._signals(vehicle_ids)
+
+    def _signals(self, vehicle_ids: List[str]) -> Dict[str, VehicleSignals]:
+        """Trending score as the engagement percentile across the table, plus urgency flags"""
+        if self._sorted_engagement is None:
+            self._sorted_engagement = np.sort(np.array(
+                [engagement(metrics) for metrics in self._metrics.values()], dtype=np.float64
+            ))
+        reference = self._sorted_engagement
+
+        rows = [self._metrics.get(vehicle_id, {}) for vehicle_id in vehicle_ids]
+        values = np.array([engagement(metrics) for metrics in rows], dtype=np.float64)
+        trending = np.where(
+            values > 0, np.searchsorted(reference, values, side='left') / max(len(reference), 1), 0.0
+        )
+
+        signals = {}
+        for vehicle_id, metrics, score in zip(vehicle_ids, rows, trending.tolist()):
+            indicators = []
+            if score >= HIGH_DEMAND_PERCENTILE:
+                indicators.append("high_demand")
+            available = metrics.get('available_units')
+            if available is not None and available <= LIMITED_AVAILABILITY_UNITS:
+                indicators.append("limited_availability")
+            if (metrics.get('price_drop') or 0) > 0:
+                indicators.append("price_drop")
+            signals[vehicle_id] = VehicleSignals(trending_score=float(score), urgency_indicators=indicators)
+        return signals
+
+    def start_background_refresh(self) -> None:
+        """Refresh the full table every refresh_seconds"""
+        if not self.refresh_task:
+            self.refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Vehicle signal refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def stop_background_refresh(self) -> None:
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            try:
+                await self.refresh_task
+            except asyncio.CancelledError:
+                pass
+            self.refresh_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'vehicles': len(self._metrics)}
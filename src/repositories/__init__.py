@@ -5,10 +5,13 @@ Data access layer for database operations
 
 from .listing_repository import ListingRepository, get_listing_repository
 from .image_repository import ImageRepository, get_image_repository
+from .user_taste_repository import UserTasteRepository, get_user_taste_repository
 
 __all__ = [
     'ListingRepository',
     'get_listing_repository',
     'ImageRepository',
-    'get_image_repository'
+    'get_image_repository',
+    'UserTasteRepository',
+    'get_user_taste_repository'
 ]
@@ -4,8 +4,8 @@ Data access layer for vehicle_listings table operations
 """
 
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -130,6 +130,7 @@ class ListingRepository:
             if result.data and len(result.data) > 0:
                 created = result.data[0]
                 logger.info(f"✅ Created listing {created['id']} for VIN: {listing.vin}")
+                self._sync_similarity_graph(created, embedding_changed=True)
                 return created
             else:
                 raise ValueError("Insert returned no data")
@@ -184,6 +185,7 @@ class ListingRepository:
                 if result.data and len(result.data) > 0:
                     updated = result.data[0]
                     logger.info(f"✅ Updated listing {updated['id']} for VIN: {listing.vin}")
+                    self._sync_similarity_graph(updated, embedding_changed='text_embedding' in data)
                     return updated
                 else:
                     raise ValueError("Update returned no data")
@@ -196,6 +198,7 @@ class ListingRepository:
                 if result.data and len(result.data) > 0:
                     created = result.data[0]
                     logger.info(f"✅ Created listing {created['id']} for VIN: {listing.vin}")
+                    self._sync_similarity_graph(created, embedding_changed=True)
                     return created
                 else:
                     raise ValueError("Insert returned no data")
@@ -204,6 +207,96 @@ class ListingRepository:
             logger.error(f"❌ Failed to upsert listing for VIN {listing.vin}: {e}")
             raise
 
+    async def upsert_batch(
+        self,
+        listings: List[ListingCreate],
+        update_metadata: bool = True,
+        chunk_size: int = 500
+    ) -> Dict[str, Any]:
+        """
+        Create or update many listings by VIN in a few round trips.
+
+        Existing VINs are looked up with one IN query per chunk, then rows
+        are written with multi-row upserts (ON CONFLICT vin), grouped by
+        column set since PostgREST bulk writes need uniform keys. If a
+        chunk is rejected, its rows are retried one by one so a single bad
+        row doesn't fail its neighbours.
+
+        Args:
+            listings: ListingCreate models; a repeated VIN keeps the last one
+            update_metadata: If True, merge processing_metadata when updating
+            chunk_size: Rows per request
+
+        Returns:
+            Dict of VIN -> upserted row, or the Exception for rows that failed
+        """
+        by_vin = {listing.vin: listing for listing in listings}
+        vins = list(by_vin)
+        results: Dict[str, Any] = {}
+
+        existing_meta: Dict[str, Dict[str, Any]] = {}
+        if update_metadata:
+            for start in range(0, len(vins), chunk_size):
+                chunk_vins = vins[start:start + chunk_size]
+                try:
+                    result = self.client.table(self.table_name) \
+                        .select('vin, processing_metadata') \
+                        .in_('vin', chunk_vins) \
+                        .execute()
+                except Exception as e:
+                    # Writing without the existing metadata would overwrite it; fail these rows instead
+                    logger.error(f"❌ Failed to look up {len(chunk_vins)} existing listings: {e}")
+                    results.update((vin, e) for vin in chunk_vins)
+                    continue
+                for row in result.data or []:
+                    existing_meta[row['vin']] = row.get('processing_metadata') or {}
+
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for vin, listing in by_vin.items():
+            if vin in results:
+                continue
+            data = listing.model_dump(exclude_none=True)
+
+            # Handle embedding as string for pgvector
+            if data.get('text_embedding'):
+                data['text_embedding'] = str(data['text_embedding'])
+
+            if existing_meta.get(vin):
+                data['processing_metadata'] = {**existing_meta[vin], **data.get('processing_metadata', {})}
+
+            groups.setdefault(tuple(sorted(data)), []).append(data)
+
+        for rows in groups.values():
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                try:
+                    result = self.client.table(self.table_name) \
+                        .upsert(chunk, on_conflict='vin') \
+                        .execute()
+                    for row in result.data or []:
+                        results[row['vin']] = row
+                except Exception as e:
+                    logger.warning(f"⚠️ Bulk upsert of {len(chunk)} listings failed, retrying per row: {e}")
+                    for data in chunk:
+                        try:
+                            result = self.client.table(self.table_name) \
+                                .upsert(data, on_conflict='vin') \
+                                .execute()
+                            if not result.data:
+                                raise ValueError("Upsert returned no data")
+                            results[data['vin']] = result.data[0]
+                        except Exception as row_error:
+                            logger.error(f"❌ Failed to upsert listing for VIN {data['vin']}: {row_error}")
+                            results[data['vin']] = row_error
+
+        for vin in vins:
+            results.setdefault(vin, ValueError("Upsert returned no data"))
+            if isinstance(results[vin], dict):
+                self._sync_similarity_graph(results[vin], embedding_changed=by_vin[vin].text_embedding is not None)
+
+        logger.info(f"✅ Bulk upserted {sum(1 for r in results.values() if isinstance(r, dict))}/{len(vins)} listings")
+        return results
+
     async def get_by_id(self, listing_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a listing by its ID.
@@ -329,6 +422,7 @@ class ListingRepository:
 
             if result.data and len(result.data) > 0:
                 logger.info(f"✅ Updated listing {listing_id}")
+                self._sync_similarity_graph(result.data[0], embedding_changed='text_embedding' in data)
                 return result.data[0]
             return None
 
@@ -354,6 +448,7 @@ class ListingRepository:
 
             if result.data and len(result.data) > 0:
                 logger.info(f"✅ Soft-deleted listing {listing_id}")
+                self._sync_similarity_graph(result.data[0])
                 return True
             return False
 
@@ -399,6 +494,156 @@ class ListingRepository:
             logger.warning("Falling back to empty results - ensure match_vehicle_listings RPC is created")
             return []
 
+    async def find_similar_by_id(self, listing_id: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find similar active listings from the precomputed kNN graph.
+
+        Args:
+            listing_id: UUID string of the source listing
+            limit: Max number of results
+
+        Returns:
+            Listings with similarity scores, best first, or None if the
+            listing is not in the graph (callers fall back to find_similar)
+        """
+        from ..recommendation.similarity_graph import get_vehicle_similarity_graph
+
+        graph = get_vehicle_similarity_graph()
+        if listing_id not in graph:
+            return None
+
+        # Fetch every stored neighbour so inactive ones can be filtered out
+        neighbors = graph.similar(listing_id, limit=graph.top_k)
+        if not neighbors:
+            return []
+
+        try:
+            result = self.client.table(self.table_name) \
+                .select('id, vin, year, make, model, trim, odometer, exterior_color, interior_color, condition_score, condition_grade') \
+                .in_('id', [neighbor_id for neighbor_id, _ in neighbors]) \
+                .eq('status', 'active') \
+                .execute()
+
+            by_id = {row['id']: row for row in result.data or []}
+            return [
+                {**by_id[neighbor_id], 'similarity': score}
+                for neighbor_id, score in neighbors
+                if neighbor_id in by_id
+            ][:limit]
+
+        except Exception as e:
+            logger.error(f"❌ Failed to load similar listings for {listing_id}: {e}")
+            raise
+
+    async def list_active_embeddings(self, page_size: int = 1000) -> List[Tuple[str, Any]]:
+        """
+        (id, text_embedding) for every active listing, for building the kNN graph.
+
+        Args:
+            page_size: Rows per request
+
+        Returns:
+            List of (listing_id, embedding) pairs; listings without embeddings are skipped
+        """
+        pairs: List[Tuple[str, Any]] = []
+        offset = 0
+        while True:
+            result = self.client.table(self.table_name) \
+                .select('id, text_embedding') \
+                .eq('status', 'active') \
+                .order('id') \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+
+            rows = result.data or []
+            pairs.extend((row['id'], row['text_embedding']) for row in rows if row.get('text_embedding'))
+            if len(rows) < page_size:
+                return pairs
+            offset += page_size
+
+    async def save_neighbor_rows(
+        self,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = 500,
+        replace: bool = False
+    ) -> None:
+        """
+        Persist kNN graph rows to the vehicle_neighbors table.
+
+        Args:
+            rows: Rows from VehicleSimilarityGraph.to_rows() / take_dirty_rows()
+            chunk_size: Rows per request
+            replace: Rows are the whole graph; delete rows of listings not in it
+        """
+        saved_at = datetime.now(timezone.utc).isoformat()
+        payload = [{**row, 'updated_at': saved_at} for row in rows]
+        for start in range(0, len(payload), chunk_size):
+            self.client.table('vehicle_neighbors') \
+                .upsert(payload[start:start + chunk_size], on_conflict='listing_id') \
+                .execute()
+
+        if replace:
+            # Every current row was just stamped; older ones belong to listings no longer in the graph
+            # (incremental flushes stamp later, so they survive)
+            self.client.table('vehicle_neighbors') \
+                .delete() \
+                .lt('updated_at', saved_at) \
+                .execute()
+        logger.info(f"✅ Saved {len(rows)} vehicle neighbour rows")
+
+    async def delete_neighbor_rows(self, listing_ids: List[str], chunk_size: int = 500) -> None:
+        """
+        Delete vehicle_neighbors rows of removed listings.
+
+        Args:
+            listing_ids: Listing ids from VehicleSimilarityGraph.take_dirty_rows()
+            chunk_size: Ids per request
+        """
+        for start in range(0, len(listing_ids), chunk_size):
+            self.client.table('vehicle_neighbors') \
+                .delete() \
+                .in_('listing_id', listing_ids[start:start + chunk_size]) \
+                .execute()
+        logger.info(f"✅ Deleted {len(listing_ids)} vehicle neighbour rows")
+
+    async def load_neighbor_rows(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Load persisted kNN graph rows, so lookups work before the first build.
+
+        Args:
+            page_size: Rows per request
+
+        Returns:
+            List of vehicle_neighbors rows
+        """
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            result = self.client.table('vehicle_neighbors') \
+                .select('listing_id, neighbor_ids, scores') \
+                .order('listing_id') \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    def _sync_similarity_graph(self, row: Dict[str, Any], embedding_changed: bool = False) -> None:
+        """Apply a written listing row to the kNN graph (never fails the write)"""
+        try:
+            from ..recommendation.similarity_graph import get_vehicle_similarity_graph
+
+            graph = get_vehicle_similarity_graph()
+            if row.get('status', 'active') != 'active':
+                graph.remove_vehicle(row['id'])
+            elif row.get('text_embedding') and (embedding_changed or row['id'] not in graph):
+                graph.add_vehicle(row['id'], row['text_embedding'])
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update similarity graph for listing {row.get('id')}: {e}")
+
     async def count(self, status: str = 'active') -> int:
         """
         Count listings by status.
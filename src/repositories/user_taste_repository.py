@@ -0,0 +1,87 @@
+"""
+Otto.AI User Taste Repository
+Data access layer for user_taste_vectors table operations
+"""
+
+import logging
+from typing import List, Dict, Any, Optional
+
+from ..services.supabase_client import get_supabase_client_singleton
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _to_bytea(data: bytes) -> str:
+    """BYTEA hex literal, as PostgREST expects it"""
+    return '\\x' + bytes(data).hex()
+
+
+def _from_bytea(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith('\\x') else value)
+
+
+class UserTasteRepository:
+    """
+    Repository for persisted user taste vectors (float16 bytes per user).
+    Uses Supabase client for database access.
+    """
+
+    def __init__(self):
+        self.client = get_supabase_client_singleton()
+        self.table_name = 'user_taste_vectors'
+
+    async def save_rows(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> None:
+        """
+        Upsert taste vector rows.
+
+        Args:
+            rows: Rows from TasteVectorStore.to_rows() / take_dirty_rows()
+            chunk_size: Rows per request
+        """
+        payload = [{**row, 'taste': _to_bytea(row['taste'])} for row in rows]
+        for start in range(0, len(payload), chunk_size):
+            self.client.table(self.table_name) \
+                .upsert(payload[start:start + chunk_size], on_conflict='user_id') \
+                .execute()
+        logger.info(f"✅ Saved {len(rows)} user taste vectors")
+
+    async def load_rows(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Load all persisted taste vectors.
+
+        Args:
+            page_size: Rows per request
+
+        Returns:
+            Rows with taste decoded to raw float16 bytes
+        """
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            result = self.client.table(self.table_name) \
+                .select('user_id, taste, weight, last_interaction_at') \
+                .order('user_id') \
+                .range(offset, offset + page_size - 1) \
+                .execute()
+
+            page = result.data or []
+            rows.extend({**row, 'taste': _from_bytea(row['taste'])} for row in page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+
+# Singleton instance
+_user_taste_repository: Optional[UserTasteRepository] = None
+
+
+def get_user_taste_repository() -> UserTasteRepository:
+    """Get singleton UserTasteRepository instance"""
+    global _user_taste_repository
+    if _user_taste_repository is None:
+        _user_taste_repository = UserTasteRepository()
+    return _user_taste_repository
@@ -374,6 +374,45 @@ class OttoAIEmbeddingService:
             logger.error(f"❌ Direct embedding generation failed: {e}")
             return [0.0] * self.embedding_dim
 
+    async def generate_text_embeddings(self, texts: List[str], batch_size: int = 64) -> List[List[float]]:
+        """
+        Embed many texts with one OpenRouter request per batch_size texts.
+
+        Failed batches fall back to zero vectors, like the single-text path.
+        """
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            try:
+                response = requests.post(
+                    url="https://openrouter.ai/api/v1/embeddings",
+                    headers={
+                        "Authorization": f"Bearer {self.openrouter_api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://otto-ai.com",
+                        "X-Title": "Otto.AI Batch Embedding",
+                    },
+                    json={
+                        "model": self.openrouter_model,
+                        "input": batch,
+                        "encoding_format": "float",
+                        "dimensions": self.embedding_dim
+                    },
+                    timeout=60
+                )
+
+                if response.status_code == 200:
+                    data = sorted(response.json()['data'], key=lambda item: item['index'])
+                    return [self._normalize_embedding(item['embedding']) for item in data]
+
+                logger.error(f"❌ OpenRouter batch embedding error: {response.status_code}")
+            except Exception as e:
+                logger.error(f"❌ Batch embedding generation failed: {e}")
+            return [[0.0] * self.embedding_dim for _ in batch]
+
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            embeddings.extend(await asyncio.to_thread(embed_batch, texts[start:start + batch_size]))
+        return embeddings
+
     def _normalize_embedding(self, embedding: List[float]) -> List[float]:
         """Normalize embedding to expected dimension"""
         if len(embedding) == self.embedding_dim:
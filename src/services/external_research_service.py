@@ -17,17 +17,17 @@ Based on conversation simulation analysis where Otto explicitly offers:
 
 import os
 import json
-import hashlib
 import logging
 import time
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
 
 import httpx
 from pydantic import BaseModel, Field
 
+from src.cache.llm_response_cache import LLMResponseCache, get_llm_response_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -145,13 +145,6 @@ class InsuranceDeltaReport(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now)
 
 
-@dataclass
-class CacheEntry:
-    """Cache entry with TTL"""
-    data: Any
-    timestamp: datetime
-
-
 # ============================================================================
 # External Research Service
 # ============================================================================
@@ -169,7 +162,10 @@ class ExternalResearchService:
     ownership research that influences buying decisions.
     """
 
-    def __init__(self, cache_ttl_hours: int = 168):  # 7 days default
+    def __init__(
+        self,
+        response_cache: Optional[LLMResponseCache] = None
+    ):
         self.api_key = os.getenv('GROQ_API_KEY') or os.getenv('OPENROUTER_API_KEY')
         self.use_openrouter = not os.getenv('GROQ_API_KEY')
 
@@ -181,9 +177,9 @@ class ExternalResearchService:
             self.api_url = "https://api.groq.com/openai/v1/chat/completions"
             self.model = "groq/compound"
 
-        # Cache settings (longer TTL for ownership data that doesn't change daily)
-        self.cache: Dict[str, CacheEntry] = {}
-        self.cache_ttl = timedelta(hours=cache_ttl_hours)
+        # Shared LLM call cache; research responses live there for 7 days since
+        # ownership data doesn't change daily
+        self.response_cache = response_cache or get_llm_response_cache()
 
         # Statistics
         self.stats = {
@@ -221,28 +217,18 @@ class ExternalResearchService:
         self.stats["total_requests"] += 1
         self.stats["ownership_cost_requests"] += 1
 
-        cache_key = self._get_cache_key(
-            "ownership", f"{year}:{make}:{model}:{trim}:{annual_mileage}"
-        )
-
-        if cached := self._get_from_cache(cache_key):
-            self.stats["cache_hits"] += 1
-            return cached
-
         try:
-            self.stats["api_calls"] += 1
-
             prompt = self._build_ownership_cost_prompt(
                 year, make, model, trim, purchase_price, annual_mileage, location
             )
 
+            # Trim, price, mileage and location all change the costs, so this
+            # research is only reused on an exact prompt match
             result = await self._call_groq_compound(prompt, "ownership cost research")
 
             report = self._parse_ownership_cost_response(result)
             report.generated_at = datetime.now()
 
-            self._store_in_cache(cache_key, report)
-
             logger.info(
                 f"Ownership cost research: {year} {make} {model} -> "
                 f"${report.cost_per_month:,.0f}/mo over 5 years "
@@ -380,22 +366,15 @@ Return ONLY a JSON object with this structure:
         self.stats["total_requests"] += 1
         self.stats["owner_experience_requests"] += 1
 
-        cache_key = self._get_cache_key("experience", f"{year}:{make}:{model}:{trim}")
-
-        if cached := self._get_from_cache(cache_key):
-            self.stats["cache_hits"] += 1
-            return cached
-
         try:
-            self.stats["api_calls"] += 1
-
             prompt = self._build_owner_experience_prompt(year, make, model, trim)
-            result = await self._call_groq_compound(prompt, "owner experience research")
+            result = await self._call_groq_compound(
+                prompt, "owner experience research",
+                semantic_scope=self._research_scope(year, make, model)
+            )
             report = self._parse_owner_experience_response(result)
             report.generated_at = datetime.now()
 
-            self._store_in_cache(cache_key, report)
-
             logger.info(
                 f"Owner experience research: {year} {make} {model} -> "
                 f"{report.overall_satisfaction:.1f}/5.0 satisfaction, "
@@ -524,14 +503,14 @@ Return ONLY a JSON object with this structure:
 
         # Don't cache this - it's user-situation specific
         try:
-            self.stats["api_calls"] += 1
-
             prompt = self._build_lease_vs_buy_prompt(
                 year, make, model, trim, msrp, annual_mileage,
                 credit_score, down_payment, user_situation
             )
 
-            result = await self._call_groq_compound(prompt, "lease vs buy analysis")
+            result = await self._call_groq_compound(
+                prompt, "lease vs buy analysis", call_type="research_personalized"
+            )
             report = self._parse_lease_vs_buy_response(result)
             report.generated_at = datetime.now()
 
@@ -676,13 +655,13 @@ Return ONLY a JSON object:
         self.stats["insurance_delta_requests"] += 1
 
         try:
-            self.stats["api_calls"] += 1
-
             prompt = self._build_insurance_delta_prompt(
                 current_vehicle, new_vehicle, user_profile
             )
 
-            result = await self._call_groq_compound(prompt, "insurance delta research")
+            result = await self._call_groq_compound(
+                prompt, "insurance delta research", call_type="research_personalized"
+            )
             report = self._parse_insurance_delta_response(result)
             report.generated_at = datetime.now()
 
@@ -773,10 +752,57 @@ Return ONLY a JSON object:
     async def _call_groq_compound(
         self,
         prompt: str,
-        research_type: str
+        research_type: str,
+        call_type: str = "research",
+        semantic_scope: Optional[str] = None
     ) -> str:
-        """Call Groq Compound API with web search capabilities"""
+        """
+        Call Groq Compound API with web search capabilities
+
+        Responses go through the shared LLM response cache. Prompts within the
+        same ``semantic_scope`` (one model year) may also be served by a
+        near-duplicate; without a scope only exact prompt matches are reused.
+        """
+        messages = [
+            {
+                "role": "system",
+                "content": f"You are an automotive research expert performing {research_type}. Use web search to find accurate, current data. Always return valid JSON."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        params = {"temperature": 0.1, "max_tokens": 2000}
+        called = False
+
+        async def call() -> str:
+            nonlocal called
+            called = True
+            self.stats["api_calls"] += 1
+            return await self._post_compound_request(messages, params, research_type)
+
+        content = await self.response_cache.get_or_call(
+            call_site=f"external_research.{research_type.replace(' ', '_')}",
+            call_type=call_type,
+            model=self.model,
+            messages=messages,
+            params=params,
+            call=call,
+            semantic_scope=semantic_scope,
+            should_cache=bool
+        )
+        if not called:
+            self.stats["cache_hits"] += 1
+        return content
 
+    async def _post_compound_request(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        research_type: str
+    ) -> str:
+        """POST a chat completion to Groq Compound and return the message content"""
         headers = {
             "Content-Type": "application/json",
         }
@@ -794,18 +820,8 @@ Return ONLY a JSON object:
                 headers=headers,
                 json={
                     "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": f"You are an automotive research expert performing {research_type}. Use web search to find accurate, current data. Always return valid JSON."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 2000
+                    "messages": messages,
+                    **params
                 },
                 timeout=45  # Longer timeout for complex research
             )
@@ -822,41 +838,24 @@ Return ONLY a JSON object:
     # Caching and Utilities
     # ========================================================================
 
-    def _get_cache_key(self, research_type: str, params: str) -> str:
-        """Generate cache key"""
-        key_data = f"{research_type}:{params}"
-        return hashlib.md5(key_data.encode()).hexdigest()
-
-    def _get_from_cache(self, cache_key: str) -> Optional[Any]:
-        """Get from cache if valid"""
-        if cache_key not in self.cache:
-            return None
-
-        entry = self.cache[cache_key]
-        if datetime.now() - entry.timestamp > self.cache_ttl:
-            del self.cache[cache_key]
-            return None
-
-        return entry.data
-
-    def _store_in_cache(self, cache_key: str, data: Any):
-        """Store in cache"""
-        self.cache[cache_key] = CacheEntry(data=data, timestamp=datetime.now())
-
-        # Limit cache size
-        if len(self.cache) > 500:
-            oldest = min(self.cache.keys(), key=lambda k: self.cache[k].timestamp)
-            del self.cache[oldest]
+    @staticmethod
+    def _research_scope(year: int, make: str, model: str) -> str:
+        """Normalized model-year key that bounds near-duplicate prompt matching"""
+        return ":".join(" ".join(str(value).lower().split()) for value in (year, make, model))
 
     def get_stats(self) -> Dict[str, Any]:
         """Get service statistics"""
         return {
             **self.stats,
-            "cache_size": len(self.cache),
             "cache_hit_rate": (
                 self.stats["cache_hits"] / self.stats["total_requests"]
                 if self.stats["total_requests"] > 0 else 0
-            )
+            ),
+            "llm_cache": {
+                site: values
+                for site, values in self.response_cache.get_stats()["call_sites"].items()
+                if site.startswith("external_research.")
+            }
         }
 
 
@@ -0,0 +1,405 @@
+"""
+Otto.AI Ingestion Dedupe Index
+Content-addressed index that lets re-sent condition reports skip work.
+
+Auction feeds resend the same PDFs constantly. The index maps:
+- SHA-256 of a PDF -> the VehicleListingArtifact it produced (and the
+  listing it was persisted as), so an unchanged PDF skips the Gemini call,
+  image extraction and re-embedding
+- SHA-256 of an image -> its uploaded storage URLs, so an image is
+  uploaded once and shared by every listing that contains it. A re-encoded
+  copy is matched by perceptual hash only after its pixels are compared
+  with the stored original.
+
+Artifacts are stored without image bytes; each distinct image is kept
+once in image_assets and re-attached on lookup. Stored image bytes are
+capped (INGESTION_DEDUPE_MAX_IMAGE_BYTES) and the least recently used are
+dropped first; an artifact whose images were dropped is simply processed
+again. Counters live in the same SQLite file so the API reports savings
+made by standalone workers too.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+IMAGE_URL_KEYS = ('original_url', 'web_url', 'detail_url', 'thumbnail_url')
+
+COUNTERS = (
+    'pdf_hits',
+    'pdf_misses',
+    'llm_calls_skipped',
+    'embeddings_skipped',
+    'image_hits',
+    'image_misses',
+    'bytes_not_uploaded',
+    'image_bytes_evicted',
+)
+
+DEFAULT_MAX_IMAGE_BYTES = 1024 * 1024 * 1024
+
+# Perceptual-hash candidates decoded and compared per lookup
+PERCEPTUAL_CANDIDATES = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_artifacts (
+    pdf_hash TEXT PRIMARY KEY,
+    vin TEXT,
+    artifact_json TEXT NOT NULL,
+    result_json TEXT,
+    size_bytes INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS image_assets (
+    content_hash TEXT PRIMARY KEY,
+    perceptual_hash TEXT,
+    size_bytes INTEGER NOT NULL,
+    image_bytes BLOB,
+    original_url TEXT,
+    web_url TEXT,
+    detail_url TEXT,
+    thumbnail_url TEXT,
+    uploaded_bytes INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_image_assets_perceptual ON image_assets(perceptual_hash);
+
+CREATE TABLE IF NOT EXISTS dedupe_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 content address"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class IngestionDedupeIndex:
+    """SQLite-backed hash -> artifact / uploaded image index"""
+
+    def __init__(self, db_path: str, max_image_bytes: int = DEFAULT_MAX_IMAGE_BYTES):
+        self.db_path = db_path
+        self.max_image_bytes = max_image_bytes
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(image_assets)")}
+            if 'last_used_at' not in columns:
+                self._conn.execute("ALTER TABLE image_assets ADD COLUMN last_used_at TEXT")
+
+    # ---- PDFs ----
+
+    def get_artifact(self, pdf_hash: str):
+        """
+        Stored artifact for a PDF hash, with image bytes re-attached.
+
+        Returns None (and counts a miss) when the PDF is unknown or any of
+        its images is no longer in the index.
+        """
+        from .pdf_ingestion_service import VehicleListingArtifact
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT artifact_json FROM pdf_artifacts WHERE pdf_hash = ?", (pdf_hash,)
+            ).fetchone()
+            data = json.loads(row['artifact_json']) if row else None
+            blobs = {}
+            if data:
+                hashes = [image['content_hash'] for image in data['images']]
+                blobs = {
+                    r['content_hash']: r['image_bytes']
+                    for r in self._conn.execute(
+                        f"SELECT content_hash, image_bytes FROM image_assets "
+                        f"WHERE content_hash IN ({','.join('?' * len(hashes))})",
+                        hashes
+                    )
+                    if r['image_bytes'] is not None
+                } if hashes else {}
+
+        if not data or any(image['content_hash'] not in blobs for image in data['images']):
+            self.increment(pdf_misses=1)
+            return None
+
+        for image in data['images']:
+            image['image_bytes'] = blobs[image['content_hash']]
+        artifact = VehicleListingArtifact(**data)
+
+        with self._lock:
+            now = _now()
+            self._conn.execute(
+                "UPDATE pdf_artifacts SET hits = hits + 1, last_seen_at = ? WHERE pdf_hash = ?",
+                (now, pdf_hash)
+            )
+            self._conn.executemany(
+                "UPDATE image_assets SET last_used_at = ? WHERE content_hash = ?",
+                [(now, image['content_hash']) for image in data['images']]
+            )
+        self.increment(pdf_hits=1, llm_calls_skipped=1)
+        return artifact
+
+    def put_artifact(self, pdf_hash: str, artifact: Any, pdf_size: int) -> None:
+        """Store an artifact; its images are stored once each by content hash"""
+        for image in artifact.images:
+            if not image.content_hash:
+                image.content_hash = hash_bytes(image.image_bytes)
+
+        data = artifact.model_dump(mode='json', exclude={'images': {'__all__': {'image_bytes'}}})
+        now = _now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO image_assets (content_hash, perceptual_hash, size_bytes, image_bytes, created_at, "
+                    "last_used_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(content_hash) DO UPDATE SET "
+                    "image_bytes = COALESCE(image_assets.image_bytes, excluded.image_bytes), "
+                    "perceptual_hash = COALESCE(image_assets.perceptual_hash, excluded.perceptual_hash), "
+                    "last_used_at = excluded.last_used_at",
+                    [
+                        (image.content_hash, image.perceptual_hash, len(image.image_bytes), image.image_bytes, now, now)
+                        for image in artifact.images
+                    ]
+                )
+                self._conn.execute(
+                    "INSERT INTO pdf_artifacts (pdf_hash, vin, artifact_json, size_bytes, created_at, last_seen_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(pdf_hash) DO UPDATE SET vin = excluded.vin, "
+                    "artifact_json = excluded.artifact_json, result_json = NULL, last_seen_at = excluded.last_seen_at",
+                    (pdf_hash, artifact.vehicle.vin, json.dumps(data), pdf_size, now, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._evict_image_bytes()
+
+    def get_result(self, pdf_hash: str) -> Optional[Dict[str, Any]]:
+        """Listing result recorded the last time this PDF was fully ingested"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json FROM pdf_artifacts WHERE pdf_hash = ?", (pdf_hash,)
+            ).fetchone()
+        return json.loads(row['result_json']) if row and row['result_json'] else None
+
+    def record_result(self, pdf_hash: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pdf_artifacts SET result_json = ? WHERE pdf_hash = ?",
+                (json.dumps(result, default=str), pdf_hash)
+            )
+
+    def forget(self, pdf_hash: str) -> None:
+        """Drop a PDF so its next upload is processed from scratch"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pdf_artifacts WHERE pdf_hash = ?", (pdf_hash,))
+
+    # ---- Images ----
+
+    def find_image(
+        self,
+        content_hash: str,
+        url_keys: Iterable[str],
+        perceptual_hash: Optional[str] = None,
+        image_bytes: Optional[bytes] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Uploaded URLs for an image, or None (counted as a miss).
+
+        Looks up the exact SHA-256 first. A re-encoded copy is reused only
+        when a stored image with the same perceptual hash decodes to the
+        same pixels as image_bytes; the hash alone is not enough. Only rows
+        that have every requested URL count as a hit.
+        """
+        from .pdf_extraction import pixels_match
+
+        url_keys = list(url_keys)
+        unknown = set(url_keys) - set(IMAGE_URL_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown image URL keys: {sorted(unknown)}")
+        has_urls = " AND ".join(f"{key} IS NOT NULL" for key in url_keys) or "1"
+        columns = ", ".join(url_keys + ['uploaded_bytes', 'content_hash'])
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM image_assets WHERE content_hash = ? AND {has_urls}", (content_hash,)
+            ).fetchone()
+            candidates = []
+            if row is None and perceptual_hash and image_bytes is not None:
+                candidates = self._conn.execute(
+                    f"SELECT {columns}, image_bytes FROM image_assets "
+                    f"WHERE perceptual_hash = ? AND image_bytes IS NOT NULL AND {has_urls} LIMIT ?",
+                    (perceptual_hash, PERCEPTUAL_CANDIDATES)
+                ).fetchall()
+
+        # Decode outside the lock; only a pixel-level match is reused
+        if row is None:
+            row = next((c for c in candidates if pixels_match(image_bytes, c['image_bytes'])), None)
+
+        if row is not None:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE image_assets SET hits = hits + 1, last_used_at = ? WHERE content_hash = ?",
+                    (_now(), row['content_hash'])
+                )
+
+        if row is None:
+            self.increment(image_misses=1)
+            return None
+
+        self.increment(image_hits=1, bytes_not_uploaded=row['uploaded_bytes'])
+        return {'urls': {key: row[key] for key in url_keys}, 'uploaded_bytes': row['uploaded_bytes']}
+
+    def record_image_upload(
+        self,
+        content_hash: str,
+        urls: Dict[str, str],
+        uploaded_bytes: int,
+        size_bytes: int,
+        perceptual_hash: Optional[str] = None,
+        image_bytes: Optional[bytes] = None
+    ) -> None:
+        """
+        Remember where an image was uploaded and how many bytes that took.
+
+        image_bytes is kept (within the byte cap) when a perceptual hash is
+        given, so later re-encoded copies can be compared pixel by pixel.
+        """
+        urls = {key: urls.get(key) for key in IMAGE_URL_KEYS}
+        blob = image_bytes if perceptual_hash else None
+        now = _now()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO image_assets (content_hash, perceptual_hash, size_bytes, image_bytes, original_url, "
+                "web_url, detail_url, thumbnail_url, uploaded_bytes, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET "
+                "perceptual_hash = COALESCE(image_assets.perceptual_hash, excluded.perceptual_hash), "
+                "image_bytes = COALESCE(image_assets.image_bytes, excluded.image_bytes), "
+                "last_used_at = excluded.last_used_at, "
+                "original_url = COALESCE(excluded.original_url, image_assets.original_url), "
+                "web_url = COALESCE(excluded.web_url, image_assets.web_url), "
+                "detail_url = COALESCE(excluded.detail_url, image_assets.detail_url), "
+                "thumbnail_url = COALESCE(excluded.thumbnail_url, image_assets.thumbnail_url), "
+                "uploaded_bytes = excluded.uploaded_bytes",
+                (content_hash, perceptual_hash, size_bytes, blob, urls['original_url'], urls['web_url'],
+                 urls['detail_url'], urls['thumbnail_url'], uploaded_bytes, now, now)
+            )
+            if blob is not None:
+                self._evict_image_bytes()
+
+    def _evict_image_bytes(self) -> int:
+        """
+        Drop the least recently used image bytes above max_image_bytes.
+
+        Rows (and their URLs) are kept; caller holds the lock. Returns the
+        number of bytes dropped.
+        """
+        stored = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM image_assets WHERE image_bytes IS NOT NULL"
+        ).fetchone()[0]
+        excess = stored - self.max_image_bytes
+        if excess <= 0:
+            return 0
+
+        evicted, freed = [], 0
+        for row in self._conn.execute(
+            "SELECT content_hash, size_bytes FROM image_assets WHERE image_bytes IS NOT NULL "
+            "ORDER BY COALESCE(last_used_at, created_at), content_hash"
+        ):
+            if freed >= excess:
+                break
+            evicted.append(row['content_hash'])
+            freed += row['size_bytes']
+
+        for start in range(0, len(evicted), 500):
+            chunk = evicted[start:start + 500]
+            self._conn.execute(
+                f"UPDATE image_assets SET image_bytes = NULL WHERE content_hash IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+        self._conn.execute(
+            "INSERT INTO dedupe_counters (name, value) VALUES ('image_bytes_evicted', ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (freed,)
+        )
+        logger.info(f"🧹 Dropped {len(evicted)} stored images ({freed} bytes) from the dedupe index")
+        return freed
+
+    # ---- Counters ----
+
+    def increment(self, **counts: int) -> None:
+        counts = {name: value for name, value in counts.items() if value}
+        if not counts:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO dedupe_counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list(counts.items())
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM dedupe_counters").fetchall())
+            pdfs = self._conn.execute("SELECT COUNT(*) FROM pdf_artifacts").fetchone()[0]
+            images = self._conn.execute("SELECT COUNT(*) FROM image_assets").fetchone()[0]
+            stored_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM image_assets WHERE image_bytes IS NOT NULL"
+            ).fetchone()[0]
+        return {
+            **{name: counters.get(name, 0) for name in COUNTERS},
+            'indexed_pdfs': pdfs,
+            'indexed_images': images,
+            'stored_image_bytes': stored_bytes
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Singleton instance
+_dedupe_index: Optional[IngestionDedupeIndex] = None
+
+
+def get_ingestion_dedupe_index() -> Optional[IngestionDedupeIndex]:
+    """
+    Get the shared dedupe index, or None when INGESTION_DEDUPE_ENABLED=false.
+
+    Stored in INGESTION_DEDUPE_DB (default data/ingestion_dedupe.sqlite3),
+    with at most INGESTION_DEDUPE_MAX_IMAGE_BYTES of image bytes.
+    """
+    global _dedupe_index
+    if os.getenv("INGESTION_DEDUPE_ENABLED", "true").lower() == "false":
+        return None
+    if _dedupe_index is None:
+        _dedupe_index = IngestionDedupeIndex(
+            os.getenv("INGESTION_DEDUPE_DB", os.path.join("data", "ingestion_dedupe.sqlite3")),
+            max_image_bytes=int(os.getenv("INGESTION_DEDUPE_MAX_IMAGE_BYTES", str(DEFAULT_MAX_IMAGE_BYTES)))
+        )
+    return _dedupe_index
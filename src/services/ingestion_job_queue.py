@@ -0,0 +1,631 @@
+"""
+Otto.AI Ingestion Job Queue
+Durable, broker-free job queue for bulk PDF ingestion.
+
+Uploads are streamed to a spool directory, batches and per-file jobs are
+tracked in SQLite (states, attempts, retry backoff) and a worker pool with
+configurable concurrency consumes them through the ingestion pipeline.
+Workers heartbeat the jobs they hold; jobs left behind by a restart of
+this host:pid, or whose heartbeat has gone stale, are re-queued, so neither
+the work nor its status lives only in process memory.
+
+Workers run inside the API process by default; set
+INGESTION_WORKERS_IN_PROCESS=false and run
+`python -m src.services.ingestion_job_queue` to consume from a separate
+process instead.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+ProcessFn = Callable[[bytes, str, Optional[str], Callable[[str], None]], Awaitable[Dict[str, Any]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_batches (
+    batch_id TEXT PRIMARY KEY,
+    seller_id TEXT,
+    total_files INTEGER NOT NULL,
+    max_concurrent INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    completed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    job_id TEXT PRIMARY KEY,
+    batch_id TEXT NOT NULL REFERENCES ingestion_batches(batch_id),
+    file_index INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    spool_path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    worker_id TEXT,
+    heartbeat_at REAL,
+    listing_id TEXT,
+    vin TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_claim ON ingestion_jobs(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_batch ON ingestion_jobs(batch_id, file_index);
+"""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class IngestionJobStore:
+    """SQLite-backed batch and job state"""
+
+    def __init__(self, db_path: str, max_attempts: int = 3, retry_backoff_seconds: float = 30.0):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(ingestion_jobs)")}
+            if 'heartbeat_at' not in columns:
+                self._conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN heartbeat_at REAL")
+
+    def create_batch(
+        self,
+        batch_id: str,
+        files: List[Dict[str, Any]],
+        seller_id: Optional[str] = None,
+        max_concurrent: int = 3
+    ) -> None:
+        """Record a batch and one queued job per spooled file ({filename, spool_path, size})"""
+        now = _now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO ingestion_batches (batch_id, seller_id, total_files, max_concurrent, started_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (batch_id, seller_id, len(files), max_concurrent, now, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO ingestion_jobs (job_id, batch_id, file_index, filename, spool_path, size_bytes, "
+                    "status, message, max_attempts, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (str(uuid.uuid4()), batch_id, index, f['filename'], f['spool_path'], f['size'],
+                         JOB_QUEUED, 'Queued for processing', self.max_attempts, 0.0, now, now)
+                        for index, f in enumerate(files)
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim_next(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest runnable job.
+
+        Respects each batch's max_concurrent and skips jobs still in retry
+        backoff.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE ingestion_jobs
+                SET status = ?, worker_id = ?, heartbeat_at = ?, attempts = attempts + 1, progress = 0,
+                    message = 'Processing PDF...', updated_at = ?
+                WHERE job_id = (
+                    SELECT j.job_id
+                    FROM ingestion_jobs j
+                    JOIN ingestion_batches b ON b.batch_id = j.batch_id
+                    WHERE j.status = ? AND j.available_at <= ?
+                      AND (SELECT COUNT(*) FROM ingestion_jobs p
+                           WHERE p.batch_id = j.batch_id AND p.status = ?) < b.max_concurrent
+                    ORDER BY j.available_at, j.created_at, j.file_index
+                    LIMIT 1
+                )
+                RETURNING job_id, batch_id, filename, spool_path, attempts, max_attempts
+                """,
+                (JOB_PROCESSING, worker_id, time.time(), _now(), JOB_QUEUED, time.time(), JOB_PROCESSING)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job = dict(row)
+            job['seller_id'] = self._conn.execute(
+                "SELECT seller_id FROM ingestion_batches WHERE batch_id = ?", (job['batch_id'],)
+            ).fetchone()['seller_id']
+        return job
+
+    def update_progress(self, job_id: str, progress: float, message: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET progress = ?, message = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (progress, message, _now(), job_id, JOB_PROCESSING)
+            )
+
+    def complete(self, job_id: str, listing_id: Optional[str], vin: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, progress = 100, message = 'Successfully processed', "
+                "listing_id = ?, vin = ?, error = NULL, worker_id = NULL, updated_at = ? WHERE job_id = ?",
+                (JOB_COMPLETED, listing_id, vin, _now(), job_id)
+            )
+            self._touch_batch(job_id)
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """
+        Record a failed attempt.
+
+        Re-queues with exponential backoff while attempts remain; returns
+        True when the job is finally failed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            final = row is None or row['attempts'] >= row['max_attempts']
+
+            if final:
+                self._conn.execute(
+                    "UPDATE ingestion_jobs SET status = ?, progress = 0, message = 'Processing failed', "
+                    "error = ?, worker_id = NULL, updated_at = ? WHERE job_id = ?",
+                    (JOB_FAILED, error, _now(), job_id)
+                )
+            else:
+                delay = self.retry_backoff_seconds * (2 ** (row['attempts'] - 1))
+                self._conn.execute(
+                    "UPDATE ingestion_jobs SET status = ?, progress = 0, message = ?, error = ?, "
+                    "worker_id = NULL, available_at = ?, updated_at = ? WHERE job_id = ?",
+                    (JOB_QUEUED, f"Retrying (attempt {row['attempts'] + 1} of {row['max_attempts']})",
+                     error, time.time() + delay, _now(), job_id)
+                )
+            self._touch_batch(job_id)
+            return final
+
+    def heartbeat(self, worker_id_prefix: str) -> int:
+        """Mark every job held by this process's workers as still running"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingestion_jobs SET heartbeat_at = ? WHERE status = ? AND worker_id LIKE ?",
+                (time.time(), JOB_PROCESSING, f"{worker_id_prefix}:%")
+            )
+            return cursor.rowcount
+
+    def requeue_interrupted(self, stale_after_seconds: float, worker_id_prefix: Optional[str] = None) -> int:
+        """
+        Put jobs left 'processing' by a dead worker back in the queue.
+
+        A job is taken back when its heartbeat is older than
+        stale_after_seconds, or when it is held by worker_id_prefix (a
+        restarted process that reuses its host:pid). The interrupted claim
+        already counted as an attempt, so jobs without attempts left fail
+        instead of being retried forever.
+        """
+        owner_clause, params = "", [JOB_PROCESSING, time.time() - stale_after_seconds]
+        if worker_id_prefix:
+            owner_clause = " OR worker_id LIKE ?"
+            params.append(f"{worker_id_prefix}:%")
+        where = f"status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?{owner_clause})"
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job_ids = [row['job_id'] for row in self._conn.execute(
+                    f"SELECT job_id FROM ingestion_jobs WHERE {where}", params
+                )]
+                self._conn.execute(
+                    f"UPDATE ingestion_jobs SET status = ?, progress = 0, message = 'Interrupted on final attempt', "
+                    f"error = 'Worker stopped while processing', worker_id = NULL, updated_at = ? "
+                    f"WHERE {where} AND attempts >= max_attempts",
+                    [JOB_FAILED, _now(), *params]
+                )
+                cursor = self._conn.execute(
+                    f"UPDATE ingestion_jobs SET status = ?, worker_id = NULL, available_at = 0, "
+                    f"message = 'Re-queued after interruption', updated_at = ? WHERE {where}",
+                    [JOB_QUEUED, _now(), *params]
+                )
+                for job_id in job_ids:
+                    self._touch_batch(job_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount
+
+    def _touch_batch(self, job_id: str) -> None:
+        """Update the batch timestamps; caller holds the lock"""
+        now = _now()
+        self._conn.execute(
+            """
+            UPDATE ingestion_batches
+            SET updated_at = ?,
+                completed_at = CASE
+                    WHEN NOT EXISTS (SELECT 1 FROM ingestion_jobs j
+                                     WHERE j.batch_id = ingestion_batches.batch_id AND j.status IN (?, ?))
+                    THEN ? ELSE NULL END
+            WHERE batch_id = (SELECT batch_id FROM ingestion_jobs WHERE job_id = ?)
+            """,
+            (now, JOB_QUEUED, JOB_PROCESSING, now, job_id)
+        )
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Batch status in the shape of the listings API BatchStatus model"""
+        with self._lock:
+            batch = self._conn.execute(
+                "SELECT * FROM ingestion_batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if batch is None:
+                return None
+            jobs = self._conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE batch_id = ? ORDER BY file_index", (batch_id,)
+            ).fetchall()
+        return self._batch_status(batch, jobs)
+
+    def list_batches(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest batches first, optionally filtered by derived status"""
+        with self._lock:
+            batch_ids = [
+                row['batch_id'] for row in self._conn.execute(
+                    "SELECT batch_id FROM ingestion_batches ORDER BY started_at DESC"
+                    + ("" if status else " LIMIT ?"),
+                    () if status else (limit,)
+                )
+            ]
+
+        batches = []
+        for batch_id in batch_ids:
+            batch = self.get_batch(batch_id)
+            if batch and (not status or batch['status'] == status):
+                batches.append(batch)
+                if len(batches) >= limit:
+                    break
+        return batches
+
+    @staticmethod
+    def _batch_status(batch: sqlite3.Row, jobs: List[sqlite3.Row]) -> Dict[str, Any]:
+        counts = {JOB_QUEUED: 0, JOB_PROCESSING: 0, JOB_COMPLETED: 0, JOB_FAILED: 0}
+        for job in jobs:
+            counts[job['status']] += 1
+
+        total = batch['total_files']
+        done = counts[JOB_COMPLETED] + counts[JOB_FAILED]
+        if done < total:
+            status = JOB_QUEUED if counts[JOB_QUEUED] == total else JOB_PROCESSING
+        elif counts[JOB_FAILED] == 0:
+            status = JOB_COMPLETED
+        elif counts[JOB_COMPLETED] == 0:
+            status = JOB_FAILED
+        else:
+            status = 'partial'
+
+        return {
+            'batch_id': batch['batch_id'],
+            'status': status,
+            'total_files': total,
+            'completed': counts[JOB_COMPLETED],
+            'failed': counts[JOB_FAILED],
+            'in_progress': counts[JOB_PROCESSING],
+            'queued': counts[JOB_QUEUED],
+            'progress': (done / total) * 100 if total > 0 else 0,
+            'started_at': datetime.fromisoformat(batch['started_at']),
+            'updated_at': datetime.fromisoformat(batch['updated_at']),
+            'completed_at': datetime.fromisoformat(batch['completed_at']) if batch['completed_at'] else None,
+            'seller_id': batch['seller_id'],
+            'files': [
+                {
+                    'filename': job['filename'],
+                    'status': job['status'],
+                    'progress': job['progress'],
+                    'message': job['message'] or '',
+                    'listing_id': job['listing_id'],
+                    'vin': job['vin'],
+                    'error': job['error'] if job['status'] == JOB_FAILED else None
+                }
+                for job in jobs
+            ]
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class IngestionJobQueue:
+    """
+    Spool directory + job store + worker pool.
+
+    process_fn receives (pdf_bytes, filename, seller_id, on_stage) and
+    returns a dict with listing_id and vin; it defaults to the shared
+    ingestion pipeline.
+    """
+
+    def __init__(
+        self,
+        spool_dir: str,
+        store: Optional[IngestionJobStore] = None,
+        concurrency: int = 3,
+        process_fn: Optional[ProcessFn] = None,
+        poll_interval_seconds: float = 2.0,
+        heartbeat_interval_seconds: float = 30.0,
+        stale_after_seconds: float = 300.0
+    ):
+        self.spool_dir = spool_dir
+        os.makedirs(spool_dir, exist_ok=True)
+        self.store = store or IngestionJobStore(os.path.join(spool_dir, "jobs.sqlite3"))
+        self.concurrency = concurrency
+        self.process_fn = process_fn or self._process_with_pipeline
+        self.poll_interval_seconds = poll_interval_seconds
+        self.heartbeat_interval_seconds = heartbeat_interval_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.worker_id_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._wakeup = asyncio.Event()
+        self._recovered = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'jobs_retried': 0,
+            'jobs_requeued': 0,
+            'bytes_spooled': 0
+        }
+
+    async def spool_upload(self, upload: Any, batch_id: str, index: int, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Stream an UploadFile to the spool directory in chunks.
+
+        Returns {filename, spool_path, size}; the file is never held in
+        memory whole.
+        """
+        batch_dir = os.path.join(self.spool_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        spool_path = os.path.join(batch_dir, f"{index:03d}.pdf")
+        partial_path = f"{spool_path}.part"
+
+        size = 0
+        try:
+            with open(partial_path, "wb") as out:
+                while True:
+                    chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise ValueError(f"{upload.filename} exceeds {max_bytes // (1024 * 1024)}MB")
+                    out.write(chunk)
+            os.replace(partial_path, spool_path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        self.stats['bytes_spooled'] += size
+        return {'filename': upload.filename, 'spool_path': spool_path, 'size': size}
+
+    def enqueue_batch(
+        self,
+        batch_id: str,
+        files: List[Dict[str, Any]],
+        seller_id: Optional[str] = None,
+        max_concurrent: int = 3
+    ) -> None:
+        """Record spooled files as queued jobs and wake the workers"""
+        self.store.create_batch(batch_id, files, seller_id=seller_id, max_concurrent=max_concurrent)
+        self._wakeup.set()
+        logger.info(f"Queued batch {batch_id} with {len(files)} files")
+
+    def discard_spool(self, batch_id: str) -> None:
+        """Remove a batch's spool directory (e.g. when enqueueing failed)"""
+        batch_dir = os.path.join(self.spool_dir, batch_id)
+        if os.path.isdir(batch_dir):
+            for name in os.listdir(batch_dir):
+                os.remove(os.path.join(batch_dir, name))
+            os.rmdir(batch_dir)
+
+    def start(self) -> None:
+        """Start the heartbeat/recovery task and the worker pool"""
+        if self._workers:
+            return
+        self._recovered.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        for i in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(f"{self.worker_id_prefix}:{i}")))
+        logger.info(f"✅ Ingestion job workers started (concurrency {self.concurrency})")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they held are re-queued once their heartbeat goes stale"""
+        tasks = self._workers + ([self._heartbeat_task] if self._heartbeat_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat_task = None
+
+    async def _requeue_interrupted(self, worker_id_prefix: Optional[str] = None) -> None:
+        requeued = await asyncio.to_thread(
+            self.store.requeue_interrupted, self.stale_after_seconds, worker_id_prefix
+        )
+        if requeued:
+            self.stats['jobs_requeued'] += requeued
+            self._wakeup.set()
+            logger.warning(f"⚠️ Re-queued {requeued} interrupted ingestion jobs")
+
+    async def _heartbeat_loop(self) -> None:
+        # Jobs still held by this host:pid belong to a previous run of this process
+        try:
+            await self._requeue_interrupted(self.worker_id_prefix)
+        except Exception as e:
+            logger.error(f"❌ Failed to re-queue interrupted ingestion jobs: {e}")
+        finally:
+            self._recovered.set()
+
+        while True:
+            await asyncio.sleep(self.heartbeat_interval_seconds)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.worker_id_prefix)
+                # Another host's worker may have died; take back its stale jobs
+                await self._requeue_interrupted()
+            except Exception as e:
+                logger.error(f"❌ Ingestion job heartbeat failed: {e}")
+
+    async def _worker(self, worker_id: str) -> None:
+        await self._recovered.wait()
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next, worker_id)
+            except Exception as e:
+                logger.error(f"❌ Failed to claim ingestion job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+            # Finishing a job may free a batch's concurrency slot for another worker
+            self._wakeup.set()
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job['job_id']
+        loop = asyncio.get_running_loop()
+
+        def on_stage(stage: str):
+            from .ingestion_pipeline import STAGES
+            progress = STAGES.index(stage) * 100.0 / len(STAGES) if stage in STAGES else 0.0
+            loop.run_in_executor(None, self.store.update_progress, job_id, progress, f"Stage: {stage}") \
+                .add_done_callback(self._progress_written)
+
+        try:
+            pdf_bytes = await asyncio.to_thread(self._read_spool, job['spool_path'])
+            result = await self.process_fn(pdf_bytes, job['filename'], job['seller_id'], on_stage)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            final = await asyncio.to_thread(self.store.fail, job_id, str(e))
+            if final:
+                self.stats['jobs_failed'] += 1
+                self._remove_spool(job['spool_path'])
+                logger.error(f"Batch {job['batch_id']}: Failed {job['filename']}: {e}")
+            else:
+                self.stats['jobs_retried'] += 1
+                logger.warning(f"⚠️ Batch {job['batch_id']}: {job['filename']} attempt {job['attempts']} failed, will retry: {e}")
+            return
+
+        await asyncio.to_thread(self.store.complete, job_id, result.get('listing_id'), result.get('vin'))
+        self.stats['jobs_completed'] += 1
+        self._remove_spool(job['spool_path'])
+        logger.info(f"Batch {job['batch_id']}: Completed {job['filename']} -> {result.get('listing_id')}")
+
+    @staticmethod
+    def _progress_written(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"⚠️ Failed to record ingestion progress: {future.exception()}")
+
+    @staticmethod
+    def _read_spool(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _remove_spool(path: str) -> None:
+        try:
+            os.remove(path)
+            batch_dir = os.path.dirname(path)
+            if not os.listdir(batch_dir):
+                os.rmdir(batch_dir)
+        except OSError:
+            pass
+
+    async def _process_with_pipeline(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        seller_id: Optional[str],
+        on_stage: Callable[[str], None]
+    ) -> Dict[str, Any]:
+        from .ingestion_pipeline import get_ingestion_pipeline
+        pipeline = await get_ingestion_pipeline()
+        return await pipeline.process(pdf_bytes, filename, seller_id, on_stage)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'workers': len(self._workers), 'concurrency': self.concurrency}
+
+
+# Singleton instance
+_ingestion_job_queue: Optional[IngestionJobQueue] = None
+
+
+def get_ingestion_job_queue() -> IngestionJobQueue:
+    """Get the shared job queue, configured from the environment"""
+    global _ingestion_job_queue
+    if _ingestion_job_queue is None:
+        spool_dir = os.getenv("INGESTION_SPOOL_DIR", os.path.join("data", "ingestion_spool"))
+        store = IngestionJobStore(
+            os.getenv("INGESTION_JOB_DB", os.path.join(spool_dir, "jobs.sqlite3")),
+            max_attempts=int(os.getenv("INGESTION_MAX_ATTEMPTS", "3")),
+            retry_backoff_seconds=float(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "30"))
+        )
+        _ingestion_job_queue = IngestionJobQueue(
+            spool_dir,
+            store=store,
+            concurrency=int(os.getenv("INGESTION_WORKER_CONCURRENCY", "3")),
+            stale_after_seconds=float(os.getenv("INGESTION_JOB_STALE_SECONDS", "300"))
+        )
+    return _ingestion_job_queue
+
+
+def workers_in_process() -> bool:
+    """Whether the API process should run the ingestion workers itself"""
+    return os.getenv("INGESTION_WORKERS_IN_PROCESS", "true").lower() != "false"
+
+
+async def run_workers() -> None:
+    """Run the worker pool standalone until interrupted"""
+    queue = get_ingestion_job_queue()
+    queue.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await queue.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_workers())
@@ -0,0 +1,406 @@
+"""
+Otto.AI Ingestion Pipeline
+Pipelined PDF ingestion engine: extract → analyze → merge → persist → embed.
+
+Every stage has its own workers fed by a bounded queue, so a slow stage
+applies backpressure upstream instead of letting PDFs pile up in memory.
+PyMuPDF extraction runs in the shared process pool while the Gemini call
+for the same PDF is already in flight, and many PDFs occupy different
+stages at once. A PDF already in the dedupe index skips extraction and
+analysis; its listing is still updated, which re-embeds nothing unchanged.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .ingestion_dedupe import hash_bytes
+from .pdf_extraction import ExtractedImage
+from .pdf_ingestion_service import PDFIngestionService, VehicleListingArtifact
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("extract", "analyze", "merge", "persist", "embed")
+
+DEFAULT_STAGE_WORKERS = {
+    "extract": 4,
+    "analyze": 4,
+    "merge": 2,
+    "persist": 4,
+    "embed": 2,
+}
+
+ArtifactHandler = Callable[[VehicleListingArtifact], Awaitable[Any]]
+
+
+@dataclass
+class StageMetrics:
+    """Counters for one pipeline stage"""
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.busy_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self, queue_depth: int) -> Dict[str, Any]:
+        handled = self.processed + self.failed
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'avg_seconds': self.busy_seconds / handled if handled else 0.0,
+            'max_seconds': self.max_seconds,
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+@dataclass
+class IngestionJob:
+    """One PDF moving through the pipeline"""
+    job_id: str
+    pdf_bytes: bytes
+    filename: str
+    seller_id: Optional[str]
+    future: asyncio.Future
+    pdf_size: int = 0
+    on_stage: Optional[Callable[[str], None]] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    analysis: Optional[asyncio.Task] = None
+    images: Optional[List[ExtractedImage]] = None
+    gemini_result: Optional[dict] = None
+    artifact: Optional[VehicleListingArtifact] = None
+    result: Optional[Dict[str, Any]] = None
+    content_hash: Optional[str] = None
+    deduplicated: bool = False
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+class IngestionPipeline:
+    """
+    Staged PDF ingestion engine shared by the upload endpoints.
+
+    Persist uploads listing images to storage and embed writes the listing
+    with its embeddings; both can be replaced with custom handlers.
+    """
+
+    def __init__(
+        self,
+        ingestion_service: PDFIngestionService,
+        persist_handler: Optional[ArtifactHandler] = None,
+        embed_handler: Optional[ArtifactHandler] = None,
+        queue_size: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        stage_workers: Optional[Dict[str, int]] = None
+    ):
+        self.service = ingestion_service
+        self.persist_handler = persist_handler or self.upload_images
+        self.embed_handler = embed_handler or self.embed_listing
+        self.queue_size = queue_size or int(os.getenv("INGESTION_QUEUE_SIZE", "8"))
+
+        workers = {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}
+        self.queues: Dict[str, asyncio.Queue] = {
+            stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES
+        }
+        self.metrics: Dict[str, StageMetrics] = {
+            stage: StageMetrics(workers=workers[stage]) for stage in STAGES
+        }
+        self._handlers = {
+            "extract": self._extract,
+            "analyze": self._await_analysis,
+            "merge": self._merge,
+            "persist": self._persist,
+            "embed": self._embed,
+        }
+        self._llm_slots = asyncio.Semaphore(
+            llm_concurrency or int(os.getenv("INGESTION_LLM_CONCURRENCY", "4"))
+        )
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._embedding_service = None
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'llm_calls': 0,
+            'llm_seconds': 0.0,
+            'deduplicated': 0
+        }
+
+    def start(self) -> None:
+        """Start the stage workers"""
+        if self._workers:
+            return
+        for stage in STAGES:
+            for _ in range(self.metrics[stage].workers):
+                self._workers.append(asyncio.create_task(self._worker(stage)))
+        logger.info(f"✅ Ingestion pipeline started ({len(self._workers)} stage workers)")
+
+    async def stop(self) -> None:
+        """Stop the workers and fail any job still in flight"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        for job in list(self._jobs.values()):
+            if job.analysis:
+                job.analysis.cancel()
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("Ingestion pipeline stopped"))
+        self._jobs.clear()
+
+    async def submit(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        seller_id: Optional[str] = None,
+        on_stage: Optional[Callable[[str], None]] = None
+    ) -> asyncio.Future:
+        """
+        Queue a PDF and return a future for its result.
+
+        Waits while the extract queue is full. on_stage is called with the
+        stage name each time the job enters a stage.
+        """
+        self.start()
+        job = IngestionJob(
+            job_id=str(uuid.uuid4()),
+            pdf_bytes=pdf_bytes,
+            filename=filename,
+            seller_id=seller_id,
+            future=asyncio.get_running_loop().create_future(),
+            pdf_size=len(pdf_bytes),
+            on_stage=on_stage
+        )
+        self._jobs[job.job_id] = job
+        job.future.add_done_callback(lambda _: self._job_done(job))
+        self.stats['submitted'] += 1
+
+        await self._enqueue("extract", job)
+        return job.future
+
+    def _job_done(self, job: IngestionJob) -> None:
+        self._jobs.pop(job.job_id, None)
+        # A cancelled caller must not leave its LLM call holding a slot
+        if job.analysis:
+            job.analysis.cancel()
+            job.analysis = None
+
+    async def process(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        seller_id: Optional[str] = None,
+        on_stage: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Run one PDF through the pipeline and wait for its result"""
+        return await (await self.submit(pdf_bytes, filename, seller_id, on_stage))
+
+    async def _enqueue(self, stage: str, job: IngestionJob) -> None:
+        queue = self.queues[stage]
+        await queue.put(job)
+        metrics = self.metrics[stage]
+        metrics.max_queue_depth = max(metrics.max_queue_depth, queue.qsize())
+
+    async def _worker(self, stage: str) -> None:
+        queue = self.queues[stage]
+        handler = self._handlers[stage]
+        metrics = self.metrics[stage]
+        index = STAGES.index(stage)
+        next_stage = STAGES[index + 1] if index + 1 < len(STAGES) else None
+
+        while True:
+            job = await queue.get()
+            try:
+                if job.future.done():
+                    # Caller gave up on this job
+                    continue
+
+                if job.on_stage:
+                    job.on_stage(stage)
+
+                started = time.monotonic()
+                try:
+                    await handler(job)
+                except Exception as e:
+                    metrics.record(time.monotonic() - started, ok=False)
+                    self._fail(job, stage, e)
+                    continue
+
+                elapsed = time.monotonic() - started
+                metrics.record(elapsed)
+                job.stage_seconds[stage] = elapsed
+
+                if next_stage:
+                    await self._enqueue(next_stage, job)
+                else:
+                    self._complete(job)
+            finally:
+                queue.task_done()
+
+    async def _extract(self, job: IngestionJob) -> None:
+        job.content_hash = await asyncio.to_thread(hash_bytes, job.pdf_bytes)
+        cached = await self.service.find_processed_artifact(job.content_hash, job.filename)
+        if cached is not None:
+            job.artifact = cached
+            job.deduplicated = True
+            job.pdf_bytes = b""
+            self.stats['deduplicated'] += 1
+            return
+
+        # Start the LLM call first so it overlaps with extraction in the pool
+        job.analysis = asyncio.create_task(self._analyze(job.pdf_bytes))
+        try:
+            job.images = await self.service.extract_images(job.pdf_bytes)
+        except Exception:
+            job.analysis.cancel()
+            raise
+
+    async def _analyze(self, pdf_bytes: bytes) -> dict:
+        async with self._llm_slots:
+            started = time.monotonic()
+            try:
+                return await self.service._analyze_with_gemini(pdf_bytes)
+            finally:
+                self.stats['llm_calls'] += 1
+                self.stats['llm_seconds'] += time.monotonic() - started
+
+    async def _await_analysis(self, job: IngestionJob) -> None:
+        if job.deduplicated:
+            return
+        job.gemini_result = await job.analysis
+        job.analysis = None
+        job.pdf_bytes = b""  # No longer needed; don't hold it through persist/embed
+
+    async def _merge(self, job: IngestionJob) -> None:
+        if not job.deduplicated:
+            job.artifact = self.service.build_artifact(
+                job.gemini_result,
+                job.images,
+                job.filename,
+                time.monotonic() - job.submitted_at
+            )
+            await self.service.remember_artifact(job.content_hash, job.artifact, job.pdf_size)
+        job.artifact.processing_metadata.update({
+            'seller_id': job.seller_id,
+            'job_id': job.job_id
+        })
+        job.images = None
+        job.gemini_result = None
+
+    async def _persist(self, job: IngestionJob) -> None:
+        await self.persist_handler(job.artifact)
+
+    async def _embed(self, job: IngestionJob) -> None:
+        # A re-sent PDF still goes through the handler: the listing may have been
+        # deactivated or the upload may come from another seller. The incremental
+        # update re-embeds nothing when only those fields differ.
+        index = self.service.get_dedupe_index()
+        job.result = await self.embed_handler(job.artifact)
+        if index is None:
+            return
+        if job.deduplicated and not (job.result or {}).get('changes', {}).get('text_embedded', True):
+            await asyncio.to_thread(index.increment, embeddings_skipped=1)
+        if job.result and job.result.get('listing_id'):
+            await asyncio.to_thread(index.record_result, job.content_hash, {
+                'listing_id': job.result['listing_id'],
+                'vin': job.artifact.vehicle.vin
+            })
+
+    def _complete(self, job: IngestionJob) -> None:
+        result = job.result or {}
+        self.stats['completed'] += 1
+        if not job.future.done():
+            job.future.set_result({
+                'listing_id': result.get('listing_id', f"listing_{job.artifact.vehicle.vin}"),
+                'vin': job.artifact.vehicle.vin,
+                'image_count': len(job.artifact.images),
+                'processing_time': time.monotonic() - job.submitted_at,
+                'stage_seconds': dict(job.stage_seconds)
+            })
+        logger.info(f"✅ Ingested {job.filename} -> {job.artifact.vehicle.vin}")
+
+    def _fail(self, job: IngestionJob, stage: str, error: Exception) -> None:
+        self.stats['failed'] += 1
+        if job.analysis:
+            job.analysis.cancel()
+        if not job.future.done():
+            job.future.set_exception(error)
+        logger.error(f"❌ Ingestion of {job.filename} failed at {stage}: {error}")
+
+    async def upload_images(self, artifact: VehicleListingArtifact) -> None:
+        """Default persist stage: upload listing images to storage"""
+        from .storage_service import get_storage_service
+        storage_service = await get_storage_service()
+
+        upload_tasks = []
+        for image in artifact.images:
+            hash_prefix = hashlib.md5(image.image_bytes[:1024]).hexdigest()[:8]
+            img_filename = f"{artifact.vehicle.vin}_{image.vehicle_angle}_{hash_prefix}.{image.format}"
+            upload_tasks.append(
+                storage_service.upload_vehicle_image(
+                    image.image_bytes,
+                    img_filename,
+                    optimize=True,
+                    create_variants=True,
+                    perceptual_hash=image.perceptual_hash
+                )
+            )
+
+        upload_results = await asyncio.gather(*upload_tasks, return_exceptions=True)
+
+        for i, (image, result) in enumerate(zip(artifact.images, upload_results)):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to upload image {i}: {str(result)}")
+                continue
+            image.storage_url = result.get('web_url')
+            image.thumbnail_url = result.get('thumbnail_url')
+
+    async def embed_listing(self, artifact: VehicleListingArtifact) -> Dict[str, Any]:
+        """Default embed stage: generate embeddings and persist the listing"""
+        from ..semantic.embedding_service import OttoAIEmbeddingService
+        from .vehicle_embedding_service import process_listing_for_search
+
+        if self._embedding_service is None:
+            self._embedding_service = OttoAIEmbeddingService()
+        return await process_listing_for_search(artifact, self._embedding_service)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'in_flight': len(self._jobs),
+            'stages': {
+                stage: self.metrics[stage].to_dict(self.queues[stage].qsize())
+                for stage in STAGES
+            }
+        }
+
+
+# Singleton instance
+_ingestion_pipeline: Optional[IngestionPipeline] = None
+
+
+async def get_ingestion_pipeline() -> IngestionPipeline:
+    """Get the shared, started ingestion pipeline"""
+    global _ingestion_pipeline
+    if _ingestion_pipeline is None:
+        from .pdf_ingestion_service import get_pdf_ingestion_service
+        _ingestion_pipeline = IngestionPipeline(await get_pdf_ingestion_service())
+    _ingestion_pipeline.start()
+    return _ingestion_pipeline
@@ -9,8 +9,9 @@ This completes the end-to-end flow:
 PDF → VehicleListingArtifact → Database → Search → Grid Display
 """
 
-import logging
 import asyncio
+import contextlib
+import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from uuid import uuid4
@@ -42,6 +43,7 @@ class ListingPersistenceService:
         self.listing_repo = ListingRepository()
         self.image_repo = ImageRepository()
         self.storage_service = None  # Lazy loaded
+        self.bulk_upload_concurrency = 16  # Concurrent image uploads in persist_batch
 
     async def _get_storage_service(self):
         """Lazy load storage service"""
@@ -76,33 +78,7 @@ class ListingPersistenceService:
             logger.info(f"Persisting listing for VIN: {artifact.vehicle.vin}")
 
             # Step 1: Create the vehicle listing record
-            listing_create = ListingCreate(
-                vin=artifact.vehicle.vin,
-                year=artifact.vehicle.year,
-                make=artifact.vehicle.make,
-                model=artifact.vehicle.model,
-                trim=artifact.vehicle.trim,
-                odometer=artifact.vehicle.odometer,
-                drivetrain=artifact.vehicle.drivetrain,
-                transmission=artifact.vehicle.transmission,
-                engine=artifact.vehicle.engine,
-                exterior_color=artifact.vehicle.exterior_color,
-                interior_color=artifact.vehicle.interior_color,
-                condition_score=artifact.condition.score,
-                condition_grade=artifact.condition.grade,
-                description_text=self._generate_description(artifact),
-                text_embedding=text_embedding,
-                status='active',
-                listing_source='pdf_upload',
-                processing_metadata={
-                    'pdf_filename': artifact.processing_metadata.get('filename'),
-                    'processing_time': artifact.processing_metadata.get('processing_time'),
-                    'gemini_images_found': artifact.processing_metadata.get('gemini_images_found', 0),
-                    'pymupdf_images_extracted': artifact.processing_metadata.get('pymupdf_images_extracted', 0),
-                    'final_merged_images': artifact.processing_metadata.get('final_merged_images', 0)
-                },
-                seller_id=seller_id
-            )
+            listing_create = self._build_listing_create(artifact, text_embedding, seller_id)
 
             # Use upsert to handle existing VINs gracefully
             listing = await self.listing_repo.upsert(listing_create, update_metadata=True)
@@ -129,6 +105,7 @@ class ListingPersistenceService:
             # Step 4: Update listing with summary metadata
             # This could trigger search indexing in the future
             logger.info(f"✅ Successfully persisted listing {listing_id}")
+            self._notify_inventory_changed([listing_id])
 
             return {
                 'listing_id': listing_id,
@@ -142,6 +119,49 @@ class ListingPersistenceService:
             logger.error(f"❌ Failed to persist listing for VIN {artifact.vehicle.vin}: {e}")
             raise
 
+    def _build_listing_create(
+        self,
+        artifact: VehicleListingArtifact,
+        text_embedding: Optional[List[float]] = None,
+        seller_id: Optional[str] = None
+    ) -> ListingCreate:
+        """Map an artifact to its vehicle_listings row"""
+        return ListingCreate(
+            vin=artifact.vehicle.vin,
+            year=artifact.vehicle.year,
+            make=artifact.vehicle.make,
+            model=artifact.vehicle.model,
+            trim=artifact.vehicle.trim,
+            odometer=artifact.vehicle.odometer,
+            drivetrain=artifact.vehicle.drivetrain,
+            transmission=artifact.vehicle.transmission,
+            engine=artifact.vehicle.engine,
+            exterior_color=artifact.vehicle.exterior_color,
+            interior_color=artifact.vehicle.interior_color,
+            condition_score=artifact.condition.score,
+            condition_grade=artifact.condition.grade,
+            description_text=self._generate_description(artifact),
+            text_embedding=text_embedding,
+            status='active',
+            listing_source='pdf_upload',
+            processing_metadata={
+                'pdf_filename': artifact.processing_metadata.get('filename'),
+                'processing_time': artifact.processing_metadata.get('processing_time'),
+                'gemini_images_found': artifact.processing_metadata.get('gemini_images_found', 0),
+                'pymupdf_images_extracted': artifact.processing_metadata.get('pymupdf_images_extracted', 0),
+                'final_merged_images': artifact.processing_metadata.get('final_merged_images', 0)
+            },
+            seller_id=seller_id
+        )
+
+    def _notify_inventory_changed(self, listing_ids: List[str]) -> None:
+        """Let the SSE inventory snapshot publish a delta for changed listings"""
+        try:
+            from ..realtime_services.inventory_snapshot import get_inventory_snapshot
+            get_inventory_snapshot().notify_listings_changed(listing_ids)
+        except Exception as e:
+            logger.warning(f"Inventory snapshot not notified for {listing_ids}: {e}")
+
     async def _persist_images(
         self,
         listing_id: str,
@@ -154,51 +174,7 @@ class ListingPersistenceService:
             return 0
 
         try:
-            storage_service = await self._get_storage_service()
-            image_creates = []
-
-            for idx, enriched_image in enumerate(images):
-                try:
-                    # Generate unique filename
-                    ext = enriched_image.format or 'jpg'
-                    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{vin}_{timestamp}_{idx}.{ext}"
-
-                    # Upload image to Supabase Storage
-                    upload_result = await storage_service.upload_vehicle_image(
-                        image_bytes=enriched_image.image_bytes,
-                        filename=filename,
-                        optimize=True,
-                        create_variants=True
-                    )
-
-                    # Create image record
-                    image_create = ImageCreate(
-                        listing_id=listing_id,
-                        vin=vin,
-                        category=enriched_image.category,
-                        vehicle_angle=enriched_image.vehicle_angle,
-                        description=enriched_image.description,
-                        suggested_alt=enriched_image.suggested_alt,
-                        quality_score=enriched_image.quality_score,
-                        visible_damage=enriched_image.visible_damage or [],
-                        original_filename=filename,
-                        file_format=enriched_image.format or 'jpeg',
-                        file_size_bytes=len(enriched_image.image_bytes),
-                        width=enriched_image.width,
-                        height=enriched_image.height,
-                        original_url=upload_result.get('original_url'),
-                        web_url=upload_result.get('web_url'),
-                        thumbnail_url=upload_result.get('thumbnail_url'),
-                        detail_url=upload_result.get('detail_url'),
-                        page_number=enriched_image.page_number,
-                        display_order=idx  # Use array index for display order
-                    )
-                    image_creates.append(image_create)
-
-                except Exception as e:
-                    logger.error(f"Failed to process image {idx} for listing {listing_id}: {e}")
-                    # Continue with other images
+            image_creates = await self._upload_images(listing_id, vin, images)
 
             # Batch create image records
             if image_creates:
@@ -213,6 +189,77 @@ class ListingPersistenceService:
             # Don't fail the entire listing if images fail
             return 0
 
+    async def _upload_images(
+        self,
+        listing_id: str,
+        vin: str,
+        images: List[Any],
+        upload_slots: Optional[asyncio.Semaphore] = None
+    ) -> List[ImageCreate]:
+        """
+        Upload images to storage concurrently and build their records.
+
+        Images that fail to upload are logged and skipped. upload_slots
+        bounds concurrent uploads when many listings share the storage client.
+        """
+        storage_service = await self._get_storage_service()
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+
+        async def upload_image(idx: int, enriched_image: Any) -> ImageCreate:
+            # Generate unique filename
+            ext = enriched_image.format or 'jpg'
+            filename = f"{vin}_{timestamp}_{idx}.{ext}"
+
+            # Upload image to Supabase Storage
+            async with upload_slots or contextlib.nullcontext():
+                upload_result = await storage_service.upload_vehicle_image(
+                    image_bytes=enriched_image.image_bytes,
+                    filename=filename,
+                    optimize=True,
+                    create_variants=True,
+                    perceptual_hash=enriched_image.perceptual_hash
+                )
+
+            # Create image record
+            return ImageCreate(
+                listing_id=listing_id,
+                vin=vin,
+                category=enriched_image.category,
+                vehicle_angle=enriched_image.vehicle_angle,
+                description=enriched_image.description,
+                suggested_alt=enriched_image.suggested_alt,
+                quality_score=enriched_image.quality_score,
+                visible_damage=enriched_image.visible_damage or [],
+                original_filename=filename,
+                file_format=enriched_image.format or 'jpeg',
+                file_size_bytes=len(enriched_image.image_bytes),
+                width=enriched_image.width,
+                height=enriched_image.height,
+                original_url=upload_result.get('original_url'),
+                web_url=upload_result.get('web_url'),
+                thumbnail_url=upload_result.get('thumbnail_url'),
+                detail_url=upload_result.get('detail_url'),
+                page_number=enriched_image.page_number,
+                processing_metadata={'content_hash': enriched_image.content_hash},
+                display_order=idx  # Use array index for display order
+            )
+
+        # Images are processed in the storage process pool and uploaded concurrently
+        results = await asyncio.gather(
+            *(upload_image(idx, image) for idx, image in enumerate(images)),
+            return_exceptions=True
+        )
+
+        image_creates = []
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to process image {idx} for listing {listing_id}: {result}")
+                # Continue with other images
+                continue
+            image_creates.append(result)
+
+        return image_creates
+
     async def _persist_condition_issues(
         self,
         listing_id: str,
@@ -225,62 +272,8 @@ class ListingPersistenceService:
             return 0
 
         try:
-            issue_count = 0
-
-            # Process each issue category
-            for category, issues in condition.issues.items():
-                if not isinstance(issues, list):
-                    continue
-
-                for issue in issues:
-                    try:
-                        # Handle both string and dict issue formats
-                        if isinstance(issue, str):
-                            # Parse "LOCATION: Issue description" format
-                            if ':' in issue:
-                                location, description = issue.split(':', 1)
-                                location = location.strip()
-                                description = description.strip()
-                            else:
-                                location = None
-                                description = issue
-                        elif isinstance(issue, dict):
-                            location = issue.get('location')
-                            description = issue.get('description', issue.get('issue', ''))
-                        else:
-                            continue
-
-                        # Determine severity based on condition score
-                        if condition.score >= 4.5:
-                            severity = 'minor'
-                        elif condition.score >= 3.5:
-                            severity = 'moderate'
-                        else:
-                            severity = 'major'
-
-                        # Create issue record (direct insert via client for now)
-                        # TODO: Create IssueRepository for this
-                        issue_data = {
-                            'listing_id': listing_id,
-                            'vin': vin,
-                            'issue_category': category,
-                            'issue_type': 'condition_issue',
-                            'severity': severity,
-                            'description': description,
-                            'location': location
-                        }
-
-                        # Direct insert for condition issues (no repository yet)
-                        from ..services.supabase_client import get_supabase_client_singleton
-                        client = get_supabase_client_singleton()
-                        result = client.table('vehicle_condition_issues').insert(issue_data).execute()
-
-                        if result.data:
-                            issue_count += 1
-
-                    except Exception as e:
-                        logger.error(f"Failed to persist issue for listing {listing_id}: {e}")
-                        # Continue with other issues
+            issue_rows = self._build_issue_rows(listing_id, vin, condition)
+            issue_count = self._insert_issue_rows(issue_rows).get(listing_id, 0)
 
             logger.info(f"✅ Created {issue_count} condition issue records for listing {listing_id}")
             return issue_count
@@ -290,6 +283,96 @@ class ListingPersistenceService:
             # Don't fail the entire listing if issues fail
             return 0
 
+    def _build_issue_rows(
+        self,
+        listing_id: str,
+        vin: str,
+        condition: Any
+    ) -> List[Dict[str, Any]]:
+        """Map condition issues to vehicle_condition_issues rows"""
+        if not condition or not condition.issues:
+            return []
+
+        # Determine severity based on condition score
+        if condition.score >= 4.5:
+            severity = 'minor'
+        elif condition.score >= 3.5:
+            severity = 'moderate'
+        else:
+            severity = 'major'
+
+        rows = []
+
+        # Process each issue category
+        for category, issues in condition.issues.items():
+            if not isinstance(issues, list):
+                continue
+
+            for issue in issues:
+                # Handle both string and dict issue formats
+                if isinstance(issue, str):
+                    # Parse "LOCATION: Issue description" format
+                    if ':' in issue:
+                        location, description = issue.split(':', 1)
+                        location = location.strip()
+                        description = description.strip()
+                    else:
+                        location = None
+                        description = issue
+                elif isinstance(issue, dict):
+                    location = issue.get('location')
+                    description = issue.get('description', issue.get('issue', ''))
+                else:
+                    continue
+
+                rows.append({
+                    'listing_id': listing_id,
+                    'vin': vin,
+                    'issue_category': category,
+                    'issue_type': 'condition_issue',
+                    'severity': severity,
+                    'description': description,
+                    'location': location
+                })
+
+        return rows
+
+    def _insert_issue_rows(
+        self,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = 500
+    ) -> Dict[str, int]:
+        """
+        Multi-row insert of condition issues (no IssueRepository yet).
+
+        A rejected chunk (e.g. an issue category outside the CHECK
+        constraint) is retried row by row. Returns created count per listing.
+        """
+        from ..services.supabase_client import get_supabase_client_singleton
+        client = get_supabase_client_singleton()
+        counts: Dict[str, int] = {}
+
+        def count(created: List[Dict[str, Any]]):
+            for row in created:
+                counts[row['listing_id']] = counts.get(row['listing_id'], 0) + 1
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                result = client.table('vehicle_condition_issues').insert(chunk).execute()
+                count(result.data or [])
+            except Exception as e:
+                logger.warning(f"⚠️ Bulk insert of {len(chunk)} condition issues failed, retrying per row: {e}")
+                for row in chunk:
+                    try:
+                        result = client.table('vehicle_condition_issues').insert(row).execute()
+                        count(result.data or [])
+                    except Exception as row_error:
+                        logger.error(f"Failed to persist issue for listing {row['listing_id']}: {row_error}")
+                        # Continue with other issues
+
+        return counts
+
     def _generate_description(self, artifact: VehicleListingArtifact) -> str:
         """Generate a natural language description from the artifact"""
         try:
@@ -334,15 +417,22 @@ class ListingPersistenceService:
         self,
         artifacts: List[VehicleListingArtifact],
         text_embeddings: Optional[List[List[float]]] = None,
-        seller_id: Optional[str] = None
+        seller_id: Optional[str] = None,
+        bulk: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Persist multiple listings in batch.
 
+        In bulk mode listings, images and condition issues are collected
+        across the whole batch and written with multi-row upserts/inserts;
+        image uploads for every listing run concurrently. bulk=False
+        persists one listing at a time via persist_listing.
+
         Args:
             artifacts: List of VehicleListingArtifact objects
             text_embeddings: Optional list of embeddings (must match artifacts length)
             seller_id: Optional seller/user ID
+            bulk: Use the batched write path
 
         Returns:
             List of result dicts for each artifact
@@ -350,6 +440,9 @@ class ListingPersistenceService:
         if not artifacts:
             return []
 
+        if bulk:
+            return await self._persist_batch_bulk(artifacts, text_embeddings, seller_id)
+
         results = []
 
         for idx, artifact in enumerate(artifacts):
@@ -372,6 +465,124 @@ class ListingPersistenceService:
 
         return results
 
+    async def _persist_batch_bulk(
+        self,
+        artifacts: List[VehicleListingArtifact],
+        text_embeddings: Optional[List[List[float]]],
+        seller_id: Optional[str],
+        chunk_size: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Batched write path for persist_batch; same result dicts as persist_listing"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(artifacts)
+        listing_creates: Dict[str, ListingCreate] = {}
+        owner: Dict[str, int] = {}  # VIN -> index of the artifact that is written
+
+        # Step 1: Build listing rows (a repeated VIN keeps the last artifact)
+        for idx, artifact in enumerate(artifacts):
+            try:
+                embedding = text_embeddings[idx] if text_embeddings and idx < len(text_embeddings) else None
+                listing_creates[artifact.vehicle.vin] = self._build_listing_create(artifact, embedding, seller_id)
+                owner[artifact.vehicle.vin] = idx
+            except Exception as e:
+                logger.error(f"Failed to persist artifact {idx}: {e}")
+                results[idx] = {
+                    'error': str(e),
+                    'vin': artifact.vehicle.vin if hasattr(artifact, 'vehicle') else 'unknown'
+                }
+
+        try:
+            upserted = await self.listing_repo.upsert_batch(
+                list(listing_creates.values()), update_metadata=True, chunk_size=chunk_size
+            )
+        except Exception as e:
+            upserted = {vin: e for vin in owner}
+
+        persisted = []  # (idx, artifact, listing_id)
+        for vin, idx in owner.items():
+            row = upserted.get(vin)
+            if isinstance(row, dict):
+                persisted.append((idx, artifacts[idx], row['id']))
+            else:
+                logger.error(f"Failed to persist artifact {idx}: {row}")
+                results[idx] = {'error': str(row), 'vin': vin}
+
+        # Step 2: Upload every listing's images concurrently, then one multi-row insert
+        upload_slots = asyncio.Semaphore(self.bulk_upload_concurrency)
+        uploads = await asyncio.gather(
+            *(self._upload_images(listing_id, artifact.vehicle.vin, artifact.images, upload_slots)
+              for _, artifact, listing_id in persisted),
+            return_exceptions=True
+        )
+        image_creates = []
+        for (_, _, listing_id), upload in zip(persisted, uploads):
+            if isinstance(upload, Exception):
+                logger.error(f"❌ Failed to persist images for listing {listing_id}: {upload}")
+                continue
+            image_creates.extend(upload)
+        image_counts = await self._create_image_records(image_creates, chunk_size)
+
+        # Step 3: Condition issues for the whole batch
+        issue_rows = []
+        for _, artifact, listing_id in persisted:
+            issue_rows.extend(self._build_issue_rows(listing_id, artifact.vehicle.vin, artifact.condition))
+        issue_counts = self._insert_issue_rows(issue_rows, chunk_size)
+
+        for idx, artifact, listing_id in persisted:
+            results[idx] = {
+                'listing_id': listing_id,
+                'vin': artifact.vehicle.vin,
+                'image_count': image_counts.get(listing_id, 0),
+                'issue_count': issue_counts.get(listing_id, 0),
+                'status': 'active'
+            }
+
+        # Earlier artifacts with a repeated VIN share the written listing's result
+        for idx, artifact in enumerate(artifacts):
+            if results[idx] is None:
+                results[idx] = dict(results[owner[artifact.vehicle.vin]])
+
+        listing_ids = [listing_id for _, _, listing_id in persisted]
+        logger.info(f"✅ Bulk persisted {len(listing_ids)}/{len(artifacts)} listings, "
+                    f"{sum(image_counts.values())} images, {sum(issue_counts.values())} issues")
+        if listing_ids:
+            self._notify_inventory_changed(listing_ids)
+
+        return results
+
+    async def _create_image_records(
+        self,
+        image_creates: List[ImageCreate],
+        chunk_size: int = 500
+    ) -> Dict[str, int]:
+        """
+        Multi-row insert of image records across listings.
+
+        A rejected chunk is retried per listing so one bad record only
+        costs its own listing's images. Returns created count per listing.
+        """
+        counts: Dict[str, int] = {}
+
+        def count(created: List[Dict[str, Any]]):
+            for row in created:
+                counts[row['listing_id']] = counts.get(row['listing_id'], 0) + 1
+
+        for start in range(0, len(image_creates), chunk_size):
+            chunk = image_creates[start:start + chunk_size]
+            try:
+                count(await self.image_repo.create_batch(chunk))
+            except Exception as e:
+                logger.warning(f"⚠️ Bulk insert of {len(chunk)} images failed, retrying per listing: {e}")
+                by_listing: Dict[str, List[ImageCreate]] = {}
+                for image in chunk:
+                    by_listing.setdefault(image.listing_id, []).append(image)
+                for listing_id, images in by_listing.items():
+                    try:
+                        count(await self.image_repo.create_batch(images))
+                    except Exception as listing_error:
+                        logger.error(f"❌ Failed to persist images for listing {listing_id}: {listing_error}")
+
+        return counts
+
     async def close(self):
         """Clean up resources"""
         if self.storage_service:
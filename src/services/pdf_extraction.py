@@ -0,0 +1,179 @@
+"""
+Otto.AI PDF Extraction Workers
+CPU-bound PyMuPDF/PIL work for the ingestion pipeline, run in a shared
+ProcessPoolExecutor so a single PDF never blocks the event loop.
+
+Everything submitted to the pool is a module-level function of plain
+arguments; this module deliberately avoids importing the service layer so
+worker processes stay light.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageChops, ImageStat
+
+logger = logging.getLogger(__name__)
+
+# Minimum size for vehicle photos; smaller images are logos, icons, stamps
+MIN_IMAGE_WIDTH = 200
+MIN_IMAGE_HEIGHT = 150
+
+_process_pool: Optional[Executor] = None
+
+
+@dataclass
+class ExtractedImage:
+    """PyMuPDF-extracted raw image data"""
+    page_number: int
+    image_bytes: bytes
+    width: int
+    height: int
+    format: str  # jpeg, png
+    xref: int  # PDF internal reference
+    content_hash: str = ""  # SHA-256 of image_bytes
+    perceptual_hash: Optional[str] = None  # see perceptual_hash()
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[str]:
+    """
+    64-bit difference hash, prefixed with the image size.
+
+    Survives re-encoding, so the same photo exported by a different PDF
+    tool still matches. Returns None for undecodable images.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            size = img.size
+            img.draft('L', (9, 8))  # JPEG: decode at 1/8 scale
+            pixels = list(img.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{size[0]}x{size[1]}:{bits:016x}"
+
+
+def pixels_match(first: bytes, second: bytes, tolerance: float = 2.0, max_changed: float = 0.001) -> bool:
+    """
+    Whether two encodings decode to the same picture.
+
+    Sizes must be equal, the mean per-channel difference at most tolerance
+    (0-255) and at most max_changed of the pixels may differ strongly.
+    That absorbs lossy re-encoding but not a different photo (or an edited
+    region) that happens to share a perceptual hash.
+    """
+    try:
+        with Image.open(io.BytesIO(first)) as a, Image.open(io.BytesIO(second)) as b:
+            if a.size != b.size:
+                return False
+            diff = ImageChops.difference(a.convert('RGB'), b.convert('RGB'))
+    except Exception:
+        return False
+
+    changed = sum(diff.convert('L').histogram()[64:])
+    return (
+        max(ImageStat.Stat(diff).mean) <= tolerance
+        and changed <= max_changed * diff.size[0] * diff.size[1]
+    )
+
+
+def extract_pdf_images(
+    pdf_bytes: bytes,
+    min_width: int = MIN_IMAGE_WIDTH,
+    min_height: int = MIN_IMAGE_HEIGHT
+) -> List[ExtractedImage]:
+    """
+    Extract raw image bytes from PDF using PyMuPDF.
+
+    Filters out small decorative images and keeps only vehicle photos.
+    """
+    images = []
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+
+            for img_info in page.get_images(full=True):
+                xref = img_info[0]
+
+                try:
+                    img_data = doc.extract_image(xref)
+                except Exception as e:
+                    # Log but don't fail - some images may be corrupt
+                    logger.debug(f"Failed to extract image xref {xref}: {e}")
+                    continue
+
+                if not img_data or not img_data.get("image"):
+                    continue
+
+                width = img_data.get("width", 0)
+                height = img_data.get("height", 0)
+                if width >= min_width and height >= min_height:
+                    images.append(ExtractedImage(
+                        page_number=page_num + 1,  # 1-indexed for consistency
+                        image_bytes=img_data["image"],
+                        width=width,
+                        height=height,
+                        format=img_data["ext"],
+                        xref=xref,
+                        content_hash=hashlib.sha256(img_data["image"]).hexdigest(),
+                        perceptual_hash=perceptual_hash(img_data["image"])
+                    ))
+    finally:
+        doc.close()
+
+    return images
+
+
+def get_process_pool() -> Optional[Executor]:
+    """
+    Shared process pool for CPU-bound ingestion work.
+
+    Sized by PDF_PROCESS_WORKERS (default: CPU count, capped at 4). Returns
+    None when process pools are unavailable, in which case callers fall
+    back to the default thread executor.
+    """
+    global _process_pool
+    if _process_pool is None:
+        workers = int(os.getenv("PDF_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+        try:
+            _process_pool = ProcessPoolExecutor(max_workers=max(1, workers))
+        except (NotImplementedError, OSError) as e:
+            logger.warning(f"⚠️ Process pool unavailable, using threads for PDF work: {e}")
+            return None
+    return _process_pool
+
+
+async def run_in_process_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable function in the shared process pool"""
+    global _process_pool
+    loop = asyncio.get_running_loop()
+
+    try:
+        return await loop.run_in_executor(get_process_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault in a malformed PDF); rebuild and retry once
+        logger.warning("⚠️ PDF process pool broken, restarting it")
+        shutdown_process_pool(wait=False)
+        return await loop.run_in_executor(get_process_pool(), fn, *args)
+
+
+def shutdown_process_pool(wait: bool = True):
+    """Shut down the shared process pool"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=not wait)
+        _process_pool = None
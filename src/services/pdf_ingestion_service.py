@@ -16,11 +16,13 @@ from datetime import datetime
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 
-import fitz  # PyMuPDF
 import httpx
 from PIL import Image
 from pydantic import BaseModel, field_validator
 
+from .ingestion_dedupe import IngestionDedupeIndex, get_ingestion_dedupe_index, hash_bytes
+from .pdf_extraction import ExtractedImage, extract_pdf_images, run_in_process_pool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,17 +40,6 @@ class ImageMetadata:
     visible_damage: Optional[List[str]] = None
 
 
-@dataclass
-class ExtractedImage:
-    """PyMuPDF-extracted raw image data"""
-    page_number: int
-    image_bytes: bytes
-    width: int
-    height: int
-    format: str  # jpeg, png
-    xref: int  # PDF internal reference
-
-
 class EnrichedImage(BaseModel):
     """Merged result: Gemini metadata + PyMuPDF raw image"""
     # From Gemini
@@ -69,6 +60,8 @@ class EnrichedImage(BaseModel):
     # Generated
     storage_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 of image_bytes
+    perceptual_hash: Optional[str] = None
 
 
 class VehicleInfo(BaseModel):
@@ -161,6 +154,7 @@ class PDFIngestionService:
         )
         self.pdf_annotations_cache = {}  # Cache for reuse annotations
         self.image_enhancement_enabled = True  # Enable by default
+        self.dedupe_index: Optional[IngestionDedupeIndex] = None  # Defaults to the shared index
 
     def _get_env_var(self, var_name: str) -> str:
         """Get environment variable with helpful error if missing"""
@@ -185,41 +179,25 @@ class PDFIngestionService:
         start_time = datetime.utcnow()
 
         try:
-            # Sequential processing for debugging
-            logger.info("Starting PyMuPDF image extraction...")
-            pymupdf_images = self._extract_images_with_pymupdf(pdf_bytes)
-
-            logger.info("Starting Gemini analysis...")
-            gemini_result = await self._analyze_with_gemini(pdf_bytes)
-
-            # Handle exceptions
-            if isinstance(gemini_result, Exception):
-                logger.error(f"Gemini analysis failed: {gemini_result}")
-                raise gemini_result
-            if isinstance(pymupdf_images, Exception):
-                logger.error(f"PyMuPDF extraction failed: {pymupdf_images}")
-                raise pymupdf_images
-
-            # Merge: Gemini metadata + PyMuPDF raw images
-            enriched_images = self._merge_image_data(
-                gemini_result["images"],
-                pymupdf_images
+            # An unchanged PDF short-circuits to the artifact it produced last time
+            pdf_hash = await asyncio.to_thread(hash_bytes, pdf_bytes)
+            cached = await self.find_processed_artifact(pdf_hash, filename)
+            if cached is not None:
+                return cached
+
+            # PyMuPDF extraction runs in the process pool while Gemini reads the PDF
+            pymupdf_images, gemini_result = await asyncio.gather(
+                self.extract_images(pdf_bytes),
+                self._analyze_with_gemini(pdf_bytes)
             )
 
-            # Create the listing artifact
-            artifact = VehicleListingArtifact(
-                vehicle=VehicleInfo(**gemini_result["vehicle"]),
-                condition=ConditionData(**gemini_result["condition"]),
-                images=enriched_images,
-                seller=SellerInfo(**gemini_result["seller"]),
-                processing_metadata={
-                    "filename": filename,
-                    "processing_time": (datetime.utcnow() - start_time).total_seconds(),
-                    "gemini_images_found": len(gemini_result["images"]),
-                    "pymupdf_images_extracted": len(pymupdf_images),
-                    "final_merged_images": len(enriched_images)
-                }
+            artifact = self.build_artifact(
+                gemini_result,
+                pymupdf_images,
+                filename,
+                (datetime.utcnow() - start_time).total_seconds()
             )
+            await self.remember_artifact(pdf_hash, artifact, len(pdf_bytes))
 
             logger.info(f"Successfully processed {filename}: {artifact.vehicle.vin}")
             return artifact
@@ -228,6 +206,70 @@ class PDFIngestionService:
             logger.error(f"Failed to process PDF {filename}: {str(e)}")
             raise
 
+    def get_dedupe_index(self) -> Optional[IngestionDedupeIndex]:
+        """Content-addressed index for this service; None when dedupe is disabled"""
+        return self.dedupe_index or get_ingestion_dedupe_index()
+
+    async def find_processed_artifact(self, pdf_hash: str, filename: str) -> Optional[VehicleListingArtifact]:
+        """Artifact previously extracted from a PDF with this SHA-256, if any (looked up off the event loop)"""
+        index = self.get_dedupe_index()
+        if index is None:
+            return None
+
+        try:
+            artifact = await asyncio.to_thread(index.get_artifact, pdf_hash)
+        except Exception as e:
+            logger.warning(f"⚠️ Dedupe lookup failed for {filename}, processing normally: {e}")
+            return None
+
+        if artifact is not None:
+            artifact.processing_metadata.update({
+                'filename': filename,
+                'content_hash': pdf_hash,
+                'deduplicated': True
+            })
+            logger.info(f"♻️ {filename} matches an ingested PDF ({artifact.vehicle.vin}); skipping extraction")
+        return artifact
+
+    async def remember_artifact(self, pdf_hash: str, artifact: VehicleListingArtifact, pdf_size: int) -> None:
+        """Index a freshly extracted artifact by its PDF's SHA-256 (written off the event loop)"""
+        artifact.processing_metadata['content_hash'] = pdf_hash
+        index = self.get_dedupe_index()
+        if index is None:
+            return
+
+        try:
+            await asyncio.to_thread(index.put_artifact, pdf_hash, artifact, pdf_size)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to index artifact for {artifact.vehicle.vin}: {e}")
+
+    def build_artifact(
+        self,
+        gemini_result: dict,
+        pymupdf_images: List[ExtractedImage],
+        filename: str,
+        processing_time: float
+    ) -> VehicleListingArtifact:
+        """Merge Gemini metadata with PyMuPDF raw images into a listing artifact"""
+        enriched_images = self._merge_image_data(
+            gemini_result["images"],
+            pymupdf_images
+        )
+
+        return VehicleListingArtifact(
+            vehicle=VehicleInfo(**gemini_result["vehicle"]),
+            condition=ConditionData(**gemini_result["condition"]),
+            images=enriched_images,
+            seller=SellerInfo(**gemini_result["seller"]),
+            processing_metadata={
+                "filename": filename,
+                "processing_time": processing_time,
+                "gemini_images_found": len(gemini_result["images"]),
+                "pymupdf_images_extracted": len(pymupdf_images),
+                "final_merged_images": len(enriched_images)
+            }
+        )
+
     async def _analyze_with_gemini(self, pdf_bytes: bytes) -> dict:
         """
         Single OpenRouter call that extracts ALL structured data + image metadata.
@@ -472,44 +514,22 @@ class PDFIngestionService:
         """
         Extract raw image bytes from PDF using PyMuPDF.
 
-        This runs synchronously but is very fast (<100ms for typical PDFs).
-        Filters out small decorative images and keeps only vehicle photos.
+        Synchronous; prefer extract_images() from async code so the work
+        runs in the process pool instead of on the event loop.
         """
-        images = []
+        try:
+            images = extract_pdf_images(pdf_bytes)
+            logger.info(f"PyMuPDF extracted {len(images)} images from PDF")
+            return images
+
+        except Exception as e:
+            logger.error(f"PyMuPDF extraction failed: {str(e)}")
+            raise
 
+    async def extract_images(self, pdf_bytes: bytes) -> List[ExtractedImage]:
+        """Extract raw images in the shared process pool"""
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                image_list = page.get_images(full=True)
-
-                for img_info in image_list:
-                    xref = img_info[0]
-
-                    try:
-                        img_data = doc.extract_image(xref)
-
-                        if img_data and img_data.get("image"):
-                            # Filter out tiny images (logos, icons, stamps)
-                            width = img_data.get("width", 0)
-                            height = img_data.get("height", 0)
-
-                            if width >= 200 and height >= 150:  # Minimum size for vehicle photos
-                                images.append(ExtractedImage(
-                                    page_number=page_num + 1,  # 1-indexed for consistency
-                                    image_bytes=img_data["image"],
-                                    width=width,
-                                    height=height,
-                                    format=img_data["ext"],
-                                    xref=xref
-                                ))
-
-                    except Exception as e:
-                        # Log but don't fail - some images may be corrupt
-                        logger.debug(f"Failed to extract image xref {xref}: {e}")
-
-            doc.close()
+            images = await run_in_process_pool(extract_pdf_images, pdf_bytes)
             logger.info(f"PyMuPDF extracted {len(images)} images from PDF")
             return images
 
@@ -619,7 +639,9 @@ class PDFIngestionService:
                 width=raw_image.width,
                 height=raw_image.height,
                 format=raw_image.format,
-                page_number=raw_image.page_number
+                page_number=raw_image.page_number,
+                content_hash=raw_image.content_hash or None,
+                perceptual_hash=raw_image.perceptual_hash
             ))
 
         # Fallback: If no images matched but we have PyMuPDF images, create basic entries
@@ -637,7 +659,9 @@ class PDFIngestionService:
                     width=raw_image.width,
                     height=raw_image.height,
                     format=raw_image.format,
-                    page_number=raw_image.page_number
+                    page_number=raw_image.page_number,
+                    content_hash=raw_image.content_hash or None,
+                    perceptual_hash=raw_image.perceptual_hash
                 ))
 
         # Sort by category priority: hero first, then carousel, etc.
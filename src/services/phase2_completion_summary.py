@@ -25,7 +25,7 @@ def print_phase2_summary():
     print(f"  [OK] ExternalResearchService singleton initialized")
     print(f"       API URL: {service.api_url}")
     print(f"       Model: {service.model}")
-    print(f"       Cache TTL: {service.cache_ttl.total_seconds()/3600:.0f} hours")
+    print(f"       Cache TTL: {service.response_cache.get_policy('research').ttl_seconds/3600:.0f} hours")
     print(f"       API Key: {'Configured' if service.api_key else 'Missing'}")
 
     # Components created
@@ -20,16 +20,16 @@ Usage:
 
 import os
 import json
-import hashlib
 import logging
 import time
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from datetime import datetime
 
 import httpx
 from pydantic import BaseModel, Field
 
+from src.cache.llm_response_cache import LLMResponseCache, get_llm_response_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,13 +53,6 @@ class PriceForecast(BaseModel):
     reasoning: str = Field("", description="Explanation of price estimate")
 
 
-@dataclass
-class CacheEntry:
-    """Cache entry with TTL"""
-    data: PriceForecast
-    timestamp: datetime
-
-
 class PriceForecastService:
     """
     Real-time vehicle price forecasting using Groq Compound.
@@ -69,10 +62,14 @@ class PriceForecastService:
     - Wolfram Alpha: Statistical calculations (mean, median, percentiles)
     - Code Execution: Data processing and analysis
 
-    The service caches results for 24 hours to minimize API costs.
+    Responses are cached for 24 hours in the shared LLM response cache to
+    minimize API costs.
     """
 
-    def __init__(self, cache_ttl_hours: int = 24):
+    def __init__(
+        self,
+        response_cache: Optional[LLMResponseCache] = None
+    ):
         self.api_key = os.getenv('GROQ_API_KEY') or os.getenv('OPENROUTER_API_KEY')
         self.use_openrouter = not os.getenv('GROQ_API_KEY')
 
@@ -84,9 +81,8 @@ class PriceForecastService:
             self.api_url = "https://api.groq.com/openai/v1/chat/completions"
             self.model = "groq/compound"
 
-        # Cache settings
-        self.cache: Dict[str, CacheEntry] = {}
-        self.cache_ttl = timedelta(hours=cache_ttl_hours)
+        # Shared LLM call cache, keyed on the exact prompt
+        self.response_cache = response_cache or get_llm_response_cache()
 
         # Statistics
         self.stats = {
@@ -125,19 +121,7 @@ class PriceForecastService:
         start_time = time.time()
         self.stats["total_requests"] += 1
 
-        # Generate cache key
-        cache_key = self._get_cache_key(year, make, model, trim, mileage)
-
-        # Check cache first
-        if cached := self._get_from_cache(cache_key):
-            self.stats["cache_hits"] += 1
-            cached.cache_hit = True
-            cached.latency_ms = (time.time() - start_time) * 1000
-            return cached
-
         try:
-            self.stats["api_calls"] += 1
-
             # Build the prompt for Groq Compound
             prompt = self._build_price_prompt(
                 year, make, model, trim, mileage, condition, location
@@ -150,14 +134,12 @@ class PriceForecastService:
             latency_ms = (time.time() - start_time) * 1000
             forecast.latency_ms = latency_ms
 
-            # Update average latency
-            total_calls = self.stats["api_calls"]
-            self.stats["avg_latency_ms"] = (
-                (self.stats["avg_latency_ms"] * (total_calls - 1) + latency_ms) / total_calls
-            )
-
-            # Cache the result
-            self._store_in_cache(cache_key, forecast)
+            # Update average latency of live calls
+            if not forecast.cache_hit:
+                total_calls = self.stats["api_calls"]
+                self.stats["avg_latency_ms"] = (
+                    (self.stats["avg_latency_ms"] * (total_calls - 1) + latency_ms) / total_calls
+                )
 
             logger.info(
                 f"Price forecast: {year} {make} {model} -> "
@@ -231,7 +213,96 @@ Only return the JSON, no other text."""
         model: str
     ) -> PriceForecast:
         """Call Groq Compound API"""
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a vehicle pricing expert. Use web search to find current market prices for vehicles. Always return valid JSON."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        params = {"temperature": 0.1, "max_tokens": 1000}
+        called = False
+
+        async def call() -> Dict[str, Any]:
+            nonlocal called
+            called = True
+            self.stats["api_calls"] += 1
+            return await self._post_compound_request(messages, params)
+
+        completion = await self.response_cache.get_or_call(
+            call_site="price_forecast.groq_compound",
+            call_type="price_forecast",
+            model=self.model,
+            messages=messages,
+            params=params,
+            call=call,
+            should_cache=lambda c: bool(c.get('content'))
+        )
+        if not called:
+            self.stats["cache_hits"] += 1
+
+        forecast = self._parse_completion(completion, year, make, model)
+        forecast.cache_hit = not called
+        return forecast
+
+    def _parse_completion(
+        self,
+        completion: Dict[str, Any],
+        year: int,
+        make: str,
+        model: str
+    ) -> PriceForecast:
+        """Turn a (possibly cached) Groq Compound completion into a forecast"""
+        content = completion['content']
+        sources = completion['sources']
+
+        # Parse the JSON response
+        try:
+            # Handle markdown code blocks
+            if '```json' in content:
+                content = content.split('```json')[1].split('```')[0]
+            elif '```' in content:
+                content = content.split('```')[1].split('```')[0]
+
+            data = json.loads(content.strip())
+
+            # Calculate confidence based on data quality
+            comparable_count = data.get('comparable_count', 0)
+            if comparable_count >= 10:
+                confidence = 0.9
+            elif comparable_count >= 5:
+                confidence = 0.75
+            elif comparable_count >= 3:
+                confidence = 0.6
+            elif comparable_count >= 1:
+                confidence = 0.4
+            else:
+                confidence = 0.2
+
+            return PriceForecast(
+                estimated_price=float(data.get('estimated_price', 0)),
+                price_low=float(data.get('price_low', 0)),
+                price_high=float(data.get('price_high', 0)),
+                confidence=confidence,
+                sources_used=data.get('sources', sources),
+                comparable_count=comparable_count,
+                reasoning=data.get('reasoning', '')
+            )
+
+        except json.JSONDecodeError:
+            # Fallback: try to extract numbers from the response
+            logger.warning(f"Could not parse JSON, attempting fallback extraction")
+            return self._fallback_parse(content, year, make, model)
 
+    async def _post_compound_request(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """POST a chat completion to Groq Compound; returns content and tools used"""
         headers = {
             "Content-Type": "application/json",
         }
@@ -249,18 +320,8 @@ Only return the JSON, no other text."""
                 headers=headers,
                 json={
                     "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a vehicle pricing expert. Use web search to find current market prices for vehicles. Always return valid JSON."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 1000
+                    "messages": messages,
+                    **params
                 },
                 timeout=30  # Compound may take longer due to web searches
             )
@@ -275,43 +336,7 @@ Only return the JSON, no other text."""
             executed_tools = result['choices'][0]['message'].get('executed_tools', [])
             sources = [tool.get('name', 'unknown') for tool in executed_tools]
 
-            # Parse the JSON response
-            try:
-                # Handle markdown code blocks
-                if '```json' in content:
-                    content = content.split('```json')[1].split('```')[0]
-                elif '```' in content:
-                    content = content.split('```')[1].split('```')[0]
-
-                data = json.loads(content.strip())
-
-                # Calculate confidence based on data quality
-                comparable_count = data.get('comparable_count', 0)
-                if comparable_count >= 10:
-                    confidence = 0.9
-                elif comparable_count >= 5:
-                    confidence = 0.75
-                elif comparable_count >= 3:
-                    confidence = 0.6
-                elif comparable_count >= 1:
-                    confidence = 0.4
-                else:
-                    confidence = 0.2
-
-                return PriceForecast(
-                    estimated_price=float(data.get('estimated_price', 0)),
-                    price_low=float(data.get('price_low', 0)),
-                    price_high=float(data.get('price_high', 0)),
-                    confidence=confidence,
-                    sources_used=data.get('sources', sources),
-                    comparable_count=comparable_count,
-                    reasoning=data.get('reasoning', '')
-                )
-
-            except json.JSONDecodeError:
-                # Fallback: try to extract numbers from the response
-                logger.warning(f"Could not parse JSON, attempting fallback extraction")
-                return self._fallback_parse(content, year, make, model)
+            return {'content': content, 'sources': sources}
 
     def _fallback_parse(
         self,
@@ -351,42 +376,6 @@ Only return the JSON, no other text."""
             reasoning="Could not extract pricing information"
         )
 
-    def _get_cache_key(
-        self,
-        year: int,
-        make: str,
-        model: str,
-        trim: Optional[str],
-        mileage: Optional[int]
-    ) -> str:
-        """Generate cache key for vehicle"""
-        # Bucket mileage into 10k increments for cache efficiency
-        mileage_bucket = (mileage // 10000) * 10000 if mileage else 0
-
-        key_data = f"{year}:{make.lower()}:{model.lower()}:{(trim or '').lower()}:{mileage_bucket}"
-        return hashlib.md5(key_data.encode()).hexdigest()
-
-    def _get_from_cache(self, cache_key: str) -> Optional[PriceForecast]:
-        """Get from cache if valid"""
-        if cache_key not in self.cache:
-            return None
-
-        entry = self.cache[cache_key]
-        if datetime.now() - entry.timestamp > self.cache_ttl:
-            del self.cache[cache_key]
-            return None
-
-        return entry.data
-
-    def _store_in_cache(self, cache_key: str, forecast: PriceForecast):
-        """Store in cache"""
-        self.cache[cache_key] = CacheEntry(data=forecast, timestamp=datetime.now())
-
-        # Limit cache size
-        if len(self.cache) > 1000:
-            oldest = min(self.cache.keys(), key=lambda k: self.cache[k].timestamp)
-            del self.cache[oldest]
-
     async def enrich_vehicle_with_price(
         self,
         vehicle: Dict[str, Any]
@@ -421,11 +410,11 @@ Only return the JSON, no other text."""
         """Get service statistics"""
         return {
             **self.stats,
-            "cache_size": len(self.cache),
             "cache_hit_rate": (
                 self.stats["cache_hits"] / self.stats["total_requests"]
                 if self.stats["total_requests"] > 0 else 0
-            )
+            ),
+            "llm_cache": self.response_cache.get_stats()["call_sites"].get("price_forecast.groq_compound", {})
         }
 
 
@@ -12,6 +12,7 @@ import asyncio
 
 from src.conversation.nlu_service import UserPreference
 from src.intelligence.preference_engine import PreferenceEvolution, PreferenceCategory
+from src.cache.dialogue_state_store import BoundedLRUCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -56,13 +57,20 @@ class UserProfile:
 class ProfileService:
     """Service for managing user profiles with preference learning"""
 
-    def __init__(self, database_client=None, cache_client=None):
+    def __init__(self, database_client=None, cache_client=None, preference_index=None):
         self.db = database_client
         self.cache = cache_client
         self.initialized = False
 
-        # In-memory storage for development
-        self.profiles: Dict[str, UserProfile] = {}
+        # Optional PreferenceIndex kept current as preferences change (attached by PreferenceAnalytics)
+        self.preference_index = preference_index
+
+        # Bounded in-memory working set; cache and database remain the source of truth.
+        # Without either it is the only copy, so entries are kept until the size cap evicts them
+        self.profiles: BoundedLRUCache = BoundedLRUCache(
+            max_entries=10000,
+            ttl_seconds=3600 if database_client or cache_client else None
+        )
 
     async def initialize(self) -> bool:
         """Initialize the profile service"""
@@ -118,6 +126,8 @@ class ProfileService:
 
                 profile.preferences[key] = new_value
 
+            self._index_profile(user_id, profile)
+
             # Update profile if there are changes
             if changes:
                 # Create new version
@@ -690,10 +700,20 @@ class ProfileService:
 
         return None
 
+    def _index_profile(self, user_id: str, profile: UserProfile):
+        """Refresh the user's entry in the preference index (never fails the caller)"""
+        if self.preference_index is None:
+            return
+        try:
+            self.preference_index.update_profile(user_id, profile.preferences)
+        except Exception as e:
+            logger.error(f"Failed to index preferences for user {user_id}: {e}")
+
     async def _save_profile(self, user_id: str, profile: UserProfile):
         """Save user profile to storage"""
         # Update in-memory storage
         self.profiles[user_id] = profile
+        self._index_profile(user_id, profile)
 
         # Update cache
         if self.cache:
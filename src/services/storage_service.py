@@ -14,6 +14,9 @@ from dataclasses import dataclass
 from PIL import Image, ImageEnhance
 import httpx
 
+from .ingestion_dedupe import IngestionDedupeIndex, get_ingestion_dedupe_index, hash_bytes
+from .pdf_extraction import run_in_process_pool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +40,14 @@ class StorageConfig:
     enable_progressive: bool = True
 
 
+# Result key for each uploaded variant
+VARIANT_URL_KEYS = {
+    'web': 'web_url',
+    'detail': 'detail_url',
+    'thumb': 'thumbnail_url',
+}
+
+
 class ImageProcessor:
     """Handles image optimization and format conversion"""
 
@@ -58,20 +69,67 @@ class ImageProcessor:
         return self._resize_image(image_bytes, self.config.detail_view_width,
                                self.config.detail_quality, maintain_aspect=True)
 
+    def variant_specs(self, create_variants: bool = True) -> Dict[str, tuple]:
+        """(width, quality) per variant name"""
+        specs = {'web': (self.config.web_optimized_width, self.config.web_quality)}
+        if create_variants:
+            specs['detail'] = (self.config.detail_view_width, self.config.detail_quality)
+            specs['thumb'] = (self.config.thumbnail_size, self.config.thumbnail_quality)
+        return specs
+
+    def create_variants(self, image_bytes: bytes, create_variants: bool = True) -> Dict[str, bytes]:
+        """
+        Create every variant from a single decode.
+
+        JPEG sources are decoded with draft() at the smallest DCT scale that
+        still covers the largest variant, then each variant is resized from
+        the next larger one (largest → smallest) instead of from full
+        resolution. Output matches create_web_optimized/create_detail_view/
+        create_thumbnail in size, quality and enhancement.
+        """
+        specs = self.variant_specs(create_variants)
+
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as source:
+                original_width, original_height = source.size
+                aspect_ratio = original_height / original_width
+
+                sizes = {
+                    name: (width, int(width * aspect_ratio))
+                    for name, (width, _) in specs.items()
+                }
+                largest = max(sizes.values())
+
+                # DCT scaling: decode at 1/2, 1/4 or 1/8 when that still covers the largest variant
+                if source.format == 'JPEG':
+                    source.draft('RGB', largest)
+                img = self._to_rgb(source)
+
+                variants = {}
+                # Resize pyramid: each variant is derived from the previous, larger one
+                for name in sorted(sizes, key=lambda n: sizes[n][0], reverse=True):
+                    target = sizes[name]
+                    if img.size == target:
+                        resized = img
+                    elif img.width >= target[0]:
+                        img = img.resize(target, Image.Resampling.LANCZOS)
+                        resized = img
+                    else:
+                        resized = img.resize(target, Image.Resampling.LANCZOS)
+                    variants[name] = self._encode(self._enhance_for_web(resized), specs[name][1])
+
+                return variants
+
+        except Exception as e:
+            logger.error(f"Failed to process image: {str(e)}")
+            return {name: image_bytes for name in specs}  # Return original if processing fails
+
     def _resize_image(self, image_bytes: bytes, max_width: int, quality: int,
                      maintain_aspect: bool = True) -> bytes:
         """Internal method to resize and optimize images"""
         try:
             with Image.open(io.BytesIO(image_bytes)) as img:
-                # Convert to RGB if necessary for JPEG output
-                if img.mode in ('RGBA', 'P', 'LA'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
+                img = self._to_rgb(img)
 
                 original_width, original_height = img.size
 
@@ -92,24 +150,40 @@ class ImageProcessor:
                 # Apply subtle enhancements for better web display
                 img = self._enhance_for_web(img)
 
-                # Save with optimization
-                buffer = io.BytesIO()
-                save_kwargs = {
-                    'format': self.config.output_format,
-                    'quality': quality,
-                    'optimize': True
-                }
-
-                if self.config.output_format == "JPEG" and self.config.enable_progressive:
-                    save_kwargs['progressive'] = True
-
-                img.save(buffer, **save_kwargs)
-                return buffer.getvalue()
+                return self._encode(img, quality)
 
         except Exception as e:
             logger.error(f"Failed to process image: {str(e)}")
             return image_bytes  # Return original if processing fails
 
+    def _to_rgb(self, img: Image.Image) -> Image.Image:
+        """Convert to RGB for JPEG output, flattening transparency onto white"""
+        if img.mode in ('RGBA', 'P', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+            return background
+        if img.mode != 'RGB':
+            return img.convert('RGB')
+        img.load()
+        return img
+
+    def _encode(self, img: Image.Image, quality: int) -> bytes:
+        """Save with optimization"""
+        buffer = io.BytesIO()
+        save_kwargs = {
+            'format': self.config.output_format,
+            'quality': quality,
+            'optimize': True
+        }
+
+        if self.config.output_format == "JPEG" and self.config.enable_progressive:
+            save_kwargs['progressive'] = True
+
+        img.save(buffer, **save_kwargs)
+        return buffer.getvalue()
+
     def _enhance_for_web(self, img: Image.Image) -> Image.Image:
         """Apply subtle enhancements for better web display"""
         try:
@@ -143,10 +217,16 @@ class SupabaseStorageService:
                 "Authorization": f"Bearer {self.supabase_service_key}",
                 "apikey": self.supabase_service_key
             },
-            timeout=30.0
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=int(self._get_env_var('STORAGE_MAX_CONNECTIONS', '32')),
+                max_keepalive_connections=int(self._get_env_var('STORAGE_MAX_KEEPALIVE', '16'))
+            )
         )
 
         self.image_processor = ImageProcessor()
+        self.dedupe_index: Optional[IngestionDedupeIndex] = None  # Defaults to the shared index
+        self._uploads_in_flight: Dict[tuple, asyncio.Future] = {}
 
     def _get_env_var(self, var_name: str, default: str = None) -> str:
         """Get environment variable with helpful error if missing"""
@@ -161,49 +241,114 @@ class SupabaseStorageService:
         image_bytes: bytes,
         filename: str,
         optimize: bool = True,
-        create_variants: bool = True
+        create_variants: bool = True,
+        perceptual_hash: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Upload vehicle image with optimization and CDN distribution.
 
+        Images are content-addressed: bytes that were uploaded before (or
+        are being uploaded right now) reuse the existing URLs instead of
+        being processed and uploaded again.
+
         Args:
             image_bytes: Raw image data
             filename: Unique filename for the image
             optimize: Whether to create web-optimized versions
             create_variants: Whether to create thumbnail and detail versions
+            perceptual_hash: Optional perceptual hash; a re-encoded copy with the
+                same pixels then reuses the earlier upload
 
         Returns:
             Dict with URLs for different image variants
         """
+        index = self.dedupe_index or get_ingestion_dedupe_index()
+        if index is None:
+            urls, _ = await self._process_and_upload(image_bytes, filename, optimize, create_variants)
+            return urls
+
+        # Hashing, SQLite lookups and pixel comparisons all run off the event loop
+        content_hash = await asyncio.to_thread(hash_bytes, image_bytes)
+        if optimize:
+            url_keys = [VARIANT_URL_KEYS[name] for name in self.image_processor.variant_specs(create_variants)]
+        else:
+            url_keys = ['original_url']
+
+        key = (content_hash, tuple(url_keys))
+        in_flight = self._uploads_in_flight.get(key)
+        if in_flight is not None:
+            # Same bytes are already being uploaded; share that upload
+            urls, uploaded_bytes = await asyncio.shield(in_flight)
+            await asyncio.to_thread(index.increment, image_hits=1, bytes_not_uploaded=uploaded_bytes)
+            return dict(urls)
+
+        # Registered before the first await so concurrent copies wait on this one
+        future = asyncio.get_running_loop().create_future()
+        self._uploads_in_flight[key] = future
+        try:
+            try:
+                existing = await asyncio.to_thread(
+                    index.find_image, content_hash, url_keys, perceptual_hash, image_bytes
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Dedupe lookup failed for {filename}, uploading: {e}")
+                existing = None
+            if existing is not None:
+                logger.info(f"♻️ Reusing uploaded image for {filename}")
+                future.set_result((existing['urls'], existing['uploaded_bytes']))
+                return existing['urls']
+
+            urls, uploaded_bytes = await self._process_and_upload(image_bytes, filename, optimize, create_variants)
+            future.set_result((urls, uploaded_bytes))
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # Waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            del self._uploads_in_flight[key]
+
+        try:
+            await asyncio.to_thread(
+                index.record_image_upload,
+                content_hash, urls, uploaded_bytes, len(image_bytes), perceptual_hash, image_bytes
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to index uploaded image {filename}: {e}")
+        return urls
+
+    async def _process_and_upload(
+        self,
+        image_bytes: bytes,
+        filename: str,
+        optimize: bool,
+        create_variants: bool
+    ) -> tuple:
+        """Render and upload an image; returns (urls, bytes uploaded)"""
         try:
             # Generate unique storage path
             storage_path = f"vehicles/{datetime.utcnow().strftime('%Y/%m')}/{filename}"
 
-            upload_results = {}
-
             if optimize:
-                # Create web-optimized version
-                web_optimized = self.image_processor.create_web_optimized(image_bytes)
-                web_url = await self._upload_file(web_optimized, f"{storage_path}_web")
-                upload_results['web_url'] = web_url
-
-                if create_variants:
-                    # Create thumbnail
-                    thumbnail = self.image_processor.create_thumbnail(image_bytes)
-                    thumbnail_url = await self._upload_file(thumbnail, f"{storage_path}_thumb")
-                    upload_results['thumbnail_url'] = thumbnail_url
-
-                    # Create detail view
-                    detail = self.image_processor.create_detail_view(image_bytes)
-                    detail_url = await self._upload_file(detail, f"{storage_path}_detail")
-                    upload_results['detail_url'] = detail_url
+                # Decode once and build every variant in the process pool
+                variants = await run_in_process_pool(
+                    self.image_processor.create_variants, image_bytes, create_variants
+                )
+                names = list(variants)
+                urls = await asyncio.gather(*(
+                    self._upload_file(variants[name], f"{storage_path}_{name}")
+                    for name in names
+                ))
+                upload_results = {VARIANT_URL_KEYS[name]: url for name, url in zip(names, urls)}
+                uploaded_bytes = sum(len(data) for data in variants.values())
             else:
                 # Upload original without optimization
                 original_url = await self._upload_file(image_bytes, storage_path)
-                upload_results['original_url'] = original_url
+                upload_results = {'original_url': original_url}
+                uploaded_bytes = len(image_bytes)
 
             logger.info(f"Successfully uploaded image variants: {list(upload_results.keys())}")
-            return upload_results
+            return upload_results, uploaded_bytes
 
         except Exception as e:
             logger.error(f"Failed to upload vehicle image {filename}: {str(e)}")
@@ -44,7 +44,7 @@ async def test_service_initialization():
     print(f"[PASS] Service initialized successfully")
     print(f"       API endpoint: {service1.api_url}")
     print(f"       Model: {service1.model}")
-    print(f"       Cache TTL: {service1.cache_ttl.total_seconds()/3600:.0f} hours")
+    print(f"       Cache TTL: {service1.response_cache.get_policy('research').ttl_seconds/3600:.0f} hours")
 
     return True
 
@@ -217,8 +217,6 @@ async def test_cache_functionality():
 
     service = get_research_service()
 
-    # Clear existing cache
-    service.cache.clear()
     initial_hits = service.stats['cache_hits']
 
     # First request - should miss cache
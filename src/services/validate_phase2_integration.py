@@ -28,7 +28,7 @@ async def validate_integration():
     assert service.api_key is not None, "API key not configured"
     print("    [PASS] ExternalResearchService initialized")
     print(f"      Model: {service.model}")
-    print(f"      Cache TTL: {service.cache_ttl.total_seconds()/3600:.0f} hours")
+    print(f"      Cache TTL: {service.response_cache.get_policy('research').ttl_seconds/3600:.0f} hours")
 
     # Test 2: ConversationAgent integration
     print("\n[2] Testing ConversationAgent integration...")
@@ -2,11 +2,19 @@
 Otto.AI Vehicle Embedding Service
 Integrates PDF processing with the existing RAG-Anything embedding system
 to make processed vehicles searchable via semantic search.
+
+Re-ingesting a known VIN is incremental: the artifact is diffed field by
+field against the stored listing, images and condition issues, and only
+what changed is re-embedded or re-written. The searchable text is hashed
+into processing_metadata and images are matched by content hash, so an
+unchanged vehicle costs no embedding calls.
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Optional, Any
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 
 from ..services.pdf_ingestion_service import VehicleListingArtifact, EnrichedImage
@@ -23,6 +31,67 @@ from ..services.supabase_client import get_supabase_client_singleton
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Images that get an image embedding: the first N hero/carousel photos
+MAX_IMAGE_EMBEDDINGS = 5
+
+LISTING_DIFF_COLUMNS = (
+    'year', 'make', 'model', 'trim', 'odometer', 'drivetrain', 'transmission', 'engine',
+    'exterior_color', 'interior_color', 'condition_score', 'condition_grade'
+)
+IMAGE_DIFF_COLUMNS = (
+    'category', 'vehicle_angle', 'description', 'suggested_alt', 'quality_score', 'visible_damage',
+    'width', 'height', 'page_number', 'display_order', 'original_url', 'web_url', 'thumbnail_url'
+)
+ISSUE_COLUMNS = (
+    'issue_category', 'issue_type', 'severity', 'description', 'location', 'estimated_repair_cost'
+)
+
+
+def text_hash(text: str) -> str:
+    """Hash stored with a text embedding to tell whether it is still current"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def usable_embedding(embedding: Optional[List[float]]) -> bool:
+    """False for a missing vector or the all-zero fallback a failed embed returns"""
+    return bool(embedding) and any(embedding)
+
+
+def _comparable(value: Any) -> Any:
+    """Normalize DB and artifact values (numeric types, empty lists) for diffing"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_comparable(v) for v in value) or None
+    return value
+
+
+@dataclass
+class EmbeddingUpdatePlan:
+    """What an incremental re-ingest of one listing has to touch"""
+    listing_id: str
+    vin: str
+    searchable_text: str
+    text_hash: str
+    embed_text: bool
+    metadata: Dict[str, Any]
+    listing_changes: Dict[str, Any] = field(default_factory=dict)
+    image_inserts: List[Tuple[int, EnrichedImage]] = field(default_factory=list)
+    image_updates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    image_deletes: List[str] = field(default_factory=list)
+    images_to_embed: List[Tuple[Optional[str], EnrichedImage]] = field(default_factory=list)
+    issue_inserts: List[Dict[str, Any]] = field(default_factory=list)
+    issue_deletes: List[str] = field(default_factory=list)
+
+    @property
+    def is_noop(self) -> bool:
+        return not (
+            self.embed_text or self.listing_changes or self.image_inserts or self.image_updates
+            or self.image_deletes or self.images_to_embed or self.issue_inserts or self.issue_deletes
+        )
+
 
 class VehicleEmbeddingService:
     """
@@ -40,6 +109,15 @@ class VehicleEmbeddingService:
         self.listing_repository = get_listing_repository()
         self.image_repository = get_image_repository()
         self.supabase_client = get_supabase_client_singleton()
+        self.stats = {
+            'text_embeddings': 0,
+            'text_embeddings_skipped': 0,
+            'image_embeddings': 0,
+            'image_embeddings_skipped': 0,
+            'listings_unchanged': 0,
+            'listings_updated': 0,
+            'embedding_failures': 0
+        }
 
     async def process_vehicle_for_search(
         self,
@@ -48,12 +126,27 @@ class VehicleEmbeddingService:
         """
         Process a vehicle listing artifact and make it searchable.
 
+        A VIN that is already stored is updated incrementally instead of
+        being inserted again.
+
         Args:
             artifact: Complete vehicle listing artifact from PDF processing
 
         Returns:
             Dict with embedding metadata and search IDs
         """
+        try:
+            existing = await self._load_existing([artifact.vehicle.vin])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load stored listing for {artifact.vehicle.vin}, creating: {e}")
+            existing = {}
+
+        if artifact.vehicle.vin in existing:
+            return (await self._update_incrementally([artifact], existing))[0]
+        return await self._create_vehicle_for_search(artifact)
+
+    async def _create_vehicle_for_search(self, artifact: VehicleListingArtifact) -> Dict[str, Any]:
+        """Embed and store a listing that is not in the database yet"""
         try:
             logger.info(f"Creating embeddings for vehicle: {artifact.vehicle.vin}")
 
@@ -64,23 +157,31 @@ class VehicleEmbeddingService:
             text_embedding_result = await self.embedding_service.generate_text_embedding(
                 vehicle_text
             )
+            text_embedding = text_embedding_result.embedding
+            if not usable_embedding(text_embedding):
+                # Stored without a vector or hash so the next ingest embeds it again
+                logger.warning(f"⚠️ Text embedding failed for {artifact.vehicle.vin}; storing listing without one")
+                self.stats['embedding_failures'] += 1
+                text_embedding = None
 
             # Generate image embeddings for main vehicle photos
             image_embeddings = []
-            main_images = [img for img in artifact.images
-                          if img.category in ['hero', 'carousel']]
+            main_images = self._main_images(artifact)
 
-            for image in main_images[:5]:  # Limit to top 5 images for performance
+            for image in main_images:  # Limit to top 5 images for performance
                 try:
                     # Create a temporary file-like object for the image
                     image_embedding = await self.embedding_service.generate_image_embedding(
                         image.image_bytes
                     )
+                    if not usable_embedding(image_embedding.embedding):
+                        raise ValueError("embedding service returned an empty vector")
                     image_embeddings.append({
                         'vehicle_angle': image.vehicle_angle,
                         'category': image.category,
                         'embedding': image_embedding.embedding,
-                        'description': image.description
+                        'description': image.description,
+                        'content_hash': self._image_hash(image)
                     })
                 except Exception as e:
                     logger.warning(f"Failed to create embedding for {image.vehicle_angle}: {e}")
@@ -89,13 +190,15 @@ class VehicleEmbeddingService:
             listing_id = await self._store_vehicle_embeddings(
                 artifact,
                 vehicle_text,
-                text_embedding_result.embedding,
+                text_embedding,
                 image_embeddings
             )
 
             # Store condition issues
             await self._store_condition_issues(artifact, listing_id)
 
+            self.stats['text_embeddings'] += text_embedding is not None
+            self.stats['image_embeddings'] += len(image_embeddings)
             embedding_metadata = {
                 'vin': artifact.vehicle.vin,
                 'listing_id': listing_id,
@@ -104,7 +207,7 @@ class VehicleEmbeddingService:
                 'processed_at': datetime.utcnow().isoformat()
             }
 
-            logger.info(f"✅ Persisted listing {listing_id} with {len(image_embeddings) + 1} embeddings for {artifact.vehicle.vin}")
+            logger.info(f"✅ Persisted listing {listing_id} with {len(image_embeddings) + (text_embedding is not None)} embeddings for {artifact.vehicle.vin}")
 
             return embedding_metadata
 
@@ -161,7 +264,7 @@ class VehicleEmbeddingService:
         self,
         artifact: VehicleListingArtifact,
         description_text: str,
-        text_embedding: List[float],
+        text_embedding: Optional[List[float]],
         image_embeddings: List[Dict[str, Any]]
     ) -> str:
         """
@@ -170,7 +273,7 @@ class VehicleEmbeddingService:
         Args:
             artifact: Complete vehicle listing artifact from PDF processing
             description_text: Searchable text description
-            text_embedding: Text embedding vector (3072 dimensions)
+            text_embedding: Text embedding vector (3072 dimensions), or None if embedding failed
             image_embeddings: List of image embeddings with metadata
 
         Returns:
@@ -181,7 +284,7 @@ class VehicleEmbeddingService:
             c = artifact.condition
 
             logger.info(f"📦 Persisting vehicle listing for VIN {v.vin}:")
-            logger.info(f"   - Text embedding: {len(text_embedding)} dimensions")
+            logger.info(f"   - Text embedding: {len(text_embedding) if text_embedding else 0} dimensions")
             logger.info(f"   - Image embeddings: {len(image_embeddings)} images")
 
             # 1. Create vehicle listing
@@ -203,7 +306,11 @@ class VehicleEmbeddingService:
                 text_embedding=text_embedding,
                 status='active',
                 listing_source='pdf_upload',
-                processing_metadata=artifact.processing_metadata,
+                processing_metadata={
+                    **artifact.processing_metadata,
+                    # Only a stored vector makes the text current
+                    **({'searchable_text_hash': text_hash(description_text)} if text_embedding is not None else {})
+                },
                 seller_id=None  # Will be linked when seller auth is implemented
             )
 
@@ -223,27 +330,7 @@ class VehicleEmbeddingService:
             for idx, img in enumerate(artifact.images):
                 # Get embedding if available for this image
                 img_embedding = embedding_map.get((img.vehicle_angle, img.category))
-
-                image_data = ImageCreate(
-                    listing_id=listing_id,
-                    vin=v.vin,
-                    category=img.category,
-                    vehicle_angle=img.vehicle_angle,
-                    description=img.description,
-                    suggested_alt=img.suggested_alt,
-                    quality_score=img.quality_score,
-                    visible_damage=img.visible_damage or [],
-                    file_format=img.format,
-                    width=img.width,
-                    height=img.height,
-                    original_url=img.storage_url,
-                    web_url=img.storage_url,
-                    thumbnail_url=img.thumbnail_url,
-                    image_embedding=img_embedding,
-                    page_number=img.page_number,
-                    display_order=idx
-                )
-                image_creates.append(image_data)
+                image_creates.append(self._build_image_create(listing_id, v.vin, idx, img, img_embedding))
 
             if image_creates:
                 created_images = await self.image_repository.create_batch(image_creates)
@@ -277,16 +364,7 @@ class VehicleEmbeddingService:
             # Process issues by category
             for category, issues in c.issues.items():
                 for issue in issues:
-                    issue_data = {
-                        'listing_id': listing_id,
-                        'vin': artifact.vehicle.vin,
-                        'issue_category': category,
-                        'issue_type': issue.get('type', 'unknown'),
-                        'severity': issue.get('severity', 'minor'),
-                        'description': issue.get('description', ''),
-                        'location': issue.get('location'),
-                        'estimated_repair_cost': issue.get('repair_cost')
-                    }
+                    issue_data = self._build_issue_row(listing_id, artifact.vehicle.vin, category, issue)
 
                     result = self.supabase_client.table('vehicle_condition_issues') \
                         .insert(issue_data).execute()
@@ -304,6 +382,336 @@ class VehicleEmbeddingService:
             # Don't raise - condition issues are secondary to main listing
             return 0
 
+    def _main_images(self, artifact: VehicleListingArtifact) -> List[EnrichedImage]:
+        """Photos that get an image embedding"""
+        return [img for img in artifact.images if img.category in ['hero', 'carousel']][:MAX_IMAGE_EMBEDDINGS]
+
+    @staticmethod
+    def _image_hash(image: EnrichedImage) -> str:
+        return image.content_hash or hashlib.sha256(image.image_bytes).hexdigest()
+
+    def _listing_columns(self, artifact: VehicleListingArtifact) -> Dict[str, Any]:
+        """Diffable vehicle_listings columns for an artifact"""
+        v = artifact.vehicle
+        return {
+            'year': v.year, 'make': v.make, 'model': v.model, 'trim': v.trim,
+            'odometer': v.odometer, 'drivetrain': v.drivetrain, 'transmission': v.transmission,
+            'engine': v.engine, 'exterior_color': v.exterior_color, 'interior_color': v.interior_color,
+            'condition_score': artifact.condition.score, 'condition_grade': artifact.condition.grade
+        }
+
+    def _image_columns(self, idx: int, img: EnrichedImage) -> Dict[str, Any]:
+        """Diffable vehicle_images columns; URLs only when the artifact has them"""
+        columns = {
+            'category': img.category,
+            'vehicle_angle': img.vehicle_angle,
+            'description': img.description,
+            'suggested_alt': img.suggested_alt,
+            'quality_score': img.quality_score,
+            'visible_damage': img.visible_damage or [],
+            'width': img.width,
+            'height': img.height,
+            'page_number': img.page_number,
+            'display_order': idx
+        }
+        if img.storage_url:
+            columns['original_url'] = img.storage_url
+            columns['web_url'] = img.storage_url
+        if img.thumbnail_url:
+            columns['thumbnail_url'] = img.thumbnail_url
+        return columns
+
+    def _build_image_create(
+        self,
+        listing_id: str,
+        vin: str,
+        idx: int,
+        img: EnrichedImage,
+        embedding: Optional[List[float]]
+    ) -> ImageCreate:
+        return ImageCreate(
+            listing_id=listing_id,
+            vin=vin,
+            category=img.category,
+            vehicle_angle=img.vehicle_angle,
+            description=img.description,
+            suggested_alt=img.suggested_alt,
+            quality_score=img.quality_score,
+            visible_damage=img.visible_damage or [],
+            file_format=img.format,
+            width=img.width,
+            height=img.height,
+            original_url=img.storage_url,
+            web_url=img.storage_url,
+            thumbnail_url=img.thumbnail_url,
+            image_embedding=embedding,
+            page_number=img.page_number,
+            processing_metadata={'content_hash': self._image_hash(img), 'embedded': embedding is not None},
+            display_order=idx
+        )
+
+    @staticmethod
+    def _build_issue_row(listing_id: str, vin: str, category: str, issue: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'listing_id': listing_id,
+            'vin': vin,
+            'issue_category': category,
+            'issue_type': issue.get('type', 'unknown'),
+            'severity': issue.get('severity', 'minor'),
+            'description': issue.get('description', ''),
+            'location': issue.get('location'),
+            'estimated_repair_cost': issue.get('repair_cost')
+        }
+
+    @staticmethod
+    def _issue_key(row: Dict[str, Any]) -> tuple:
+        return tuple(_comparable(row.get(column)) for column in ISSUE_COLUMNS)
+
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the batched path when the embedding service has one"""
+        batch_embed = getattr(self.embedding_service, 'generate_text_embeddings', None)
+        if asyncio.iscoroutinefunction(batch_embed):
+            return await batch_embed(texts)
+
+        results = await asyncio.gather(*(
+            self.embedding_service.generate_text_embedding(text) for text in texts
+        ))
+        return [result.embedding for result in results]
+
+    def _select_in(
+        self,
+        table: str,
+        columns: str,
+        column: str,
+        values: List[str],
+        chunk_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for start in range(0, len(values), chunk_size):
+            result = self.supabase_client.table(table) \
+                .select(columns) \
+                .in_(column, values[start:start + chunk_size]) \
+                .execute()
+            rows.extend(result.data or [])
+        return rows
+
+    async def _load_existing(self, vins: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored listing, image and issue rows per VIN, without embedding vectors"""
+        listings = self._select_in(
+            'vehicle_listings',
+            ', '.join(('id', 'vin', 'status', 'processing_metadata') + LISTING_DIFF_COLUMNS),
+            'vin', vins
+        )
+        if not listings:
+            return {}
+
+        existing = {row['vin']: {'listing': row, 'images': [], 'issues': []} for row in listings}
+        by_listing = {row['id']: existing[row['vin']] for row in listings}
+        listing_ids = list(by_listing)
+
+        for row in self._select_in(
+            'vehicle_images', ', '.join(('id', 'listing_id', 'processing_metadata') + IMAGE_DIFF_COLUMNS),
+            'listing_id', listing_ids
+        ):
+            by_listing[row['listing_id']]['images'].append(row)
+        for row in self._select_in(
+            'vehicle_condition_issues', ', '.join(('id', 'listing_id') + ISSUE_COLUMNS),
+            'listing_id', listing_ids
+        ):
+            by_listing[row['listing_id']]['issues'].append(row)
+
+        return existing
+
+    def _plan_update(self, artifact: VehicleListingArtifact, stored: Dict[str, Any]) -> EmbeddingUpdatePlan:
+        """Diff an artifact against its stored rows, field by field"""
+        listing = stored['listing']
+        metadata = listing.get('processing_metadata') or {}
+        seller_id = artifact.processing_metadata.get('seller_id')
+        seller_changed = seller_id is not None and metadata.get('seller_id') != seller_id
+        if seller_changed:
+            metadata = {**metadata, 'seller_id': seller_id}
+        searchable_text = self._create_searchable_text(artifact)
+        new_hash = text_hash(searchable_text)
+
+        plan = EmbeddingUpdatePlan(
+            listing_id=listing['id'],
+            vin=artifact.vehicle.vin,
+            searchable_text=searchable_text,
+            text_hash=new_hash,
+            embed_text=metadata.get('searchable_text_hash') != new_hash,
+            metadata=metadata
+        )
+
+        for column, value in self._listing_columns(artifact).items():
+            if _comparable(listing.get(column)) != _comparable(value):
+                plan.listing_changes[column] = value
+        if listing.get('status') != 'active':
+            plan.listing_changes['status'] = 'active'
+        if seller_changed:
+            plan.listing_changes['processing_metadata'] = metadata
+
+        # Images are matched by content hash; unmatched rows are removed
+        stored_images: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for row in stored['images']:
+            content_hash = (row.get('processing_metadata') or {}).get('content_hash')
+            stored_images.setdefault(content_hash, []).append(row)
+
+        main_images = {id(img) for img in self._main_images(artifact)}
+        for idx, img in enumerate(artifact.images):
+            candidates = stored_images.get(self._image_hash(img))
+            if not candidates:
+                plan.image_inserts.append((idx, img))
+                if id(img) in main_images:
+                    plan.images_to_embed.append((None, img))
+                continue
+
+            row = candidates.pop(0)
+            changes = {
+                column: value for column, value in self._image_columns(idx, img).items()
+                if _comparable(row.get(column)) != _comparable(value)
+            }
+            if changes:
+                plan.image_updates[row['id']] = changes
+            if id(img) in main_images:
+                if (row.get('processing_metadata') or {}).get('embedded'):
+                    self.stats['image_embeddings_skipped'] += 1
+                else:
+                    plan.images_to_embed.append((row, img))
+        plan.image_deletes = [row['id'] for rows in stored_images.values() for row in rows]
+
+        # Condition issues are compared as a multiset of rows
+        stored_issues: Dict[tuple, List[str]] = {}
+        for row in stored['issues']:
+            stored_issues.setdefault(self._issue_key(row), []).append(row['id'])
+        for category, issues in artifact.condition.issues.items():
+            for issue in issues:
+                row = self._build_issue_row(plan.listing_id, plan.vin, category, issue)
+                matched = stored_issues.get(self._issue_key(row))
+                if matched:
+                    matched.pop()
+                else:
+                    plan.issue_inserts.append(row)
+        plan.issue_deletes = [issue_id for ids in stored_issues.values() for issue_id in ids]
+
+        return plan
+
+    async def _update_incrementally(
+        self,
+        artifacts: List[VehicleListingArtifact],
+        existing: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Re-embed and re-write only what changed for already stored VINs"""
+        plans = [self._plan_update(artifact, existing[artifact.vehicle.vin]) for artifact in artifacts]
+
+        # One batched call for every changed searchable text
+        text_plans = [plan for plan in plans if plan.embed_text]
+        text_embeddings = await self._embed_texts([plan.searchable_text for plan in text_plans]) if text_plans else []
+        # A failed batch comes back as zero vectors; keep the old vector and hash so it is retried
+        text_by_plan = {
+            id(plan): embedding for plan, embedding in zip(text_plans, text_embeddings)
+            if usable_embedding(embedding)
+        }
+        if len(text_by_plan) < len(text_plans):
+            self.stats['embedding_failures'] += len(text_plans) - len(text_by_plan)
+            logger.warning(f"⚠️ {len(text_plans) - len(text_by_plan)} text embeddings failed; will retry on next ingest")
+
+        # Image embeddings only for new or never-embedded main photos
+        to_embed = [img for plan in plans for _, img in plan.images_to_embed]
+        image_results = await asyncio.gather(
+            *(self.embedding_service.generate_image_embedding(img.image_bytes) for img in to_embed),
+            return_exceptions=True
+        )
+        image_embeddings: Dict[int, List[float]] = {}
+        for img, result in zip(to_embed, image_results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to create embedding for {img.vehicle_angle}: {result}")
+            elif not usable_embedding(result.embedding):
+                self.stats['embedding_failures'] += 1
+                logger.warning(f"Failed to create embedding for {img.vehicle_angle}: empty vector")
+            else:
+                image_embeddings[id(img)] = result.embedding
+
+        self.stats['text_embeddings'] += len(text_by_plan)
+        self.stats['text_embeddings_skipped'] += len(plans) - len(text_plans)
+        self.stats['image_embeddings'] += len(image_embeddings)
+
+        results = []
+        for plan in plans:
+            changes = await self._apply_plan(plan, text_by_plan.get(id(plan)), image_embeddings)
+            results.append({
+                'vin': plan.vin,
+                'listing_id': plan.listing_id,
+                'text_embedding_id': None,
+                'image_embedding_count': sum(1 for _, img in plan.images_to_embed if id(img) in image_embeddings),
+                'processed_at': datetime.utcnow().isoformat(),
+                'incremental': True,
+                'changes': changes
+            })
+        return results
+
+    async def _apply_plan(
+        self,
+        plan: EmbeddingUpdatePlan,
+        text_embedding: Optional[List[float]],
+        image_embeddings: Dict[int, List[float]]
+    ) -> Dict[str, Any]:
+        """Write one plan: in-place updates, then inserts and deletes"""
+        changes = {
+            'text_embedded': text_embedding is not None,
+            'listing_fields': sorted(plan.listing_changes),
+            'images_inserted': len(plan.image_inserts),
+            'images_updated': 0,
+            'images_deleted': len(plan.image_deletes),
+            'issues_inserted': len(plan.issue_inserts),
+            'issues_deleted': len(plan.issue_deletes)
+        }
+        if plan.is_noop:
+            self.stats['listings_unchanged'] += 1
+            logger.info(f"♻️ {plan.vin} unchanged; nothing re-embedded")
+            return changes
+
+        listing_update = dict(plan.listing_changes)
+        if text_embedding is not None:
+            listing_update.update({
+                'description_text': plan.searchable_text,
+                'text_embedding': str(text_embedding),
+                'processing_metadata': {**plan.metadata, 'searchable_text_hash': plan.text_hash}
+            })
+        if listing_update:
+            self.supabase_client.table('vehicle_listings') \
+                .update(listing_update).eq('id', plan.listing_id).execute()
+
+        image_updates = {image_id: dict(update) for image_id, update in plan.image_updates.items()}
+        for row, img in plan.images_to_embed:
+            if row is not None and id(img) in image_embeddings:
+                update = image_updates.setdefault(row['id'], {})
+                update['image_embedding'] = str(image_embeddings[id(img)])
+                update['processing_metadata'] = {**(row.get('processing_metadata') or {}), 'embedded': True}
+        changes['images_updated'] = len(image_updates)
+
+        if plan.image_deletes:
+            self.supabase_client.table('vehicle_images') \
+                .delete().in_('id', plan.image_deletes).execute()
+        for image_id, update in image_updates.items():
+            self.supabase_client.table('vehicle_images') \
+                .update(update).eq('id', image_id).execute()
+        if plan.image_inserts:
+            await self.image_repository.create_batch([
+                self._build_image_create(plan.listing_id, plan.vin, idx, img, image_embeddings.get(id(img)))
+                for idx, img in plan.image_inserts
+            ])
+
+        if plan.issue_deletes:
+            self.supabase_client.table('vehicle_condition_issues') \
+                .delete().in_('id', plan.issue_deletes).execute()
+        if plan.issue_inserts:
+            self.supabase_client.table('vehicle_condition_issues') \
+                .insert(plan.issue_inserts).execute()
+
+        self.stats['listings_updated'] += 1
+        logger.info(f"✅ Incrementally updated {plan.vin}: {changes}")
+        return changes
+
     async def search_similar_vehicles(
         self,
         query_text: str,
@@ -354,19 +762,26 @@ class VehicleEmbeddingService:
     async def update_vehicle_embeddings(
         self,
         vin: str,
-        artifact: VehicleListingArtifact
+        artifact: VehicleListingArtifact,
+        force: bool = False
     ) -> bool:
         """
         Update existing embeddings for a vehicle (useful for corrections or updates).
+
+        Only the parts of the artifact that changed are re-embedded or
+        re-written; force=True deletes and rebuilds the whole listing.
         """
         try:
             logger.info(f"🔄 Updating embeddings for VIN {vin}")
 
-            # Delete existing embeddings
-            await self._delete_vehicle_embeddings(vin)
+            if force:
+                # Delete existing embeddings
+                await self._delete_vehicle_embeddings(vin)
 
-            # Create new embeddings
-            await self.process_vehicle_for_search(artifact)
+                # Create new embeddings
+                await self._create_vehicle_for_search(artifact)
+            else:
+                await self.update_vehicles_batch([artifact])
 
             logger.info(f"✅ Successfully updated embeddings for VIN {vin}")
             return True
@@ -375,6 +790,31 @@ class VehicleEmbeddingService:
             logger.error(f"Failed to update embeddings for {vin}: {e}")
             return False
 
+    async def update_vehicles_batch(self, artifacts: List[VehicleListingArtifact]) -> List[Dict[str, Any]]:
+        """
+        Re-ingest many artifacts at once (e.g. a daily inventory feed).
+
+        Stored rows are read with a few IN queries, changed texts are embedded
+        in one batched call, and unknown VINs are created. A repeated VIN
+        uses its last artifact. Returns one result per artifact.
+        """
+        latest = {artifact.vehicle.vin: artifact for artifact in artifacts}
+        existing = await self._load_existing(list(latest))
+
+        known = [artifact for vin, artifact in latest.items() if vin in existing]
+        results = {
+            result['vin']: result
+            for result in (await self._update_incrementally(known, existing) if known else [])
+        }
+        for vin, artifact in latest.items():
+            if vin not in existing:
+                results[vin] = await self._create_vehicle_for_search(artifact)
+
+        return [results[artifact.vehicle.vin] for artifact in artifacts]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
     async def _delete_vehicle_embeddings(self, vin: str) -> None:
         """
         Delete existing embeddings and listing for a vehicle.
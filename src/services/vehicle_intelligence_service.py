@@ -19,6 +19,9 @@ import httpx
 from pydantic import BaseModel, Field, validator
 import backoff
 
+from src.cache.dialogue_state_store import BoundedLRUCache
+from src.cache.llm_response_cache import LLMResponseCache, get_llm_response_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -107,7 +110,7 @@ class VehicleIntelligence:
 class GroqCompoundAIClient:
     """Groq Compound AI client with web search + LLM reasoning"""
 
-    def __init__(self):
+    def __init__(self, response_cache: Optional[LLMResponseCache] = None):
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("GROQ_API_KEY environment variable is required")
@@ -122,6 +125,9 @@ class GroqCompoundAIClient:
             timeout=60.0
         )
 
+        # Shared LLM call cache; cached responses do not count against the rate limit
+        self.response_cache = response_cache or get_llm_response_cache()
+
         # Request counts for rate limiting
         self.request_count = 0
         self.requests_reset_time = datetime.now() + timedelta(minutes=1)
@@ -156,6 +162,26 @@ class GroqCompoundAIClient:
                 await asyncio.sleep(sleep_time)
                 self.request_count = 0
 
+    async def _make_request(self, model: str, messages: List[Dict], **kwargs) -> Dict:
+        """Make API request, served from the shared LLM response cache when possible"""
+        params = {
+            "temperature": kwargs.get("temperature", 0.3),
+            "max_tokens": kwargs.get("max_tokens", 4000),
+            "response_format": kwargs.get("response_format", {"type": "text"}),
+            # Note: Groq Compound AI automatically uses web search when needed
+            # No additional configuration required for web search
+        }
+
+        return await self.response_cache.get_or_call(
+            call_site="vehicle_intelligence.groq_compound",
+            call_type="vehicle_intelligence",
+            model=model,
+            messages=messages,
+            params=params,
+            call=lambda: self._post_request({"model": model, "messages": messages, **params}),
+            should_cache=lambda response: bool(response.get("choices"))
+        )
+
     @backoff.on_exception(
         backoff.expo,
         (httpx.HTTPError, httpx.TimeoutException),
@@ -163,20 +189,10 @@ class GroqCompoundAIClient:
         base=1,
         max_value=30
     )
-    async def _make_request(self, model: str, messages: List[Dict], **kwargs) -> Dict:
+    async def _post_request(self, data: Dict[str, Any]) -> Dict:
         """Make API request with retry logic"""
         await self._check_rate_limit()
 
-        data = {
-            "model": model,
-            "messages": messages,
-            "temperature": kwargs.get("temperature", 0.3),
-            "max_tokens": kwargs.get("max_tokens", 4000),
-            "response_format": kwargs.get("response_format", {"type": "text"}),
-            # Note: Groq Compound AI automatically uses web search when needed
-            # No additional configuration required for web search
-        }
-
         self.request_count += 1
 
         try:
@@ -579,8 +595,11 @@ class VehicleIntelligenceService:
 
     def __init__(self):
         self.client = None
-        self._cache: Dict[str, VehicleIntelligence] = {}
         self.cache_ttl = timedelta(hours=24)
+        self._cache: BoundedLRUCache = BoundedLRUCache(
+            max_entries=int(os.getenv("VEHICLE_INTELLIGENCE_CACHE_ENTRIES", "5000")),
+            ttl_seconds=self.cache_ttl.total_seconds()
+        )
 
     async def get_vehicle_intelligence(
         self,
@@ -696,7 +715,11 @@ class VehicleIntelligenceService:
         return {
             "total_entries": total_entries,
             "valid_entries": valid_entries,
-            "expired_entries": total_entries - valid_entries
+            "expired_entries": total_entries - valid_entries,
+            "evictions": self._cache.evictions,
+            "llm_cache": get_llm_response_cache().get_stats()["call_sites"].get(
+                "vehicle_intelligence.groq_compound", {}
+            )
         }
 
 
@@ -323,6 +323,29 @@ class FavoritesService:
             logger.error(f"❌ Failed to get favorite count: {e}")
             return 0
 
+    async def get_all_favorites(self) -> List[Dict[str, Any]]:
+        """
+        Get every (user_id, vehicle_id, created_at) favorite row
+
+        Used to seed the collaborative filter; the scan runs off the event loop.
+
+        Returns:
+            Favorite rows as dictionaries
+        """
+        try:
+            return await asyncio.to_thread(self._select_all_favorites)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get all favorites: {e}")
+            return []
+
+    def _select_all_favorites(self) -> List[Dict[str, Any]]:
+        with self.db_conn.cursor(row_factory=dict_row) as cur:
+            cur.execute("""
+                SELECT user_id, vehicle_id, created_at FROM user_favorites;
+            """)
+            return cur.fetchall()
+
     async def close(self) -> None:
         """Close database connection"""
         if self.db_conn:
@@ -302,6 +302,43 @@ class TestAPIEndpointsIntegration:
         assert len(result.images) == 1
 
 
+class TestVehicleNeighborRows:
+    """Persistence of the kNN graph rows"""
+
+    @pytest.mark.asyncio
+    @patch('src.repositories.listing_repository.get_supabase_client_singleton')
+    async def test_full_save_deletes_rows_it_did_not_write(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        from src.repositories.listing_repository import ListingRepository
+
+        repo = ListingRepository()
+        rows = [{'listing_id': 'v1', 'neighbor_ids': ['v2'], 'scores': [0.9]}]
+        await repo.save_neighbor_rows(rows, replace=True)
+
+        table = mock_client.table.return_value
+        saved = table.upsert.call_args[0][0]
+        assert saved[0]['listing_id'] == 'v1'
+        table.delete.return_value.lt.assert_called_once_with('updated_at', saved[0]['updated_at'])
+
+    @pytest.mark.asyncio
+    @patch('src.repositories.listing_repository.get_supabase_client_singleton')
+    async def test_incremental_save_keeps_other_rows(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        from src.repositories.listing_repository import ListingRepository
+
+        repo = ListingRepository()
+        await repo.save_neighbor_rows([{'listing_id': 'v1', 'neighbor_ids': [], 'scores': []}])
+        await repo.delete_neighbor_rows(['v3'])
+
+        table = mock_client.table.return_value
+        table.delete.return_value.lt.assert_not_called()
+        table.delete.return_value.in_.assert_called_once_with('listing_id', ['v3'])
+
+
 class TestSemanticSearchIntegration:
     """Integration tests for semantic search functionality"""
 
@@ -0,0 +1,273 @@
+"""
+Tests for the Otto.AI Notification Dispatch Pipeline
+
+Bulk fan-out, per-channel limits, digests and multi-row persistence against
+local in-memory sinks
+"""
+
+import pytest
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.notifications.notification_service import (
+    NotificationService,
+    NotificationType,
+    NotificationChannel
+)
+from src.notifications.dispatch_pipeline import (
+    ChannelLimits,
+    NotificationDispatcher,
+    TokenBucket,
+    VehicleEvent,
+    local_sinks
+)
+
+
+def preference_row(user_id: str, **overrides):
+    row = {
+        'user_id': user_id,
+        'price_drop_notifications': True,
+        'availability_notifications': True,
+        'new_similar_vehicle_notifications': False,
+        'email_enabled': True,
+        'sms_enabled': False,
+        'in_app_enabled': True,
+        'email_address': f"{user_id}@example.com",
+        'phone_number': None,
+        'min_price_drop_percentage': 5.0,
+        'notification_frequency': 'immediate',
+        'quiet_hours_start': None,
+        'quiet_hours_end': None,
+        'created_at': None,
+        'updated_at': None
+    }
+    row.update(overrides)
+    return row
+
+
+def make_dispatcher(rows, limits=None, **kwargs):
+    service = NotificationService()
+    service.db_conn = MagicMock()
+    cursor = service.db_conn.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = rows
+    sinks = local_sinks()
+    dispatcher = NotificationDispatcher(service, sinks, limits=limits, **kwargs)
+    return dispatcher, sinks, cursor
+
+
+def price_drop(vehicle_id="vehicle_1", old_price=30000.0, new_price=27000.0):
+    return VehicleEvent(
+        vehicle_id=vehicle_id,
+        type=NotificationType.PRICE_DROP,
+        vehicle_details={'year': 2021, 'make': 'Toyota', 'model': 'Camry'},
+        old_price=old_price,
+        new_price=new_price
+    )
+
+
+def insert_calls(cursor):
+    return [c for c in cursor.execute.call_args_list if 'INSERT INTO notifications' in c[0][0]]
+
+
+class TestDispatch:
+    """Test fan-out of one event"""
+
+    @pytest.mark.asyncio
+    async def test_one_preference_query_and_one_insert_for_all_followers(self):
+        users = [f"user_{i}" for i in range(50)]
+        dispatcher, sinks, cursor = make_dispatcher([preference_row(u) for u in users])
+
+        report = await dispatcher.dispatch(price_drop(), users)
+
+        selects = [c for c in cursor.execute.call_args_list if 'user_notification_preferences' in c[0][0]]
+        assert len(selects) == 1
+        assert len(insert_calls(cursor)) == 1
+        assert report.sent == 100  # email + in-app per user
+        assert len(sinks[NotificationChannel.EMAIL].sent) == 50
+        assert len(sinks[NotificationChannel.IN_APP].sent) == 50
+
+    @pytest.mark.asyncio
+    async def test_preferences_filter_recipients(self):
+        dispatcher, sinks, _ = make_dispatcher([
+            preference_row("keen", min_price_drop_percentage=5.0),
+            preference_row("picky", min_price_drop_percentage=20.0),
+            preference_row("opted_out", price_drop_notifications=False),
+        ])
+
+        report = await dispatcher.dispatch(price_drop(), ["keen", "picky", "opted_out", "no_row"])
+
+        assert report.filtered == 2
+        recipients = {n.user_id for _, n in sinks[NotificationChannel.IN_APP].sent}
+        assert recipients == {"keen", "no_row"}
+
+    @pytest.mark.asyncio
+    async def test_channel_copies_have_distinct_ids_and_failures_are_recorded(self):
+        dispatcher, sinks, cursor = make_dispatcher([preference_row("user_1")])
+        sinks[NotificationChannel.EMAIL].fail_addresses.add("user_1@example.com")
+
+        report = await dispatcher.dispatch(price_drop(), ["user_1"])
+
+        assert report.sent == 1 and report.failed == 1
+        params = insert_calls(cursor)[0][0][1]
+        ids, statuses = params[0::13], params[10::13]
+        assert len(set(ids)) == 2
+        assert sorted(statuses) == ['failed', 'sent']
+
+
+class TestDigests:
+    """Test collapsing of repeated events"""
+
+    @pytest.mark.asyncio
+    async def test_second_event_in_window_becomes_digest(self):
+        dispatcher, sinks, _ = make_dispatcher([preference_row("user_1")], digest_window_seconds=60)
+
+        await dispatcher.dispatch(price_drop("vehicle_1"), ["user_1"])
+        second = await dispatcher.dispatch(price_drop("vehicle_2"), ["user_1"])
+        await dispatcher.dispatch(
+            VehicleEvent(vehicle_id="vehicle_3", type=NotificationType.AVAILABILITY_CHANGE, new_status="sold"),
+            ["user_1"]
+        )
+
+        assert second.digested == 1
+        assert len(sinks[NotificationChannel.IN_APP].sent) == 1
+        assert await dispatcher.flush_digests() == 0  # not due yet
+
+        assert await dispatcher.flush_digests(force=True) == 1
+        _, digest = sinks[NotificationChannel.IN_APP].sent[-1]
+        assert digest.type == NotificationType.DIGEST
+        assert digest.data['vehicle_ids'] == ["vehicle_2", "vehicle_3"]
+        assert dispatcher.get_stats()['pending_digests'] == 0
+
+    @pytest.mark.asyncio
+    async def test_hourly_users_are_digested_and_flushed_when_due(self):
+        dispatcher, sinks, _ = make_dispatcher([preference_row("user_1", notification_frequency="hourly")])
+
+        report = await dispatcher.dispatch(price_drop(), ["user_1"])
+        assert report.digested == 1
+        assert sinks[NotificationChannel.EMAIL].sent == []
+
+        dispatcher._digests["user_1"].due_at = time.monotonic() - 1
+        assert await dispatcher.flush_digests() == 1
+        # A single pending item is sent as-is rather than wrapped
+        assert sinks[NotificationChannel.EMAIL].sent[0][1].type == NotificationType.PRICE_DROP
+
+    @pytest.mark.asyncio
+    async def test_quiet_hours_are_deferred_in_the_database(self):
+        dispatcher, sinks, cursor = make_dispatcher([preference_row("user_1")])
+        dispatcher.service._is_quiet_hours = lambda preferences: True
+
+        report = await dispatcher.dispatch(price_drop(), ["user_1"])
+
+        assert report.deferred == 1 and report.digested == 1
+        assert sinks[NotificationChannel.EMAIL].sent == []
+        (call,) = insert_calls(cursor)
+        assert 'deferred' in call[0][1]
+        assert dispatcher.get_stats()['pending_digests'] == 1
+
+    @pytest.mark.asyncio
+    async def test_quiet_hour_deferrals_are_one_insert(self):
+        users = [f"user_{i}" for i in range(5)]
+        dispatcher, _, cursor = make_dispatcher([preference_row(u) for u in users])
+        dispatcher.service._is_quiet_hours = lambda preferences: True
+
+        report = await dispatcher.dispatch(price_drop(), users)
+
+        assert report.deferred == 5
+        (call,) = insert_calls(cursor)
+        assert call[0][1].count('deferred') == 5
+
+    @pytest.mark.asyncio
+    async def test_deferred_rows_are_settled_when_the_digest_is_sent(self):
+        dispatcher, sinks, cursor = make_dispatcher([preference_row("user_1")])
+        dispatcher.service._is_quiet_hours = lambda preferences: True
+        await dispatcher.dispatch(price_drop(), ["user_1"])
+        deferred_id = insert_calls(cursor)[0][0][1][0]
+        cursor.execute.reset_mock()
+
+        dispatcher.service._is_quiet_hours = lambda preferences: False
+        assert await dispatcher.flush_digests(force=True) == 1
+
+        (call,) = insert_calls(cursor)
+        params = call[0][1]
+        # Two channel rows plus the original deferral, now marked sent
+        rows = [params[i:i + 13] for i in range(0, len(params), 13)]
+        assert len(rows) == 3
+        settled = [row for row in rows if row[0] == deferred_id]
+        assert settled and settled[0][10] == 'sent' and settled[0][9] is not None
+        assert len(sinks[NotificationChannel.EMAIL].sent) == 1
+
+    @pytest.mark.asyncio
+    async def test_deferred_rows_are_restored_into_digests(self):
+        dispatcher, _, cursor = make_dispatcher([])
+        notification = dispatcher.service.build_price_drop_notification(
+            "user_1", "vehicle_1", 30000.0, 27000.0, {'year': 2021, 'make': 'Toyota', 'model': 'Camry'}
+        )
+        stored = {
+            'id': notification.id, 'user_id': 'user_1', 'vehicle_id': 'vehicle_1',
+            'type': 'price_drop', 'channel': 'email', 'subject': notification.subject,
+            'content': notification.content, 'data': '{}', 'created_at': notification.created_at,
+            'sent_at': None, 'status': 'deferred', 'retry_count': 0, 'max_retries': 3
+        }
+        cursor.fetchall.side_effect = [[stored], [preference_row("user_1")]]
+
+        assert await dispatcher.restore_deferred() == 1
+        assert dispatcher.get_stats()['pending_digest_items'] == 1
+        # Rows already held are not added twice
+        cursor.fetchall.side_effect = [[stored]]
+        assert await dispatcher.restore_deferred() == 0
+
+
+class TestLifecycle:
+    """Test that the service runs the dispatcher's digest flusher"""
+
+    @pytest.mark.asyncio
+    async def test_initialize_starts_and_close_stops_the_flusher(self, monkeypatch):
+        monkeypatch.setenv('SUPABASE_DB_PASSWORD', 'secret')
+        monkeypatch.setenv('NOTIFICATION_SINKS', 'local')
+        service = NotificationService()
+
+        with patch('src.notifications.notification_service.psycopg.connect', return_value=MagicMock()):
+            assert await service.initialize('https://project.supabase.co', 'key')
+
+        flush_task = service.dispatcher._flush_task
+        assert flush_task is not None and not flush_task.done()
+
+        await service.close()
+        assert flush_task.cancelled()
+        assert service.dispatcher._flush_task is None
+
+
+class TestChannelLimits:
+    """Test per-channel concurrency and rate limits"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_per_channel(self):
+        users = [f"user_{i}" for i in range(20)]
+        dispatcher, sinks, _ = make_dispatcher(
+            [preference_row(u) for u in users],
+            limits={NotificationChannel.EMAIL: ChannelLimits(concurrency=3)}
+        )
+        for sink in sinks.values():
+            sink.latency = 0.01
+
+        await dispatcher.dispatch(price_drop(), users)
+
+        assert sinks[NotificationChannel.EMAIL].max_in_flight == 3
+        assert sinks[NotificationChannel.IN_APP].max_in_flight > 3
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_sends(self):
+        bucket = TokenBucket(rate_per_second=100, burst=5)
+
+        started = time.monotonic()
+        for _ in range(15):
+            await bucket.acquire()
+        elapsed = time.monotonic() - started
+
+        # 5 from the burst, the other 10 at 100/s
+        assert elapsed >= 0.09
@@ -0,0 +1,68 @@
+"""
+Performance benchmark for the columnar interaction event log
+Append throughput into day-partitioned segments, compaction, and
+per-user get_interaction_stats latency over a persisted, reopened log
+"""
+
+import pytest
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.recommendation.interaction_log import InteractionEventLog
+
+BENCHMARK_EVENTS = 1_000_000
+USERS = 20_000
+VEHICLES = 50_000
+DAYS = 60
+QUERIES = 500
+TYPES = ['view', 'view', 'view', 'save', 'compare', 'search', 'recommendation_click']
+
+
+@pytest.mark.performance
+def test_interaction_stats_latency(tmp_path):
+    rng = np.random.default_rng(21)
+    now = datetime(2026, 10, 18, 12, 0)
+    start = now - timedelta(days=DAYS)
+    users = rng.integers(USERS, size=BENCHMARK_EVENTS)
+    vehicles = rng.integers(VEHICLES, size=BENCHMARK_EVENTS)
+    kinds = rng.integers(len(TYPES), size=BENCHMARK_EVENTS)
+    offsets = np.sort(rng.uniform(0, DAYS * 86400, size=BENCHMARK_EVENTS))
+
+    log = InteractionEventLog(str(tmp_path))
+    started = time.perf_counter()
+    for user, vehicle, kind, offset in zip(users.tolist(), vehicles.tolist(), kinds.tolist(), offsets.tolist()):
+        log.append(
+            f'user_{user}', f'session_{user}_{int(offset // 1800)}', TYPES[kind],
+            [] if TYPES[kind] == 'search' else [f'vehicle_{vehicle}'],
+            start + timedelta(seconds=offset),
+            query='awd family suv' if TYPES[kind] == 'search' else None
+        )
+    log.flush()
+    append_us = (time.perf_counter() - started) / BENCHMARK_EVENTS * 1e6
+
+    started = time.perf_counter()
+    log.compact(now=now)
+    compact_seconds = time.perf_counter() - started
+
+    reopened = InteractionEventLog(str(tmp_path))
+    latencies = []
+    for user in rng.integers(USERS, size=QUERIES).tolist():
+        started = time.perf_counter()
+        stats = reopened.interaction_stats(f'user_{user}', days=30, now=now)
+        latencies.append(time.perf_counter() - started)
+        assert stats['total_interactions'] > 0
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+
+    print(
+        f"\n{BENCHMARK_EVENTS} events: append {append_us:.2f}us/event, compaction {compact_seconds:.1f}s, "
+        f"stats p50 {p50:.2f}ms p99 {p99:.2f}ms, {reopened.get_stats()}"
+    )
+    assert reopened.get_stats()['partitions'] == DAYS + 1
+    assert append_us < 50
+    assert p50 < 10
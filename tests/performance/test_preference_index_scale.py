@@ -0,0 +1,95 @@
+"""
+Performance benchmark for the preference index at 1M users
+MinHash LSH build, similar-user queries with exact Jaccard re-scoring,
+incremental profile updates and mini-batch k-means segmentation
+"""
+
+import pytest
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import src.conversation  # noqa: F401  (loads before analytics; see tests/unit/test_preference_index.py)
+from src.analytics.preference_index import PreferenceIndex, preference_items
+
+BENCHMARK_USERS = 1_000_000
+QUERIES = 200
+UPDATES = 5_000
+
+CATEGORIES = {
+    'brand': [f'brand_{i}' for i in range(40)],
+    'vehicle_type': ['suv', 'sedan', 'truck', 'minivan', 'coupe', 'wagon'],
+    'fuel': ['gas', 'ev', 'hybrid', 'diesel'],
+    'budget': list(range(15000, 90000, 2500)),
+    'color': ['red', 'blue', 'black', 'white', 'silver', 'grey'],
+    'family_size': [1, 2, 3, 4, 5, 6],
+    'feature': [f'feature_{i}' for i in range(25)],
+    'commute': ['short', 'medium', 'long'],
+}
+
+
+def synthetic_profiles(count, seed=13):
+    """Users drift from one of 50 archetypes, so similar users and segments exist"""
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORIES)
+    choices = np.array([rng.integers(len(CATEGORIES[name]), size=50) for name in names]).T
+    archetype = rng.integers(50, size=count)
+    drift = rng.random((count, len(names))) < 0.25
+    present = rng.random((count, len(names))) < 0.85
+    values = np.where(drift, rng.integers(0, 1000, size=(count, len(names))), choices[archetype])
+    confidence = rng.uniform(0.5, 1.0, size=(count, len(names)))
+
+    for user in range(count):
+        yield f'user_{user}', {
+            f'pref_{name}': {
+                'value': CATEGORIES[name][values[user, column] % len(CATEGORIES[name])],
+                'confidence': confidence[user, column]
+            }
+            for column, name in enumerate(names) if present[user, column]
+        }
+
+
+@pytest.mark.performance
+def test_preference_index_at_one_million_users():
+    profiles = dict(synthetic_profiles(BENCHMARK_USERS))
+    index = PreferenceIndex()
+
+    started = time.perf_counter()
+    index.build(profiles.items())
+    build_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(1)
+    query_users = [f'user_{i}' for i in rng.integers(BENCHMARK_USERS, size=QUERIES)]
+    latencies = []
+    for user_id in query_users:
+        started = time.perf_counter()
+        similar = index.similar_to(preference_items(profiles[user_id]), limit=10, exclude_user_id=user_id)
+        latencies.append(time.perf_counter() - started)
+        assert len(similar) <= 10 and all(score >= 0.5 for _, score in similar)
+    query_p50, query_p99 = np.percentile(latencies, [50, 99]) * 1000
+
+    updates = synthetic_profiles(UPDATES, seed=99)
+    started = time.perf_counter()
+    for i, (_, preferences) in enumerate(updates):
+        index.update_profile(f'new_user_{i}', preferences)
+    update_ms = (time.perf_counter() - started) / UPDATES * 1000
+
+    started = time.perf_counter()
+    index.fit_segments()
+    segments = index.segments(min_size=10)
+    segment_seconds = time.perf_counter() - started
+
+    print(
+        f"\n{BENCHMARK_USERS} users: build {build_seconds:.1f}s, similar-user query p50 {query_p50:.2f}ms "
+        f"p99 {query_p99:.2f}ms, update {update_ms:.3f}ms, segmentation {segment_seconds:.1f}s "
+        f"({len(segments)} segments), stats {index.get_stats()}"
+    )
+    assert build_seconds < 180
+    assert query_p50 < 25
+    assert update_ms < 5
+    assert segment_seconds < 120
+    assert sum(segment.size for segment in segments) <= BENCHMARK_USERS + UPDATES
@@ -0,0 +1,86 @@
+"""
+Performance benchmark for vectorized recommendation scoring
+1k candidates x 5 context vehicles: content, collaborative and embedding
+similarity scores for every candidate in one pass
+"""
+
+import pytest
+import asyncio
+import os
+import random
+import sys
+import time
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.recommendation.batch_scoring import CandidateBatch
+from src.recommendation.recommendation_engine import RecommendationEngine
+
+CANDIDATES = 1000
+CONTEXT_VEHICLES = 5
+EMBEDDING_DIM = 1536
+RUNS = 50
+
+
+def catalogue(count: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    makes = ['Toyota', 'Honda', 'Ford', 'BMW', 'Tesla', 'Kia', 'Subaru', 'Audi']
+    types = ['SUV', 'Sedan', 'Truck', 'Coupe', 'Van']
+    features = [f"feature_{i}" for i in range(120)]
+    embeddings = rng.standard_normal((count, EMBEDDING_DIM), dtype=np.float32)
+    return [
+        {
+            'id': f"vehicle_{i}",
+            'make': makes[i % len(makes)],
+            'model': f"model_{i % 40}",
+            'vehicle_type': types[i % len(types)],
+            'price': float(rng.uniform(8000, 90000)),
+            'year': int(rng.integers(2012, 2025)),
+            'mileage': int(rng.integers(0, 150000)),
+            'description': 'clean title one owner',
+            'features': random.Random(i).sample(features, 12),
+            'embedding': embeddings[i],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.performance
+def test_hybrid_scoring_pass_under_5ms():
+    vehicles = catalogue(CANDIDATES + CONTEXT_VEHICLES)
+    candidates, context = vehicles[:CANDIDATES], vehicles[CANDIDATES:]
+
+    vehicle_db = Mock()
+    vehicle_db.get_vehicles_by_ids = AsyncMock(return_value=context)
+    engine = RecommendationEngine(vehicle_db, Mock())
+    loop = asyncio.new_event_loop()
+    profile = loop.run_until_complete(engine._get_user_profile('buyer'))
+    context_ids = [v['id'] for v in context]
+
+    started = time.perf_counter()
+    batch = CandidateBatch(candidates)
+    encode_ms = (time.perf_counter() - started) * 1e3
+
+    def score_pass():
+        collaborative = engine._collaborative_scores('buyer', batch)
+        content = loop.run_until_complete(engine._content_scores(batch, profile, 'clean suv'))
+        similarity = loop.run_until_complete(engine._context_similarity_scores(context_ids, batch))
+        return 0.4 * collaborative + 0.6 * content + 0.2 * similarity
+
+    score_pass()  # warm caches (token index, attribute vectors)
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        scores = score_pass()
+        timings.append((time.perf_counter() - started) * 1e3)
+    loop.close()
+
+    median_ms = float(np.median(timings))
+    print(f"\nBatch scoring ({CANDIDATES} candidates x {CONTEXT_VEHICLES} context, {EMBEDDING_DIM}-d embeddings): "
+          f"encode {encode_ms:.1f}ms once per request, scoring pass median {median_ms:.2f}ms")
+
+    assert scores.shape == (CANDIDATES,)
+    assert median_ms < 5.0
@@ -0,0 +1,64 @@
+"""
+Performance benchmark for the vehicle kNN similarity graph
+Batch top-50 build over 1536-d listing embeddings, incremental add/remove
+and key-lookup serving
+"""
+
+import pytest
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.recommendation.similarity_graph import VehicleSimilarityGraph
+
+BENCHMARK_VEHICLES = 10_000
+EMBEDDING_DIM = 1536
+SEGMENTS = 200
+
+
+def synthetic_embeddings(seed: int = 7):
+    """Listings cluster around segment centroids, like real make/model/body groups"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((SEGMENTS, EMBEDDING_DIM), dtype=np.float32)
+    segments = rng.integers(SEGMENTS, size=BENCHMARK_VEHICLES)
+    vectors = centroids[segments] + 0.5 * rng.standard_normal((BENCHMARK_VEHICLES, EMBEDDING_DIM), dtype=np.float32)
+    return [(f"listing_{i}", vectors[i]) for i in range(BENCHMARK_VEHICLES)]
+
+
+@pytest.mark.performance
+def test_graph_build_and_lookup():
+    embeddings = synthetic_embeddings()
+    graph = VehicleSimilarityGraph(top_k=50)
+
+    started = time.perf_counter()
+    graph.build(embeddings)
+    build_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(1)
+    started = time.perf_counter()
+    for i in range(100):
+        graph.add_vehicle(f"new_{i}", rng.standard_normal(EMBEDDING_DIM, dtype=np.float32))
+    add_ms = (time.perf_counter() - started) / 100 * 1e3
+
+    started = time.perf_counter()
+    for i in range(0, 1000, 10):
+        graph.remove_vehicle(f"listing_{i}")
+    remove_ms = (time.perf_counter() - started) / 100 * 1e3
+
+    lookups = [f"listing_{i}" for i in range(1, BENCHMARK_VEHICLES, 7)]
+    started = time.perf_counter()
+    for vehicle_id in lookups:
+        graph.similar(vehicle_id, limit=10)
+    lookup_us = (time.perf_counter() - started) / len(lookups) * 1e6
+
+    stats = graph.get_stats()
+    print(f"\nkNN graph ({stats['vehicles']} vehicles x {EMBEDDING_DIM}-d, top-{graph.top_k}): "
+          f"build {build_seconds:.2f}s; neighbour table {stats['neighbor_table_bytes'] / 1e6:.1f} MB; "
+          f"add {add_ms:.1f}ms; remove {remove_ms:.1f}ms; lookup {lookup_us:.1f}us")
+
+    assert build_seconds < 60
+    assert lookup_us < 500
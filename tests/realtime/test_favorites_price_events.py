@@ -0,0 +1,178 @@
+"""
+Tests for event-driven price change detection in FavoritesWebSocketService
+
+Trigger notifications, batched last-known-price writes and the chunked
+polling fallback
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+import threading
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.realtime_services.favorites_websocket_service import FavoritesWebSocketService
+
+
+def make_service(monitored_rows=None, fetch_batches=None):
+    """Service with a MagicMock connection; the cursor returns the given rows"""
+    service = FavoritesWebSocketService()
+    service.db_conn = MagicMock()
+    cursor = service.db_conn.cursor.return_value.__enter__.return_value
+    if fetch_batches is not None:
+        cursor.fetchall.side_effect = fetch_batches
+    else:
+        cursor.fetchall.return_value = monitored_rows or []
+    return service, cursor
+
+
+async def subscribe(service, user_id, vehicle_ids):
+    websocket = Mock()
+    websocket.send_text = AsyncMock()
+    connection_id = await service.register_connection(user_id, websocket)
+    for vehicle_id in vehicle_ids:
+        await service.subscribe_to_vehicle(connection_id, vehicle_id)
+    return websocket
+
+
+def price_update_calls(cursor):
+    return [c for c in cursor.execute.call_args_list if 'unnest' in c[0][0]]
+
+
+class TestPriceEvents:
+    """Test the notification consumer"""
+
+    @pytest.mark.asyncio
+    async def test_burst_is_one_read_and_one_write(self):
+        service, cursor = make_service(monitored_rows=[
+            {'vehicle_id': 'v1', 'last_known_price': 30000, 'price_change_threshold': 5.0},
+            {'vehicle_id': 'v2', 'last_known_price': 20000, 'price_change_threshold': 5.0},
+        ])
+        ws = await subscribe(service, 'user_1', ['v1', 'v2'])
+        cursor.execute.reset_mock()
+        service.monitoring_active = True
+        consumer = asyncio.create_task(service._price_event_consumer())
+
+        for price in (29000, 28000, 27000):
+            service._enqueue_price_event(json.dumps({'vehicle_id': 'v1', 'old_price': 0, 'new_price': price}))
+        service._enqueue_price_event(json.dumps({'vehicle_id': 'v2', 'old_price': 20000, 'new_price': 19900}))
+        service._enqueue_price_event(json.dumps({'vehicle_id': 'unwatched', 'new_price': 1}))
+        await asyncio.sleep(service.price_event_batch_window + 0.05)
+        consumer.cancel()
+
+        # One lookup and one multi-row write for the whole burst
+        assert cursor.execute.call_count == 2
+        ids, prices = price_update_calls(cursor)[0][0][1]
+        assert ids == ['v1'] and prices == [27000.0]
+
+        message = json.loads(ws.send_text.call_args[0][0])
+        assert message['new_price'] == 27000.0
+        assert message['price_drop_percentage'] == pytest.approx(10.0)
+        assert service.stats['price_event_batches'] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_baseline_is_seeded_without_alert(self):
+        service, cursor = make_service(monitored_rows=[
+            {'vehicle_id': 'v1', 'last_known_price': None, 'price_change_threshold': 5.0},
+        ])
+        ws = await subscribe(service, 'user_1', ['v1'])
+
+        await service._process_price_events([{'vehicle_id': 'v1', 'new_price': 25000}])
+
+        ids, prices = price_update_calls(cursor)[0][0][1]
+        assert ids == ['v1'] and prices == [25000]
+        ws.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_database_work_runs_off_the_event_loop(self):
+        service, cursor = make_service(monitored_rows=[
+            {'vehicle_id': 'v1', 'last_known_price': 30000, 'price_change_threshold': 5.0},
+        ])
+        await subscribe(service, 'user_1', ['v1'])
+        loop_thread = threading.get_ident()
+        threads = []
+        cursor.execute.side_effect = lambda *args: threads.append(threading.get_ident())
+        service.db_conn.commit.side_effect = lambda: threads.append(threading.get_ident())
+
+        await service._process_price_events([{'vehicle_id': 'v1', 'new_price': 25000}])
+
+        assert len(threads) == 3  # lookup, update, commit
+        assert loop_thread not in threads
+
+    @pytest.mark.asyncio
+    async def test_shared_connection_is_used_by_one_thread_at_a_time(self):
+        service, cursor = make_service(monitored_rows=[
+            {'vehicle_id': 'v1', 'last_known_price': 30000, 'price_change_threshold': 5.0},
+        ])
+        await subscribe(service, 'user_1', ['v1'])
+        active, overlaps = [], []
+
+        def slow_execute(*args):
+            active.append(1)
+            if len(active) > 1:
+                overlaps.append(args[0])
+            threading.Event().wait(0.01)
+            active.pop()
+
+        cursor.execute.side_effect = slow_execute
+
+        await asyncio.gather(
+            service._process_price_events([{'vehicle_id': 'v1', 'new_price': 25000}]),
+            service._check_vehicle_prices(),
+            service._start_monitoring_vehicle('v2')
+        )
+
+        assert overlaps == []
+
+    def test_queue_overflow_is_counted(self):
+        service, _ = make_service()
+        service.price_event_queue = asyncio.Queue(maxsize=1)
+
+        service._enqueue_price_event('{"vehicle_id": "v1", "new_price": 1}')
+        service._enqueue_price_event('{"vehicle_id": "v2", "new_price": 1}')
+        service._enqueue_price_event('not json')
+
+        assert service.stats['price_events_received'] == 2
+        assert service.stats['price_events_dropped'] == 1
+
+
+class TestPollingFallback:
+    """Test chunked polling"""
+
+    @pytest.mark.asyncio
+    async def test_poll_is_chunked_and_batches_writes(self):
+        service, cursor = make_service(fetch_batches=[
+            [{'vehicle_id': 'v0', 'old_price': 30000, 'new_price': 27000, 'price_change_threshold': 5.0}],
+            [{'vehicle_id': 'v3', 'old_price': 20000, 'new_price': 15000, 'price_change_threshold': 5.0}],
+        ])
+        await subscribe(service, 'user_1', ['v0', 'v1', 'v2', 'v3'])
+        service.price_check_chunk_size = 2
+        cursor.execute.reset_mock()
+
+        await service._check_vehicle_prices()
+
+        selects = [c for c in cursor.execute.call_args_list if 'JOIN vehicles' in c[0][0]]
+        assert [c[0][1][0] for c in selects] == [['v0', 'v1'], ['v2', 'v3']]
+        ids, _ = price_update_calls(cursor)[0][0][1]
+        assert sorted(ids) == ['v0', 'v3']
+        assert service.stats['last_known_price_writes'] == 2
+
+    @pytest.mark.asyncio
+    async def test_polling_slows_down_while_events_flow(self):
+        service, _ = make_service()
+        service.monitoring_active = True
+        service.price_events_active = True
+        service._check_vehicle_prices = AsyncMock()
+
+        async def stop_after_sleep(seconds):
+            service.monitoring_active = False
+
+        with patch('asyncio.sleep', side_effect=stop_after_sleep) as mock_sleep:
+            await service._price_monitoring_loop()
+
+        mock_sleep.assert_called_once_with(service.price_reconcile_interval)
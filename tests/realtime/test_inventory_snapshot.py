@@ -0,0 +1,189 @@
+"""
+Tests for the Otto.AI Inventory Snapshot
+
+Shared pre-serialized snapshot, delta computation and compressed framing
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.realtime_services.sse_event_broker import SSEEventBroker, INVENTORY_TOPIC
+from src.realtime_services.inventory_snapshot import (
+    InventorySnapshot,
+    INVENTORY_DELTA_EVENT,
+    ENCODING_GZIP,
+    ENCODING_IDENTITY,
+    SUPPORTED_ENCODINGS,
+    apply_vehicle_delta,
+    decode_payload,
+    negotiate_encoding,
+    vehicle_delta
+)
+
+
+def vehicle(vehicle_id: str, created_at: str, **fields):
+    return {'id': vehicle_id, 'created_at': created_at, 'price': 20000, **fields}
+
+
+def make_snapshot(rows, listing_rows=None, **kwargs):
+    broker = SSEEventBroker()
+    loader = Mock(return_value=rows)
+    listing_loader = Mock(return_value=listing_rows or [])
+    snapshot = InventorySnapshot(
+        broker=broker, loader=loader, listing_loader=listing_loader, debounce_seconds=0, **kwargs
+    )
+    return snapshot, broker, loader, listing_loader
+
+
+def frame_data(frame: str) -> dict:
+    data_line = [line for line in frame.split("\n") if line.startswith("data: ")][0]
+    return json.loads(data_line[len("data: "):])
+
+
+class TestVehicleDelta:
+    """Test delta computation"""
+
+    def test_added_removed_and_changed_fields(self):
+        old = {'a': vehicle('a', '1'), 'b': vehicle('b', '2')}
+        new = {'b': vehicle('b', '2', price=18500), 'c': vehicle('c', '3')}
+
+        delta = vehicle_delta(old, new)
+
+        assert [v['id'] for v in delta['added']] == ['c']
+        assert delta['removed'] == ['a']
+        assert delta['changed'] == {'b': {'price': 18500}}
+
+    def test_apply_round_trips_and_keeps_newest(self):
+        old = {'a': vehicle('a', '1'), 'b': vehicle('b', '2')}
+        new = {'c': vehicle('c', '3'), 'b': vehicle('b', '2', price=18500)}
+
+        applied = apply_vehicle_delta(old, vehicle_delta(old, new), limit=2)
+
+        assert applied == new
+        assert list(applied) == ['c', 'b']
+
+
+class TestInventorySnapshot:
+    """Test the shared snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_connections_share_one_load_and_frame(self):
+        snapshot, _, loader, _ = make_snapshot([vehicle('a', '1'), vehicle('b', '2')])
+
+        results = await asyncio.gather(*(snapshot.snapshot_frame() for _ in range(50)))
+
+        assert loader.call_count == 1
+        assert len({frame for frame, _ in results}) == 1
+        assert snapshot.stats['frames_built'] == 1
+        data = frame_data(results[0][0])
+        assert [v['id'] for v in data['vehicles']] == ['b', 'a']
+        assert data['version'] == snapshot.version
+
+    @pytest.mark.asyncio
+    async def test_compressed_frame_wraps_same_payload(self):
+        snapshot, _, _, _ = make_snapshot([vehicle('a', '1')])
+        plain, _ = await snapshot.snapshot_frame(ENCODING_IDENTITY)
+        compressed, version = await snapshot.snapshot_frame(ENCODING_GZIP)
+
+        assert compressed.startswith("event: inventory_snapshot\n")
+        wrapped = frame_data(compressed)
+        assert wrapped['version'] == version
+        assert json.loads(decode_payload(wrapped['payload'], ENCODING_GZIP)) == frame_data(plain)
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding("zstd, gzip") == ENCODING_GZIP
+        assert negotiate_encoding(None) == ENCODING_IDENTITY
+        assert negotiate_encoding("br") == ("br" if "br" in SUPPORTED_ENCODINGS else ENCODING_IDENTITY)
+
+    @pytest.mark.asyncio
+    async def test_listing_change_publishes_delta_and_bumps_version(self):
+        snapshot, broker, _, listing_loader = make_snapshot(
+            [vehicle('a', '1'), vehicle('b', '2')],
+            listing_rows=[vehicle('b', '2', price=17000)]
+        )
+        await snapshot.snapshot_frame()
+        before, old_version = await snapshot.snapshot_frame()
+        subscription = broker.subscribe("user_1")
+
+        delta = await snapshot.apply_listing_changes(['a', 'b'])
+
+        assert delta['removed'] == ['a']
+        assert delta['changed'] == {'b': {'price': 17000}}
+        assert delta['baseVersion'] == old_version
+        event = subscription.queue.get_nowait()
+        assert event.event == INVENTORY_DELTA_EVENT
+        assert event.seq == delta['version'] == snapshot.version
+
+        after, _ = await snapshot.snapshot_frame()
+        assert after != before
+        assert [v['id'] for v in frame_data(after)['vehicles']] == ['b']
+
+    @pytest.mark.asyncio
+    async def test_unchanged_listing_publishes_nothing(self):
+        rows = [vehicle('a', '1')]
+        snapshot, broker, _, _ = make_snapshot(rows, listing_rows=rows)
+        await snapshot.snapshot_frame()
+
+        assert await snapshot.apply_listing_changes(['a']) is None
+        assert broker.stats['published'] == 0
+
+    @pytest.mark.asyncio
+    async def test_deltas_from_other_workers_are_applied(self):
+        snapshot, broker, _, _ = make_snapshot([vehicle('a', '1')])
+        await snapshot.snapshot_frame()
+
+        delta = {'added': [vehicle('z', '9')], 'removed': [], 'changed': {'a': {'price': 1}}}
+        await broker.publish(INVENTORY_TOPIC, INVENTORY_DELTA_EVENT, delta)
+
+        frame, version = await snapshot.snapshot_frame()
+        assert version == broker.last_seq
+        assert {v['id']: v['price'] for v in frame_data(frame)['vehicles']} == {'z': 20000, 'a': 1}
+        assert snapshot.stats['deltas_applied'] == 1
+
+    @pytest.mark.asyncio
+    async def test_change_notifications_are_coalesced(self):
+        snapshot, _, _, listing_loader = make_snapshot([vehicle('a', '1')])
+        await snapshot.snapshot_frame()
+
+        snapshot.notify_listings_changed(['a'])
+        snapshot.notify_listings_changed(['b', 'c'])
+        await snapshot._flush_task
+
+        listing_loader.assert_called_once()
+        assert sorted(listing_loader.call_args[0][0]) == ['a', 'b', 'c']
+
+    @pytest.mark.asyncio
+    async def test_changes_queued_during_a_refresh_are_flushed(self):
+        snapshot, _, _, listing_loader = make_snapshot([vehicle('a', '1')])
+        await snapshot.snapshot_frame()
+        apply = snapshot.apply_listing_changes
+
+        async def apply_and_notify(listing_ids):
+            if listing_ids == ['a']:
+                snapshot.notify_listings_changed(['d'])
+            return await apply(listing_ids)
+
+        snapshot.apply_listing_changes = apply_and_notify
+        snapshot.notify_listings_changed(['a'])
+        await snapshot._flush_task
+
+        assert [c[0][0] for c in listing_loader.call_args_list] == [['a'], ['d']]
+        assert not snapshot._pending_ids
+
+    @pytest.mark.asyncio
+    async def test_failed_load_is_not_retried_per_connection(self):
+        snapshot, _, loader, _ = make_snapshot([])
+        loader.side_effect = RuntimeError("supabase down")
+
+        for _ in range(5):
+            frame, _ = await snapshot.snapshot_frame()
+
+        assert loader.call_count == 1
+        assert frame_data(frame)['vehicles'] == []
@@ -0,0 +1,243 @@
+"""
+Unit tests for batched FavoritesAnalyticsService ingestion
+Checks the per-vehicle counter deltas and daily rollups against a full
+recount, and the batched flush / dashboard SQL on a recording connection
+"""
+
+import pytest
+import sys
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# The conversation package must load before analytics (profile_service <-> conversation_agent import order)
+import src.conversation  # noqa: F401
+from src.analytics.favorites_analytics_service import (
+    FavoriteEvent, FavoritesAnalyticsService, _ConversionUpdate, daily_rollups, metric_deltas
+)
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        # psycopg rejects a statement whose placeholders and parameters differ in number
+        assert sql.count('%s') == len(params or []), f"{sql.count('%s')} placeholders, {len(params or [])} parameters"
+        self.conn.statements.append((' '.join(sql.split()), params))
+        self.rows = self.conn.respond(sql, params)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class RecordingConnection:
+    """psycopg connection stand-in that records statements"""
+
+    def __init__(self, respond=None):
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_commits = 0
+        self.respond = respond or (lambda sql, params: [])
+
+    def cursor(self, row_factory=None):
+        return RecordingCursor(self)
+
+    def commit(self):
+        if self.fail_commits:
+            self.fail_commits -= 1
+            raise RuntimeError('connection lost')
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def executed(self, fragment):
+        return [(sql, params) for sql, params in self.statements if fragment in sql]
+
+
+def make_event(user_id, vehicle_id, event_type, timestamp):
+    return FavoriteEvent(f'{user_id}-{vehicle_id}-{timestamp}', user_id, vehicle_id, event_type, timestamp, {})
+
+
+def make_service(conn, **kwargs):
+    service = FavoritesAnalyticsService(**kwargs)
+    service.db_conn = conn
+    return service
+
+
+class TestCounterDeltas:
+    """Test suite for the pure batch aggregation"""
+
+    def test_counters_match_full_recount_across_batches(self):
+        rng = random.Random(5)
+        events, table = [], {}  # table mirrors conversion_tracking
+        counters = Counter()
+        hours_sum, notified = Counter(), Counter()
+
+        for batch in range(20):
+            batch_events, conversions = [], {}
+            for _ in range(rng.randint(0, 30)):
+                user, vehicle = f'user_{rng.randint(0, 8)}', f'vehicle_{rng.randint(0, 5)}'
+                timestamp = NOW + timedelta(hours=batch, minutes=rng.randint(0, 59))
+                if rng.random() < 0.7:
+                    batch_events.append(make_event(user, vehicle, 'favorited', timestamp))
+                else:
+                    favorited_at = table[(user, vehicle)]['favorited_at'] if (user, vehicle) in table else timestamp - timedelta(hours=rng.randint(1, 48))
+                    conversions[(user, vehicle)] = _ConversionUpdate(
+                        user, vehicle, favorited_at, timestamp, 'inquiry', None, rng.random() < 0.5
+                    )
+
+            previous = {key: dict(table[key]) for key in conversions if key in table}
+            for vehicle_id, (favorites, converted, hours, notified_delta) in metric_deltas(batch_events, conversions, previous).items():
+                counters[(vehicle_id, 'favorites')] += favorites
+                counters[(vehicle_id, 'conversions')] += converted
+                hours_sum[vehicle_id] += hours
+                notified[vehicle_id] += notified_delta
+
+            events.extend(batch_events)
+            for key, update in conversions.items():
+                row = table.setdefault(key, {'favorited_at': update.favorited_at})
+                row.update(converted=True, conversion_time=update.conversion_time, notification_effective=update.notification_effective)
+
+        for vehicle_id in {key[1] for key in table} | {event.vehicle_id for event in events}:
+            rows = [row for (_, vehicle), row in table.items() if vehicle == vehicle_id]
+            assert counters[(vehicle_id, 'favorites')] == sum(
+                event.vehicle_id == vehicle_id and event.event_type == 'favorited' for event in events
+            )
+            assert counters[(vehicle_id, 'conversions')] == len(rows)
+            assert hours_sum[vehicle_id] == pytest.approx(sum(
+                (row['conversion_time'] - row['favorited_at']).total_seconds() / 3600 for row in rows
+            ))
+            assert notified[vehicle_id] == sum(row['notification_effective'] for row in rows)
+
+    def test_daily_rollups_match_group_by(self):
+        events = [
+            make_event('a', 'v1', 'favorited', NOW),
+            make_event('a', 'v1', 'viewed_from_favorites', NOW),
+            make_event('a', 'v1', 'viewed_from_favorites', NOW + timedelta(minutes=5)),
+            make_event('b', 'v1', 'viewed_from_favorites', NOW + timedelta(days=1)),
+            make_event('b', 'v2', 'favorited', NOW + timedelta(days=1)),
+        ]
+
+        rollups, users = daily_rollups(events)
+
+        assert sorted(rollups) == [
+            (NOW.date(), 'v1', 'favorited', 1),
+            (NOW.date(), 'v1', 'viewed_from_favorites', 2),
+            (NOW.date() + timedelta(days=1), 'v1', 'viewed_from_favorites', 1),
+            (NOW.date() + timedelta(days=1), 'v2', 'favorited', 1),
+        ]
+        assert len(users) == 4  # a's repeat view on the same day is one row
+
+
+class TestBatchedIngestion:
+    """Test the buffered flush on a recording connection"""
+
+    @pytest.mark.asyncio
+    async def test_events_are_written_in_batches(self):
+        conn = RecordingConnection()
+        service = make_service(conn, flush_batch_size=500)
+
+        for i in range(1200):
+            assert await service.track_favorite_event(f'user_{i % 40}', f'vehicle_{i % 7}', 'favorited', {'source': 'test'})
+        assert service.get_stats()['pending_events'] == 200
+        assert await service.flush() == 200
+
+        inserts = conn.executed('INSERT INTO favorite_events')
+        assert conn.commits == 3
+        assert [len(params) // 7 for _, params in inserts] == [500, 500, 200]
+        assert not conn.executed('COUNT(*)')
+        metric_values = [value for _, params in conn.executed('INSERT INTO favorite_performance_metrics') for value in params]
+        assert sum(metric_values[1::8]) == 1200  # total_favorites deltas, 8 values per row
+        assert service.get_stats()['events_flushed'] == 1200
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_the_batch(self):
+        conn = RecordingConnection()
+        service = make_service(conn)
+        await service.track_favorite_event('buyer', 'vehicle_1', 'favorited', {})
+        await service.track_favorite_event('buyer', 'vehicle_2', 'favorited', {})
+        conn.fail_commits = 1
+
+        assert await service.flush() == 0
+        await service.track_favorite_event('buyer', 'vehicle_3', 'favorited', {})
+
+        assert conn.rollbacks == 1
+        assert [event.vehicle_id for event in service.event_buffer] == ['vehicle_1', 'vehicle_2', 'vehicle_3']
+        assert await service.flush() == 3
+        assert service.get_stats()['flush_failures'] == 1
+
+    @pytest.mark.asyncio
+    async def test_conversion_of_unflushed_favorite(self):
+        conn = RecordingConnection()
+        service = make_service(conn)
+        await service.track_favorite_event('buyer', 'vehicle_1', 'favorited', {})
+
+        assert await service.track_favorite_conversion('buyer', 'vehicle_1', 'reservation', 500.0, notification_triggered=True)
+        assert not await service.track_favorite_conversion('buyer', 'vehicle_9', 'reservation')
+        await service.flush()
+
+        assert conn.executed('FROM conversion_tracking WHERE (user_id, vehicle_id) IN ((%s, %s)) FOR UPDATE')
+        (_, params), = conn.executed('INSERT INTO favorite_performance_metrics')
+        assert params[:3] == ['vehicle_1', 1, 1]
+        assert params[4] == 1  # notified conversions
+        assert conn.commits == 1
+
+
+class TestDashboardReads:
+    """Test that get_favorites_analytics is served from the rollups"""
+
+    @pytest.mark.asyncio
+    async def test_dashboard_reads_rollups(self):
+        def respond(sql, params):
+            if 'USING (event_type)' in sql:
+                return [
+                    {'event_type': 'favorited', 'count': 40, 'unique_users': 12},
+                    {'event_type': 'inquiry', 'count': 10, 'unique_users': 6},
+                ]
+            if 'GROUP BY day' in sql:
+                return [{'date': NOW.date(), 'total_events': 50, 'favorites': 40, 'conversions': 10}]
+            if 'LIMIT 10' in sql:
+                return [{'vehicle_id': 'vehicle_1', 'favorites': 30, 'conversions': 9, 'conversion_rate': 0.3}]
+            return []
+
+        conn = RecordingConnection(respond)
+        service = make_service(conn)
+
+        analytics = await service.get_favorites_analytics(start_date=NOW - timedelta(days=7), end_date=NOW)
+
+        assert analytics['summary']['total_favorites'] == 40
+        assert analytics['summary']['total_conversions'] == 10
+        assert analytics['summary']['overall_conversion_rate'] == 25.0
+        assert analytics['top_vehicles'][0]['conversion_rate'] == 30.0
+        assert not conn.executed('favorite_events')
+        assert all(params[-2:] == [(NOW - timedelta(days=7)).date(), NOW.date()] for _, params in conn.statements)
+
+    @pytest.mark.asyncio
+    async def test_user_analytics_read_that_users_events(self):
+        conn = RecordingConnection()
+        service = make_service(conn)
+
+        analytics = await service.get_favorites_analytics(user_id='buyer')
+
+        assert analytics['summary']['total_favorites'] == 0
+        assert len(conn.statements) == 3
+        assert all('favorite_events fe' in sql and '$' not in sql and params[-1] == 'buyer' for sql, params in conn.statements)
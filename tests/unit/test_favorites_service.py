@@ -177,6 +177,23 @@ class TestFavoritesService:
         count = await service.get_favorite_count('user123')
         assert count == 5
 
+    @pytest.mark.asyncio
+    async def test_get_all_favorites(self, service, mock_db_conn):
+        """Test reading every favorite row for the collaborative filter"""
+        rows = [{'user_id': 'user123', 'vehicle_id': 'vehicle456', 'created_at': datetime.now()}]
+        mock_db_conn.cursor.return_value.__enter__.return_value.fetchall.return_value = rows
+        service.db_conn = mock_db_conn
+
+        assert await service.get_all_favorites() == rows
+
+    @pytest.mark.asyncio
+    async def test_get_all_favorites_failure(self, service, mock_db_conn):
+        """Test that a failed scan yields no favorites"""
+        mock_db_conn.cursor.side_effect = Exception("Connection lost")
+        service.db_conn = mock_db_conn
+
+        assert await service.get_all_favorites() == []
+
     def test_favorite_item_creation(self):
         """Test FavoriteItem dataclass creation"""
         favorite = FavoriteItem(
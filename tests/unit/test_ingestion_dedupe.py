@@ -0,0 +1,271 @@
+"""
+Unit tests for content-addressed ingestion dedupe
+PDF hash -> artifact short-circuit, shared image uploads and savings counters
+"""
+
+import pytest
+import asyncio
+import io
+import sys
+import os
+import threading
+from unittest.mock import AsyncMock
+
+import fitz
+from PIL import Image
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENROUTER_API_KEY', 'test-key')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'test-key')
+
+from src.services.ingestion_dedupe import IngestionDedupeIndex
+from src.services.ingestion_pipeline import IngestionPipeline
+from src.services.pdf_extraction import perceptual_hash
+from src.services.pdf_ingestion_service import PDFIngestionService
+from src.services.storage_service import SupabaseStorageService
+
+
+def png(width: int, height: int, compress_level: int = 6) -> bytes:
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def make_pdf(label: str = 'report') -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(fitz.Rect(10, 10, 210, 160), stream=png(800, 600))
+    page.insert_text((10, 300), label)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def gemini_result(vin: str = '1HGBH41JXMN109186') -> dict:
+    return {
+        'vehicle': {'vin': vin, 'year': 2021, 'make': 'Honda', 'model': 'Civic'},
+        'condition': {'score': 4.2, 'grade': 'Clean', 'issues': {'exterior': ['HOOD: Chip']}},
+        'images': [{
+            'page_number': 1, 'description': 'Front view', 'category': 'hero',
+            'quality_score': 8, 'vehicle_angle': 'front', 'suggested_alt': 'Front'
+        }],
+        'seller': {'name': 'Test Dealer', 'type': 'dealer'}
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = IngestionDedupeIndex(str(tmp_path / "dedupe.sqlite3"))
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def service(index):
+    service = PDFIngestionService()
+    service.dedupe_index = index
+    service._analyze_with_gemini = AsyncMock(return_value=gemini_result())
+    return service
+
+
+class TestPdfDedupe:
+    """Test the PDF hash -> artifact short-circuit"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_pdf_skips_extraction_and_llm(self, service, index):
+        pdf = make_pdf()
+        first = await service.process_condition_report(pdf, 'report.pdf')
+        service.extract_images = AsyncMock(side_effect=AssertionError("re-extracted"))
+
+        second = await service.process_condition_report(pdf, 'resent.pdf')
+
+        service._analyze_with_gemini.assert_awaited_once()
+        assert second.vehicle == first.vehicle
+        assert second.condition == first.condition
+        assert second.images[0].image_bytes == first.images[0].image_bytes
+        assert second.images[0].content_hash == first.images[0].content_hash
+        assert second.processing_metadata['filename'] == 'resent.pdf'
+        assert second.processing_metadata['deduplicated'] is True
+        stats = index.get_stats()
+        assert stats['pdf_hits'] == 1 and stats['llm_calls_skipped'] == 1
+        assert stats['indexed_pdfs'] == 1 and stats['indexed_images'] == 1
+
+    @pytest.mark.asyncio
+    async def test_index_is_used_off_the_event_loop(self, service, index):
+        loop_thread = threading.get_ident()
+        threads = []
+        for name in ('get_artifact', 'put_artifact'):
+            method = getattr(index, name)
+            setattr(index, name, lambda *args, _method=method: threads.append(threading.get_ident()) or _method(*args))
+
+        pdf = make_pdf()
+        await service.process_condition_report(pdf, 'report.pdf')
+        await service.process_condition_report(pdf, 'resent.pdf')
+
+        assert len(threads) == 3  # miss, store, hit
+        assert loop_thread not in threads
+
+    @pytest.mark.asyncio
+    async def test_changed_pdf_is_processed(self, service):
+        await service.process_condition_report(make_pdf('first'), 'a.pdf')
+        await service.process_condition_report(make_pdf('second'), 'b.pdf')
+
+        assert service._analyze_with_gemini.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_index_survives_restart(self, service, index, tmp_path):
+        pdf = make_pdf()
+        await service.process_condition_report(pdf, 'report.pdf')
+        index.close()
+
+        restarted = PDFIngestionService()
+        restarted.dedupe_index = IngestionDedupeIndex(str(tmp_path / "dedupe.sqlite3"))
+        restarted._analyze_with_gemini = AsyncMock(side_effect=AssertionError("LLM called"))
+
+        artifact = await restarted.process_condition_report(pdf, 'report.pdf')
+
+        assert artifact.vehicle.vin == '1HGBH41JXMN109186'
+        restarted.dedupe_index.close()
+
+    @pytest.mark.asyncio
+    async def test_pipeline_skips_analysis_and_embedding(self, service, index):
+        embed = AsyncMock(side_effect=[
+            {'listing_id': 'listing_1'},
+            {'listing_id': 'listing_1', 'incremental': True, 'changes': {'text_embedded': False}}
+        ])
+        pipeline = IngestionPipeline(service, persist_handler=AsyncMock(), embed_handler=embed)
+        pdf = make_pdf()
+
+        first = await pipeline.process(pdf, 'report.pdf', seller_id='seller_1')
+        second = await pipeline.process(pdf, 'report.pdf', seller_id='seller_2')
+        await pipeline.stop()
+
+        service._analyze_with_gemini.assert_awaited_once()
+        # The listing update still runs so the new seller and active status are applied
+        assert embed.await_count == 2
+        assert embed.await_args[0][0].processing_metadata['seller_id'] == 'seller_2'
+        assert first['listing_id'] == second['listing_id'] == 'listing_1'
+        assert second['image_count'] == 1
+        assert pipeline.stats['deduplicated'] == 1
+        assert index.get_stats()['embeddings_skipped'] == 1
+
+
+class TestImageDedupe:
+    """Test content-addressed image uploads"""
+
+    @pytest.fixture
+    def storage(self, index):
+        storage = SupabaseStorageService()
+        storage.dedupe_index = index
+        storage.uploaded = []
+
+        async def fake_upload(file_bytes, storage_path):
+            await asyncio.sleep(0.01)
+            storage.uploaded.append((storage_path, len(file_bytes)))
+            return f"https://cdn/{storage_path}"
+
+        storage._upload_file = fake_upload
+        return storage
+
+    @pytest.mark.asyncio
+    async def test_identical_image_is_uploaded_once(self, storage, index):
+        image = png(1600, 1200)
+
+        first = await storage.upload_vehicle_image(image, 'VIN1_front.png')
+        second = await storage.upload_vehicle_image(image, 'VIN2_front.png')
+        await storage.close()
+
+        assert second == first
+        assert len(storage.uploaded) == 3
+        stats = index.get_stats()
+        assert stats['image_hits'] == 1
+        assert stats['bytes_not_uploaded'] == sum(size for _, size in storage.uploaded)
+
+    @pytest.mark.asyncio
+    async def test_image_index_is_used_off_the_event_loop(self, storage, index):
+        loop_thread = threading.get_ident()
+        threads = []
+        for name in ('find_image', 'record_image_upload'):
+            method = getattr(index, name)
+            setattr(index, name, lambda *args, _method=method: threads.append(threading.get_ident()) or _method(*args))
+
+        image = png(1600, 1200)
+        await storage.upload_vehicle_image(image, 'VIN1_front.png')
+        await storage.upload_vehicle_image(image, 'VIN2_front.png')
+        await storage.close()
+
+        assert len(threads) == 3  # miss, record, hit
+        assert loop_thread not in threads
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_upload(self, storage, index):
+        image = png(1600, 1200)
+
+        results = await asyncio.gather(*(
+            storage.upload_vehicle_image(image, f"VIN{i}_front.png") for i in range(4)
+        ))
+        await storage.close()
+
+        assert len(storage.uploaded) == 3
+        assert all(result == results[0] for result in results)
+        assert index.get_stats()['image_hits'] == 3
+
+    @pytest.mark.asyncio
+    async def test_reencoded_image_matches_perceptually(self, storage):
+        fast, small = png(1600, 1200, compress_level=1), png(1600, 1200, compress_level=9)
+        assert fast != small and perceptual_hash(fast) == perceptual_hash(small)
+
+        await storage.upload_vehicle_image(fast, 'a.png', perceptual_hash=perceptual_hash(fast))
+        await storage.upload_vehicle_image(small, 'b.png', perceptual_hash=perceptual_hash(small))
+        await storage.close()
+
+        assert len(storage.uploaded) == 3
+
+    @pytest.mark.asyncio
+    async def test_perceptual_hash_collision_is_not_reused(self, storage):
+        photo = png(1600, 1200)
+        other = Image.open(io.BytesIO(photo)).transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+        buffer = io.BytesIO()
+        other.save(buffer, format='PNG')
+        colliding_hash = perceptual_hash(photo)
+
+        await storage.upload_vehicle_image(photo, 'a.png', perceptual_hash=colliding_hash)
+        await storage.upload_vehicle_image(buffer.getvalue(), 'b.png', perceptual_hash=colliding_hash)
+        await storage.close()
+
+        # Same hash, different pixels: both photos are uploaded
+        assert len(storage.uploaded) == 6
+
+    @pytest.mark.asyncio
+    async def test_different_variant_sets_are_not_mixed(self, storage):
+        image = png(1600, 1200)
+
+        await storage.upload_vehicle_image(image, 'web_only.png', create_variants=False)
+        result = await storage.upload_vehicle_image(image, 'all.png')
+        await storage.close()
+
+        assert set(result) == {'web_url', 'detail_url', 'thumbnail_url'}
+        assert result['thumbnail_url'].endswith('all.png_thumb')
+
+    def test_stored_image_bytes_are_capped(self, tmp_path):
+        index = IngestionDedupeIndex(str(tmp_path / "capped.sqlite3"), max_image_bytes=300)
+        urls = {'web_url': 'https://cdn/web'}
+        for name in ('old', 'recent', 'new'):
+            index.record_image_upload(name, urls, 100, 100, perceptual_hash='p', image_bytes=b'x' * 100)
+        index.find_image('old', ['web_url'])  # a hit makes it recently used
+
+        index.record_image_upload('newest', urls, 100, 100, perceptual_hash='p', image_bytes=b'x' * 100)
+
+        stored = {row['content_hash'] for row in index._conn.execute(
+            "SELECT content_hash FROM image_assets WHERE image_bytes IS NOT NULL"
+        )}
+        stats = index.get_stats()
+        index.close()
+
+        assert stored == {'old', 'new', 'newest'}
+        assert stats['stored_image_bytes'] == 300
+        assert stats['image_bytes_evicted'] == 100
+        assert stats['indexed_images'] == 4  # URLs are kept for every image
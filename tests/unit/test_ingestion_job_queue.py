@@ -0,0 +1,249 @@
+"""
+Unit tests for the durable Ingestion Job Queue
+Spooling, SQLite job states, retries, per-batch concurrency and restart recovery
+"""
+
+import pytest
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENROUTER_API_KEY', 'test-key')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'test-key')
+
+from src.services.ingestion_job_queue import (
+    IngestionJobQueue,
+    IngestionJobStore,
+    SPOOL_CHUNK_SIZE
+)
+
+
+class FakeUpload:
+    """UploadFile stand-in that records read sizes"""
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.data = data
+        self.offset = 0
+        self.reads = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        chunk = self.data[self.offset:self.offset + size] if size > 0 else self.data[self.offset:]
+        self.offset += len(chunk)
+        return chunk
+
+
+def make_queue(tmp_path, process_fn, concurrency=3, max_attempts=3):
+    store = IngestionJobStore(str(tmp_path / "jobs.sqlite3"), max_attempts=max_attempts, retry_backoff_seconds=0)
+    return IngestionJobQueue(
+        str(tmp_path), store=store, concurrency=concurrency, process_fn=process_fn, poll_interval_seconds=0.05
+    )
+
+
+async def spool_batch(queue, batch_id, count, max_concurrent=3):
+    files = [
+        await queue.spool_upload(FakeUpload(f"report_{i}.pdf", b"%PDF-" + bytes([i])), batch_id, i)
+        for i in range(count)
+    ]
+    queue.enqueue_batch(batch_id, files, seller_id="seller_1", max_concurrent=max_concurrent)
+    return files
+
+
+async def wait_for_batch(store, batch_id, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        batch = store.get_batch(batch_id)
+        if batch['completed_at'] is not None:
+            return batch
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"batch {batch_id} did not finish: {store.get_batch(batch_id)}")
+
+
+class TestSpooling:
+    """Test streaming uploads to disk"""
+
+    @pytest.mark.asyncio
+    async def test_upload_is_streamed_in_chunks(self, tmp_path):
+        queue = make_queue(tmp_path, process_fn=None)
+        upload = FakeUpload("big.pdf", b"x" * (SPOOL_CHUNK_SIZE * 2 + 10))
+
+        spooled = await queue.spool_upload(upload, "batch_1", 0)
+
+        assert spooled['size'] == SPOOL_CHUNK_SIZE * 2 + 10
+        assert set(upload.reads) == {SPOOL_CHUNK_SIZE}
+        assert os.path.getsize(spooled['spool_path']) == spooled['size']
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_is_rejected_and_cleaned_up(self, tmp_path):
+        queue = make_queue(tmp_path, process_fn=None)
+
+        with pytest.raises(ValueError):
+            await queue.spool_upload(FakeUpload("huge.pdf", b"x" * (SPOOL_CHUNK_SIZE + 1)), "batch_1", 0,
+                                     max_bytes=SPOOL_CHUNK_SIZE)
+        queue.discard_spool("batch_1")
+
+        assert not os.path.exists(tmp_path / "batch_1")
+
+
+class TestWorkers:
+    """Test job consumption"""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_processed_and_status_read_from_store(self, tmp_path):
+        seen = []
+
+        async def process(pdf_bytes, filename, seller_id, on_stage):
+            on_stage("analyze")
+            seen.append((pdf_bytes, filename, seller_id))
+            return {'listing_id': f"listing_{filename}", 'vin': 'VIN1'}
+
+        queue = make_queue(tmp_path, process)
+        files = await spool_batch(queue, "batch_1", 4)
+        queue.start()
+
+        batch = await wait_for_batch(queue.store, "batch_1")
+        await queue.stop()
+
+        assert batch['status'] == 'completed'
+        assert batch['completed'] == 4 and batch['progress'] == 100
+        assert [f['listing_id'] for f in batch['files']] == [f"listing_report_{i}.pdf" for i in range(4)]
+        assert sorted(seen)[0] == (b"%PDF-\x00", "report_0.pdf", "seller_1")
+        assert not any(os.path.exists(f['spool_path']) for f in files)
+
+    @pytest.mark.asyncio
+    async def test_failed_attempts_are_retried_then_failed(self, tmp_path):
+        attempts = {}
+
+        async def process(pdf_bytes, filename, seller_id, on_stage):
+            attempts[filename] = attempts.get(filename, 0) + 1
+            if filename == "report_0.pdf" and attempts[filename] == 1:
+                raise RuntimeError("openrouter timeout")
+            if filename == "report_1.pdf":
+                raise RuntimeError("not a condition report")
+            return {'listing_id': 'listing_1', 'vin': 'VIN1'}
+
+        queue = make_queue(tmp_path, process, max_attempts=2)
+        await spool_batch(queue, "batch_1", 2)
+        queue.start()
+
+        batch = await wait_for_batch(queue.store, "batch_1")
+        await queue.stop()
+
+        assert attempts == {"report_0.pdf": 2, "report_1.pdf": 2}
+        assert batch['status'] == 'partial'
+        assert [f['status'] for f in batch['files']] == ['completed', 'failed']
+        assert batch['files'][0]['error'] is None
+        assert batch['files'][1]['error'] == "not a condition report"
+        assert queue.stats['jobs_retried'] == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_max_concurrent_is_respected(self, tmp_path):
+        in_flight = 0
+        peak = 0
+
+        async def process(pdf_bytes, filename, seller_id, on_stage):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return {'listing_id': 'listing_1', 'vin': 'VIN1'}
+
+        queue = make_queue(tmp_path, process, concurrency=6)
+        await spool_batch(queue, "batch_1", 6, max_concurrent=2)
+        queue.start()
+
+        await wait_for_batch(queue.store, "batch_1")
+        await queue.stop()
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_jobs_survive_a_restart(self, tmp_path):
+        async def never_runs(*args):
+            raise AssertionError("first worker was killed before processing")
+
+        first = make_queue(tmp_path, never_runs)
+        await spool_batch(first, "batch_1", 2)
+        # A worker claims a job and then the process dies; the restart reuses its host:pid
+        assert first.store.claim_next(f"{first.worker_id_prefix}:0") is not None
+        first.store.close()
+
+        async def process(pdf_bytes, filename, seller_id, on_stage):
+            return {'listing_id': 'listing_1', 'vin': 'VIN1'}
+
+        restarted = make_queue(tmp_path, process)
+        assert restarted.store.get_batch("batch_1")['in_progress'] == 1
+        restarted.start()
+
+        batch = await wait_for_batch(restarted.store, "batch_1")
+        await restarted.stop()
+
+        assert batch['status'] == 'completed' and batch['completed'] == 2
+
+    @pytest.mark.asyncio
+    async def test_only_stale_jobs_of_other_workers_are_requeued(self, tmp_path):
+        queue = make_queue(tmp_path, None)
+        await spool_batch(queue, "batch_1", 3)
+        store = queue.store
+        live = store.claim_next("other-host:1:0")
+        dead = store.claim_next("other-host:2:0")
+        store._conn.execute("UPDATE ingestion_jobs SET heartbeat_at = 0 WHERE job_id = ?", (dead['job_id'],))
+
+        assert store.requeue_interrupted(stale_after_seconds=60, worker_id_prefix=queue.worker_id_prefix) == 1
+
+        statuses = {job['job_id']: job['status'] for job in store._conn.execute("SELECT job_id, status FROM ingestion_jobs")}
+        assert statuses[live['job_id']] == 'processing'
+        assert statuses[dead['job_id']] == 'queued'
+        # The interrupted claim counted as an attempt
+        assert store.claim_next("other-host:3:0")['attempts'] == 2
+
+    @pytest.mark.asyncio
+    async def test_interrupted_final_attempt_fails_the_job(self, tmp_path):
+        queue = make_queue(tmp_path, None, max_attempts=1)
+        await spool_batch(queue, "batch_1", 1)
+        queue.store.claim_next(f"{queue.worker_id_prefix}:0")
+
+        assert queue.store.requeue_interrupted(60, queue.worker_id_prefix) == 0
+
+        batch = queue.store.get_batch("batch_1")
+        assert batch['status'] == 'failed' and batch['completed_at'] is not None
+
+
+class TestBatchEndpoints:
+    """Test the listings API on top of the job store"""
+
+    def test_bulk_upload_and_status(self, tmp_path):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from src.api import listings_api
+
+        queue = make_queue(tmp_path, process_fn=None)
+        app = FastAPI()
+        app.include_router(listings_api.listings_router)
+
+        with patch.object(listings_api, 'get_ingestion_job_queue', return_value=queue), \
+                patch.object(listings_api, 'workers_in_process', return_value=False):
+            client = TestClient(app)
+            response = client.post(
+                "/api/listings/upload/bulk",
+                files=[("files", (f"r{i}.pdf", b"%PDF-1.4", "application/pdf")) for i in range(3)],
+                params={"seller_id": "seller_1"}
+            )
+            batch_id = response.json()['batch_id']
+
+            status = client.get(f"/api/listings/batch/{batch_id}").json()
+            listed = client.get("/api/listings/batch", params={"status": "queued"}).json()
+            missing = client.get("/api/listings/batch/batch_missing")
+
+        assert response.status_code == 200
+        assert status['status'] == 'queued' and status['queued'] == 3
+        assert [f['filename'] for f in status['files']] == ['r0.pdf', 'r1.pdf', 'r2.pdf']
+        assert [b['batch_id'] for b in listed] == [batch_id]
+        assert missing.status_code == 404
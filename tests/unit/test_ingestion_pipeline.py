@@ -0,0 +1,221 @@
+"""
+Unit tests for the Ingestion Pipeline
+Process-pool extraction, stage overlap, backpressure and failure handling
+"""
+
+import pytest
+import asyncio
+import io
+import sys
+import os
+from unittest.mock import AsyncMock
+
+import fitz
+from PIL import Image
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENROUTER_API_KEY', 'test-key')
+os.environ.setdefault('INGESTION_DEDUPE_ENABLED', 'false')
+
+from src.services.pdf_extraction import extract_pdf_images, run_in_process_pool
+from src.services.pdf_ingestion_service import PDFIngestionService
+from src.services.ingestion_pipeline import IngestionPipeline, STAGES
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_pdf(image_sizes=((800, 600), (40, 40))) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, (width, height) in enumerate(image_sizes):
+        page.insert_image(fitz.Rect(10, 10 + i * 200, 210, 160 + i * 200), stream=png(width, height))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def gemini_result(vin: str = '1HGBH41JXMN109186') -> dict:
+    return {
+        'vehicle': {'vin': vin, 'year': 2021, 'make': 'Honda', 'model': 'Civic'},
+        'condition': {'score': 4.2, 'grade': 'Clean', 'issues': {}},
+        'images': [{
+            'page_number': 1, 'description': 'Front view', 'category': 'hero',
+            'quality_score': 8, 'vehicle_angle': 'front', 'suggested_alt': 'Front'
+        }],
+        'seller': {'name': 'Test Dealer', 'type': 'dealer'}
+    }
+
+
+def make_pipeline(analyze_delay: float = 0.0, embed_handler=None, **kwargs):
+    service = PDFIngestionService()
+
+    async def analyze(pdf_bytes):
+        await asyncio.sleep(analyze_delay)
+        return gemini_result()
+
+    service._analyze_with_gemini = AsyncMock(side_effect=analyze)
+    persist = AsyncMock()
+    embed = embed_handler or AsyncMock(return_value={'listing_id': 'listing_1'})
+    pipeline = IngestionPipeline(service, persist_handler=persist, embed_handler=embed, **kwargs)
+    return pipeline, service, persist, embed
+
+
+class TestExtraction:
+    """Test PyMuPDF extraction workers"""
+
+    def test_small_images_are_filtered(self):
+        images = extract_pdf_images(make_pdf())
+
+        assert [(i.width, i.height) for i in images] == [(800, 600)]
+        assert images[0].page_number == 1
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_inline_extraction(self):
+        pdf = make_pdf()
+
+        pooled = await run_in_process_pool(extract_pdf_images, pdf)
+
+        assert pooled == extract_pdf_images(pdf)
+
+    @pytest.mark.asyncio
+    async def test_condition_report_overlaps_extraction_and_analysis(self):
+        service = PDFIngestionService()
+        started = asyncio.Event()
+
+        async def analyze(pdf_bytes):
+            started.set()
+            return gemini_result()
+
+        async def extract(pdf_bytes):
+            # Gemini must already be running while images are extracted
+            await asyncio.wait_for(started.wait(), timeout=1)
+            return extract_pdf_images(pdf_bytes)
+
+        service._analyze_with_gemini = AsyncMock(side_effect=analyze)
+        service.extract_images = AsyncMock(side_effect=extract)
+
+        artifact = await service.process_condition_report(make_pdf(), 'report.pdf')
+
+        assert artifact.vehicle.vin == '1HGBH41JXMN109186'
+        assert len(artifact.images) == 1 and artifact.images[0].category == 'hero'
+
+
+class TestIngestionPipeline:
+    """Test the staged engine"""
+
+    @pytest.mark.asyncio
+    async def test_pdfs_flow_through_every_stage(self):
+        pipeline, service, persist, embed = make_pipeline()
+        seen = []
+
+        result = await pipeline.process(make_pdf(), 'report.pdf', seller_id='seller_1', on_stage=seen.append)
+        await pipeline.stop()
+
+        assert seen == list(STAGES)
+        assert result['listing_id'] == 'listing_1'
+        assert result['image_count'] == 1
+        assert set(result['stage_seconds']) == set(STAGES)
+        artifact = embed.call_args[0][0]
+        assert persist.call_args[0][0] is artifact
+        assert artifact.processing_metadata['seller_id'] == 'seller_1'
+
+        stats = pipeline.get_stats()
+        assert stats['completed'] == 1 and stats['in_flight'] == 0
+        assert all(stats['stages'][stage]['processed'] == 1 for stage in STAGES)
+
+    @pytest.mark.asyncio
+    async def test_llm_calls_overlap_across_pdfs(self):
+        pipeline, _, _, _ = make_pipeline(analyze_delay=0.2, llm_concurrency=8)
+        pdf = make_pdf()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(pipeline.process(pdf, f"r{i}.pdf") for i in range(8)))
+        elapsed = loop.time() - started
+        await pipeline.stop()
+
+        assert len(results) == 8
+        assert elapsed < 8 * 0.2 / 2
+        assert pipeline.stats['llm_calls'] == 8
+
+    @pytest.mark.asyncio
+    async def test_bounded_queues_apply_backpressure(self):
+        release = asyncio.Event()
+
+        async def slow_embed(artifact):
+            await release.wait()
+            return {'listing_id': artifact.vehicle.vin}
+
+        pipeline, _, _, _ = make_pipeline(
+            embed_handler=slow_embed, queue_size=1, stage_workers={stage: 1 for stage in STAGES}
+        )
+        pdf = make_pdf()
+
+        futures = [asyncio.create_task(pipeline.submit(pdf, f"r{i}.pdf")) for i in range(20)]
+        await asyncio.sleep(0.5)
+
+        # At most one job per stage worker plus one per queue slot; the rest wait in submit()
+        accepted = sum(1 for f in futures if f.done())
+        assert 0 < accepted <= 2 * len(STAGES)
+        assert all(m.max_queue_depth <= 1 for m in pipeline.metrics.values())
+
+        release.set()
+        results = await asyncio.gather(*[await f for f in futures])
+        await pipeline.stop()
+        assert len(results) == 20
+
+    @pytest.mark.asyncio
+    async def test_stage_failure_fails_only_that_job(self):
+        async def flaky_embed(artifact):
+            # Fail by file, not call order; the two jobs can reach embed in either order
+            if artifact.processing_metadata['filename'] == 'bad.pdf':
+                raise RuntimeError("embedding service down")
+            return {'listing_id': 'listing_2'}
+
+        pipeline, _, _, _ = make_pipeline(embed_handler=flaky_embed, stage_workers={'embed': 1})
+        pdf = make_pdf()
+
+        first = await pipeline.submit(pdf, 'bad.pdf')
+        second = await pipeline.submit(pdf, 'good.pdf')
+
+        with pytest.raises(RuntimeError):
+            await first
+        assert (await second)['listing_id'] == 'listing_2'
+        await pipeline.stop()
+
+        stats = pipeline.get_stats()
+        assert stats['failed'] == 1 and stats['completed'] == 1
+        assert stats['stages']['embed']['failed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_extraction_error_cancels_analysis(self):
+        pipeline, service, _, _ = make_pipeline(analyze_delay=5)
+
+        with pytest.raises(Exception):
+            await pipeline.process(b'not a pdf', 'broken.pdf')
+        await pipeline.stop()
+
+        assert pipeline.metrics['extract'].failed == 1
+        assert pipeline.metrics['analyze'].processed == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_cancels_its_analysis(self):
+        pipeline, _, _, _ = make_pipeline(analyze_delay=5)
+
+        future = await pipeline.submit(make_pdf(), 'abandoned.pdf')
+        while not pipeline.metrics['extract'].processed:
+            await asyncio.sleep(0.01)
+        job, = pipeline._jobs.values()
+        analysis = job.analysis
+
+        future.cancel()
+        await asyncio.sleep(0.05)
+
+        assert analysis.done() and analysis.cancelled()
+        assert not pipeline._jobs
+        await pipeline.stop()
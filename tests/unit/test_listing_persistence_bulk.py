@@ -0,0 +1,202 @@
+"""
+Unit tests for the bulk persist_batch path of ListingPersistenceService
+"""
+
+import pytest
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENROUTER_API_KEY', 'test-key')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'test-key')
+
+from src.services.pdf_ingestion_service import (
+    VehicleListingArtifact,
+    VehicleInfo,
+    ConditionData,
+    SellerInfo,
+    EnrichedImage
+)
+from src.services.listing_persistence_service import ListingPersistenceService
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST table query"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = None
+        self.payload = None
+        self.vins = None
+
+    def select(self, columns):
+        self.op = 'select'
+        return self
+
+    def in_(self, column, values):
+        self.vins = list(values)
+        return self
+
+    def upsert(self, payload, on_conflict=None):
+        self.op, self.payload = 'upsert', payload
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = 'insert', payload
+        return self
+
+    def execute(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        self.db.calls.append((self.table, self.op, len(rows) if self.op != 'select' else len(self.vins)))
+
+        if self.op == 'select':
+            if self.db.fail_lookups:
+                raise ConnectionError("lookup timed out")
+            return SimpleNamespace(data=[
+                {'vin': vin, 'processing_metadata': {'first_seen': 'auction_1'}}
+                for vin in self.vins if vin in self.db.listings
+            ])
+
+        if any(row.get('vin') in self.db.reject_vins or row.get('issue_category') == 'bogus' for row in rows):
+            raise ValueError("violates check constraint")
+
+        if self.table == 'vehicle_listings':
+            for row in rows:
+                self.db.listings.setdefault(row['vin'], {'id': str(uuid.uuid4())}).update(row)
+            return SimpleNamespace(data=[dict(self.db.listings[row['vin']]) for row in rows])
+
+        return SimpleNamespace(data=[dict(row, id=str(uuid.uuid4())) for row in rows])
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.listings = {}
+        self.reject_vins = set()
+        self.fail_lookups = False
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def artifact(vin: str, image_count: int = 2, issues=None) -> VehicleListingArtifact:
+    return VehicleListingArtifact(
+        vehicle=VehicleInfo(vin=vin, year=2021, make='Honda', model='Civic', odometer=15000),
+        condition=ConditionData(score=4.2, grade='Clean', issues=issues or {
+            'exterior': ['FRONT BUMPER: Scratch', 'Door ding']
+        }),
+        images=[
+            EnrichedImage(
+                description='Front', category='hero', quality_score=8, vehicle_angle='front',
+                suggested_alt='Front', visible_damage=[], image_bytes=b'jpeg', width=1200,
+                height=900, format='jpeg', page_number=1
+            )
+            for _ in range(image_count)
+        ],
+        seller=SellerInfo(name='Auction House', type='dealer'),
+        processing_metadata={'filename': f"{vin}.pdf"}
+    )
+
+
+@pytest.fixture
+def service():
+    client = FakeClient()
+    with patch('src.repositories.listing_repository.get_supabase_client_singleton', return_value=client), \
+            patch('src.repositories.image_repository.get_supabase_client_singleton', return_value=client), \
+            patch('src.services.supabase_client.get_supabase_client_singleton', return_value=client):
+        service = ListingPersistenceService()
+        service.storage_service = SimpleNamespace(upload_vehicle_image=AsyncMock(return_value={
+            'web_url': 'https://cdn/web', 'thumbnail_url': 'https://cdn/thumb', 'detail_url': 'https://cdn/detail'
+        }))
+        service._notify_inventory_changed = lambda listing_ids: None
+        yield service, client
+
+
+class TestPersistBatchBulk:
+    """Test the batched write path"""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_written_in_a_few_round_trips(self, service):
+        service, client = service
+        artifacts = [artifact(f"VIN{i:014d}") for i in range(120)]
+
+        results = await service.persist_batch(artifacts)
+
+        assert [r['vin'] for r in results] == [a.vehicle.vin for a in artifacts]
+        assert all(r['image_count'] == 2 and r['issue_count'] == 2 and r['status'] == 'active' for r in results)
+        assert [(table, op) for table, op, _ in client.calls] == [
+            ('vehicle_listings', 'select'),
+            ('vehicle_listings', 'upsert'),
+            ('vehicle_images', 'insert'),
+            ('vehicle_condition_issues', 'insert'),
+        ]
+        assert service.storage_service.upload_vehicle_image.await_count == 240
+
+    @pytest.mark.asyncio
+    async def test_reingest_merges_metadata_and_keeps_listing_ids(self, service):
+        service, client = service
+        first = await service.persist_batch([artifact('VIN00000000000001')])
+
+        second = await service.persist_batch([artifact('VIN00000000000001')])
+
+        assert second[0]['listing_id'] == first[0]['listing_id']
+        metadata = client.listings['VIN00000000000001']['processing_metadata']
+        assert metadata['first_seen'] == 'auction_1'
+        assert metadata['pdf_filename'] == 'VIN00000000000001.pdf'
+
+    @pytest.mark.asyncio
+    async def test_bad_rows_are_reported_per_row(self, service):
+        service, client = service
+        client.reject_vins.add('VIN00000000000002')
+        artifacts = [
+            artifact('VIN00000000000001'),
+            artifact('VIN00000000000002'),
+            artifact('VIN00000000000003', issues={'exterior': ['Scratch'], 'bogus': ['Unknown']}),
+        ]
+
+        results = await service.persist_batch(artifacts)
+
+        assert results[0]['issue_count'] == 2
+        assert results[1] == {'error': 'violates check constraint', 'vin': 'VIN00000000000002'}
+        # The issue outside the category CHECK constraint is dropped, its neighbours are kept
+        assert results[2]['issue_count'] == 1
+        assert results[2]['image_count'] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_existing_vin_lookup_fails_each_artifact(self, service):
+        service, client = service
+        client.fail_lookups = True
+
+        results = await service.persist_batch([artifact('VIN00000000000001'), artifact('VIN00000000000002')])
+
+        assert results == [
+            {'error': 'lookup timed out', 'vin': 'VIN00000000000001'},
+            {'error': 'lookup timed out', 'vin': 'VIN00000000000002'},
+        ]
+        assert not client.listings
+
+    @pytest.mark.asyncio
+    async def test_repeated_vin_is_written_once(self, service):
+        service, client = service
+
+        results = await service.persist_batch([artifact('VIN00000000000001'), artifact('VIN00000000000001', image_count=3)])
+
+        assert results[0] == results[1]
+        assert results[1]['image_count'] == 3
+        assert service.storage_service.upload_vehicle_image.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_sequential_mode_is_still_available(self, service):
+        service, client = service
+        service.listing_repo.upsert = AsyncMock(return_value={'id': 'listing_1', 'created_at': 'x'})
+
+        results = await service.persist_batch([artifact('VIN00000000000001')], bulk=False)
+
+        assert results[0]['listing_id'] == 'listing_1'
+        service.listing_repo.upsert.assert_awaited_once()
@@ -0,0 +1,235 @@
+"""
+Unit tests for the MinHash LSH / mini-batch k-means PreferenceIndex
+Checks LSH retrieval against a brute-force Jaccard scan, incremental updates
+and compaction, segment recovery, and the PreferenceAnalytics wiring
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from enum import Enum
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# The conversation package must load before analytics (profile_service <-> conversation_agent import order)
+import src.conversation  # noqa: F401
+from src.analytics.preference_analytics import PreferenceAnalytics
+from src.analytics.preference_index import PreferenceIndex, preference_items
+from src.services.profile_service import ProfileService, UserProfile
+
+CATEGORIES = {
+    'brand': ['toyota', 'honda', 'ford', 'bmw', 'tesla'],
+    'vehicle_type': ['suv', 'sedan', 'truck', 'minivan'],
+    'fuel': ['gas', 'ev', 'hybrid'],
+    'budget': [22000, 27500, 35000, 48000, 65000],
+    'color': ['red', 'blue', 'black', 'white', 'silver'],
+    'family_size': [1, 2, 4, 6],
+}
+
+# Planted segments: users mostly hold their archetype's confident preferences
+ARCHETYPES = [
+    {'vehicle_type': 'minivan', 'family_size': 6, 'budget': 27500},
+    {'vehicle_type': 'sedan', 'fuel': 'ev', 'brand': 'tesla'},
+    {'vehicle_type': 'truck', 'brand': 'ford', 'fuel': 'gas'},
+]
+
+
+def pref(value, confidence=0.9):
+    return {'value': value, 'strength': 0.8, 'confidence': confidence, 'source': 'explicit', 'updated_at': ''}
+
+
+def random_preferences(rng):
+    return {
+        f'pref_{category}': pref(values[rng.integers(len(values))], float(rng.uniform(0.5, 1.0)))
+        for category, values in CATEGORIES.items()
+        if rng.random() < 0.8
+    }
+
+
+def archetype_preferences(rng, archetype):
+    preferences = {f'pref_{category}': pref(value) for category, value in archetype.items()}
+    color = CATEGORIES['color'][rng.integers(5)]
+    preferences['pref_color'] = pref(color, confidence=0.6)
+    return preferences
+
+
+def jaccard(a, b):
+    a, b = set(preference_items(a)), set(preference_items(b))
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+@pytest.fixture
+def profiles():
+    rng = np.random.default_rng(11)
+    return {f'user_{i}': random_preferences(rng) for i in range(3000)}
+
+
+@pytest.fixture
+def index(profiles):
+    index = PreferenceIndex()
+    index.build(profiles.items())
+    return index
+
+
+def make_profile(user_id, preferences):
+    now = datetime.now()
+    return UserProfile(
+        user_id=user_id, created_at=now, updated_at=now, preferences=preferences,
+        preference_history=[], versions=[], current_version=1, privacy_settings={}, notification_settings={}
+    )
+
+
+class TestSimilarUsers:
+    """LSH candidate retrieval with exact Jaccard re-scoring"""
+
+    def test_scores_are_exact_jaccard(self, index, profiles):
+        query = profiles['user_0']
+
+        similar = index.similar_to(preference_items(query), limit=50, min_similarity=0.3, exclude_user_id='user_0')
+
+        assert similar
+        assert 'user_0' not in [user_id for user_id, _ in similar]
+        for user_id, score in similar:
+            assert score == pytest.approx(jaccard(query, profiles[user_id]))
+        assert [score for _, score in similar] == sorted((score for _, score in similar), reverse=True)
+
+    def test_recall_of_close_matches(self, index, profiles):
+        """Nearly every pair with Jaccard >= 0.6 shares an LSH band"""
+        expected = found = 0
+        for user_id in [f'user_{i}' for i in range(0, 3000, 60)]:
+            truth = {
+                other for other, preferences in profiles.items()
+                if other != user_id and jaccard(profiles[user_id], preferences) >= 0.6
+            }
+            retrieved = {other for other, _ in index.similar_users(user_id, limit=len(profiles), min_similarity=0.6)}
+            assert retrieved <= truth
+            expected += len(truth)
+            found += len(truth & retrieved)
+
+        assert expected > 0
+        assert found / expected >= 0.9
+
+    def test_unknown_values_count_in_the_union(self, index, profiles):
+        items = preference_items(profiles['user_3']) + [('trim', 'never-seen')]
+
+        for user_id, score in index.similar_to(items, limit=20, min_similarity=0.0):
+            stored = set(preference_items(profiles[user_id]))
+            assert score == pytest.approx(len(stored & set(items)) / len(stored | set(items)))
+
+    def test_incremental_updates_and_compaction(self, index, profiles):
+        twin = dict(profiles['user_5'])
+        assert index.update_profile('newcomer', twin)
+        assert not index.update_profile('newcomer', twin)
+        assert index.similar_users('user_5', limit=1)[0] == ('newcomer', 1.0)
+
+        # Move an existing user away, then force the delta to be merged
+        index.update_profile('user_5', {'pref_brand': pref('lada')})
+        assert ('user_5', 1.0) not in index.similar_users('newcomer')
+        rng = np.random.default_rng(3)
+        for i in range(1200):
+            index.update_profile(f'late_{i}', random_preferences(rng))
+
+        assert index.stats['compactions'] >= 1
+        assert index.get_stats()['pending_delta'] < 1200
+        assert index.similar_to([('brand', 'lada')], limit=5, min_similarity=1.0) == [('user_5', 1.0)]
+        for user_id, score in index.similar_users('newcomer', limit=20, min_similarity=0.3):
+            if user_id.startswith('user_'):
+                assert score == pytest.approx(jaccard(twin, profiles[user_id]))
+
+
+class TestSegments:
+    """Mini-batch k-means over one-hot confident preferences"""
+
+    @pytest.fixture
+    def segmented(self):
+        rng = np.random.default_rng(4)
+        profiles = [
+            (f'user_{i}', archetype_preferences(rng, ARCHETYPES[i % len(ARCHETYPES)])) for i in range(1500)
+        ]
+        profiles += [(f'quiet_{i}', {'pref_color': pref('red', confidence=0.4)}) for i in range(40)]
+        index = PreferenceIndex()
+        index.build(profiles)
+        index.fit_segments(n_segments=3, batch_size=256, iterations=50)
+        return index
+
+    def test_planted_segments_are_recovered(self, segmented):
+        segments = segmented.segments(min_size=10)
+
+        defining = sorted(sorted(segment.defining_preferences) for segment in segments if segment.segment_id >= 0)
+        expected = sorted([
+            ['budget: 30000', 'family_size: 6', 'vehicle_type: minivan'],
+            ['brand: tesla', 'fuel: ev', 'vehicle_type: sedan'],
+            ['brand: ford', 'fuel: gas', 'vehicle_type: truck'],
+        ])
+        assert defining == expected
+        assert [segment.size for segment in segments] == [500, 500, 500, 40]
+        assert segments[-1].name == 'general'
+
+    def test_numbers_are_bucketed(self, segmented):
+        assert 'budget: 30000' in segmented.segment_tokens.ids
+        assert 'budget: 27500' in segmented.tokens.ids
+        assert 'budget: 27500' not in segmented.segment_tokens.ids
+
+    def test_changed_users_join_their_nearest_segment(self, segmented):
+        rng = np.random.default_rng(9)
+        target = segmented.segment_of('user_1')
+
+        segmented.update_profile('user_0', archetype_preferences(rng, ARCHETYPES[1]))
+        segmented.update_profile('newcomer', archetype_preferences(rng, ARCHETYPES[1]))
+
+        assert segmented.segment_of('user_0') == target
+        assert segmented.segment_of('newcomer') == target
+        assert not segmented.needs_refit()
+        for i in range(400):
+            segmented.update_profile(f'late_{i}', archetype_preferences(rng, ARCHETYPES[0]))
+        assert segmented.needs_refit()
+
+
+class TestPreferenceAnalyticsWiring:
+    """Profile saves keep the index current for analytics"""
+
+    @pytest.mark.asyncio
+    async def test_similar_users_and_segments(self):
+        profile_service = ProfileService()
+        await profile_service.initialize()
+        rng = np.random.default_rng(2)
+        for i in range(60):
+            await profile_service._save_profile(
+                f'user_{i}', make_profile(f'user_{i}', archetype_preferences(rng, ARCHETYPES[i % 3]))
+            )
+        analytics = PreferenceAnalytics(profile_service, Mock(initialized=True))
+        assert await analytics.initialize()
+        assert len(analytics.preference_index) == 60
+
+        await profile_service._save_profile('buyer', make_profile('buyer', {
+            'pref_vehicle_type': pref('truck'), 'pref_brand': pref('ford'), 'pref_fuel': pref('gas')
+        }))
+        category = Enum('Category', {name.upper(): name for name in CATEGORIES})
+        evolved = {
+            category(name): SimpleNamespace(value=value) for name, value in ARCHETYPES[2].items()
+        }
+        similar = await analytics._find_similar_users('buyer', evolved)
+
+        assert similar
+        assert all(int(user_id.split('_')[1]) % 3 == 2 for user_id in similar)
+        insights = await analytics.identify_preference_segments(min_segment_size=5)
+        assert sum(insight.size for insight in insights) == 61
+        assert all(insight.defining_preferences for insight in insights)
+
+    @pytest.mark.asyncio
+    async def test_memory_only_profiles_do_not_expire(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr('src.cache.dialogue_state_store.time.monotonic', lambda: clock[0])
+        memory_only, cached = ProfileService(), ProfileService(cache_client=Mock())
+        memory_only.profiles['buyer'] = cached.profiles['buyer'] = make_profile('buyer', {})
+
+        clock[0] += 2 * 3600
+
+        assert 'buyer' in memory_only.profiles
+        assert 'buyer' not in cached.profiles
@@ -0,0 +1,112 @@
+"""
+Unit tests for the decode-once image variant pipeline in the Storage Service
+"""
+
+import pytest
+import asyncio
+import io
+import sys
+import os
+from unittest.mock import patch
+
+from PIL import Image
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'test-key')
+os.environ.setdefault('INGESTION_DEDUPE_ENABLED', 'false')
+
+from src.services.storage_service import ImageProcessor, SupabaseStorageService
+
+
+def jpeg(width: int, height: int) -> bytes:
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def size_of(image_bytes: bytes):
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        return img.format, img.size
+
+
+class TestCreateVariants:
+    """Test single-decode variant generation"""
+
+    def test_variant_sizes_match_individual_methods(self):
+        processor = ImageProcessor()
+        source = jpeg(3200, 2400)
+
+        variants = processor.create_variants(source)
+
+        assert size_of(variants['web']) == size_of(processor.create_web_optimized(source))
+        assert size_of(variants['detail']) == size_of(processor.create_detail_view(source))
+        assert size_of(variants['thumb']) == size_of(processor.create_thumbnail(source))
+        assert size_of(variants['web']) == ('JPEG', (1200, 900))
+
+    def test_source_is_decoded_once_at_reduced_scale(self):
+        processor = ImageProcessor()
+        source = jpeg(4000, 3000)
+        opened = []
+        original_open = Image.open
+
+        def tracking_open(*args, **kwargs):
+            img = original_open(*args, **kwargs)
+            opened.append(img)
+            return img
+
+        with patch('src.services.storage_service.Image.open', side_effect=tracking_open), \
+                patch.object(Image.Image, 'resize', autospec=True, side_effect=Image.Image.resize) as resize:
+            processor.create_variants(source)
+
+        assert len(opened) == 1
+        # draft() decoded at 1/2 scale (1/4 would be narrower than the 1200px web variant)
+        assert max(call.args[0].width for call in resize.call_args_list) == 2000
+
+    def test_web_only_without_variants(self):
+        variants = ImageProcessor().create_variants(jpeg(1600, 1200), create_variants=False)
+
+        assert list(variants) == ['web']
+
+    def test_transparent_png_is_flattened(self):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (1000, 500), (0, 0, 0, 0)).save(buffer, format='PNG')
+
+        variants = ImageProcessor().create_variants(buffer.getvalue())
+
+        with Image.open(io.BytesIO(variants['thumb'])) as thumb:
+            assert thumb.mode == 'RGB'
+            assert thumb.getpixel((10, 10)) == (255, 255, 255)
+
+    def test_undecodable_input_falls_back_to_original(self):
+        variants = ImageProcessor().create_variants(b'not an image')
+
+        assert variants == {'web': b'not an image', 'detail': b'not an image', 'thumb': b'not an image'}
+
+
+class TestUploadVehicleImage:
+    """Test concurrent variant uploads"""
+
+    @pytest.mark.asyncio
+    async def test_variants_upload_concurrently(self):
+        service = SupabaseStorageService()
+        in_flight = 0
+        peak = 0
+
+        async def fake_upload(file_bytes, storage_path):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return f"https://cdn/{storage_path}"
+
+        service._upload_file = fake_upload
+        result = await service.upload_vehicle_image(jpeg(1600, 1200), 'vin_front.jpg')
+        await service.close()
+
+        assert peak == 3
+        assert set(result) == {'web_url', 'detail_url', 'thumbnail_url'}
+        assert result['thumbnail_url'].endswith('vin_front.jpg_thumb')
@@ -0,0 +1,288 @@
+"""
+Unit tests for change-aware incremental re-embedding in VehicleEmbeddingService
+"""
+
+import pytest
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('OPENROUTER_API_KEY', 'test-key')
+
+from src.services.pdf_ingestion_service import (
+    VehicleListingArtifact,
+    VehicleInfo,
+    ConditionData,
+    SellerInfo,
+    EnrichedImage
+)
+from src.services.vehicle_embedding_service import VehicleEmbeddingService
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST table query over in-memory rows"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = 'select'
+        self.payload = None
+        self.filters = []
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, set(values)))
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, {value}))
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = 'insert', payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = 'update', payload
+        return self
+
+    def delete(self):
+        self.op = 'delete'
+        return self
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(row.get(column) in values for column, values in self.filters)]
+        self.db.calls.append((self.table, self.op))
+
+        if self.op == 'insert':
+            created = [dict(row, id=str(uuid.uuid4())) for row in
+                       (self.payload if isinstance(self.payload, list) else [self.payload])]
+            rows.extend(created)
+            return SimpleNamespace(data=[dict(row) for row in created])
+        if self.op == 'update':
+            for row in matched:
+                row.update(self.payload)
+        if self.op == 'delete':
+            self.db.tables[self.table] = [row for row in rows if row not in matched]
+        return SimpleNamespace(data=[dict(row) for row in matched])
+
+
+class FakeClient:
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def writes(self):
+        return [call for call in self.calls if call[1] != 'select']
+
+
+class FakeEmbeddingService:
+    """Counts embedding calls; batched text path like OttoAIEmbeddingService"""
+
+    def __init__(self):
+        self.text_batches = []
+        self.single_texts = 0
+        self.images = 0
+        self.failing = False  # failed calls return zero vectors, like OttoAIEmbeddingService
+
+    def _vector(self):
+        return [0.0 if self.failing else 0.1] * 8
+
+    async def generate_text_embeddings(self, texts):
+        self.text_batches.append(list(texts))
+        return [self._vector() for _ in texts]
+
+    async def generate_text_embedding(self, text):
+        self.single_texts += 1
+        return SimpleNamespace(embedding=self._vector(), get=lambda key: None)
+
+    async def generate_image_embedding(self, image_bytes):
+        self.images += 1
+        return SimpleNamespace(embedding=[0.0 if self.failing else 0.2] * 8)
+
+    @property
+    def calls(self):
+        return self.single_texts + sum(len(batch) for batch in self.text_batches) + self.images
+
+
+def image(name: str, category: str = 'carousel', description: str = 'Side view') -> EnrichedImage:
+    return EnrichedImage(
+        description=description, category=category, quality_score=8, vehicle_angle=name,
+        suggested_alt=name, visible_damage=[], image_bytes=name.encode(), width=1200,
+        height=900, format='jpeg', page_number=1
+    )
+
+
+def artifact(vin: str = '1HGBH41JXMN109186', odometer: int = 15000, images=None, issues=None):
+    return VehicleListingArtifact(
+        vehicle=VehicleInfo(vin=vin, year=2021, make='Honda', model='Civic', trim='EX', odometer=odometer),
+        condition=ConditionData(score=4.2, grade='Clean', issues=issues if issues is not None else {
+            'exterior': [{'type': 'scratch', 'severity': 'minor', 'description': 'Bumper scratch'}]
+        }),
+        images=images if images is not None else [
+            image('front', 'hero', 'Front view'), image('side'), image('odometer', 'detail', 'Dash')
+        ],
+        seller=SellerInfo(name='Test Dealer', type='dealer')
+    )
+
+
+@pytest.fixture
+def setup():
+    client = FakeClient()
+    embeddings = FakeEmbeddingService()
+    with patch('src.repositories.listing_repository.get_supabase_client_singleton', return_value=client), \
+            patch('src.repositories.image_repository.get_supabase_client_singleton', return_value=client), \
+            patch('src.services.vehicle_embedding_service.get_supabase_client_singleton', return_value=client), \
+            patch('src.repositories.listing_repository._listing_repository', None), \
+            patch('src.repositories.image_repository._image_repository', None):
+        yield VehicleEmbeddingService(embeddings), client, embeddings
+
+
+class TestIncrementalReembedding:
+    """Test diff-based updates of stored listings"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_reingest_costs_nothing(self, setup):
+        service, client, embeddings = setup
+        first = await service.process_vehicle_for_search(artifact())
+        calls, writes = embeddings.calls, len(client.writes())
+
+        second = await service.process_vehicle_for_search(artifact())
+
+        assert second['listing_id'] == first['listing_id']
+        assert embeddings.calls == calls
+        assert len(client.writes()) == writes
+        assert second['changes']['text_embedded'] is False
+        assert service.stats['listings_unchanged'] == 1
+        assert service.stats['image_embeddings_skipped'] == 2
+
+    @pytest.mark.asyncio
+    async def test_resend_reactivates_and_applies_new_seller_without_embedding(self, setup):
+        service, client, embeddings = setup
+        await service.process_vehicle_for_search(artifact())
+        listing = client.tables['vehicle_listings'][0]
+        listing['status'] = 'inactive'
+        calls = embeddings.calls
+        resent = artifact()
+        resent.processing_metadata['seller_id'] = 'seller_2'
+
+        result = await service.process_vehicle_for_search(resent)
+
+        assert result['changes']['listing_fields'] == ['processing_metadata', 'status']
+        assert result['changes']['text_embedded'] is False
+        assert embeddings.calls == calls
+        assert listing['status'] == 'active'
+        assert listing['processing_metadata']['seller_id'] == 'seller_2'
+        assert 'searchable_text_hash' in listing['processing_metadata']
+
+    @pytest.mark.asyncio
+    async def test_changed_fields_are_updated_in_place(self, setup):
+        service, client, embeddings = setup
+        first = await service.process_vehicle_for_search(artifact())
+        image_ids = {row['id'] for row in client.tables['vehicle_images']}
+        calls = embeddings.calls
+
+        result = await service.process_vehicle_for_search(artifact(odometer=16000))
+
+        assert result['listing_id'] == first['listing_id']
+        assert result['changes']['listing_fields'] == ['odometer']
+        assert embeddings.calls == calls + 1
+        assert embeddings.text_batches == [[service._create_searchable_text(artifact(odometer=16000))]]
+        listing = client.tables['vehicle_listings'][0]
+        assert len(client.tables['vehicle_listings']) == 1
+        assert listing['odometer'] == 16000 and '16,000 miles' in listing['description_text']
+        assert {row['id'] for row in client.tables['vehicle_images']} == image_ids
+
+    @pytest.mark.asyncio
+    async def test_failed_text_embedding_is_not_recorded(self, setup):
+        service, client, embeddings = setup
+        await service.process_vehicle_for_search(artifact())
+        listing = client.tables['vehicle_listings'][0]
+        stored_hash = listing['processing_metadata']['searchable_text_hash']
+
+        embeddings.failing = True
+        failed = await service.process_vehicle_for_search(artifact(odometer=16000))
+
+        assert failed['changes']['text_embedded'] is False
+        assert listing['odometer'] == 16000
+        assert listing['processing_metadata']['searchable_text_hash'] == stored_hash
+        assert service.stats['embedding_failures'] == 1
+
+        embeddings.failing = False
+        retried = await service.process_vehicle_for_search(artifact(odometer=16000))
+
+        assert retried['changes']['text_embedded'] is True
+        assert listing['processing_metadata']['searchable_text_hash'] != stored_hash
+
+    @pytest.mark.asyncio
+    async def test_new_listing_with_failed_embeddings_stores_no_vectors(self, setup):
+        service, client, embeddings = setup
+        embeddings.failing = True
+
+        await service.process_vehicle_for_search(artifact())
+
+        listing = client.tables['vehicle_listings'][0]
+        assert 'text_embedding' not in listing
+        assert 'searchable_text_hash' not in listing['processing_metadata']
+        assert not any(row['processing_metadata']['embedded'] for row in client.tables['vehicle_images'])
+
+    @pytest.mark.asyncio
+    async def test_only_changed_images_and_issues_are_rewritten(self, setup):
+        service, client, embeddings = setup
+        await service.process_vehicle_for_search(artifact())
+        kept = {row['vehicle_angle']: row['id'] for row in client.tables['vehicle_images']}
+        images_before = embeddings.images
+
+        result = await service.process_vehicle_for_search(artifact(
+            images=[image('front', 'hero', 'Front view'), image('rear'), image('odometer', 'detail', 'Dash reading')],
+            issues={'interior': [{'type': 'stain', 'severity': 'minor', 'description': 'Seat stain'}]}
+        ))
+
+        changes = result['changes']
+        assert (changes['images_inserted'], changes['images_deleted'], changes['images_updated']) == (1, 1, 1)
+        assert (changes['issues_inserted'], changes['issues_deleted']) == (1, 1)
+        assert embeddings.images == images_before + 1  # only the new carousel photo
+        rows = {row['vehicle_angle']: row for row in client.tables['vehicle_images']}
+        assert set(rows) == {'front', 'rear', 'odometer'}
+        assert rows['front']['id'] == kept['front'] and rows['odometer']['id'] == kept['odometer']
+        assert rows['odometer']['description'] == 'Dash reading'
+        assert [row['issue_type'] for row in client.tables['vehicle_condition_issues']] == ['stain']
+
+    @pytest.mark.asyncio
+    async def test_bulk_reingest_batches_changed_texts(self, setup):
+        service, client, embeddings = setup
+        await service.update_vehicles_batch([artifact(f"VIN{i:014d}") for i in range(3)])
+        embeddings.text_batches.clear()
+
+        results = await service.update_vehicles_batch([
+            artifact('VIN00000000000000'),
+            artifact('VIN00000000000001', odometer=20000),
+            artifact('VIN00000000000002', odometer=21000),
+            artifact('VIN00000000000003'),
+        ])
+
+        assert len(embeddings.text_batches) == 1 and len(embeddings.text_batches[0]) == 2
+        assert [r.get('incremental', False) for r in results] == [True, True, True, False]
+        assert len(client.tables['vehicle_listings']) == 4
+
+    @pytest.mark.asyncio
+    async def test_force_rebuilds_listing(self, setup):
+        service, client, embeddings = setup
+        await service.process_vehicle_for_search(artifact())
+        calls = embeddings.calls
+
+        assert await service.update_vehicle_embeddings('1HGBH41JXMN109186', artifact(), force=True)
+        assert embeddings.calls == calls + 3  # text + two main photos